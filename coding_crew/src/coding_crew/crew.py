@@ -1,81 +1,12 @@
-from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task
+"""The engineering crew: the shared crew factory on this package's ``config/``."""
+import os
 
+from crew_kit.crew import ConfigCrew
 
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), 'config')
 
-@CrewBase
-class CodingCrew():
-    """EngineeringTeam crew"""
-
-    agents_config = 'config/agents.yaml'
-    tasks_config = 'config/tasks.yaml'
-
-    @agent
-    def engineering_lead(self) -> Agent:
-        return Agent(
-            config=self.agents_config['engineering_lead'],
-            verbose=True,
-        )
-
-    @agent
-    def backend_engineer(self) -> Agent:
-        return Agent(
-            config=self.agents_config['backend_engineer'],
-            verbose=True,
-            allow_code_execution=True,
-            code_execution_mode="safe",  # Uses Docker for safety
-            max_execution_time=500, 
-            max_retry_limit=3 
-        )
-    
-    @agent
-    def frontend_engineer(self) -> Agent:
-        return Agent(
-            config=self.agents_config['frontend_engineer'],
-            verbose=True,
-        )
-    
-    @agent
-    def test_engineer(self) -> Agent:
-        return Agent(
-            config=self.agents_config['test_engineer'],
-            verbose=True,
-            allow_code_execution=True,
-            code_execution_mode="safe",  # Uses Docker for safety
-            max_execution_time=500, 
-            max_retry_limit=3 
-        )
 
-    @task
-    def design_task(self) -> Task:
-        return Task(
-            config=self.tasks_config['design_task']
-        )
-
-    @task
-    def code_task(self) -> Task:
-        return Task(
-            config=self.tasks_config['code_task'],
-        )
-
-    @task
-    def frontend_task(self) -> Task:
-        return Task(
-            config=self.tasks_config['frontend_task'],
-        )
-
-    @task
-    def test_task(self) -> Task:
-        return Task(
-            config=self.tasks_config['test_task'],
-        )   
+class CodingCrew(ConfigCrew):
+    """EngineeringTeam crew"""
 
-    @crew
-    def crew(self) -> Crew:
-        """Creates the research crew"""
-        return Crew(
-            agents=self.agents,
-            tasks=self.tasks,
-            process=Process.sequential,
-            verbose=True,
-        )
\ No newline at end of file
+    config_dir = CONFIG_DIR
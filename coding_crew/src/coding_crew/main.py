@@ -1,16 +1,9 @@
 #!/usr/bin/env python
-import sys
-import warnings
-import os
-from datetime import datetime
+"""Entry points of this crew: its inputs, run by the shared :class:`~crew_kit.cli.CrewCLI`."""
+from crew_kit.cli import CrewCLI
 
 from coding_crew.crew import CodingCrew
 
-warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
-
-# Create output directory if it doesn't exist
-os.makedirs('output', exist_ok=True)
-
 requirements = """
 A simple account management system for a trading simulation platform.
 The system should allow users to create an account, deposit funds, and withdraw funds.
@@ -27,19 +20,25 @@ module_name = "accounts.py"
 class_name = "Account"
 
 
-def run():
-    """
-    Run the research crew.
-    """
-    inputs = {
-        'requirements': requirements,
-        'module_name': module_name,
-        'class_name': class_name
-    }
+inputs = {
+    'requirements': requirements,
+    'module_name': module_name,
+    'class_name': class_name,
+    'output_dir': 'output'
+}
 
-    # Create and run the crew
-    result = CodingCrew().crew().kickoff(inputs=inputs)
+cli = CrewCLI(CodingCrew, inputs)
+run = cli.run
+resume = cli.resume
+replay = cli.replay
+batch = cli.batch
+train = cli.train
+test = cli.test
+run_with_trigger = cli.run_with_trigger
+bench_startup = cli.bench_startup
+bench_pipeline = cli.bench_pipeline
+index_knowledge = cli.index_knowledge
 
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    run()
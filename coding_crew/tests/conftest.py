@@ -0,0 +1,17 @@
+import pytest
+
+from crew_kit.fake_openai import FakeOpenAIServer
+
+
+@pytest.fixture
+def fake_openai():
+    servers = []
+
+    def start(**options):
+        server = FakeOpenAIServer(**options).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
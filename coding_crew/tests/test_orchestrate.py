@@ -0,0 +1,62 @@
+import asyncio
+import json
+import os
+
+from crew_kit.benchmark import INPUTS, bench_crew_class, default_script
+from crew_kit.cache import LLMCache
+from crew_kit.fake_openai import ResponseScript
+from crew_kit.httppool import HTTPPool
+from crew_kit.orchestrate import crew_limits, crew_name, format_report, merge_limits, orchestrate
+from crew_kit.ratelimit import RateLimiter
+
+from coding_crew.crew import CodingCrew
+
+
+def test_crews_run_concurrently_on_shared_resources(fake_openai, tmp_path, monkeypatch):
+    # crewAI treats absolute output paths as relative, so work in tmp_path
+    monkeypatch.chdir(tmp_path)
+    server = fake_openai(script=ResponseScript.from_file(default_script(CodingCrew)), latency=0.3)
+    crews = {name: bench_crew_class(CodingCrew, server, str(tmp_path / name)) for name in ("left", "right")}
+    cache = LLMCache(mode="off")
+    limiter = RateLimiter.from_config({"max_concurrency": 4})
+    pool = HTTPPool()
+
+    comparison = asyncio.run(orchestrate(
+        crews, {name: INPUTS for name in crews}, "compare", verify=False, cache=cache, limiter=limiter, http_pool=pool,
+    ))
+
+    runs = {run["crew"]: run for run in comparison["runs"]}
+    assert set(runs) == {"left", "right"} and all(run["ok"] for run in runs.values())
+    # Both crews' provider calls overlapped on the one event loop
+    assert server.max_in_flight >= 2
+    assert comparison["wall_seconds"] < sum(run["wall_seconds"] for run in runs.values())
+    # Every agent's clients came from the one pool; each crew's metrics saw only its own calls
+    assert comparison["http_clients_shared"] == 8
+    assert [runs[name]["llm_calls"] for name in ("left", "right")] == [4, 4]
+    assert comparison["limiter"] == f"openai/gpt-4o: {limiter.report()}"
+    for name in crews:
+        assert os.path.getsize(os.path.join("compare", name, INPUTS["module_name"])) > 0
+        assert len(runs[name]["tasks"]) == 4
+    with open(os.path.join("compare", "comparison.json")) as f:
+        assert json.load(f)["runs"] == comparison["runs"]
+    report = format_report(comparison)
+    assert "left" in report and "right" in report and "8 provider clients" in report
+
+
+def test_crews_on_one_model_share_one_limiter_from_all_their_limits(tmp_path):
+    other = CodingCrew.from_config_dir(CodingCrew.config_dir)
+    other.agents_config = {**other.agents_config, "reviewer": {"llm": "openai/gpt-4.1"}}
+    other.limits_config = {"requests_per_minute": 100, "max_concurrency": 8,
+                           "lanes": {"frontend_engineer": {"reserve": 0.5}, "reviewer": {"reserve": 0.1}}}
+    limits = crew_limits({"coding": CodingCrew, "other": other})
+    assert {model: len(configs) for model, configs in limits.items()} == {"openai/gpt-4o": 2, "openai/gpt-4.1": 1}
+
+    merged = merge_limits(limits["openai/gpt-4o"])
+    assert (merged["requests_per_minute"], merged["tokens_per_minute"], merged["max_concurrency"]) == (100, 30000, 4)
+    assert merged["lanes"]["frontend_engineer"] == {"reserve": 0.5}
+    assert merged["lanes"]["reviewer"] == {"reserve": 0.1} and "backend_engineer" in merged["lanes"]
+    assert merged["backoff"] == CodingCrew.limits_config["backoff"]
+
+    config = tmp_path / "coding_crew" / "config"
+    config.mkdir(parents=True)
+    assert crew_name(str(config)) == "coding_crew" and crew_name("coding_crew.crew:CodingCrew") == "coding_crew.crew"
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from crew_kit.benchmark import INPUTS, bench_crew_class, default_script, run_scenario
+from crew_kit.fake_openai import ResponseScript
+from crew_kit.startup import entry_points, run_benchmark
+from crew_kit.streaming import OutputStreams
+
+from coding_crew import crew as crew_module
+
+
+def test_crew_runs_end_to_end_against_the_fake_provider():
+    bench = run_scenario("instant", crew_module.CodingCrew, runs=1)
+    # One scripted call per task, and every task wrote its output file
+    assert bench.llm_calls == 4
+    assert bench.output_bytes > 4000
+    assert 0 <= bench.scheduling_seconds <= bench.overhead_seconds < bench.wall_seconds
+    assert bench.file_output_seconds > 0 and bench.checkpoint_seconds > 0
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_crew_streams_outputs_from_the_provider(fake_openai, tmp_path, enabled):
+    server = fake_openai(script=ResponseScript.from_file(default_script(crew_module.CodingCrew)),
+                         tokens_per_second=2000)
+    bench = bench_crew_class(crew_module.CodingCrew, server, str(tmp_path))
+    bench.output_streams = OutputStreams(enabled=enabled)
+    partial_seen = []
+    bench.output_streams.subscribe(lambda stream, added: partial_seen.append(os.path.exists(stream.path)))
+    output_dir = tmp_path / "output"
+    bench().crew().kickoff(inputs={**INPUTS, "output_dir": str(output_dir)})
+
+    assert sorted(os.listdir(output_dir)) == ["accounts.py", "accounts.py_design.md", "app.py", "test_accounts.py"]
+    assert (output_dir / "accounts.py").read_text().startswith("from dataclasses import dataclass")
+    if enabled:
+        assert partial_seen and all(partial_seen)
+        assert bench.output_streams.tasks_streamed == {"design_task", "code_task", "frontend_task", "test_task"}
+        assert bench.output_streams.syntax.errors == {}
+    else:
+        assert partial_seen == []
+
+
+def test_entry_points_start_without_crewai():
+    scripts = entry_points("coding_crew")
+    assert {"run_crew", "batch", "replay"} <= set(scripts)
+    results = run_benchmark(crew_module.CodingCrew, {name: scripts[name] for name in ("run_crew", "batch")},
+                            repeat=1, include_crew=False)
+    assert [(r.name, r.crewai_loaded) for r in results] == [("batch", False), ("run_crew", False)]
+    assert all(r.seconds > 0 and "crew_kit" in r.heaviest for r in results)
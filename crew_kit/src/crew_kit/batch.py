@@ -0,0 +1,202 @@
+"""Run the crew over many requirement specs on a bounded process pool.
+
+A spec is a JSON/YAML object with ``requirements``, ``module_name`` and
+``class_name`` (plus an optional ``name``). Specs come from a ``.jsonl`` file,
+one per line, or from a directory of ``.json``/``.yaml`` files. Every spec
+gets its own ``output/<name>/`` directory, checkpoints, run log, sandbox
+mount and code index, and all workers share the crew's rate limits through
+one file-locked bucket state.
+"""
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from crew_kit.codeintel import SymbolIndex
+from crew_kit.metrics import RunMetrics
+from crew_kit.ratelimit import RateLimiter
+from crew_kit.sandbox import SandboxPool
+
+REQUIRED_FIELDS = ("requirements", "module_name", "class_name")
+
+
+@dataclass
+class SpecResult:
+    name: str
+    output_dir: str
+    ok: bool
+    seconds: float
+    cache_hits: int = 0
+    cache_misses: int = 0
+    error: str | None = None
+
+
+def _spec_name(raw: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", raw).strip("._") or "spec"
+
+
+def load_specs(path: str) -> list[dict[str, Any]]:
+    """Read specs from a JSONL file or a directory of JSON/YAML files."""
+    source = Path(path)
+    if source.is_dir():
+        entries = []
+        for file in sorted(source.iterdir()):
+            if file.suffix == ".json":
+                entries.append((file.stem, json.loads(file.read_text())))
+            elif file.suffix in (".yaml", ".yml"):
+                entries.append((file.stem, yaml.safe_load(file.read_text())))
+    else:
+        entries = []
+        for lineno, line in enumerate(source.read_text().splitlines(), 1):
+            if line.strip():
+                spec = json.loads(line)
+                entries.append((Path(spec.get("module_name", f"spec{lineno}")).stem, spec))
+
+    specs, seen = [], set()
+    for default_name, spec in entries:
+        missing = [f for f in REQUIRED_FIELDS if not spec.get(f)]
+        if missing:
+            raise ValueError(f"Spec '{default_name}' is missing {', '.join(missing)}.")
+        name = _spec_name(spec.get("name") or default_name)
+        base, n = name, 2
+        while name in seen:
+            name, n = f"{base}-{n}", n + 1
+        seen.add(name)
+        specs.append({**spec, "name": name})
+    return specs
+
+
+def _init_worker(crew_class, limits: dict[str, Any]) -> None:
+    crew_class.llm_limiter = RateLimiter.from_config(limits)
+
+
+def _run_spec(crew_class, spec: dict[str, Any], output_root: str, verify: bool = True) -> SpecResult:
+    # crewAI is only needed in the workers, not to parse specs and fan out
+    from crew_kit.checkpoint import CheckpointStore, kickoff_with_checkpoints
+    from crew_kit.verify import MAX_REPAIRS, verify_and_repair
+
+    output_dir = os.path.join(output_root, spec["name"])
+    os.makedirs(output_dir, exist_ok=True)
+    inputs = {field: spec[field] for field in REQUIRED_FIELDS}
+    inputs["output_dir"] = output_dir
+
+    cache = crew_class.llm_cache
+    hits, misses = cache.stats.hits, cache.stats.misses
+    # Each spec keeps its own trace, and is compared with its own previous run
+    crew_class.run_metrics = RunMetrics(os.path.join(output_dir, ".metrics"))
+    # Generated code is run and searched in this spec's directory only
+    crew_class.sandbox_pool = SandboxPool.from_config(crew_class.sandbox_config, mount=output_dir)
+    crew_class.code_index = SymbolIndex(output_dir)
+    start = time.perf_counter()
+    error = None
+    # Agents are verbose; keep each spec's transcript out of the shared terminal
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = os.dup(1), os.dup(2)
+    with open(os.path.join(output_dir, "run.log"), "w") as log:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        try:
+            crew = crew_class().crew()
+            store = CheckpointStore(os.path.join(output_dir, ".checkpoints"))
+            with crew_class.run_metrics.collect():
+                kickoff_with_checkpoints(crew, inputs, store=store, incremental=True)
+                if verify:
+                    report = verify_and_repair(
+                        crew,
+                        inputs,
+                        crew_class.sandbox_pool,
+                        max_repairs=crew_class.sandbox_config.get("repair_iterations", MAX_REPAIRS),
+                        store=store,
+                    )
+                    print(report.summary())
+                    if not report.ok:
+                        raise RuntimeError(report.summary())
+        except Exception:
+            error = traceback.format_exc()
+        finally:
+            crew_class.sandbox_pool.close()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if error:
+                log.write(error)
+                log.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+    return SpecResult(
+        name=spec["name"],
+        output_dir=output_dir,
+        ok=error is None,
+        seconds=time.perf_counter() - start,
+        cache_hits=cache.stats.hits - hits,
+        cache_misses=cache.stats.misses - misses,
+        error=error.strip().splitlines()[-1] if error else None,
+    )
+
+
+def run_batch(
+    crew_class,
+    specs: list[dict[str, Any]],
+    output_root: str = "output",
+    workers: int = 4,
+    rpm: float | None = None,
+    verify: bool = True,
+) -> list[SpecResult]:
+    """Run ``crew_class`` once per spec, at most ``workers`` at a time."""
+    os.makedirs(output_root, exist_ok=True)
+    # Every worker's limiter reads and writes the same file-locked buckets
+    limits = {**crew_class.limits_config, "state_file": os.path.join(output_root, ".ratelimit.json")}
+    if rpm:
+        limits["requests_per_minute"] = rpm
+    results = []
+    # crewAI starts background threads on import, which makes fork() unsafe
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(crew_class, limits),
+    ) as pool:
+        futures = {pool.submit(_run_spec, crew_class, spec, output_root, verify): spec for spec in specs}
+        for future in as_completed(futures):
+            spec = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # worker died before it could report
+                result = SpecResult(
+                    name=spec["name"],
+                    output_dir=os.path.join(output_root, spec["name"]),
+                    ok=False,
+                    seconds=0.0,
+                    error=repr(e),
+                )
+            print(f"{'done' if result.ok else 'FAILED'}: {result.name} ({result.seconds:.1f}s)")
+            results.append(result)
+    results.sort(key=lambda r: r.name)
+    with open(os.path.join(output_root, "batch_summary.json"), "w") as f:
+        json.dump([asdict(r) for r in results], f, indent=2)
+    return results
+
+
+def format_summary(results: list[SpecResult]) -> str:
+    width = max([len(r.name) for r in results] + [4])
+    lines = [f"{'spec':<{width}}  status   seconds  cache hit/miss  error"]
+    for r in results:
+        lines.append(
+            f"{r.name:<{width}}  {'ok' if r.ok else 'FAILED':<7}  {r.seconds:7.1f}  "
+            f"{r.cache_hits:>5}/{r.cache_misses:<8}  {r.error or ''}"
+        )
+    failed = sum(not r.ok for r in results)
+    total = sum(r.seconds for r in results)
+    lines.append(f"{len(results)} specs, {failed} failed, {total:.1f}s of crew time")
+    return "\n".join(lines)
@@ -0,0 +1,253 @@
+"""End-to-end pipeline benchmark against the local fake provider.
+
+Each scenario runs the whole crew ``runs`` times, with every agent pointed at
+a :class:`~crew_kit.fake_openai.FakeOpenAIServer` that answers from the
+crew's ``config/fake_llm.yaml`` at the scenario's latency and token rate. The
+response cache is off and the rate limiter keeps its lanes and concurrency
+but not its per-minute quotas. Each run's wall time is split into
+
+- ``llm_seconds``: time inside provider calls (scripted latency plus HTTP);
+- ``overhead_seconds``: everything else, i.e. what the pipeline itself costs;
+- ``scheduling_seconds``: the part of the overhead spent between tasks;
+- ``file_output_seconds`` and ``checkpoint_seconds``: writing task output
+  files and checkpoints.
+
+A warm-up run per scenario is not counted. Medians are appended to
+``output/.metrics/pipeline.jsonl``, and overhead that grew by more than
+:data:`~crew_kit.metrics.REGRESSION_THRESHOLD` against the previous entry
+(or a ``--baseline`` file) is flagged, so CI can catch it offline.
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from crew_kit.cache import LLMCache
+from crew_kit.crew import ConfigCrew
+from crew_kit.fake_openai import FakeOpenAIServer, ResponseScript
+from crew_kit.metrics import METRICS_DIR, REGRESSION_THRESHOLD, RunMetrics
+from crew_kit.ratelimit import RateLimiter
+
+HISTORY_FILE = os.path.join(METRICS_DIR, "pipeline.jsonl")
+# Scripted replies, in each crew's config directory
+SCRIPT_FILE = "fake_llm.yaml"
+# Overhead changes smaller than this are run-to-run noise
+MIN_REGRESSION_SECONDS = 0.1
+
+# Fake provider settings per scenario
+SCENARIOS: dict[str, dict[str, Any]] = {
+    # No model time at all: the run is pure pipeline overhead
+    "instant": {"latency": 0.0, "tokens_per_second": None},
+    # A fast model, so overhead is measured around realistic call timing
+    "paced": {"latency": 0.05, "tokens_per_second": 5000},
+}
+
+INPUTS = {
+    "requirements": "A simple account management system for a trading simulation platform.",
+    "module_name": "accounts.py",
+    "class_name": "Account",
+}
+
+
+@dataclass
+class PipelineResult:
+    scenario: str
+    runs: int
+    llm_calls: int
+    wall_seconds: float
+    llm_seconds: float
+    queued_seconds: float
+    overhead_seconds: float
+    scheduling_seconds: float
+    file_output_seconds: float
+    checkpoint_seconds: float
+    output_bytes: int
+
+
+@contextlib.contextmanager
+def _timed(owner: Any, name: str, totals: dict[str, float], key: str) -> Iterator[None]:
+    """Add the time spent in ``owner.name`` to ``totals[key]`` inside the block."""
+    original = getattr(owner, name)
+
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            totals[key] += time.perf_counter() - started
+
+    setattr(owner, name, timed)
+    try:
+        yield
+    finally:
+        setattr(owner, name, original)
+
+
+def bench_crew_class(crew_class: type[ConfigCrew], server: FakeOpenAIServer, workdir: str) -> type[ConfigCrew]:
+    """A copy of ``crew_class`` that talks to ``server`` and keeps its state in ``workdir``."""
+    bench = crew_class.from_config_dir(crew_class.config_dir)
+    bench.llm_cache = LLMCache(mode="off")
+    bench.llm_limiter = RateLimiter.from_config(
+        {**bench.limits_config, "requests_per_minute": None, "tokens_per_minute": None, "state_file": None}
+    )
+    bench.run_metrics = RunMetrics(os.path.join(workdir, ".metrics"))
+    bench.llm_options = {"base_url": server.base_url, "api_key": "fake"}
+    return bench
+
+
+def _scheduling_seconds(metrics: RunMetrics, started: float) -> float:
+    """Kickoff to the first task, plus every gap between consecutive tasks."""
+    spans = sorted((s for s in metrics.spans.values() if s.finished), key=lambda s: s.started)
+    if not spans:
+        return 0.0
+    gaps = [max(0.0, later.started - earlier.finished) for earlier, later in zip(spans, spans[1:])]
+    return max(0.0, spans[0].started - started) + sum(gaps)
+
+
+def run_once(crew_class: type[ConfigCrew], workdir: str) -> dict[str, float]:
+    from crew_kit.checkpoint import CheckpointStore, kickoff_with_checkpoints
+    from crew_kit.task import AtomicOutputTask
+
+    output_dir = os.path.join(workdir, "output")
+    crew = crew_class().crew()
+    store = CheckpointStore(os.path.join(workdir, ".checkpoints"))
+    totals = {"file_output": 0.0, "checkpoint": 0.0}
+    metrics = crew_class.run_metrics
+    with (
+        _timed(AtomicOutputTask, "_save_file", totals, "file_output"),
+        _timed(CheckpointStore, "save", totals, "checkpoint"),
+        metrics.collect(),
+    ):
+        started = time.time()
+        kickoff_with_checkpoints(crew, {**INPUTS, "output_dir": output_dir}, store=store)
+        wall = time.time() - started
+    llm = sum(call.wall_seconds for call in metrics.calls)
+    return {
+        "llm_calls": len(metrics.calls),
+        "wall_seconds": wall,
+        "llm_seconds": llm,
+        "queued_seconds": sum(call.queued_seconds for call in metrics.calls),
+        "overhead_seconds": wall - llm,
+        "scheduling_seconds": _scheduling_seconds(metrics, started),
+        "file_output_seconds": totals["file_output"],
+        "checkpoint_seconds": totals["checkpoint"],
+        "output_bytes": sum(os.path.getsize(os.path.join(output_dir, f)) for f in os.listdir(output_dir)),
+    }
+
+
+def default_script(crew_class: type[ConfigCrew]) -> str:
+    return os.path.join(crew_class.config_dir, SCRIPT_FILE)
+
+
+def run_scenario(
+    name: str,
+    crew_class: type[ConfigCrew],
+    runs: int = 3,
+    script: str | None = None,
+) -> PipelineResult:
+    """Median of ``runs`` crew runs (after one warm-up) in scenario ``name``."""
+    script = script or default_script(crew_class)
+    server = FakeOpenAIServer(ResponseScript.from_file(script), **SCENARIOS[name]).start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="crew-bench-") as workdir:
+            bench = bench_crew_class(crew_class, server, workdir)
+            samples = []
+            for i in range(runs + 1):
+                run_dir = os.path.join(workdir, f"run-{i}")
+                os.makedirs(run_dir)
+                samples.append(run_once(bench, run_dir))
+    finally:
+        server.stop()
+    measured = samples[1:]
+    medians = {key: statistics.median(sample[key] for sample in measured) for key in measured[0]}
+    return PipelineResult(
+        scenario=name,
+        runs=runs,
+        llm_calls=int(medians.pop("llm_calls")),
+        output_bytes=int(medians.pop("output_bytes")),
+        **medians,
+    )
+
+
+def regressions(
+    current: list[PipelineResult], previous: dict[str, Any] | None, threshold: float = REGRESSION_THRESHOLD
+) -> list[str]:
+    """Scenarios whose pipeline overhead grew noticeably since ``previous``."""
+    if not previous:
+        return []
+    before = {r["scenario"]: r for r in previous.get("results", [])}
+    found = []
+    for result in current:
+        old = before.get(result.scenario, {}).get("overhead_seconds", 0)
+        new = result.overhead_seconds
+        if old > 0 and new > old * (1 + threshold) and new - old >= MIN_REGRESSION_SECONDS:
+            found.append(f"{result.scenario}: overhead {old:.2f}s -> {new:.2f}s (+{(new - old) / old:.0%})")
+    return found
+
+
+def load_previous(path: str) -> dict[str, Any] | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+    return json.loads(lines[-1]) if lines else None
+
+
+def record(results: list[PipelineResult], crew: str, path: str = HISTORY_FILE,
+           baseline: str | None = None) -> dict[str, Any]:
+    """Append this run of ``crew`` to ``path``; compare with ``baseline`` or the last entry."""
+    run = {
+        "run_at": time.time(),
+        "crew": crew,
+        "results": [asdict(r) for r in results],
+        "regressions": regressions(results, load_previous(baseline or path)),
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run) + "\n")
+    return run
+
+
+def format_report(run: dict[str, Any]) -> str:
+    lines = [
+        f"Pipeline benchmark ({run['crew']}, medians):",
+        f"  {'scenario':<10}  {'wall s':>6}  {'llm s':>6}  {'overhead s':>10}  {'between tasks s':>15}  "
+        f"{'files s':>7}  {'checkpoints s':>13}  {'calls':>5}  {'output KB':>9}",
+    ]
+    for r in run["results"]:
+        lines.append(
+            f"  {r['scenario']:<10}  {r['wall_seconds']:6.2f}  {r['llm_seconds']:6.2f}  "
+            f"{r['overhead_seconds']:10.2f}  {r['scheduling_seconds']:15.3f}  {r['file_output_seconds']:7.3f}  "
+            f"{r['checkpoint_seconds']:13.3f}  {r['llm_calls']:5}  {r['output_bytes'] / 1024:9.1f}"
+        )
+    for regression in run["regressions"]:
+        lines.append(f"  REGRESSION {regression}")
+    return "\n".join(lines)
+
+
+def main(crew_class: type[ConfigCrew]) -> None:
+    """
+    Benchmark the pipeline overhead of ``crew_class`` against the local fake provider.
+    """
+    parser = argparse.ArgumentParser(prog="bench_pipeline")
+    parser.add_argument("--runs", type=int, default=3, help="measured runs per scenario, after one warm-up")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="default: all")
+    parser.add_argument("--script", default=default_script(crew_class), help="scripted replies for the fake provider")
+    parser.add_argument("--history", default=HISTORY_FILE, help="JSONL file the results are appended to")
+    parser.add_argument("--baseline", help="compare with the last entry of this file instead of --history")
+    args = parser.parse_args(sys.argv[1:])
+
+    results = [run_scenario(name, crew_class, args.runs, args.script) for name in args.scenario or SCENARIOS]
+    run = record(results, crew_class.__name__, args.history, args.baseline)
+    print(format_report(run))
+    if run["regressions"]:
+        sys.exit(1)
+
@@ -0,0 +1,239 @@
+"""Content-addressed on-disk cache for LLM responses.
+
+Every LLM call an agent makes is keyed by a hash of the model name, the
+rendered prompt messages and the tools offered to the model. Tool results
+reach the model as messages, so they are part of the key too. Rerunning
+the crew with identical inputs replays the recorded responses instead of
+calling the provider again, so iterating on one task in ``tasks.yaml`` only
+pays for the tasks whose prompts actually changed.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+DEFAULT_CACHE_DIR = ".crew_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# readwrite: serve hits, record misses.  replay: serve hits, fail on misses
+# (offline test runs).  record: always call the provider and overwrite.
+# off: bypass the cache entirely.
+CACHE_MODES = ("readwrite", "replay", "record", "off")
+
+# Message fields that differ between runs of the same conversation, such as
+# the provider's random tool call ids
+VOLATILE_FIELDS = frozenset({"id", "tool_call_id", "timestamp", "created"})
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay mode when a call has no recorded response."""
+
+
+def _stable(value: Any) -> Any:
+    """``value`` without its :data:`VOLATILE_FIELDS`, at any depth."""
+    if hasattr(value, "model_dump"):
+        # Provider tool call objects
+        value = value.model_dump()
+    if isinstance(value, dict):
+        return {k: _stable(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+    if isinstance(value, (list, tuple)):
+        return [_stable(v) for v in value]
+    return value
+
+
+def cache_key(
+    model: str,
+    messages: str | list[dict[str, Any]],
+    tools: list[dict[str, Any]] | None = None,
+    response_model: type | None = None,
+) -> str:
+    """Return the content address for one LLM call.
+
+    Whole messages are hashed, tool calls, names and multi-part content
+    included, minus the fields in :data:`VOLATILE_FIELDS`.
+    """
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": _stable(messages),
+            "tools": tools or [],
+            "response_model": getattr(response_model, "__name__", None),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+    # agent role -> [hits, misses]
+    by_agent: dict[str, list[int]] = field(default_factory=dict)
+
+    def record(self, agent: str | None, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        counts = self.by_agent.setdefault(agent or "-", [0, 0])
+        counts[0 if hit else 1] += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LLMCache:
+    """SQLite-backed response store with size-bounded LRU eviction."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        mode: str = "readwrite",
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}.")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @classmethod
+    def from_env(cls) -> "LLMCache":
+        """Build a cache from ``CREW_LLM_CACHE*`` environment variables."""
+        return cls(
+            path=os.environ.get("CREW_LLM_CACHE_DIR", DEFAULT_CACHE_DIR),
+            max_bytes=int(
+                float(os.environ.get("CREW_LLM_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2**20))
+                * 2**20
+            ),
+            mode=os.environ.get("CREW_LLM_CACHE", "readwrite"),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            os.makedirs(self.path, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.path, "llm_cache.db"), timeout=30)
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def get(self, key: str) -> str | None:
+        if self.mode in ("off", "record"):
+            return None
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT response FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    "UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key)
+                )
+                conn.commit()
+                return row[0]
+            finally:
+                conn.close()
+
+    def put(self, key: str, model: str, response: str) -> None:
+        if self.mode in ("off", "replay"):
+            return
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, model, response, size, created, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, response, size, now, now),
+                )
+                self.stats.writes += 1
+                self._evict(conn)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_used ASC"
+        ).fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.stats.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def size(self) -> tuple[int, int]:
+        """Return ``(entries, bytes)`` currently stored."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                return conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+            finally:
+                conn.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM entries")
+                conn.commit()
+            finally:
+                conn.close()
+
+    def report(self) -> str:
+        """Human-readable hit/miss summary for the end of a run."""
+        s = self.stats
+        lines = [
+            f"LLM cache ({self.mode}): {s.hits} hits, {s.misses} misses "
+            f"({s.hit_rate:.0%} hit rate), {s.writes} writes, {s.evictions} evictions"
+        ]
+        if self.enabled:
+            entries, stored = self.size()
+            lines.append(
+                f"  {entries} entries, {stored / 2**20:.1f} MiB of {self.max_bytes / 2**20:.0f} MiB"
+            )
+        for agent, (hits, misses) in sorted(s.by_agent.items()):
+            lines.append(f"  {agent}: {hits} hits, {misses} misses")
+        return "\n".join(lines)
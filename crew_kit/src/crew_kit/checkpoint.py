@@ -0,0 +1,321 @@
+"""Per-task checkpoints so a crew run can resume or replay from any task.
+
+Each completed task's output is written to ``output/.checkpoints/<task>.json``
+together with a hash of the task's inputs. Resuming after a failure skips the
+leading tasks whose checkpoint still matches; replaying ``--from`` a task loads
+every earlier task from its checkpoint and reruns the rest.
+
+Checkpoints also record a dependency-aware fingerprint (:func:`task_fingerprint`):
+the task's and its agent's config text, the kickoff inputs it renders, its
+model and tools, and the hashes of the upstream outputs it reads. An
+``incremental`` run executes only the tasks whose fingerprint changed plus
+everything downstream of them, and loads the rest from disk.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any
+
+from crewai import Crew, Task
+from crewai.crews.crew_output import CrewOutput
+from crewai.tasks.task_output import TaskOutput
+from crewai.types.usage_metrics import UsageMetrics
+from crewai.utilities.constants import NOT_SPECIFIED
+
+from crew_kit.streaming import atomic_write
+
+CHECKPOINT_DIR = os.path.join("output", ".checkpoints")
+
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_\-]*)\}")
+
+
+def task_input_hash(task: Task, inputs: dict[str, Any]) -> str:
+    """Hash the task's uninterpolated config together with the kickoff inputs."""
+    payload = json.dumps(
+        {
+            "description": task._original_description or task.description,
+            "expected_output": task._original_expected_output or task.expected_output,
+            "output_file": task._original_output_file or task.output_file,
+            "inputs": inputs,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def output_hash(raw: str) -> str:
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def task_dependencies(tasks: list[Task]) -> dict[str, list[str]]:
+    """Upstream task names whose output each task reads.
+
+    A task without explicit ``context`` gets every earlier output in a
+    sequential crew, so it depends on all the tasks before it.
+    """
+    dependencies = {}
+    for index, task in enumerate(tasks):
+        if task.context is NOT_SPECIFIED:
+            dependencies[task.name] = [t.name for t in tasks[:index]]
+        else:
+            dependencies[task.name] = [t.name for t in task.context or []]
+    return dependencies
+
+
+def task_fingerprint(task: Task, inputs: dict[str, Any], upstream: dict[str, str]) -> str:
+    """Hash everything that decides ``task``'s output.
+
+    ``upstream`` maps each dependency to the hash of its output. Only the
+    inputs the task's or agent's text actually refers to are included, so
+    editing an input another task uses does not invalidate this one.
+    """
+    agent = task.agent
+    texts = {
+        "description": task._original_description or task.description,
+        "expected_output": task._original_expected_output or task.expected_output,
+        "output_file": task._original_output_file or task.output_file,
+        "role": agent and (agent._original_role or agent.role),
+        "goal": agent and (agent._original_goal or agent.goal),
+        "backstory": agent and (agent._original_backstory or agent.backstory),
+    }
+    used = {name for text in texts.values() if text for name in _PLACEHOLDER.findall(text)}
+    payload = json.dumps(
+        {
+            **texts,
+            "inputs": {name: value for name, value in inputs.items()
+                       if name in used or name.startswith("crewai_")},
+            "model": getattr(getattr(agent, "llm", None), "model", None),
+            "tools": sorted(tool.name for tool in (agent.tools if agent else None) or []),
+            "upstream": upstream,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """Directory of JSON task checkpoints, one file per task name."""
+
+    def __init__(self, path: str = CHECKPOINT_DIR):
+        self.path = path
+
+    def _file(self, task_name: str) -> str:
+        return os.path.join(self.path, f"{task_name}.json")
+
+    def load(self, task_name: str) -> dict[str, Any] | None:
+        try:
+            with open(self._file(task_name), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(
+        self,
+        task_name: str,
+        input_hash: str,
+        output: TaskOutput,
+        output_file: str | None,
+        fingerprint: str | None = None,
+    ) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        record = {
+            "task": task_name,
+            "input_hash": input_hash,
+            "fingerprint": fingerprint,
+            "output_hash": output_hash(output.raw),
+            "agent": output.agent,
+            "description": output.description,
+            "raw": output.raw,
+            "output_file": output_file,
+            "created": time.time(),
+        }
+        # Write-then-rename so a crash never leaves a truncated checkpoint
+        atomic_write(self._file(task_name), json.dumps(record, indent=2))
+
+    def is_fresh(self, task_name: str, input_hash: str) -> bool:
+        record = self.load(task_name)
+        return record is not None and record["input_hash"] == input_hash
+
+    def stale_tasks(self, tasks: list[Task], inputs: dict[str, Any]) -> dict[str, str]:
+        """Tasks an incremental run has to execute, with the reason for each."""
+        dependencies = task_dependencies(tasks)
+        records = {task.name: self.load(task.name) for task in tasks}
+        stale: dict[str, str] = {}
+        for task in tasks:
+            changed = [name for name in dependencies[task.name] if name in stale]
+            if changed:
+                stale[task.name] = f"upstream {', '.join(changed)} reruns"
+                continue
+            record = records[task.name]
+            if record is None:
+                stale[task.name] = "no checkpoint"
+                continue
+            upstream = {name: records[name].get("output_hash") for name in dependencies[task.name]}
+            if record.get("fingerprint") != task_fingerprint(task, inputs, upstream):
+                stale[task.name] = "inputs changed"
+        return stale
+
+    def clear(self) -> None:
+        if os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.path, name))
+
+
+def _restore(task: Task, record: dict[str, Any]) -> TaskOutput:
+    output = TaskOutput(
+        name=task.name,
+        description=record["description"],
+        raw=record["raw"],
+        agent=record["agent"],
+    )
+    task.output = output
+    # Put the file back if it was deleted since the checkpoint was taken
+    output_file = record.get("output_file")
+    if output_file and not os.path.exists(output_file):
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        atomic_write(output_file, record["raw"])
+    return output
+
+
+class _CheckpointedRun:
+    """One kickoff of ``crew`` with checkpoints, shared by the sync and async entry points."""
+
+    def __init__(
+        self,
+        crew: Crew,
+        inputs: dict[str, Any],
+        store: CheckpointStore | None,
+        from_task: str | None,
+        resume: bool,
+        incremental: bool,
+    ):
+        self.crew = crew
+        self.inputs = inputs
+        self.store = store or CheckpointStore()
+        self.tasks = list(crew.tasks)
+        self.names = [task.name for task in self.tasks]
+        self.hashes = {task.name: task_input_hash(task, inputs) for task in self.tasks}
+        self.dependencies = task_dependencies(self.tasks)
+        self.skipped = self._skipped(from_task, resume, incremental)
+        self.outputs: dict[str, TaskOutput] = {}
+        self.remaining = [task for task in self.tasks if task.name not in self.skipped]
+        self.pinned: list[Task] = []
+        self.task_callback = crew.task_callback
+
+    def _skipped(self, from_task: str | None, resume: bool, incremental: bool) -> set[str]:
+        if from_task is not None:
+            if from_task not in self.names:
+                raise ValueError(f"Unknown task '{from_task}', expected one of {self.names}.")
+            return set(self.names[:self.names.index(from_task)])
+        if incremental:
+            stale = self.store.stale_tasks(self.tasks, self.inputs)
+            for name, reason in stale.items():
+                print(f"Running {name}: {reason}")
+            return {name for name in self.names if name not in stale}
+        start = 0
+        while resume and start < len(self.tasks) and self.store.is_fresh(self.names[start],
+                                                                         self.hashes[self.names[start]]):
+            start += 1
+        return set(self.names[:start])
+
+    def restore(self) -> CrewOutput | None:
+        """Load the skipped tasks; the whole result if nothing is left to run."""
+        for task in self.tasks:
+            if task.name not in self.skipped:
+                continue
+            record = self.store.load(task.name)
+            if record is None:
+                raise ValueError(f"No checkpoint for '{task.name}'; run the crew first.")
+            print(f"Skipping {task.name}: loaded from checkpoint")
+            self.outputs[task.name] = _restore(task, record)
+        if self.remaining:
+            return None
+        restored = [self.outputs[name] for name in self.names]
+        return CrewOutput(raw=restored[-1].raw, tasks_output=restored, token_usage=UsageMetrics())
+
+    def save_checkpoint(self, output: TaskOutput) -> None:
+        task = next(t for t in self.remaining if t.name == output.name)
+        upstream = {name: output_hash(self.outputs[name].raw)
+                    for name in self.dependencies[task.name] if name in self.outputs}
+        self.outputs[task.name] = output
+        fingerprint = task_fingerprint(task, self.inputs, upstream)
+        self.store.save(task.name, self.hashes[task.name], output, task.output_file, fingerprint)
+        if self.task_callback:
+            self.task_callback(output)
+
+    def __enter__(self) -> "_CheckpointedRun":
+        # Sequential tasks without explicit context read every earlier output of
+        # the kickoff; pin that dependency so it survives the skipped tasks.
+        for task in self.remaining:
+            if task.context is NOT_SPECIFIED and any(name in self.skipped for name in self.dependencies[task.name]):
+                task.context = [t for t in self.tasks if t.name in self.dependencies[task.name]]
+                self.pinned.append(task)
+        self.crew.tasks = self.remaining
+        self.crew.task_callback = self.save_checkpoint
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.crew.tasks = self.tasks
+        self.crew.task_callback = self.task_callback
+        for task in self.remaining:
+            if task.callback == self.save_checkpoint:
+                task.callback = None
+        for task in self.pinned:
+            task.context = NOT_SPECIFIED
+
+    def result(self, result: CrewOutput) -> CrewOutput:
+        executed = {output.name: output for output in result.tasks_output}
+        result.tasks_output = [self.outputs.get(name) or executed[name] for name in self.names]
+        return result
+
+
+def kickoff_with_checkpoints(
+    crew: Crew,
+    inputs: dict[str, Any],
+    store: CheckpointStore | None = None,
+    from_task: str | None = None,
+    resume: bool = False,
+    incremental: bool = False,
+) -> CrewOutput:
+    """Kick off ``crew``, checkpointing every task and skipping restored ones.
+
+    With ``resume`` the leading tasks whose checkpoint matches the current
+    input hash are loaded instead of executed. With ``from_task`` every task
+    before it is loaded from its checkpoint, whatever its hash. With
+    ``incremental`` only stale tasks (see :meth:`CheckpointStore.stale_tasks`)
+    execute, wherever they are in the crew.
+    """
+    run = _CheckpointedRun(crew, inputs, store, from_task, resume, incremental)
+    restored = run.restore()
+    if restored is not None:
+        return restored
+    with run:
+        result = crew.kickoff(inputs=inputs)
+    return run.result(result)
+
+
+async def akickoff_with_checkpoints(
+    crew: Crew,
+    inputs: dict[str, Any],
+    store: CheckpointStore | None = None,
+    from_task: str | None = None,
+    resume: bool = False,
+    incremental: bool = False,
+) -> CrewOutput:
+    """:func:`kickoff_with_checkpoints` on crewAI's native async kickoff.
+
+    Agents call :meth:`~crew_kit.llm.CachedLLM.acall`, so several crews can
+    run concurrently on one event loop.
+    """
+    run = _CheckpointedRun(crew, inputs, store, from_task, resume, incremental)
+    restored = run.restore()
+    if restored is not None:
+        return restored
+    with run:
+        result = await crew.akickoff(inputs=inputs)
+    return run.result(result)
@@ -0,0 +1,199 @@
+"""Console scripts shared by the crew packages.
+
+A crew package's ``main.py`` only holds its inputs and binds the methods of
+a :class:`CrewCLI` to the names its ``[project.scripts]`` point at::
+
+    cli = CrewCLI(CodingCrew, inputs)
+    run, resume, replay, batch = cli.run, cli.resume, cli.replay, cli.batch
+"""
+import argparse
+import json
+import os
+import sys
+import warnings
+from typing import Any
+
+# crewAI loads with checkpoint and verify; both are imported where used so
+# that argument errors and --help return without it (see startup.py)
+from crew_kit.batch import format_summary, load_specs, run_batch
+
+warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
+
+
+class CrewCLI:
+    """The ``run``, ``resume``, ``replay``, ``batch``, ... entry points of one crew."""
+
+    def __init__(self, crew_class: type, inputs: dict[str, Any]):
+        self.crew_class = crew_class
+        self.inputs = inputs
+        # Create output directory if it doesn't exist
+        os.makedirs(inputs.get('output_dir', 'output'), exist_ok=True)
+
+    def _report(self) -> None:
+        crew_class = self.crew_class
+        print(crew_class.llm_cache.report())
+        print(crew_class.llm_limiter.report())
+        print(crew_class.run_metrics.report())
+        print(crew_class.sandbox_pool.report())
+        if crew_class.output_streams.enabled:
+            print(crew_class.output_streams.report())
+
+    def _verify(self, crew: Any) -> None:
+        from crew_kit.checkpoint import CheckpointStore
+        from crew_kit.verify import MAX_REPAIRS, verify_and_repair
+
+        # Compile and test the generated code, regenerating only the failing task
+        report = verify_and_repair(
+            crew,
+            self.inputs,
+            self.crew_class.sandbox_pool,
+            max_repairs=self.crew_class.sandbox_config.get('repair_iterations', MAX_REPAIRS),
+            store=CheckpointStore(),
+        )
+        print(report.summary())
+
+    def run(self) -> None:
+        """
+        Run the crew.
+
+        Only tasks whose fingerprint changed since the last run, and the tasks
+        downstream of them, execute; ``--full`` reruns every task.
+        """
+        parser = argparse.ArgumentParser(prog="run_crew")
+        parser.add_argument("--full", action="store_true", help="rerun every task, even unchanged ones")
+        args = parser.parse_args(sys.argv[1:])
+        from crew_kit.checkpoint import kickoff_with_checkpoints
+
+        # Create and run the crew, checkpointing each task under output/
+        crew = self.crew_class().crew()
+        with self.crew_class.run_metrics.collect():
+            kickoff_with_checkpoints(crew, self.inputs, incremental=not args.full)
+            self._verify(crew)
+        self._report()
+
+    def resume(self) -> None:
+        """
+        Resume after a failure, skipping tasks whose checkpoint matches the current inputs.
+        """
+        from crew_kit.checkpoint import kickoff_with_checkpoints
+
+        crew = self.crew_class().crew()
+        with self.crew_class.run_metrics.collect():
+            kickoff_with_checkpoints(crew, self.inputs, resume=True)
+            self._verify(crew)
+        self._report()
+
+    def replay(self) -> None:
+        """
+        Replay the crew execution from a specific task.
+
+        ``replay --from code_task`` loads every earlier task from its checkpoint
+        and reruns the rest; a bare task id falls back to crewAI's own replay.
+        """
+        parser = argparse.ArgumentParser(prog="replay")
+        parser.add_argument("--from", dest="from_task", help="task name to replay from, e.g. code_task")
+        parser.add_argument("task_id", nargs="?", help="crewAI task id from `crewai log-tasks-outputs`")
+        args = parser.parse_args(sys.argv[1:])
+        if not args.from_task and not args.task_id:
+            parser.error("either --from <task> or a task id is required")
+        from crew_kit.checkpoint import kickoff_with_checkpoints
+
+        try:
+            crew = self.crew_class().crew()
+            with self.crew_class.run_metrics.collect():
+                if args.from_task:
+                    kickoff_with_checkpoints(crew, self.inputs, from_task=args.from_task)
+                else:
+                    crew.replay(task_id=args.task_id)
+        except Exception as e:
+            raise Exception(f"An error occurred while replaying the crew: {e}")
+        self._report()
+
+    def batch(self) -> None:
+        """
+        Run the crew for every spec in a JSONL file or directory, in parallel.
+        """
+        parser = argparse.ArgumentParser(prog="batch")
+        parser.add_argument("specs", help="JSONL file, or directory of .json/.yaml spec files")
+        parser.add_argument("--workers", type=int, default=4, help="crews to run at once")
+        parser.add_argument("--rpm", type=float, help="LLM requests per minute shared by all workers")
+        parser.add_argument("--output", default="output", help="root for the per-spec output directories")
+        parser.add_argument("--no-verify", dest="verify", action="store_false", help="skip compiling and testing")
+        args = parser.parse_args(sys.argv[1:])
+
+        results = run_batch(
+            self.crew_class,
+            load_specs(args.specs),
+            output_root=args.output,
+            workers=args.workers,
+            rpm=args.rpm,
+            verify=args.verify,
+        )
+        print(format_summary(results))
+        if not all(r.ok for r in results):
+            sys.exit(1)
+
+    def train(self) -> None:
+        """
+        Train the crew for a given number of iterations.
+        """
+        try:
+            self.crew_class().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=self.inputs)
+        except Exception as e:
+            raise Exception(f"An error occurred while training the crew: {e}")
+
+    def test(self) -> None:
+        """
+        Test the crew execution and returns the results.
+        """
+        try:
+            self.crew_class().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=self.inputs)
+        except Exception as e:
+            raise Exception(f"An error occurred while testing the crew: {e}")
+
+    def run_with_trigger(self) -> Any:
+        """
+        Run the crew with a JSON trigger payload passed as the first argument.
+        """
+        if len(sys.argv) < 2:
+            raise Exception("No trigger payload provided. Please provide JSON payload as argument.")
+
+        try:
+            trigger_payload = json.loads(sys.argv[1])
+        except json.JSONDecodeError:
+            raise Exception("Invalid JSON payload provided as argument")
+        from crew_kit.checkpoint import kickoff_with_checkpoints
+
+        try:
+            with self.crew_class.run_metrics.collect():
+                result = kickoff_with_checkpoints(
+                    self.crew_class().crew(), {**self.inputs, 'crewai_trigger_payload': trigger_payload}
+                )
+        except Exception as e:
+            raise Exception(f"An error occurred while running the crew with trigger: {e}")
+        self._report()
+        return result
+
+    def bench_startup(self) -> None:
+        """
+        Benchmark the import time of this crew's entry points.
+        """
+        from crew_kit import startup
+
+        startup.main(self.crew_class)
+
+    def bench_pipeline(self) -> None:
+        """
+        Benchmark this crew's pipeline overhead against the local fake provider.
+        """
+        from crew_kit import benchmark
+
+        benchmark.main(self.crew_class)
+
+    def index_knowledge(self) -> None:
+        """
+        Update this crew's knowledge index and optionally search it.
+        """
+        from crew_kit import knowledge
+
+        knowledge.main(os.path.join(self.crew_class.config_dir, 'knowledge.yaml'))
@@ -0,0 +1,188 @@
+"""In-process symbol index over the generated modules in ``output/``.
+
+The code-intelligence tools (``code_search``, ``read_code``) answer from a
+:class:`SymbolIndex` instead of handing an agent whole files: every module
+is parsed once with :mod:`ast` into its classes, functions and methods with
+their signatures and line ranges, and re-parsed only when its mtime or size
+changes. An agent can find ``Account.buy``, read just that method, and look
+again after the file was rewritten without paying for the rest of the
+module in its context.
+"""
+import ast
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+# Longest excerpt ``read`` returns, so a careless request cannot pull a whole file
+MAX_READ_LINES = 200
+MAX_GREP_MATCHES = 50
+
+
+@dataclass(frozen=True)
+class Symbol:
+    qualname: str
+    kind: str
+    path: str
+    line: int
+    end_line: int
+    signature: str
+    doc: str = ""
+
+    def format(self) -> str:
+        doc = f"  # {self.doc}" if self.doc else ""
+        return f"{self.path}:{self.line}-{self.end_line}  {self.signature}{doc}"
+
+
+@dataclass
+class _Module:
+    mtime_ns: int
+    size: int
+    lines: list[str]
+    symbols: list[Symbol]
+    error: str | None = None
+
+
+@dataclass
+class IndexStats:
+    parses: int = 0
+    hits: int = 0
+    # path -> times parsed
+    modules: dict[str, int] = field(default_factory=dict)
+
+
+def _signature(node: ast.AST) -> str:
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(ast.unparse(b) for b in [*node.bases, *node.keywords])
+        return f"class {node.name}({bases})" if bases else f"class {node.name}"
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def _symbols(tree: ast.Module, path: str) -> list[Symbol]:
+    found = []
+
+    def visit(body: list[ast.stmt], scope: str, in_class: bool) -> None:
+        for node in body:
+            if not isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            qualname = f"{scope}.{node.name}" if scope else node.name
+            if isinstance(node, ast.ClassDef):
+                kind = "class"
+            else:
+                kind = "method" if in_class else "function"
+            # Decorators belong to the definition they wrap
+            start = min([node.lineno, *(d.lineno for d in node.decorator_list)])
+            doc = (ast.get_docstring(node) or "").strip().split("\n")[0]
+            found.append(Symbol(qualname, kind, path, start, node.end_lineno or node.lineno, _signature(node), doc))
+            visit(node.body, qualname, isinstance(node, ast.ClassDef))
+
+    visit(tree.body, "", False)
+    return found
+
+
+class SymbolIndex:
+    """Classes, functions and methods of the ``.py`` files under ``root``."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.stats = IndexStats()
+        self._modules: dict[str, _Module] = {}
+        self._lock = threading.Lock()
+
+    def paths(self) -> list[str]:
+        """Python files under ``root``, relative to it."""
+        found = []
+        for directory, dirs, names in os.walk(self.root):
+            dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__pycache__")
+            for name in sorted(names):
+                if name.endswith(".py"):
+                    found.append(os.path.relpath(os.path.join(directory, name), self.root))
+        return found
+
+    def _resolve(self, path: str) -> str:
+        full = os.path.abspath(os.path.join(self.root, path))
+        if os.path.relpath(full, os.path.abspath(self.root)).startswith(os.pardir):
+            raise ValueError(f"{path} is outside {self.root}.")
+        return full
+
+    def module(self, path: str) -> _Module:
+        """The parsed module at ``path``, re-parsed only if the file changed."""
+        path = os.path.normpath(path)
+        full = self._resolve(path)
+        stat = os.stat(full)
+        with self._lock:
+            cached = self._modules.get(path)
+            if cached is not None and (cached.mtime_ns, cached.size) == (stat.st_mtime_ns, stat.st_size):
+                self.stats.hits += 1
+                return cached
+        with open(full, encoding="utf-8", errors="replace") as f:
+            source = f.read()
+        try:
+            module = _Module(stat.st_mtime_ns, stat.st_size, source.splitlines(),
+                             _symbols(ast.parse(source, path), path))
+        except (SyntaxError, ValueError) as e:
+            # Still searchable and readable by line, just without symbols
+            module = _Module(stat.st_mtime_ns, stat.st_size, source.splitlines(), [], f"{type(e).__name__}: {e}")
+        with self._lock:
+            self._modules[path] = module
+            self.stats.parses += 1
+            self.stats.modules[path] = self.stats.modules.get(path, 0) + 1
+        return module
+
+    def symbols(self, path: str | None = None) -> list[Symbol]:
+        return [s for p in ([path] if path else self.paths()) for s in self.module(p).symbols]
+
+    def find(self, query: str) -> list[Symbol]:
+        """Symbols whose qualified name contains ``query``; exact names first."""
+        needle = query.strip().lower()
+        matches = [s for s in self.symbols() if needle in s.qualname.lower()]
+        return sorted(matches, key=lambda s: (
+            s.qualname.lower() != needle and s.qualname.lower().rsplit(".", 1)[-1] != needle, s.path, s.line
+        ))
+
+    def grep(self, pattern: str, limit: int = MAX_GREP_MATCHES) -> list[tuple[str, int, str]]:
+        """Lines matching ``pattern`` (a regular expression, else plain text)."""
+        try:
+            regex = re.compile(pattern, re.IGNORECASE)
+        except re.error:
+            regex = re.compile(re.escape(pattern), re.IGNORECASE)
+        matches = []
+        for path in self.paths():
+            for number, line in enumerate(self.module(path).lines, 1):
+                if regex.search(line):
+                    matches.append((path, number, line.rstrip()))
+                    if len(matches) >= limit:
+                        return matches
+        return matches
+
+    def outline(self, path: str) -> str:
+        module = self.module(path)
+        lines = [f"{path}: {len(module.lines)} lines"]
+        if module.error:
+            lines.append(f"  does not parse: {module.error}")
+        for symbol in module.symbols:
+            indent = "  " * (symbol.qualname.count(".") + 1)
+            doc = f"  # {symbol.doc}" if symbol.doc else ""
+            lines.append(f"{indent}{symbol.line}-{symbol.end_line}: {symbol.signature}{doc}")
+        return "\n".join(lines)
+
+    def read(self, path: str, symbol: str | None = None, start: int | None = None, end: int | None = None) -> str:
+        """Numbered source of ``symbol`` in ``path``, or of lines ``start``-``end``."""
+        module = self.module(path)
+        if symbol:
+            found = [s for s in module.symbols if s.qualname == symbol]
+            if not found:
+                found = [s for s in module.symbols if s.qualname.rsplit(".", 1)[-1] == symbol]
+            if not found:
+                raise KeyError(f"No symbol {symbol} in {path}.")
+            start, end = found[0].line, found[0].end_line
+        start = max(1, start or 1)
+        wanted = min(len(module.lines), end or len(module.lines))
+        end = min(wanted, start + MAX_READ_LINES - 1)
+        width = len(str(end))
+        excerpt = [f"{number:>{width}}  {module.lines[number - 1]}" for number in range(start, end + 1)]
+        if end < wanted:
+            excerpt.append(f"... {wanted - end} more lines; read from line {end + 1} to see them")
+        return "\n".join(excerpt)
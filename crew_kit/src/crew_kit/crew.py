@@ -0,0 +1,200 @@
+"""Crew factory: builds a sequential crew from a directory of YAML config.
+
+``agents.yaml`` and ``tasks.yaml`` describe the whole crew: an agent's
+``tools`` are names from :data:`TOOLS`, a task's ``agent`` and ``context``
+name other entries, and agents and tasks run in file order. The optional
+``limits.yaml``, ``prompts.yaml``, ``sandbox.yaml`` and ``knowledge.yaml``
+configure the shared rate limiter, prompt assembler, sandbox pool and
+knowledge index. A crew package subclasses :class:`ConfigCrew` and points
+``config_dir`` at its own ``config/``; every subclass that sets
+``config_dir`` gets its own shared state, built from that directory.
+:meth:`ConfigCrew.from_config_dir` returns such a class for another config
+directory.
+
+crewAI is imported when a crew is built, not when this module is, so the
+CLI entry points start without it.
+"""
+import os
+from collections.abc import Callable
+from typing import Any
+
+import yaml
+
+from crew_kit.cache import LLMCache
+from crew_kit.codeintel import SymbolIndex
+from crew_kit.httppool import HTTPPool
+from crew_kit.knowledge import KnowledgeIndex
+from crew_kit.metrics import RunMetrics
+from crew_kit.prompt import PromptAssembler
+from crew_kit.ratelimit import RateLimiter
+from crew_kit.sandbox import SandboxPool
+from crew_kit.streaming import OutputStreams
+
+
+def load_config(config_dir: str, name: str) -> dict[str, Any]:
+    """``<config_dir>/<name>``, or ``{}`` for a missing optional file."""
+    path = os.path.join(config_dir, name)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def _sandbox_code(crew: 'ConfigCrew') -> Any:
+    # Warm local sandbox instead of crewAI's Docker code execution
+    from crew_kit.tools.code_execution import SandboxCodeTool
+
+    return SandboxCodeTool(pool=crew.sandbox_pool)
+
+
+def _knowledge_search(crew: 'ConfigCrew') -> Any:
+    # Top-k chunks from the local index instead of whole knowledge files
+    from crew_kit.tools.knowledge_search import KnowledgeSearchTool
+
+    return KnowledgeSearchTool(index=crew.knowledge_index)
+
+
+def _code_search(crew: 'ConfigCrew') -> Any:
+    from crew_kit.tools.code_intelligence import CodeSearchTool
+
+    return CodeSearchTool(index=crew.code_index)
+
+
+def _read_code(crew: 'ConfigCrew') -> Any:
+    from crew_kit.tools.code_intelligence import ReadCodeTool
+
+    return ReadCodeTool(index=crew.code_index)
+
+
+def _run_tests(crew: 'ConfigCrew') -> Any:
+    from crew_kit.tools.code_intelligence import RunTestsTool
+
+    return RunTestsTool(pool=crew.sandbox_pool)
+
+
+# Tool names usable in an agent's ``tools`` list
+TOOLS: dict[str, Callable[['ConfigCrew'], Any]] = {
+    'code_interpreter': _sandbox_code,
+    'knowledge_search': _knowledge_search,
+    'code_search': _code_search,
+    'read_code': _read_code,
+    'run_tests': _run_tests,
+}
+
+
+class ConfigCrew:
+    """A sequential crew built from the YAML files in ``config_dir``."""
+
+    config_dir: str
+    agents_config: dict[str, Any]
+    tasks_config: dict[str, Any]
+    limits_config: dict[str, Any]
+    prompt_config: dict[str, Any]
+    sandbox_config: dict[str, Any]
+    knowledge_config: dict[str, Any]
+
+    # Shared by every agent so one report covers the whole run
+    llm_cache: LLMCache
+    # One provider quota for all agents; each agent draws from its own lane
+    llm_limiter: RateLimiter
+    # Per-task/per-agent latency and token trace under output/.metrics/
+    run_metrics: RunMetrics
+    # Sends shared inputs once per call and compacts upstream context
+    prompt_assembler: PromptAssembler
+    # Warm subprocess sandboxes, started on first use, shared by the engineers
+    sandbox_pool: SandboxPool
+    # Symbols of the generated modules in the sandbox mount, re-parsed when a file changes
+    code_index: SymbolIndex
+    # Chunked, embedded knowledge/ files, updated incrementally on first search
+    knowledge_index: KnowledgeIndex
+    # Task outputs written to <output_file>.partial as they stream (CREW_STREAM_OUTPUTS)
+    output_streams: OutputStreams
+    # Extra provider arguments for every agent's LLM, e.g. a local base_url
+    llm_options: dict[str, Any] = {}
+    # Provider connections shared with other crews in the same process (orchestrate.py)
+    http_pool: HTTPPool | None = None
+    # Provider quotas shared with other crews in the same process, by model (orchestrate.py)
+    model_limiters: dict[str, RateLimiter] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        if 'config_dir' in vars(cls):
+            cls._configure(cls.config_dir)
+
+    @classmethod
+    def _configure(cls, config_dir: str) -> None:
+        cls.agents_config = load_config(config_dir, 'agents.yaml')
+        cls.tasks_config = load_config(config_dir, 'tasks.yaml')
+        cls.limits_config = load_config(config_dir, 'limits.yaml')
+        cls.prompt_config = load_config(config_dir, 'prompts.yaml')
+        cls.sandbox_config = load_config(config_dir, 'sandbox.yaml')
+        cls.knowledge_config = load_config(config_dir, 'knowledge.yaml')
+        cls.llm_cache = LLMCache.from_env()
+        cls.llm_limiter = RateLimiter.from_config(cls.limits_config)
+        cls.run_metrics = RunMetrics()
+        cls.prompt_assembler = PromptAssembler.from_config(cls.prompt_config)
+        cls.sandbox_pool = SandboxPool.from_config(cls.sandbox_config)
+        cls.code_index = SymbolIndex(cls.sandbox_pool.mount)
+        cls.knowledge_index = KnowledgeIndex.from_config(cls.knowledge_config)
+        cls.output_streams = OutputStreams.from_env()
+
+    @classmethod
+    def from_config_dir(cls, config_dir: str) -> type['ConfigCrew']:
+        """A crew class built from ``config_dir`` instead of this class's config."""
+        return type(cls.__name__, (cls,), {'config_dir': config_dir, '__module__': cls.__module__})
+
+    def _llm(self, name: str) -> Any:
+        from crew_kit.llm import CachedLLM
+
+        model = self.agents_config[name]['llm']
+        return CachedLLM(
+            model,
+            cache=self.llm_cache,
+            limiter=self.model_limiters.get(model, self.llm_limiter),
+            lane=name,
+            metrics=self.run_metrics,
+            assembler=self.prompt_assembler,
+            streams=self.output_streams,
+            http_pool=self.http_pool,
+            **self.llm_options,
+        )
+
+    def _agent(self, name: str) -> Any:
+        from crewai import Agent
+
+        config = dict(self.agents_config[name])
+        unknown = [tool for tool in config.get('tools', []) if tool not in TOOLS]
+        if unknown:
+            raise ValueError(f"Agent {name} uses unknown tools {unknown}; known tools are {sorted(TOOLS)}.")
+        tools = [TOOLS[tool](self) for tool in config.pop('tools', [])]
+        return Agent(config=config, llm=self._llm(name), tools=tools, verbose=True)
+
+    def _task(self, name: str, agents: dict[str, Any], tasks: dict[str, Any]) -> Any:
+        from crew_kit.task import AtomicOutputTask
+
+        config = dict(self.tasks_config[name])
+        agent, context = config.pop('agent'), config.pop('context', None)
+        if agent not in agents:
+            raise ValueError(f"Task {name} is assigned to unknown agent {agent}.")
+        options = {}
+        if context is not None:
+            missing = [upstream for upstream in context if upstream not in tasks]
+            if missing:
+                raise ValueError(f"Task {name} needs context from {missing}, which must be defined before it.")
+            options['context'] = [tasks[upstream] for upstream in context]
+        return AtomicOutputTask(name=name, config=config, agent=agents[agent], **options)
+
+    def crew(self) -> Any:
+        """Creates the crew from the agents and tasks in ``config_dir``"""
+        from crewai import Crew, Process
+
+        agents = {name: self._agent(name) for name in self.agents_config}
+        tasks: dict[str, Any] = {}
+        for name in self.tasks_config:
+            tasks[name] = self._task(name, agents, tasks)
+        return Crew(
+            agents=list(agents.values()),
+            tasks=list(tasks.values()),
+            process=Process.sequential,
+            verbose=True,
+        )
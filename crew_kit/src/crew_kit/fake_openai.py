@@ -0,0 +1,311 @@
+"""Local OpenAI-compatible chat completions server for offline runs.
+
+:class:`FakeOpenAIServer` answers ``POST /v1/chat/completions`` (plain and
+``stream: true``) without a provider, so the crew can be run, tested and
+benchmarked offline. Replies come from
+
+- a :class:`Recording` of real responses, replayed by prompt hash and then
+  in recorded order; with ``upstream`` set, misses are forwarded to the real
+  provider and added to the recording;
+- otherwise a :class:`ResponseScript`: the first rule whose ``match`` occurs
+  in the prompt, e.g. an agent's role, or the default reply.
+
+``latency`` delays the first token and ``tokens_per_second`` paces the rest,
+like a real model; ``quota`` answers 429 to requests beyond ``quota`` per
+``window`` seconds. Completion tokens are whitespace-separated words, prompt
+tokens about four characters each.
+
+Point a crew at it with ``OPENAI_BASE_URL=<base_url>`` and any API key::
+
+    fake_openai --script src/coding_crew/config/fake_llm.yaml --latency 0.2
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Iterator
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import yaml
+
+DEFAULT_REPLY = "Final Answer: ok"
+
+
+def prompt_key(model: str, messages: list[dict[str, Any]]) -> str:
+    payload = json.dumps({"model": model, "messages": messages}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def prompt_text(messages: list[dict[str, Any]]) -> str:
+    return "\n".join(str(m.get("content") or "") for m in messages)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split ``text`` into word tokens that join back into ``text``."""
+    return re.findall(r"\s*\S+\s*", text) or [text]
+
+
+@dataclass
+class Rule:
+    reply: str
+    match: str | None = None
+
+
+class ResponseScript:
+    """Replies chosen by the first rule whose ``match`` occurs in the prompt."""
+
+    def __init__(self, rules: list[Rule] | None = None, default: str = DEFAULT_REPLY):
+        self.rules = rules or []
+        self.default = default
+
+    @classmethod
+    def from_file(cls, path: str) -> "ResponseScript":
+        """Load ``{rules: [{match, reply}], default}`` from YAML or JSON."""
+        with open(path, encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        return cls([Rule(**rule) for rule in config.get("rules", [])], config.get("default", DEFAULT_REPLY))
+
+    def reply(self, model: str, messages: list[dict[str, Any]]) -> str:
+        text = prompt_text(messages)
+        for rule in self.rules:
+            if rule.match is None or rule.match in text:
+                return rule.reply
+        return self.default
+
+
+class Recording:
+    """Provider replies in a JSONL file, one ``{key, model, reply}`` per call."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: list[dict[str, Any]] = []
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.entries = [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            pass
+        self._unused = list(range(len(self.entries)))
+
+    def reply(self, model: str, messages: list[dict[str, Any]]) -> str | None:
+        """The reply recorded for this prompt, else the next unused one."""
+        key = prompt_key(model, messages)
+        with self.lock:
+            if not self._unused:
+                return None
+            index = next((i for i in self._unused if self.entries[i]["key"] == key), self._unused[0])
+            self._unused.remove(index)
+            return self.entries[index]["reply"]
+
+    def add(self, model: str, messages: list[dict[str, Any]], reply: str) -> None:
+        entry = {"key": prompt_key(model, messages), "model": model, "reply": reply}
+        with self.lock:
+            self.entries.append(entry)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Local OpenAI-compatible ``/chat/completions`` endpoint."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        script: ResponseScript | None = None,
+        recording: Recording | None = None,
+        upstream: str | None = None,
+        latency: float = 0.0,
+        tokens_per_second: float | None = None,
+        quota: int | None = None,
+        window: float = 1.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        super().__init__((host, port), _FakeOpenAIHandler)
+        self.script = script or ResponseScript()
+        self.recording = recording
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.quota = quota
+        self.window = window
+        self.lock = threading.Lock()
+        self.accepted: list[float] = []
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        """Serve on a daemon thread; returns the server."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def _admit(self) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            recent = [t for t in self.accepted if now - t < self.window]
+            if self.quota is not None and len(recent) >= self.quota:
+                self.rejected += 1
+                return False
+            self.accepted.append(now)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return True
+
+    def _forward(self, request: dict[str, Any], authorization: str | None) -> str:
+        body = json.dumps({**request, "stream": False}).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if authorization:
+            headers["Authorization"] = authorization
+        upstream = urllib.request.Request(f"{self.upstream}/chat/completions", body, headers)
+        with urllib.request.urlopen(upstream, timeout=600) as response:
+            return json.load(response)["choices"][0]["message"]["content"] or ""
+
+    def reply(self, request: dict[str, Any], authorization: str | None = None) -> str:
+        model, messages = request["model"], request["messages"]
+        if self.recording is not None:
+            recorded = self.recording.reply(model, messages)
+            if recorded is not None:
+                return recorded
+            if self.upstream:
+                reply = self._forward(request, authorization)
+                self.recording.add(model, messages, reply)
+                return reply
+        return self.script.reply(model, messages)
+
+    def pace(self, tokens: list[str]) -> Iterator[str]:
+        """Yield ``tokens`` at the configured latency and rate."""
+        time.sleep(self.latency)
+        for i, token in enumerate(tokens):
+            if self.tokens_per_second and i:
+                time.sleep(1 / self.tokens_per_second)
+            yield token
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _event(self, payload: dict[str, Any] | str) -> None:
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        chunk = f"data: {data}\n\n".encode()
+        self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        server: FakeOpenAIServer = self.server
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._reply(404, {"error": {"message": f"Unknown endpoint {self.path}", "type": "invalid_request"}})
+        if not server._admit():
+            return self._reply(429, {"error": {
+                "message": "Rate limit reached for requests", "type": "requests", "code": "rate_limit_exceeded"}})
+        try:
+            content = server.reply(request, self.headers.get("Authorization"))
+            tokens = tokenize(content)
+            prompt = sum(len(str(m.get("content") or "")) for m in request["messages"]) // 4
+            usage = {"prompt_tokens": prompt, "completion_tokens": len(tokens), "total_tokens": prompt + len(tokens)}
+            with server.lock:
+                server.prompt_tokens += prompt
+                server.completion_tokens += len(tokens)
+            meta = {"id": "chatcmpl-fake", "created": int(time.time()), "model": request["model"]}
+            if request.get("stream"):
+                self._stream(server.pace(tokens), meta, usage, request.get("stream_options") or {})
+            else:
+                for _ in server.pace(tokens):
+                    pass
+                self._reply(200, {**meta, "object": "chat.completion", "usage": usage, "choices": [
+                    {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}]})
+        except urllib.error.URLError as e:
+            self._reply(502, {"error": {"message": f"Upstream failed: {e}", "type": "upstream_error"}})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _stream(self, tokens: Iterator[str], meta: dict[str, Any], usage: dict[str, int],
+                options: dict[str, Any]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        chunk = {**meta, "object": "chat.completion.chunk"}
+        delta: dict[str, Any] = {"role": "assistant"}
+        for token in tokens:
+            self._event({**chunk, "choices": [{"index": 0, "delta": {**delta, "content": token}, "finish_reason": None}]})
+            delta = {}
+        self._event({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if options.get("include_usage"):
+            self._event({**chunk, "choices": [], "usage": usage})
+        self._event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def main() -> None:
+    """
+    Serve scripted or recorded chat completions on a local port.
+    """
+    parser = argparse.ArgumentParser(prog="fake_openai")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8911)
+    parser.add_argument("--script", help="YAML/JSON file of {rules: [{match, reply}], default}")
+    parser.add_argument("--recording", help="JSONL file of recorded replies to play back")
+    parser.add_argument("--upstream", help="real provider base URL; misses are forwarded and recorded")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, help="completion tokens generated per second")
+    parser.add_argument("--quota", type=int, help="requests allowed per --window seconds, then 429")
+    parser.add_argument("--window", type=float, default=60.0)
+    args = parser.parse_args()
+    if args.upstream and not args.recording:
+        parser.error("--upstream needs --recording to record into")
+
+    server = FakeOpenAIServer(
+        script=ResponseScript.from_file(args.script) if args.script else None,
+        recording=Recording(args.recording) if args.recording else None,
+        upstream=args.upstream,
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        quota=args.quota,
+        window=args.window,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Serving fake chat completions; export OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=fake")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""One HTTP connection pool for every agent's provider client.
+
+crewAI's native OpenAI provider builds its own ``httpx`` clients for every
+LLM, so each agent of each crew opens and keeps its own connections to the
+provider. An :class:`HTTPPool` holds one sync and one async ``httpx`` client
+with bounded keep-alive connections, and :meth:`HTTPPool.attach` points a
+provider LLM's clients at them. Crews running side by side in one process
+(see :mod:`crew_kit.orchestrate`) then reuse the same warm connections.
+"""
+from typing import Any
+
+DEFAULT_MAX_CONNECTIONS = 32
+DEFAULT_MAX_KEEPALIVE = 16
+
+
+class HTTPPool:
+    """Shared ``httpx`` clients, created on first use."""
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive: int = DEFAULT_MAX_KEEPALIVE, timeout: float = 600.0):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.timeout = timeout
+        self.attached = 0
+        self._client = None
+        self._async_client = None
+
+    def _limits(self) -> Any:
+        import httpx
+
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_keepalive)
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.Client(limits=self._limits(), timeout=self.timeout)
+        return self._client
+
+    @property
+    def async_client(self) -> Any:
+        if self._async_client is None:
+            import httpx
+
+            self._async_client = httpx.AsyncClient(limits=self._limits(), timeout=self.timeout)
+        return self._async_client
+
+    def attach(self, llm: Any) -> bool:
+        """Rebuild ``llm``'s provider clients on the shared pool.
+
+        Only providers that build OpenAI-style ``client``/``async_client``
+        pairs from ``_get_client_params`` can be attached; others keep their
+        own connections and ``False`` is returned.
+        """
+        params = getattr(llm, "_get_client_params", None)
+        client, async_client = getattr(llm, "client", None), getattr(llm, "async_client", None)
+        if params is None or client is None or async_client is None:
+            return False
+        llm.client = type(client)(**{**params(), "http_client": self.client})
+        llm.async_client = type(async_client)(**{**params(), "http_client": self.async_client})
+        self.attached += 1
+        return True
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
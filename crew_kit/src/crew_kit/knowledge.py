@@ -0,0 +1,362 @@
+"""Local, indexed knowledge for the agents.
+
+Files under ``knowledge/`` are split into overlapping chunks, embedded on
+the CPU and kept in a vector index on disk. Agents search it with the
+``knowledge_search`` tool and get back only the top-k chunks for their
+query, not whole files in every prompt.
+
+Embeddings come from a :class:`HashingEmbedder` by default: words and word
+pairs are hashed into a fixed number of signed buckets, so there is no
+model to download and no vocabulary to fit. With ``embedder:
+sentence-transformers/<model>`` in ``config/knowledge.yaml`` a local
+sentence-transformers model is used instead, if it is installed.
+
+The index stores each file's SHA-256. :meth:`KnowledgeIndex.refresh` only
+chunks and embeds files that were added or changed since the last run, drops
+removed ones, and rebuilds everything when the embedder or chunking
+settings change.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+import yaml
+
+from crew_kit.streaming import atomic_write
+
+DEFAULT_KNOWLEDGE_DIR = "knowledge"
+DEFAULT_INDEX_FILE = os.path.join(".crew_cache", "knowledge", "index.json")
+DEFAULT_EXTENSIONS = (".txt", ".md", ".rst", ".py", ".json", ".yaml", ".yml", ".csv")
+DEFAULT_CHUNK_CHARS = 800
+DEFAULT_OVERLAP_CHARS = 120
+DEFAULT_TOP_K = 4
+HASHING_DIMENSIONS = 2 ** 18
+INDEX_VERSION = 1
+
+_WORD = re.compile(r"[a-z0-9_]+")
+
+
+def load_knowledge_config(path: str) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_text(text: str, max_chars: int = DEFAULT_CHUNK_CHARS, overlap: int = DEFAULT_OVERLAP_CHARS) -> list[str]:
+    """Split ``text`` into chunks of at most ``max_chars``.
+
+    Chunks end at a paragraph break, line break or space where possible,
+    and each chunk repeats the last ``overlap`` characters of the previous
+    one so a sentence cut at a boundary is still found whole.
+    """
+    if overlap >= max_chars:
+        raise ValueError(f"overlap ({overlap}) must be smaller than max_chars ({max_chars}).")
+    text = text.strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            for separator in ("\n\n", "\n", " "):
+                cut = text.rfind(separator, start + overlap + 1, end)
+                if cut > start:
+                    end = cut
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+class Embedder(Protocol):
+    name: str
+
+    def embed(self, texts: list[str]) -> list[dict[int, float]]:
+        ...
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words and word pairs, L2-normalised.
+
+    Vectors are sparse ``{bucket: weight}`` dicts; term counts are
+    log-scaled so a word repeated many times does not dominate a chunk.
+    """
+
+    def __init__(self, dimensions: int = HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _bucket(self, feature: str) -> tuple[int, float]:
+        value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        return value % self.dimensions, 1.0 if value >> 63 else -1.0
+
+    def embed(self, texts: list[str]) -> list[dict[int, float]]:
+        vectors = []
+        for text in texts:
+            words = _WORD.findall(text.lower())
+            features = Counter(words)
+            features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+            vector: dict[int, float] = defaultdict(float)
+            for feature, count in features.items():
+                bucket, sign = self._bucket(feature)
+                vector[bucket] += sign * (1.0 + math.log(count))
+            vectors.append(_normalise(vector))
+        return vectors
+
+
+class SentenceTransformerEmbedder:
+    """A local sentence-transformers model, run on the CPU."""
+
+    def __init__(self, model: str):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                f"Embedder sentence-transformers/{model} needs the sentence-transformers package; "
+                "install it or use the default hashing embedder."
+            ) from e
+        self.model = SentenceTransformer(model, device="cpu")
+        self.name = f"sentence-transformers/{model}"
+
+    def embed(self, texts: list[str]) -> list[dict[int, float]]:
+        embeddings = self.model.encode(texts, normalize_embeddings=True)
+        return [{i: float(x) for i, x in enumerate(row) if x} for row in embeddings]
+
+
+def make_embedder(name: str | None) -> Embedder:
+    if not name or name == "hashing":
+        return HashingEmbedder()
+    if name.startswith("hashing-"):
+        return HashingEmbedder(int(name.removeprefix("hashing-")))
+    if name.startswith("sentence-transformers/"):
+        return SentenceTransformerEmbedder(name.removeprefix("sentence-transformers/"))
+    raise ValueError(f"Unknown embedder '{name}', expected hashing or sentence-transformers/<model>.")
+
+
+def _normalise(vector: dict[int, float]) -> dict[int, float]:
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    return {bucket: w / norm for bucket, w in vector.items() if w} if norm else {}
+
+
+@dataclass
+class Hit:
+    source: str
+    chunk: int
+    text: str
+    score: float
+
+    def format(self) -> str:
+        return f"[{self.source} #{self.chunk}, score {self.score:.2f}]\n{self.text}"
+
+
+@dataclass
+class RefreshStats:
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    chunks_embedded: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+
+class KnowledgeIndex:
+    """Chunked, embedded ``knowledge/`` files, persisted to ``index_file``."""
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_KNOWLEDGE_DIR,
+        index_file: str = DEFAULT_INDEX_FILE,
+        embedder: Embedder | str | None = None,
+        chunk_chars: int = DEFAULT_CHUNK_CHARS,
+        overlap_chars: int = DEFAULT_OVERLAP_CHARS,
+        top_k: int = DEFAULT_TOP_K,
+        extensions: tuple[str, ...] = DEFAULT_EXTENSIONS,
+    ):
+        self.directory = directory
+        self.index_file = index_file
+        # An embedder named in config is only created when something needs embedding
+        if embedder is None or isinstance(embedder, str):
+            self._embedder = None
+            self.embedder_name = HashingEmbedder().name if embedder in (None, "hashing") else embedder
+        else:
+            self._embedder = embedder
+            self.embedder_name = embedder.name
+        self.chunk_chars = chunk_chars
+        self.overlap_chars = overlap_chars
+        self.top_k = top_k
+        self.extensions = extensions
+        # relative path -> {"hash": ..., "chunks": [{"text": ..., "vector": [[bucket, weight], ...]}]}
+        self.files: dict[str, dict[str, Any]] = {}
+        self.last_refresh = RefreshStats()
+        self._postings: dict[int, list[tuple[int, float]]] | None = None
+        self._chunks: list[tuple[str, int, str]] = []
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any], **overrides: Any) -> "KnowledgeIndex":
+        options = {
+            "directory": config.get("directory", DEFAULT_KNOWLEDGE_DIR),
+            "index_file": config.get("index_file", DEFAULT_INDEX_FILE),
+            "chunk_chars": config.get("chunk_chars", DEFAULT_CHUNK_CHARS),
+            "overlap_chars": config.get("overlap_chars", DEFAULT_OVERLAP_CHARS),
+            "top_k": config.get("top_k", DEFAULT_TOP_K),
+            "extensions": tuple(config.get("extensions") or DEFAULT_EXTENSIONS),
+            "embedder": config.get("embedder"),
+        }
+        return cls(**{**options, **overrides})
+
+    @property
+    def embedder(self) -> Embedder:
+        if self._embedder is None:
+            self._embedder = make_embedder(self.embedder_name)
+        return self._embedder
+
+    def _settings(self) -> dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "embedder": self.embedder_name,
+            "chunk_chars": self.chunk_chars,
+            "overlap_chars": self.overlap_chars,
+        }
+
+    def _load(self) -> None:
+        self._loaded = True
+        try:
+            with open(self.index_file, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        # Vectors from another embedder or chunking are not comparable
+        if stored.get("settings") == self._settings():
+            self.files = stored.get("files", {})
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.index_file) or ".", exist_ok=True)
+        atomic_write(self.index_file, json.dumps({"settings": self._settings(), "files": self.files}))
+
+    def _sources(self) -> dict[str, str]:
+        sources = {}
+        for root, dirs, names in os.walk(self.directory):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(names):
+                if name.endswith(self.extensions) and not name.startswith("."):
+                    path = os.path.join(root, name)
+                    sources[os.path.relpath(path, self.directory)] = path
+        return sources
+
+    def refresh(self) -> RefreshStats:
+        """Re-index files added, changed or removed since the last refresh."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            stats = RefreshStats()
+            sources = self._sources()
+            for name in [name for name in self.files if name not in sources]:
+                del self.files[name]
+                stats.removed += 1
+            for name, path in sources.items():
+                digest = file_hash(path)
+                entry = self.files.get(name)
+                if entry is not None and entry["hash"] == digest:
+                    stats.unchanged += 1
+                    continue
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    chunks = chunk_text(f.read(), self.chunk_chars, self.overlap_chars)
+                vectors = self.embedder.embed(chunks) if chunks else []
+                self.files[name] = {
+                    "hash": digest,
+                    "chunks": [
+                        {"text": text, "vector": [[bucket, round(w, 6)] for bucket, w in vector.items()]}
+                        for text, vector in zip(chunks, vectors)
+                    ],
+                }
+                stats.chunks_embedded += len(chunks)
+                if entry is None:
+                    stats.added += 1
+                else:
+                    stats.updated += 1
+            if stats.changed or not os.path.exists(self.index_file):
+                self._save()
+            if stats.changed or self._postings is None:
+                self._build_postings()
+            self.last_refresh = stats
+            return stats
+
+    def _build_postings(self) -> None:
+        """Bucket -> (chunk, weight) lists, so a query only touches chunks sharing a bucket with it."""
+        postings: dict[int, list[tuple[int, float]]] = defaultdict(list)
+        self._chunks = []
+        for name in sorted(self.files):
+            for number, chunk in enumerate(self.files[name]["chunks"]):
+                chunk_id = len(self._chunks)
+                self._chunks.append((name, number, chunk["text"]))
+                for bucket, weight in chunk["vector"]:
+                    postings[bucket].append((chunk_id, weight))
+        self._postings = dict(postings)
+
+    def search(self, query: str, k: int | None = None) -> list[Hit]:
+        """The ``k`` chunks most similar to ``query`` (cosine), best first."""
+        if self._postings is None:
+            self.refresh()
+        postings = self._postings or {}
+        scores: dict[int, float] = defaultdict(float)
+        for bucket, weight in self.embedder.embed([query])[0].items():
+            for chunk_id, chunk_weight in postings.get(bucket, ()):
+                scores[chunk_id] += weight * chunk_weight
+        best = sorted((item for item in scores.items() if item[1] > 0), key=lambda item: -item[1])
+        hits = []
+        for chunk_id, score in best[:k or self.top_k]:
+            name, number, text = self._chunks[chunk_id]
+            hits.append(Hit(name, number, text, score))
+        return hits
+
+    @property
+    def chunk_count(self) -> int:
+        return sum(len(entry["chunks"]) for entry in self.files.values())
+
+
+def main(config: str = "knowledge.yaml") -> None:
+    """
+    Update the knowledge index and optionally search it.
+    """
+    parser = argparse.ArgumentParser(prog="index_knowledge")
+    parser.add_argument("query", nargs="?", help="search the index after updating it")
+    parser.add_argument("-k", type=int, help="number of chunks to return")
+    parser.add_argument("--config", default=config)
+    args = parser.parse_args(sys.argv[1:])
+
+    index = KnowledgeIndex.from_config(load_knowledge_config(args.config))
+    stats = index.refresh()
+    print(f"Knowledge index {index.index_file}: {len(index.files)} files, {index.chunk_count} chunks "
+          f"({stats.added} added, {stats.updated} updated, {stats.removed} removed, "
+          f"{stats.unchanged} unchanged; {stats.chunks_embedded} chunks embedded)")
+    if args.query:
+        for hit in index.search(args.query, args.k):
+            print()
+            print(hit.format())
+
+
+if __name__ == "__main__":
+    main()
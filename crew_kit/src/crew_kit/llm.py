@@ -0,0 +1,234 @@
+"""Provider wrapper that every agent's LLM calls go through.
+
+:class:`CachedLLM` compacts the prompt with the
+:class:`~crew_kit.prompt.PromptAssembler`, serves recorded responses from
+the :class:`~crew_kit.cache.LLMCache`, queues provider calls behind the
+shared :class:`~crew_kit.ratelimit.RateLimiter`, records each call in
+:class:`~crew_kit.metrics.RunMetrics` and, in streaming mode, sends the
+reply to :class:`~crew_kit.streaming.OutputStreams` as it arrives. With
+an :class:`~crew_kit.httppool.HTTPPool` the provider's connections are
+shared with every other agent's. It is the only module besides the crew
+itself that needs crewAI at import time.
+"""
+import time
+from typing import Any
+
+from crewai import LLM
+from crewai.llms.base_llm import BaseLLM
+
+from crew_kit.cache import CacheMissError, LLMCache, cache_key
+from crew_kit.httppool import HTTPPool
+from crew_kit.metrics import LLMCall, RunMetrics
+from crew_kit.prompt import PromptAssembler, message_chars
+from crew_kit.ratelimit import CallStats, RateLimiter, estimate_tokens
+from crew_kit.streaming import OutputStreams
+
+
+class CachedLLM(BaseLLM):
+    """LLM wrapper that consults an :class:`LLMCache` before the provider.
+
+    The underlying provider LLM is only constructed on the first cache miss,
+    so a fully recorded run needs neither network access nor an API key.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        cache: LLMCache,
+        llm: BaseLLM | None = None,
+        limiter: RateLimiter | None = None,
+        lane: str | None = None,
+        metrics: RunMetrics | None = None,
+        assembler: PromptAssembler | None = None,
+        streams: OutputStreams | None = None,
+        http_pool: HTTPPool | None = None,
+        **llm_kwargs: Any,
+    ):
+        if streams is not None and streams.enabled:
+            llm_kwargs.setdefault("stream", True)
+        super().__init__(model=model, temperature=llm_kwargs.get("temperature"))
+        self.cache = cache
+        self.limiter = limiter
+        self.lane = lane
+        self.metrics = metrics
+        self.assembler = assembler
+        self.streams = streams
+        self.http_pool = http_pool
+        self._llm = llm
+        self._llm_kwargs = llm_kwargs
+
+    @property
+    def llm(self) -> BaseLLM:
+        if self._llm is None:
+            self._llm = LLM(model=self.model, **self._llm_kwargs)
+            if self.http_pool is not None:
+                self.http_pool.attach(self._llm)
+        return self._llm
+
+    def _tokens_used(self) -> int:
+        return self.llm.get_token_usage_summary().total_tokens
+
+    def _usage(self) -> tuple[int, int]:
+        if self._llm is None:
+            return 0, 0
+        usage = self.llm.get_token_usage_summary()
+        return usage.prompt_tokens, usage.completion_tokens
+
+    def _assemble(self, messages, from_task):
+        """Compact ``messages``; return them with their size before and after."""
+        if self.assembler is None:
+            chars = message_chars(messages)
+            return messages, (chars, chars)
+        prompt = self.assembler.assemble(messages, from_task)
+        return prompt.messages, (prompt.original_chars, prompt.chars)
+
+    def _record(self, from_task, from_agent, started: float, usage: tuple[int, int],
+                stats: CallStats | None, size: tuple[int, int], cache_hit: bool = False) -> None:
+        if self.metrics is None:
+            return
+        prompt, completion = self._usage()
+        self.metrics.record_call(LLMCall(
+            task=getattr(from_task, "name", None) or "-",
+            agent=(getattr(from_agent, "role", None) or "-").strip(),
+            model=self.model,
+            started=started,
+            wall_seconds=time.time() - started,
+            queued_seconds=stats.queued_seconds if stats else 0.0,
+            prompt_tokens=prompt - usage[0],
+            completion_tokens=completion - usage[1],
+            retries=stats.retries if stats else 0,
+            prompt_chars=size[1],
+            saved_chars=size[0] - size[1],
+            cache_hit=cache_hit,
+        ))
+
+    def _key(self, messages, tools, response_model) -> str:
+        return cache_key(self.model, messages, tools=tools, response_model=response_model)
+
+    def _lookup(self, key: str, from_agent: Any) -> str | None:
+        agent = (getattr(from_agent, "role", None) or "").strip() or None
+        cached = self.cache.get(key)
+        self.cache.stats.record(agent, hit=cached is not None)
+        if cached is None and self.cache.mode == "replay":
+            raise CacheMissError(f"No recorded response for {self.model} call {key[:12]}.")
+        return cached
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        started = time.time()
+        messages, size = self._assemble(messages, from_task)
+        key = None
+        if self.cache.enabled:
+            key = self._key(messages, tools, response_model)
+            cached = self._lookup(key, from_agent)
+            if cached is not None:
+                self._record(from_task, from_agent, started, self._usage(), None, size, cache_hit=True)
+                return cached
+        self.llm.stop = self.stop
+        usage = self._usage()
+
+        def send():
+            return self.llm.call(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+                response_model=response_model,
+            )
+
+        stats = CallStats()
+        stream = self.streams.begin(from_task) if self.streams is not None else None
+        try:
+            if self.limiter:
+                result = self.limiter.submit(
+                    send, lane=self.lane, tokens=estimate_tokens(messages), usage=self._tokens_used, stats=stats
+                )
+            else:
+                result = send()
+        finally:
+            if stream is not None:
+                self.streams.end(stream)
+        self._record(from_task, from_agent, started, usage, stats, size)
+        if key is not None and isinstance(result, str):
+            self.cache.put(key, self.model, result)
+        return result
+
+    async def acall(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        started = time.time()
+        messages, size = self._assemble(messages, from_task)
+        key = None
+        if self.cache.enabled:
+            key = self._key(messages, tools, response_model)
+            cached = self._lookup(key, from_agent)
+            if cached is not None:
+                self._record(from_task, from_agent, started, self._usage(), None, size, cache_hit=True)
+                return cached
+        self.llm.stop = self.stop
+        usage = self._usage()
+
+        def send():
+            return self.llm.acall(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+                response_model=response_model,
+            )
+
+        stats = CallStats()
+        stream = self.streams.begin(from_task) if self.streams is not None else None
+        try:
+            if self.limiter:
+                result = await self.limiter.asubmit(
+                    send, lane=self.lane, tokens=estimate_tokens(messages), usage=self._tokens_used, stats=stats
+                )
+            else:
+                result = await send()
+        finally:
+            if stream is not None:
+                self.streams.end(stream)
+        self._record(from_task, from_agent, started, usage, stats, size)
+        if key is not None and isinstance(result, str):
+            self.cache.put(key, self.model, result)
+        return result
+
+    def supports_function_calling(self) -> bool:
+        if self._llm is None and self.cache.mode == "replay":
+            return False
+        return self.llm.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        if self._llm is None and self.cache.mode == "replay":
+            return super().supports_stop_words()
+        return self.llm.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        if self._llm is None and self.cache.mode == "replay":
+            return super().get_context_window_size()
+        return self.llm.get_context_window_size()
+
+    def get_token_usage_summary(self):
+        if self._llm is None:
+            return super().get_token_usage_summary()
+        return self.llm.get_token_usage_summary()
@@ -0,0 +1,387 @@
+"""Per-task and per-agent latency and token instrumentation for crew runs.
+
+:class:`RunMetrics` collects one record per LLM call (wall time, time queued
+behind the rate limiter, prompt size, prompt and completion tokens, 429
+retries, cache hits) from :class:`~crew_kit.llm.CachedLLM`, and task
+spans and tool calls from crewAI's event bus. Every record is appended to a JSONL trace in
+``output/.metrics/<run id>.jsonl`` as it happens; :meth:`RunMetrics.finish`
+aggregates them per task and per agent, compares the totals with the
+previous run's ``summary.json`` and flags regressions.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from crew_kit.streaming import atomic_write
+
+if TYPE_CHECKING:
+    from crewai.events import TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent, ToolUsageFinishedEvent
+
+METRICS_DIR = os.path.join("output", ".metrics")
+
+# Event handlers run on crewAI's thread pool behind its own listeners, so
+# task events can arrive after kickoff returns; wait at most this long. A task
+# still running after that is recorded as failed.
+EVENT_GRACE_SECONDS = 10.0
+
+# A task or agent is flagged when it got this much slower or more expensive
+# than in the previous run (and by at least a second, for wall time).
+REGRESSION_THRESHOLD = 0.2
+MIN_REGRESSION_SECONDS = 1.0
+
+
+@dataclass
+class LLMCall:
+    task: str
+    agent: str
+    model: str
+    started: float
+    wall_seconds: float
+    queued_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+    # Prompt size as sent, and how much prompt assembly removed from it
+    prompt_chars: int = 0
+    saved_chars: int = 0
+    cache_hit: bool = False
+
+
+@dataclass
+class Totals:
+    wall_seconds: float = 0.0
+    queued_seconds: float = 0.0
+    llm_calls: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tool_calls: int = 0
+    retries: int = 0
+    prompt_chars: int = 0
+    saved_chars: int = 0
+
+    @property
+    def tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add_call(self, call: LLMCall) -> None:
+        self.queued_seconds += call.queued_seconds
+        self.llm_calls += 1
+        self.cache_hits += call.cache_hit
+        self.prompt_tokens += call.prompt_tokens
+        self.completion_tokens += call.completion_tokens
+        self.retries += call.retries
+        self.prompt_chars += call.prompt_chars
+        self.saved_chars += call.saved_chars
+
+
+@dataclass
+class TaskSpan:
+    name: str
+    agent: str
+    started: float
+    finished: float | None = None
+    status: str = "running"
+
+
+def _label(value: Any, fallback: str = "-") -> str:
+    text = (getattr(value, "role", None) or getattr(value, "name", None) or "").strip()
+    return text or fallback
+
+
+def _task_name(task: Any) -> str:
+    return getattr(task, "name", None) or (getattr(task, "description", None) or "-")[:40]
+
+
+class _MetricsListener:
+    """Forwards crewAI task and tool events to every running :class:`RunMetrics`.
+
+    Registered on crewAI's event bus when the first run starts, so importing
+    this module does not import crewAI.
+    """
+
+    def __init__(self):
+        from crewai.events import crewai_event_bus
+
+        self.active: set["RunMetrics"] = set()
+        self.lock = threading.Lock()
+        self.setup_listeners(crewai_event_bus)
+
+    def _dispatch(self, method: str, event: Any) -> None:
+        with self.lock:
+            targets = list(self.active)
+        for metrics in targets:
+            if metrics.accepts(event):
+                getattr(metrics, method)(event)
+
+    def setup_listeners(self, crewai_event_bus) -> None:
+        from crewai.events import TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent, ToolUsageFinishedEvent
+
+        @crewai_event_bus.on(TaskStartedEvent)
+        def on_task_started(source, event):
+            self._dispatch("_task_started", event)
+
+        @crewai_event_bus.on(TaskCompletedEvent)
+        def on_task_completed(source, event):
+            self._dispatch("_task_completed", event)
+
+        @crewai_event_bus.on(TaskFailedEvent)
+        def on_task_failed(source, event):
+            self._dispatch("_task_failed", event)
+
+        @crewai_event_bus.on(ToolUsageFinishedEvent)
+        def on_tool_finished(source, event):
+            self._dispatch("_tool_finished", event)
+
+
+_listener: _MetricsListener | None = None
+_listener_lock = threading.Lock()
+
+
+def _get_listener() -> _MetricsListener:
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = _MetricsListener()
+        return _listener
+
+
+class RunMetrics:
+    """Collects a JSONL trace and an end-of-run summary for one crew run."""
+
+    def __init__(self, path: str = METRICS_DIR, threshold: float = REGRESSION_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.run_id: str | None = None
+        self.calls: list[LLMCall] = []
+        self.spans: dict[str, TaskSpan] = {}
+        self.tool_calls: dict[tuple[str, str], int] = {}
+        # Handlers run concurrently, so an end event can beat its start event
+        self._early_ends: dict[str, tuple[float, str]] = {}
+        self.last_summary: dict[str, Any] | None = None
+        self.previous_summary: dict[str, Any] | None = None
+        self._started = 0.0
+        self._trace = None
+        self._lock = threading.Lock()
+        # Notified whenever a span opens or closes, or a call is recorded
+        self._changed = threading.Condition(self._lock)
+        # When set, only events from these crewAI task ids are recorded, so
+        # crews running side by side in one process keep separate traces
+        self.task_ids: set[str] | None = None
+
+    # === Lifecycle ===
+    def start(self, tasks: list[Any] | None = None) -> None:
+        self.task_ids = None if tasks is None else {str(task.id) for task in tasks}
+        self.run_id = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        self.calls, self.spans, self.tool_calls, self._early_ends = [], {}, {}, {}
+        self._started = time.time()
+        os.makedirs(self.path, exist_ok=True)
+        self._trace = open(os.path.join(self.path, f"{self.run_id}.jsonl"), "a", encoding="utf-8")
+        listener = _get_listener()
+        with listener.lock:
+            listener.active.add(self)
+
+    def finish(self) -> dict[str, Any]:
+        """Stop collecting, write ``summary.json`` and return the summary."""
+        with self._changed:
+            self._changed.wait_for(self._settled, timeout=EVENT_GRACE_SECONDS)
+        listener = _get_listener()
+        with listener.lock:
+            listener.active.discard(self)
+        with self._lock:
+            running = [span for span in self.spans.values() if span.status == "running"]
+        for span in running:
+            self._close_span(span, time.time(), "failed")
+
+        summary = self.summary()
+        summary_file = os.path.join(self.path, "summary.json")
+        try:
+            with open(summary_file, encoding="utf-8") as f:
+                self.previous_summary = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.previous_summary = None
+        summary["regressions"] = self.regressions(summary, self.previous_summary)
+        self._write({"type": "summary", **summary})
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+        atomic_write(summary_file, json.dumps(summary, indent=2))
+        self.last_summary = summary
+        return summary
+
+    def _settled(self) -> bool:
+        """True once every task that made an LLM call has reported its end; needs ``_lock``."""
+        spans = self.spans.values()
+        called = {call.task for call in self.calls if call.task != "-"}
+        ended = {span.name for span in spans if span.status != "running"}
+        return called <= ended and all(span.status != "running" for span in spans)
+
+    @contextlib.contextmanager
+    def collect(self, tasks: list[Any] | None = None) -> Iterator["RunMetrics"]:
+        """Record everything inside the block as one run, optionally of ``tasks`` only."""
+        self.start(tasks)
+        try:
+            yield self
+        finally:
+            self.finish()
+
+    def _write(self, record: dict[str, Any]) -> None:
+        with self._lock:
+            if self._trace is not None:
+                self._trace.write(json.dumps(record, default=str) + "\n")
+                self._trace.flush()
+
+    def accepts(self, event: Any) -> bool:
+        if self.task_ids is None:
+            return True
+        task_id = getattr(event, "task_id", None) or getattr(getattr(event, "task", None), "id", None)
+        return str(task_id) in self.task_ids
+
+    # === Recording ===
+    def record_call(self, call: LLMCall) -> None:
+        with self._changed:
+            self.calls.append(call)
+            self._changed.notify_all()
+        self._write({"type": "llm_call", **asdict(call)})
+
+    def _task_started(self, event: "TaskStartedEvent") -> None:
+        task = event.task
+        key = str(getattr(task, "id", id(task)))
+        span = TaskSpan(_task_name(task), _label(getattr(task, "agent", None)), event.timestamp.timestamp())
+        with self._changed:
+            self.spans[key] = span
+            ended = self._early_ends.pop(key, None)
+            self._changed.notify_all()
+        self._write({"type": "task_started", "task": span.name, "agent": span.agent, "ts": span.started})
+        if ended:
+            self._close_span(span, *ended)
+
+    def _task_ended(self, event: "TaskCompletedEvent | TaskFailedEvent", status: str) -> None:
+        task = event.task
+        key = str(getattr(task, "id", id(task)))
+        with self._lock:
+            span = self.spans.get(key)
+            if span is None:
+                self._early_ends[key] = (event.timestamp.timestamp(), status)
+                return
+        self._close_span(span, event.timestamp.timestamp(), status)
+
+    def _close_span(self, span: TaskSpan, finished: float, status: str) -> None:
+        with self._changed:
+            if span.status != "running":
+                # Already closed by finish(); the event came too late
+                return
+            span.finished = finished
+            span.status = status
+            self._changed.notify_all()
+        self._write({
+            "type": f"task_{status}",
+            "task": span.name,
+            "agent": span.agent,
+            "ts": span.finished,
+            "wall_seconds": span.finished - span.started,
+        })
+
+    def _task_completed(self, event: "TaskCompletedEvent") -> None:
+        self._task_ended(event, "completed")
+
+    def _task_failed(self, event: "TaskFailedEvent") -> None:
+        self._task_ended(event, "failed")
+
+    def _tool_finished(self, event: "ToolUsageFinishedEvent") -> None:
+        key = (event.task_name or "-", (event.agent_role or "-").strip())
+        with self._lock:
+            self.tool_calls[key] = self.tool_calls.get(key, 0) + 1
+        self._write({
+            "type": "tool_call",
+            "task": key[0],
+            "agent": key[1],
+            "tool": event.tool_name,
+            "wall_seconds": (event.finished_at - event.started_at).total_seconds(),
+            "from_cache": event.from_cache,
+        })
+
+    # === Aggregation ===
+    def summary(self) -> dict[str, Any]:
+        tasks: dict[str, Totals] = {}
+        agents: dict[str, Totals] = {}
+        status: dict[str, tuple[str, str]] = {}
+        for span in self.spans.values():
+            totals = tasks.setdefault(span.name, Totals())
+            agent = agents.setdefault(span.agent, Totals())
+            if span.finished is not None:
+                totals.wall_seconds += span.finished - span.started
+                agent.wall_seconds += span.finished - span.started
+            status[span.name] = (span.agent, span.status)
+        for call in self.calls:
+            tasks.setdefault(call.task, Totals()).add_call(call)
+            agents.setdefault(call.agent, Totals()).add_call(call)
+        for (task, agent), count in self.tool_calls.items():
+            tasks.setdefault(task, Totals()).tool_calls += count
+            agents.setdefault(agent, Totals()).tool_calls += count
+        return {
+            "run_id": self.run_id,
+            "started": self._started,
+            "wall_seconds": time.time() - self._started if self._started else 0.0,
+            "tasks": {
+                name: dict(zip(("agent", "status"), status.get(name, ("-", "-"))), **asdict(t), tokens=t.tokens)
+                for name, t in tasks.items()
+            },
+            "agents": {name: {**asdict(t), "tokens": t.tokens} for name, t in agents.items()},
+        }
+
+    def regressions(self, current: dict[str, Any], previous: dict[str, Any] | None) -> list[str]:
+        """Tasks and agents that got slower or used more tokens than last time."""
+        if not previous:
+            return []
+        found = []
+        for scope in ("tasks", "agents"):
+            for name, now in current.get(scope, {}).items():
+                before = previous.get(scope, {}).get(name)
+                if not before:
+                    continue
+                for metric, unit in (("wall_seconds", "s"), ("tokens", " tokens")):
+                    old, new = before.get(metric, 0), now.get(metric, 0)
+                    if old <= 0 or new <= old * (1 + self.threshold):
+                        continue
+                    if metric == "wall_seconds" and new - old < MIN_REGRESSION_SECONDS:
+                        continue
+                    found.append(
+                        f"{scope[:-1]} {name}: {metric} {old:.0f}{unit} -> {new:.0f}{unit} "
+                        f"(+{(new - old) / old:.0%})"
+                    )
+        return found
+
+    def report(self) -> str:
+        """End-of-run table of per-task and per-agent totals."""
+        summary = self.last_summary or self.summary()
+        previous = (self.previous_summary or {}).get("tasks", {})
+        width = max([len(name) for name in summary["tasks"]] + [4])
+        lines = [
+            f"Run metrics ({summary['wall_seconds']:.1f}s wall):",
+            f"  {'task':<{width}}  {'wall s':>7}  {'queued s':>8}  {'calls':>5}  {'hits':>4}  "
+            f"{'prompt':>7}  {'compl':>6}  {'tools':>5}  {'retry':>5}  vs last",
+        ]
+        for name, t in summary["tasks"].items():
+            before = previous.get(name, {}).get("wall_seconds")
+            delta = f"{t['wall_seconds'] - before:+.1f}s" if before else ""
+            lines.append(
+                f"  {name:<{width}}  {t['wall_seconds']:7.1f}  {t['queued_seconds']:8.1f}  "
+                f"{t['llm_calls']:5}  {t['cache_hits']:4}  {t['prompt_tokens']:7}  "
+                f"{t['completion_tokens']:6}  {t['tool_calls']:5}  {t['retries']:5}  {delta}"
+            )
+        for name, a in sorted(summary["agents"].items()):
+            lines.append(
+                f"  agent {name}: {a['wall_seconds']:.1f}s, {a['queued_seconds']:.1f}s queued, "
+                f"{a['llm_calls']} calls, {a['tokens']} tokens, {a['prompt_chars']} prompt chars "
+                f"({a['saved_chars']} compacted away), {a['tool_calls']} tool calls, {a['retries']} retries"
+            )
+        for regression in summary.get("regressions", []):
+            lines.append(f"  REGRESSION {regression}")
+        return "\n".join(lines)
@@ -0,0 +1,317 @@
+"""Run several crews concurrently in one process and compare them.
+
+``orchestrate`` kicks off every crew given with ``--crew`` on crewAI's
+native async path (:func:`~crew_kit.checkpoint.akickoff_with_checkpoints`)
+on one event loop, e.g. ``--crew coding_crew --crew testing_crew`` on the
+same spec to compare the in-memory and SQLite variants. A crew is a package,
+a ``module:Class`` or a crew config directory, so the crews need not be
+installed side by side. They share one :class:`~crew_kit.cache.LLMCache`,
+one :class:`~crew_kit.httppool.HTTPPool` and, per model, one
+:class:`~crew_kit.ratelimit.RateLimiter` built from the limits of every crew
+that uses the model, so together they stay within each provider quota.
+Each crew keeps its own output directory, checkpoints, metrics trace and
+sandbox pool under ``output/compare/<crew>/``, and is verified after its
+last task like a normal run.
+
+The results go into one comparative report, printed and saved to
+``output/compare/comparison.json``: per crew, its wall time, provider time,
+time queued behind the shared limiter, calls, cache hits, tokens and
+verification result, plus a per-task wall time table across crews.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import yaml
+
+from crew_kit.batch import REQUIRED_FIELDS
+from crew_kit.cache import LLMCache
+from crew_kit.codeintel import SymbolIndex
+from crew_kit.crew import ConfigCrew
+from crew_kit.httppool import HTTPPool
+from crew_kit.metrics import RunMetrics
+from crew_kit.ratelimit import RateLimiter
+from crew_kit.sandbox import SandboxPool
+
+DEFAULT_OUTPUT = os.path.join("output", "compare")
+REPORT_FILE = "comparison.json"
+
+
+@dataclass
+class CrewRun:
+    crew: str
+    output_dir: str
+    ok: bool
+    wall_seconds: float
+    llm_calls: int = 0
+    llm_seconds: float = 0.0
+    queued_seconds: float = 0.0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # None when verification was skipped
+    verified: bool | None = None
+    tests_run: int = 0
+    # task name -> wall seconds
+    tasks: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+
+
+def load_crew_class(name: str) -> type:
+    """The crew class of package ``name``, ``module:Class``, or a crew config directory."""
+    if os.path.isdir(name):
+        return ConfigCrew.from_config_dir(name)
+    module_name, _, class_name = name.partition(":")
+    module = importlib.import_module(module_name if class_name else f"{module_name}.crew")
+    if class_name:
+        return getattr(module, class_name)
+    found = [value for value in vars(module).values()
+             if isinstance(value, type) and hasattr(value, "from_config_dir") and value.__module__ == module.__name__]
+    if len(found) != 1:
+        raise ValueError(f"Expected one crew class in {module.__name__}, found {[c.__name__ for c in found]}.")
+    return found[0]
+
+
+def crew_name(name: str) -> str:
+    """The report name of ``--crew name``: the package, or the crew's directory."""
+    if not os.path.isdir(name):
+        return name.partition(":")[0]
+    path = os.path.abspath(name)
+    # <package>/config names the crew after its package
+    return os.path.basename(os.path.dirname(path) if os.path.basename(path) == "config" else path)
+
+
+def default_inputs(crew_class: type) -> dict[str, Any]:
+    """The inputs the crew's own ``main.py`` runs with."""
+    main = importlib.import_module(f"{crew_class.__module__.split('.')[0]}.main")
+    return dict(main.inputs)
+
+
+def load_spec(path: str) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        spec = yaml.safe_load(f) or {}
+    missing = [name for name in REQUIRED_FIELDS if not spec.get(name)]
+    if missing:
+        raise ValueError(f"Spec {path} is missing {', '.join(missing)}.")
+    return {name: spec[name] for name in REQUIRED_FIELDS}
+
+
+def merge_limits(configs: list[dict[str, Any]]) -> dict[str, Any]:
+    """One :meth:`RateLimiter.from_config` dict for crews that draw on the same quota.
+
+    The buckets and the concurrency cap take the tightest value any crew sets.
+    The lanes are the union of the crews' lanes, with the larger reserve where
+    two crews define the same lane. Backoff and ``state_file`` come from the
+    first crew that sets them.
+    """
+    merged: dict[str, Any] = {}
+    lanes: dict[str, dict[str, Any]] = {}
+    for config in configs:
+        for key in ("requests_per_minute", "tokens_per_minute", "max_concurrency"):
+            if config.get(key) is not None:
+                merged[key] = config[key] if merged.get(key) is None else min(merged[key], config[key])
+        for key in ("backoff", "state_file"):
+            if config.get(key) and not merged.get(key):
+                merged[key] = config[key]
+        for name, lane in (config.get("lanes") or {}).items():
+            lane = dict(lane or {})
+            if name in lanes:
+                lane["reserve"] = max(lanes[name].get("reserve", 0.0), lane.get("reserve", 0.0))
+            lanes[name] = {**lanes.get(name, {}), **lane}
+    merged["lanes"] = lanes
+    return merged
+
+
+def crew_limits(crews: dict[str, type]) -> dict[str, list[dict[str, Any]]]:
+    """Model -> the limits of every crew with an agent on that model."""
+    limits: dict[str, list[dict[str, Any]]] = {}
+    for crew_class in crews.values():
+        for model in dict.fromkeys(agent["llm"] for agent in crew_class.agents_config.values()):
+            limits.setdefault(model, []).append(crew_class.limits_config)
+    return limits
+
+
+def share(
+    crew_class: type,
+    output_dir: str,
+    cache: LLMCache,
+    limiters: dict[str, RateLimiter],
+    http_pool: HTTPPool,
+) -> type:
+    """A copy of ``crew_class`` on the shared resources, writing under ``output_dir``."""
+    crew = crew_class.from_config_dir(crew_class.config_dir)
+    crew.llm_cache = cache
+    crew.model_limiters = limiters
+    crew.http_pool = http_pool
+    crew.llm_options = dict(crew_class.llm_options)
+    crew.run_metrics = RunMetrics(os.path.join(output_dir, ".metrics"))
+    crew.sandbox_pool = SandboxPool.from_config(crew.sandbox_config, mount=output_dir)
+    crew.code_index = SymbolIndex(output_dir)
+    return crew
+
+
+async def run_crew(name: str, crew_class: type, inputs: dict[str, Any], verify: bool = True) -> CrewRun:
+    """One crew's kickoff (and verification) on the running event loop."""
+    # crewAI loads with these, so only once a crew runs
+    from crew_kit import checkpoint, verify as repair
+
+    output_dir = inputs["output_dir"]
+    os.makedirs(output_dir, exist_ok=True)
+    metrics = crew_class.run_metrics
+    run = CrewRun(crew=name, output_dir=output_dir, ok=False, wall_seconds=0.0)
+    started = time.perf_counter()
+    try:
+        crew = crew_class().crew()
+        store = checkpoint.CheckpointStore(os.path.join(output_dir, ".checkpoints"))
+        metrics.start(crew.tasks)
+        try:
+            await checkpoint.akickoff_with_checkpoints(crew, inputs, store=store, incremental=True)
+            if verify:
+                report = await asyncio.to_thread(
+                    repair.verify_and_repair,
+                    crew,
+                    inputs,
+                    crew_class.sandbox_pool,
+                    max_repairs=crew_class.sandbox_config.get("repair_iterations", repair.MAX_REPAIRS),
+                    store=store,
+                )
+                run.verified, run.tests_run = report.ok, report.tests_run
+        finally:
+            # Waits for late task events; keep the loop free for the other crews
+            summary = await asyncio.to_thread(metrics.finish)
+        run.ok = run.verified is not False
+    except Exception as e:
+        run.error = f"{type(e).__name__}: {e}"
+        summary = metrics.last_summary or {}
+    finally:
+        crew_class.sandbox_pool.close()
+    run.wall_seconds = time.perf_counter() - started
+    run.llm_calls = len(metrics.calls)
+    run.llm_seconds = sum(call.wall_seconds for call in metrics.calls)
+    run.queued_seconds = sum(call.queued_seconds for call in metrics.calls)
+    run.cache_hits = sum(call.cache_hit for call in metrics.calls)
+    run.prompt_tokens = sum(call.prompt_tokens for call in metrics.calls)
+    run.completion_tokens = sum(call.completion_tokens for call in metrics.calls)
+    run.tasks = {task: totals["wall_seconds"] for task, totals in summary.get("tasks", {}).items()}
+    return run
+
+
+async def orchestrate(
+    crews: dict[str, type],
+    inputs: dict[str, dict[str, Any]],
+    output_root: str = DEFAULT_OUTPUT,
+    verify: bool = True,
+    cache: LLMCache | None = None,
+    limiter: RateLimiter | None = None,
+    http_pool: HTTPPool | None = None,
+) -> dict[str, Any]:
+    """Run ``crews`` concurrently, each on ``inputs[name]``; return the comparison.
+
+    ``limiter``, if given, governs every model instead of the merged limits.
+    """
+    cache = cache or LLMCache.from_env()
+    limiters = {
+        model: limiter or RateLimiter.from_config(merge_limits(configs))
+        for model, configs in crew_limits(crews).items()
+    }
+    http_pool = http_pool or HTTPPool()
+    shared = {}
+    for name, crew_class in crews.items():
+        output_dir = os.path.join(output_root, name)
+        shared[name] = (share(crew_class, output_dir, cache, limiters, http_pool),
+                        {**inputs[name], "output_dir": output_dir})
+    started = time.perf_counter()
+    try:
+        runs = await asyncio.gather(*(
+            run_crew(name, crew_class, crew_inputs, verify) for name, (crew_class, crew_inputs) in shared.items()
+        ))
+    finally:
+        await http_pool.aclose()
+    comparison = {
+        "run_at": time.time(),
+        "wall_seconds": time.perf_counter() - started,
+        "runs": [asdict(run) for run in runs],
+        "cache": cache.report(),
+        "limiter": "\n".join(f"{model}: {limiter.report()}" for model, limiter in limiters.items()),
+        "http_clients_shared": http_pool.attached,
+    }
+    os.makedirs(output_root, exist_ok=True)
+    with open(os.path.join(output_root, REPORT_FILE), "w", encoding="utf-8") as f:
+        json.dump(comparison, f, indent=2)
+    return comparison
+
+
+def format_report(comparison: dict[str, Any]) -> str:
+    runs = comparison["runs"]
+    sequential = sum(run["wall_seconds"] for run in runs)
+    lines = [
+        f"Crews run concurrently in {comparison['wall_seconds']:.1f}s "
+        f"({sequential:.1f}s one after the other; {comparison['http_clients_shared']} provider clients "
+        f"on one HTTP pool)",
+        f"  {'crew':<16}  {'status':<9}  {'wall s':>7}  {'llm s':>7}  {'queued s':>8}  {'calls':>5}  "
+        f"{'cached':>6}  {'tokens':>8}  {'tests':>5}",
+    ]
+    for run in runs:
+        if run["error"]:
+            status = "error"
+        elif run["verified"] is None:
+            status = "done"
+        else:
+            status = "verified" if run["verified"] else "failed"
+        lines.append(
+            f"  {run['crew']:<16}  {status:<9}  {run['wall_seconds']:7.1f}  {run['llm_seconds']:7.1f}  "
+            f"{run['queued_seconds']:8.1f}  {run['llm_calls']:5}  {run['cache_hits']:6}  "
+            f"{run['prompt_tokens'] + run['completion_tokens']:8}  {run['tests_run']:5}"
+        )
+    tasks = list(dict.fromkeys(task for run in runs for task in run["tasks"]))
+    if tasks:
+        lines.append("")
+        lines.append("  " + f"{'task wall s':<16}" + "".join(f"  {run['crew']:>16}" for run in runs))
+        for task in tasks:
+            cells = "".join(
+                f"  {run['tasks'][task]:16.1f}" if task in run["tasks"] else f"  {'-':>16}" for run in runs
+            )
+            lines.append(f"  {task:<16}{cells}")
+    for run in runs:
+        if run["error"]:
+            lines.append(f"  {run['crew']}: {run['error']}")
+    lines += [comparison["cache"], comparison["limiter"]]
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """
+    Run several crews concurrently on shared resources and compare them.
+    """
+    parser = argparse.ArgumentParser(prog="orchestrate")
+    parser.add_argument("--crew", action="append", required=True,
+                        help="crew package, module:Class or config directory; repeat for each crew")
+    parser.add_argument("--spec", help="JSON/YAML spec with requirements, module_name and class_name for every crew; "
+                                       "default: each crew package's own inputs from its main.py")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="root for the per-crew output directories")
+    parser.add_argument("--no-verify", dest="verify", action="store_false", help="skip compiling and testing")
+    parser.add_argument("--max-connections", type=int, default=HTTPPool().max_connections,
+                        help="connections in the shared HTTP pool")
+    args = parser.parse_args(sys.argv[1:])
+
+    if not args.spec and any(os.path.isdir(name) for name in args.crew):
+        parser.error("--spec is required for a crew given as a config directory")
+    crews = {crew_name(name): load_crew_class(name) for name in args.crew}
+    spec = load_spec(args.spec) if args.spec else None
+    inputs = {name: spec or default_inputs(crew_class) for name, crew_class in crews.items()}
+    comparison = asyncio.run(orchestrate(
+        crews, inputs, args.output, verify=args.verify, http_pool=HTTPPool(max_connections=args.max_connections)
+    ))
+    print(format_report(comparison))
+    if not all(run["ok"] for run in comparison["runs"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Prompt assembly: compact the messages of every LLM call before sending.
+
+crewAI renders each agent's goal and backstory into the system prompt, the
+task description into the user prompt, and appends upstream task outputs
+as context, so large shared inputs such as ``{requirements}`` tend to reach
+the model several times per call. :class:`PromptAssembler` runs between the
+agent and the provider (inside :class:`~crew_kit.llm.CachedLLM`, before
+the cache key is computed) and
+
+- keeps the first copy of any repeated block of lines and replaces later
+  copies with a short marker, so shared inputs are sent once;
+- optionally replaces upstream Python context with an outline of its
+  imports, signatures and docstrings plus a pointer to the file on disk.
+
+Which tasks receive an outline instead of the full upstream output is set
+in ``config/prompts.yaml``.
+"""
+import ast
+from dataclasses import dataclass
+from typing import Any
+
+import yaml
+
+CONTEXT_MARKER = "This is the context you're working with:\n"
+# crewAI joins several upstream outputs with this divider, and the agent's
+# prompt template continues after the context with "Begin!"
+CONTEXT_DIVIDER = "\n\n----------\n\n"
+CONTEXT_END = "\n\nBegin!"
+CONTEXT_MODES = ("full", "outline")
+
+# Only runs of already-sent lines at least this long are collapsed, so short
+# repeated code lines (returns, decorators, blank lines) stay untouched.
+MIN_BLOCK_CHARS = 200
+# Lines shorter than this never start or extend a repeated block.
+MIN_LINE_CHARS = 20
+
+OMITTED = "[{lines} repeated lines omitted; see above]"
+
+
+def load_prompt_config(path: str) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def message_chars(messages: str | list[dict[str, Any]]) -> int:
+    if isinstance(messages, str):
+        return len(messages)
+    return sum(len(str(m.get("content") or "")) for m in messages)
+
+
+def _stub(node: ast.AST) -> None:
+    """Reduce function bodies to their docstring (or ``...``), recursively."""
+    for child in getattr(node, "body", []):
+        if isinstance(child, ast.ClassDef):
+            _stub(child)
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            doc = ast.get_docstring(child)
+            child.body = [ast.Expr(ast.Constant(doc))] if doc else [ast.Expr(ast.Constant(...))]
+    if isinstance(node, ast.ClassDef):
+        node.body = [
+            child for child in node.body
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+            or (isinstance(child, ast.Expr) and isinstance(getattr(child, "value", None), ast.Constant))
+            or isinstance(child, (ast.Assign, ast.AnnAssign))
+        ] or [ast.Expr(ast.Constant(...))]
+
+
+def python_outline(source: str) -> str | None:
+    """Signatures, docstrings and top-level statements of a Python module.
+
+    Returns ``None`` when ``source`` is not a Python module (invalid syntax,
+    or prose that happens to parse but defines nothing).
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+    if not any(isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+               for node in tree.body):
+        return None
+    # Module-level code that does work (calls, loops, launching a UI) is dropped
+    tree.body = [
+        node for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.AsyncFunctionDef,
+                             ast.ClassDef, ast.Assign, ast.AnnAssign))
+        or (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant))
+    ]
+    _stub(tree)
+    return ast.unparse(tree)
+
+
+@dataclass
+class AssembledPrompt:
+    messages: str | list[dict[str, Any]]
+    original_chars: int
+    chars: int
+
+    @property
+    def saved_chars(self) -> int:
+        return self.original_chars - self.chars
+
+
+class PromptAssembler:
+    """Deduplicates shared inputs and compacts upstream context per task."""
+
+    def __init__(self, context: dict[str, str] | None = None, min_block_chars: int = MIN_BLOCK_CHARS):
+        for task, mode in (context or {}).items():
+            if mode not in CONTEXT_MODES:
+                raise ValueError(f"Unknown context mode '{mode}' for {task}, expected one of {CONTEXT_MODES}.")
+        self.context = context or {}
+        self.min_block_chars = min_block_chars
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "PromptAssembler":
+        return cls(
+            context=config.get("context"),
+            min_block_chars=config.get("min_block_chars", MIN_BLOCK_CHARS),
+        )
+
+    def assemble(self, messages: str | list[dict[str, Any]], task: Any = None) -> AssembledPrompt:
+        original = message_chars(messages)
+        if isinstance(messages, str):
+            compacted = self._assemble([{"role": "user", "content": messages}], task)[0]["content"]
+        else:
+            compacted = self._assemble(messages, task)
+        return AssembledPrompt(compacted, original, message_chars(compacted))
+
+    def _assemble(self, messages: list[dict[str, Any]], task: Any) -> list[dict[str, Any]]:
+        mode = self.context.get(getattr(task, "name", None) or "", "full")
+        seen: set[str] = set()
+        assembled = []
+        for message in messages:
+            content = message.get("content")
+            if not isinstance(content, str):
+                assembled.append(message)
+                continue
+            if mode == "outline" and message.get("role") == "user":
+                content = self._outline_context(content, task)
+            # Copies keep any provider-specific keys; crewAI's own list is not mutated
+            assembled.append({**message, "content": self._dedupe(content, seen)})
+        return assembled
+
+    def _dedupe(self, content: str, seen: set[str]) -> str:
+        lines, run = [], []
+
+        def flush() -> None:
+            if sum(len(line) for line in run) >= self.min_block_chars:
+                lines.append(OMITTED.format(lines=len(run)))
+            else:
+                lines.extend(run)
+            run.clear()
+
+        for line in content.split("\n"):
+            key = line.strip()
+            if len(key) >= MIN_LINE_CHARS and key in seen:
+                run.append(line)
+                continue
+            flush()
+            lines.append(line)
+            if len(key) >= MIN_LINE_CHARS:
+                seen.add(key)
+        flush()
+        return "\n".join(lines)
+
+    def _outline_context(self, content: str, task: Any) -> str:
+        head, marker, context = content.partition(CONTEXT_MARKER)
+        if not marker:
+            return content
+        upstream = getattr(task, "context", None)
+        files = [t.output_file for t in upstream if t.output_file] if isinstance(upstream, list) else []
+        body, end, tail = context.partition(CONTEXT_END)
+        parts = []
+        for part in body.split(CONTEXT_DIVIDER):
+            outline = python_outline(part.strip())
+            if outline is None:
+                parts.append(part)
+            else:
+                source = f"Outline of {', '.join(files)}; the full source is on disk" if files else "Outline only"
+                parts.append(f"# {source}.\n{outline}")
+        return head + marker + CONTEXT_DIVIDER.join(parts) + end + tail
@@ -0,0 +1,375 @@
+"""Token-bucket rate limiting and concurrency governance for provider calls.
+
+Every agent in a crew shares one provider quota. :class:`RateLimiter` holds a
+requests-per-minute and a tokens-per-minute bucket, caps the number of calls
+in flight and backs off adaptively when the provider still answers 429.
+Agents are mapped to priority lanes: a lane with a ``reserve`` may only draw
+on a bucket while more than that fraction of it is left, so lower-priority
+agents yield to the ones on the critical path.
+
+Bucket state lives in memory by default. With ``state_file`` it lives in a
+JSON file guarded by an exclusive file lock, so several crew processes on
+one machine share a single budget.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import random
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+import yaml
+
+T = TypeVar("T")
+
+# Refill checks are re-evaluated at least this often so other processes'
+# consumption and backoff decisions are picked up while waiting.
+MAX_POLL_SECONDS = 1.0
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True if ``error`` (or anything it wraps) is a provider 429.
+
+    Only the status code and the exception type count: a message that merely
+    mentions 429, a model or request id for instance, is not a rate limit.
+    """
+    while error is not None:
+        if getattr(error, "status_code", None) == 429 or "RateLimit" in type(error).__name__:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def estimate_tokens(messages: str | list[dict[str, Any]]) -> int:
+    """Rough prompt size in tokens (~4 characters per token)."""
+    if isinstance(messages, str):
+        return len(messages) // 4 + 1
+    return sum(len(str(m.get("content") or "")) for m in messages) // 4 + 1
+
+
+def load_limits(path: str) -> dict[str, Any]:
+    """Read a ``limits.yaml`` file into a :meth:`RateLimiter.from_config` dict."""
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+@dataclass
+class BackoffPolicy:
+    initial_seconds: float = 1.0
+    max_seconds: float = 60.0
+    max_retries: int = 5
+    # Refill-rate multiplier applied after a 429, and per success until 1.0
+    decrease_factor: float = 0.5
+    recovery_factor: float = 1.1
+
+    def delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.max_seconds, self.initial_seconds * 2**attempt))
+
+
+@dataclass
+class Lane:
+    name: str
+    # Fraction of each bucket this lane must leave untouched for higher lanes
+    reserve: float = 0.0
+
+
+@dataclass
+class CallStats:
+    """What one governed call cost beyond its own latency."""
+
+    queued_seconds: float = 0.0
+    retries: int = 0
+
+
+@dataclass
+class LaneStats:
+    requests: int = 0
+    tokens: int = 0
+    waited_seconds: float = 0.0
+    retries: int = 0
+
+
+class _MemoryState:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def locked(self) -> Iterator[dict[str, float]]:
+        with self._lock:
+            yield self._data
+
+
+class _FileState:
+    """Bucket state in a JSON file, serialised across processes with flock."""
+
+    def __init__(self, path: str):
+        import fcntl  # POSIX only; the in-memory state needs no file locking
+
+        self._fcntl = fcntl
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @contextlib.contextmanager
+    def locked(self) -> Iterator[dict[str, float]]:
+        with self._lock, open(self.path + ".lock", "a") as lock_file:
+            self._fcntl.flock(lock_file, self._fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        data = json.load(f)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    data = {}
+                yield data
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp, self.path)
+            finally:
+                self._fcntl.flock(lock_file, self._fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """Shared RPM/TPM token buckets with priority lanes and adaptive backoff."""
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        max_concurrency: int | None = None,
+        lanes: dict[str, Lane] | None = None,
+        backoff: BackoffPolicy | None = None,
+        state_file: str | None = None,
+    ):
+        for name, value in (("requests_per_minute", requests_per_minute), ("tokens_per_minute", tokens_per_minute)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive.")
+        self.capacity = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self.max_concurrency = max_concurrency
+        self.lanes = lanes or {}
+        self.backoff = backoff or BackoffPolicy()
+        self.state_file = state_file
+        self.stats: dict[str, LaneStats] = {}
+        self._state = _FileState(state_file) if state_file else _MemoryState()
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        # asyncio semaphores are bound to the loop they are first used on
+        self._async_slots: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> "RateLimiter":
+        return cls(
+            requests_per_minute=config.get("requests_per_minute"),
+            tokens_per_minute=config.get("tokens_per_minute"),
+            max_concurrency=config.get("max_concurrency"),
+            lanes={
+                name: Lane(name, **(lane or {}))
+                for name, lane in (config.get("lanes") or {}).items()
+            },
+            backoff=BackoffPolicy(**(config.get("backoff") or {})),
+            state_file=config.get("state_file"),
+        )
+
+    @classmethod
+    def from_yaml(cls, path: str) -> "RateLimiter":
+        return cls.from_config(load_limits(path))
+
+    # === Buckets ===
+    def _refill(self, data: dict[str, float], now: float) -> None:
+        factor = data.setdefault("factor", 1.0)
+        elapsed = max(0.0, now - data.get("updated", now))
+        for bucket, capacity in self.capacity.items():
+            if capacity is None:
+                continue
+            level = data.get(bucket, capacity)
+            data[bucket] = min(capacity, level + elapsed * capacity / 60.0 * factor)
+        data["updated"] = now
+
+    def _try_take(self, lane: Lane, costs: dict[str, float]) -> float:
+        """Take ``costs`` if the lane may; otherwise return seconds to wait."""
+        with self._state.locked() as data:
+            now = time.time()
+            self._refill(data, now)
+            wait = max(0.0, data.get("cooldown_until", 0.0) - now)
+            for bucket, cost in costs.items():
+                capacity = self.capacity[bucket]
+                if capacity is None:
+                    continue
+                reserve = lane.reserve * capacity
+                # Oversized calls only need a full (unreserved) bucket
+                need = reserve + min(cost, capacity - reserve)
+                if data[bucket] < need:
+                    rate = capacity / 60.0 * data["factor"]
+                    wait = max(wait, (need - data[bucket]) / rate)
+            if wait > 0:
+                return wait
+            for bucket, cost in costs.items():
+                if self.capacity[bucket] is not None:
+                    data[bucket] -= cost
+            return 0.0
+
+    def _lane(self, lane: str | None) -> Lane:
+        return self.lanes.get(lane or "", Lane(lane or "-"))
+
+    def _record(self, lane: str | None, **deltas: float) -> None:
+        with self._stats_lock:
+            stats = self.stats.setdefault(lane or "-", LaneStats())
+            for name, delta in deltas.items():
+                setattr(stats, name, getattr(stats, name) + delta)
+
+    def acquire(self, lane: str | None = None, tokens: int = 0) -> float:
+        """Block until ``lane`` may send one request of ``tokens``; return seconds waited."""
+        costs = {"requests": 1, "tokens": tokens}
+        started = time.monotonic()
+        while (wait := self._try_take(self._lane(lane), costs)) > 0:
+            time.sleep(min(wait, MAX_POLL_SECONDS))
+        waited = time.monotonic() - started
+        self._record(lane, requests=1, tokens=tokens, waited_seconds=waited)
+        return waited
+
+    async def aacquire(self, lane: str | None = None, tokens: int = 0) -> float:
+        costs = {"requests": 1, "tokens": tokens}
+        started = time.monotonic()
+        while (wait := self._try_take(self._lane(lane), costs)) > 0:
+            await asyncio.sleep(min(wait, MAX_POLL_SECONDS))
+        waited = time.monotonic() - started
+        self._record(lane, requests=1, tokens=tokens, waited_seconds=waited)
+        return waited
+
+    def settle(self, lane: str | None, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the real usage of a call is known."""
+        if self.capacity["tokens"] is None or actual == estimated:
+            return
+        with self._state.locked() as data:
+            self._refill(data, time.time())
+            data["tokens"] -= actual - estimated
+        self._record(lane, tokens=actual - estimated)
+
+    # === Adaptive backoff ===
+    def throttled(self, delay: float) -> None:
+        """The provider rejected a call: slow every lane down and pause."""
+        with self._state.locked() as data:
+            now = time.time()
+            self._refill(data, now)
+            data["factor"] = max(0.05, data["factor"] * self.backoff.decrease_factor)
+            data["cooldown_until"] = max(data.get("cooldown_until", 0.0), now + delay)
+
+    def succeeded(self) -> None:
+        with self._state.locked() as data:
+            self._refill(data, time.time())
+            data["factor"] = min(1.0, data["factor"] * self.backoff.recovery_factor)
+
+    @property
+    def factor(self) -> float:
+        with self._state.locked() as data:
+            return data.get("factor", 1.0)
+
+    # === Governed calls ===
+    @contextlib.contextmanager
+    def _slot(self) -> Iterator[None]:
+        if self._slots is None:
+            yield
+            return
+        with self._slots:
+            yield
+
+    @contextlib.asynccontextmanager
+    async def _aslot(self) -> AsyncIterator[None]:
+        if self.max_concurrency is None:
+            yield
+            return
+        loop = asyncio.get_running_loop()
+        with self._stats_lock:
+            slots = self._async_slots.get(loop)
+            if slots is None:
+                slots = self._async_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        # Cancelled while waiting: nothing was taken, so nothing leaks
+        async with slots:
+            yield
+
+    def submit(
+        self,
+        fn: Callable[[], T],
+        lane: str | None = None,
+        tokens: int = 0,
+        usage: Callable[[], int] | None = None,
+        stats: CallStats | None = None,
+    ) -> T:
+        """Run ``fn`` within the limits, retrying rate-limit errors with backoff.
+
+        ``usage`` returns the tokens actually consumed so far; when given, the
+        token bucket is corrected by the difference from the estimate. ``stats``
+        accumulates the time this call spent queued and its retries.
+        """
+        stats = stats or CallStats()
+        started = time.monotonic()
+        with self._slot():
+            stats.queued_seconds += time.monotonic() - started
+            for attempt in range(self.backoff.max_retries + 1):
+                stats.queued_seconds += self.acquire(lane, tokens)
+                before = usage() if usage else 0
+                try:
+                    result = fn()
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt == self.backoff.max_retries:
+                        raise
+                    delay = self.backoff.delay(attempt)
+                    self.throttled(delay)
+                    self._record(lane, retries=1)
+                    stats.retries += 1
+                    continue
+                self.succeeded()
+                if usage:
+                    self.settle(lane, tokens, usage() - before)
+                return result
+        raise AssertionError("unreachable")
+
+    async def asubmit(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        lane: str | None = None,
+        tokens: int = 0,
+        usage: Callable[[], int] | None = None,
+        stats: CallStats | None = None,
+    ) -> T:
+        # The concurrency cap applies to the calls on each event loop
+        stats = stats or CallStats()
+        started = time.monotonic()
+        async with self._aslot():
+            stats.queued_seconds += time.monotonic() - started
+            for attempt in range(self.backoff.max_retries + 1):
+                stats.queued_seconds += await self.aacquire(lane, tokens)
+                before = usage() if usage else 0
+                try:
+                    result = await fn()
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt == self.backoff.max_retries:
+                        raise
+                    delay = self.backoff.delay(attempt)
+                    self.throttled(delay)
+                    self._record(lane, retries=1)
+                    stats.retries += 1
+                    continue
+                self.succeeded()
+                if usage:
+                    self.settle(lane, tokens, usage() - before)
+                return result
+        raise AssertionError("unreachable")
+
+    def report(self) -> str:
+        lines = [f"Rate limiter (rate factor {self.factor:.2f}):"]
+        for lane, s in sorted(self.stats.items()):
+            lines.append(
+                f"  {lane}: {s.requests} requests, {s.tokens} tokens, "
+                f"{s.waited_seconds:.1f}s queued, {s.retries} retries"
+            )
+        return "\n".join(lines)
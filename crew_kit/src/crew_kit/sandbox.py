@@ -0,0 +1,378 @@
+"""Warm, reusable local sandboxes for the engineers' code execution.
+
+crewAI's "safe" code execution starts a fresh Docker container for every
+snippet an agent runs. A :class:`SandboxPool` instead keeps a few warm
+Python processes ("zygotes") that have already imported the configured
+modules. Each run forks a child from a zygote, applies resource limits
+(CPU seconds, address space, file size), runs the code in a scratch
+directory where the generated ``output/`` is mounted, and is killed when
+it exceeds its wall-clock timeout. The zygote itself never runs agent code,
+so resetting a sandbox between leases only means emptying its scratch
+directory.
+
+These sandboxes isolate runs from each other and from the crew process and
+bound their resources; unlike a container they are not a security boundary.
+
+Run as a script, this module is the zygote itself.
+"""
+import atexit
+import contextlib
+import itertools
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from typing import Any
+
+DEFAULT_PRELOAD = ("json", "sqlite3", "datetime", "decimal", "unittest")
+# Name of the mount inside each scratch directory
+MOUNT_NAME = "output"
+
+
+class SandboxError(RuntimeError):
+    """Raised when a sandbox process dies or cannot be started."""
+
+
+def load_sandbox_config(path: str) -> dict[str, Any]:
+    import yaml
+
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+@dataclass
+class SandboxLimits:
+    timeout_seconds: float = 120.0
+    cpu_seconds: int = 120
+    memory_mb: int = 1024
+    max_file_mb: int = 64
+    max_output_chars: int = 20000
+
+
+@dataclass
+class ExecutionResult:
+    exit_code: int
+    stdout: str
+    stderr: str
+    seconds: float
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0 and not self.timed_out
+
+    def format(self) -> str:
+        """Tool output for the agent: status line, then stdout and stderr."""
+        if self.timed_out:
+            status = f"Timed out after {self.seconds:.1f}s"
+        else:
+            status = f"Exit code {self.exit_code} after {self.seconds:.1f}s"
+        parts = [status]
+        if self.stdout:
+            parts.append(f"stdout:\n{self.stdout}")
+        if self.stderr:
+            parts.append(f"stderr:\n{self.stderr}")
+        return "\n".join(parts)
+
+
+@dataclass
+class PoolStats:
+    runs: int = 0
+    cold_starts: int = 0
+    restarts: int = 0
+    timeouts: int = 0
+    lease_wait_seconds: float = 0.0
+    run_seconds: float = 0.0
+
+
+class Sandbox:
+    """One warm zygote process and its scratch directory."""
+
+    def __init__(self, workdir: str, mount: str, limits: SandboxLimits, preload: tuple[str, ...]):
+        self.workdir = workdir
+        self.mount = os.path.abspath(mount)
+        self.limits = limits
+        self.preload = preload
+        self._process: subprocess.Popen | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    @property
+    def pid(self) -> int | None:
+        return self._process.pid if self._process else None
+
+    def start(self) -> None:
+        os.makedirs(self.workdir, exist_ok=True)
+        os.makedirs(self.mount, exist_ok=True)
+        self.reset()
+        config = {"preload": list(self.preload), "limits": asdict(self.limits)}
+        self._process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), json.dumps(config)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=self.workdir,
+            text=True,
+        )
+        ready = self._process.stdout.readline()
+        if not ready:
+            raise SandboxError("Sandbox process exited during startup.")
+
+    def reset(self) -> None:
+        """Empty the scratch directory and re-create the ``output/`` mount."""
+        for name in os.listdir(self.workdir):
+            path = os.path.join(self.workdir, name)
+            if os.path.islink(path) or not os.path.isdir(path):
+                os.remove(path)
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+        os.symlink(self.mount, os.path.join(self.workdir, MOUNT_NAME))
+
+    def run(self, code: str, timeout: float | None = None) -> ExecutionResult:
+        if not self.alive:
+            raise SandboxError("Sandbox is not running.")
+        request = {"code": code, "timeout": timeout or self.limits.timeout_seconds, "mount": self.mount}
+        try:
+            self._process.stdin.write(json.dumps(request) + "\n")
+            self._process.stdin.flush()
+            reply = self._process.stdout.readline()
+        except (BrokenPipeError, OSError) as e:
+            raise SandboxError(f"Sandbox process died: {e}") from e
+        if not reply:
+            raise SandboxError("Sandbox process died while running code.")
+        return ExecutionResult(**json.loads(reply))
+
+    def close(self) -> None:
+        if self._process is not None:
+            with contextlib.suppress(OSError):
+                self._process.stdin.close()
+            with contextlib.suppress(subprocess.TimeoutExpired):
+                self._process.wait(timeout=2)
+            if self._process.poll() is None:
+                self._process.kill()
+                self._process.wait()
+            self._process = None
+
+
+class SandboxPool:
+    """A bounded set of warm sandboxes that callers lease one at a time."""
+
+    def __init__(
+        self,
+        size: int = 2,
+        mount: str = MOUNT_NAME,
+        limits: SandboxLimits | None = None,
+        preload: tuple[str, ...] | list[str] = DEFAULT_PRELOAD,
+        root: str | None = None,
+    ):
+        if size < 1:
+            raise ValueError("Sandbox pool size must be at least 1.")
+        self.size = size
+        self.mount = mount
+        self.limits = limits or SandboxLimits()
+        self.preload = tuple(preload)
+        self.root = root
+        self.stats = PoolStats()
+        self._idle: queue.Queue[Sandbox] = queue.Queue()
+        self._created = 0
+        self._names = itertools.count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any], **overrides: Any) -> "SandboxPool":
+        limits = SandboxLimits(**{
+            name: config[name] for name in SandboxLimits.__dataclass_fields__ if name in config
+        })
+        options = {
+            "size": config.get("pool_size", 2),
+            "preload": config.get("preload") or DEFAULT_PRELOAD,
+            "limits": limits,
+        }
+        return cls(**{**options, **overrides})
+
+    def _new_sandbox(self) -> Sandbox:
+        if self.root is None:
+            self.root = tempfile.mkdtemp(prefix="crew-sandbox-")
+            atexit.register(self.close)
+        sandbox = Sandbox(
+            os.path.join(self.root, f"sandbox-{next(self._names)}"), self.mount, self.limits, self.preload
+        )
+        sandbox.start()
+        return sandbox
+
+    def start(self) -> None:
+        """Warm every sandbox now instead of on first use."""
+        while True:
+            with self._lock:
+                if self._created >= self.size:
+                    return
+                self._created += 1
+            self._idle.put(self._new_sandbox())
+            self.stats.cold_starts += 1
+
+    @contextlib.contextmanager
+    def lease(self) -> Iterator[Sandbox]:
+        started = time.monotonic()
+        with self._lock:
+            create = self._idle.empty() and self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                sandbox = self._new_sandbox()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            self.stats.cold_starts += 1
+        else:
+            sandbox = self._idle.get()
+        self.stats.lease_wait_seconds += time.monotonic() - started
+        try:
+            yield sandbox
+        finally:
+            try:
+                if not sandbox.alive:
+                    sandbox.close()
+                    sandbox.start()
+                    self.stats.restarts += 1
+                sandbox.reset()
+            except BaseException:
+                # Give up the slot so that the next lease starts a new sandbox
+                sandbox.close()
+                with self._lock:
+                    self._created -= 1
+                raise
+            self._idle.put(sandbox)
+
+    def run(self, code: str, timeout: float | None = None) -> ExecutionResult:
+        with self.lease() as sandbox:
+            result = sandbox.run(code, timeout)
+        self.stats.runs += 1
+        self.stats.timeouts += result.timed_out
+        self.stats.run_seconds += result.seconds
+        return result
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get().close()
+        with self._lock:
+            self._created = 0
+        if self.root is not None:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self.root = None
+
+    def report(self) -> str:
+        s = self.stats
+        return (
+            f"Sandbox pool ({self.size} warm): {s.runs} runs in {s.run_seconds:.1f}s, "
+            f"{s.cold_starts} cold starts, {s.restarts} restarts, {s.timeouts} timeouts, "
+            f"{s.lease_wait_seconds:.1f}s waiting for a sandbox"
+        )
+
+
+# === Zygote (runs in the sandbox process) ===
+def _apply_limits(limits: dict[str, Any]) -> None:
+    import resource
+
+    for name, value in (
+        ("RLIMIT_CPU", limits["cpu_seconds"]),
+        ("RLIMIT_AS", limits["memory_mb"] * 2**20),
+        ("RLIMIT_FSIZE", limits["max_file_mb"] * 2**20),
+    ):
+        with contextlib.suppress(ValueError, OSError):
+            resource.setrlimit(getattr(resource, name), (value, value))
+
+
+def _read_capped(file, limit: int) -> str:
+    file.seek(0)
+    text = file.read(limit + 1).decode("utf-8", "replace")
+    return text if len(text) <= limit else text[:limit] + "\n[output truncated]"
+
+
+def _execute(request: dict[str, Any], limits: dict[str, Any]) -> dict[str, Any]:
+    import signal
+    import traceback
+
+    started = time.monotonic()
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        pid = os.fork()
+        if pid == 0:  # child: run the code, never return
+            exit_code = 1
+            try:
+                os.setsid()
+                # stdin is the zygote's request pipe; the code must not read it
+                devnull = os.open(os.devnull, os.O_RDONLY)
+                os.dup2(devnull, 0)
+                os.dup2(out.fileno(), 1)
+                os.dup2(err.fileno(), 2)
+                _apply_limits(limits)
+                sys.path[:0] = [os.getcwd(), request["mount"]]
+                sys.argv = ["<sandbox>"]
+                exec(compile(request["code"], "<sandbox>", "exec"), {"__name__": "__main__"})
+                exit_code = 0
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except BaseException as e:
+                # Leave the zygote's own frame out of the agent's traceback
+                traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+            finally:
+                with contextlib.suppress(Exception):
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                os._exit(exit_code)
+
+        deadline = started + request["timeout"]
+        timed_out = False
+        while True:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            if time.monotonic() >= deadline:
+                timed_out = True
+                with contextlib.suppress(ProcessLookupError):
+                    os.killpg(pid, signal.SIGKILL)
+                _, status = os.waitpid(pid, 0)
+                break
+            time.sleep(0.005)
+        # Kill anything the run left behind in its process group
+        with contextlib.suppress(ProcessLookupError, PermissionError):
+            os.killpg(pid, signal.SIGKILL)
+        return {
+            "exit_code": os.waitstatus_to_exitcode(status),
+            "stdout": _read_capped(out, limits["max_output_chars"]),
+            "stderr": _read_capped(err, limits["max_output_chars"]),
+            "seconds": time.monotonic() - started,
+            "timed_out": timed_out,
+        }
+
+
+def _serve(config: dict[str, Any]) -> None:
+    import importlib
+
+    # Running as a script put the package directory on the path; agent code
+    # must not import the crew's own modules by accident.
+    sys.path.pop(0)
+    for name in config["preload"]:
+        with contextlib.suppress(ImportError):
+            importlib.import_module(name)
+    protocol = sys.stdout
+    protocol.write("ready\n")
+    protocol.flush()
+    for line in sys.stdin:
+        reply = _execute(json.loads(line), config["limits"])
+        protocol.write(json.dumps(reply) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    _serve(json.loads(sys.argv[1]))
@@ -0,0 +1,195 @@
+"""Startup benchmark: how long each CLI entry point of a crew takes to import.
+
+Every ``[project.scripts]`` entry point of the crew's package is imported ``repeat`` times in a
+fresh interpreter with ``-X importtime``; the median wall time, the import
+time and the heaviest top-level packages are recorded, along with whether
+crewAI was loaded (it should only be loaded once a crew is built, which the
+``crew()`` probe measures). Each run is appended to
+``output/.metrics/startup.jsonl`` and compared with the previous one.
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from crew_kit.metrics import METRICS_DIR, REGRESSION_THRESHOLD
+
+HISTORY_FILE = os.path.join(METRICS_DIR, "startup.jsonl")
+# Startup times are small; ignore jitter below this
+MIN_REGRESSION_SECONDS = 0.05
+HEAVIEST_SHOWN = 3
+
+
+def crew_probe(crew_class: type) -> tuple[str, str]:
+    """Not an entry point: what the entry points defer until a crew is built."""
+    name = crew_class.__name__
+    return "crew()", f"from {crew_class.__module__} import {name}; {name}().crew()"
+
+
+@dataclass
+class StartupResult:
+    name: str
+    code: str
+    seconds: float
+    import_seconds: float
+    crewai_loaded: bool
+    # Top-level packages that took longest to import, in seconds
+    heaviest: dict[str, float] = field(default_factory=dict)
+
+
+def _source_root(package: str) -> str:
+    """The directory ``package`` is imported from."""
+    return os.path.dirname(os.path.dirname(os.path.abspath(importlib.import_module(package).__file__)))
+
+
+def entry_points(package: str) -> dict[str, str]:
+    """``{script: "module:function"}`` for the console scripts of ``package``."""
+    from importlib.metadata import entry_points as installed
+
+    scripts = {ep.name: ep.value for ep in installed(group="console_scripts") if ep.module.startswith(package)}
+    if scripts:
+        return scripts
+    # Running from a source checkout: read them from pyproject.toml
+    import tomllib
+
+    pyproject = os.path.join(_source_root(package), os.pardir, "pyproject.toml")
+    with open(pyproject, "rb") as f:
+        return dict(tomllib.load(f)["project"]["scripts"])
+
+
+def _probe_code(target: str) -> str:
+    module, _, attr = target.partition(":")
+    return f"from {module} import {attr}" if attr else f"import {module}"
+
+
+def parse_importtime(stderr: str) -> tuple[float, dict[str, float]]:
+    """Total import time and import time per top-level package (``-X importtime``).
+
+    Each module's own time is charged to its top-level package, so a package
+    imported from inside another one is not counted twice.
+    """
+    packages: dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue  # header line
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(own) / 1e6
+    return sum(packages.values()), packages
+
+
+def measure(name: str, code: str, repeat: int = 3, packages: tuple[str, ...] = ()) -> StartupResult:
+    """Run ``code`` in ``repeat`` fresh interpreters; keep the median run."""
+    # Make this package and ``packages`` importable from a source checkout too
+    roots = dict.fromkeys(_source_root(package) for package in (__package__, *packages))
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [*roots, os.environ.get("PYTHONPATH")]))}
+    probe = f"{code}\nimport sys\nprint('crewai' in sys.modules)"
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True, env=env
+        )
+        seconds = time.perf_counter() - started
+        if proc.returncode != 0:
+            raise RuntimeError(f"{name} failed to start:\n{proc.stderr[-2000:]}")
+        runs.append((seconds, proc))
+    seconds, proc = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+    import_seconds, packages = parse_importtime(proc.stderr)
+    heaviest = dict(sorted(packages.items(), key=lambda item: -item[1])[:HEAVIEST_SHOWN])
+    return StartupResult(
+        name=name,
+        code=code,
+        seconds=seconds,
+        import_seconds=import_seconds,
+        crewai_loaded=proc.stdout.strip().splitlines()[-1] == "True",
+        heaviest=heaviest,
+    )
+
+
+def run_benchmark(
+    crew_class: type, scripts: dict[str, str] | None = None, repeat: int = 3, include_crew: bool = True
+) -> list[StartupResult]:
+    package = crew_class.__module__.split(".")[0]
+    probes = [(name, _probe_code(target)) for name, target in sorted((scripts or entry_points(package)).items())]
+    if include_crew:
+        probes.append(crew_probe(crew_class))
+    return [measure(name, code, repeat, (package,)) for name, code in probes]
+
+
+def regressions(
+    current: list[StartupResult], previous: dict[str, Any] | None, threshold: float = REGRESSION_THRESHOLD
+) -> list[str]:
+    """Entry points that start noticeably slower than in ``previous``."""
+    if not previous:
+        return []
+    before = {r["name"]: r for r in previous.get("results", [])}
+    found = []
+    for result in current:
+        old = before.get(result.name, {}).get("seconds", 0)
+        new = result.seconds
+        if old > 0 and new > old * (1 + threshold) and new - old >= MIN_REGRESSION_SECONDS:
+            found.append(f"{result.name}: {old:.2f}s -> {new:.2f}s (+{(new - old) / old:.0%})")
+        if result.crewai_loaded and not before.get(result.name, {}).get("crewai_loaded", True):
+            found.append(f"{result.name}: now imports crewai at startup")
+    return found
+
+
+def load_previous(path: str = HISTORY_FILE) -> dict[str, Any] | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+    return json.loads(lines[-1]) if lines else None
+
+
+def record(results: list[StartupResult], path: str = HISTORY_FILE) -> dict[str, Any]:
+    """Append this run to the history file; return it with its regressions."""
+    run = {
+        "run_at": time.time(),
+        "python": sys.version.split()[0],
+        "results": [asdict(r) for r in results],
+        "regressions": regressions(results, load_previous(path)),
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run) + "\n")
+    return run
+
+
+def format_report(run: dict[str, Any]) -> str:
+    width = max([len(r["name"]) for r in run["results"]] + [11])
+    lines = [f"  {'entry point':<{width}}  {'wall s':>6}  {'import s':>8}  crewai  heaviest imports"]
+    for r in run["results"]:
+        heaviest = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in r["heaviest"].items())
+        lines.append(
+            f"  {r['name']:<{width}}  {r['seconds']:6.2f}  {r['import_seconds']:8.2f}  "
+            f"{'yes' if r['crewai_loaded'] else 'no':>6}  {heaviest}"
+        )
+    for regression in run["regressions"]:
+        lines.append(f"  REGRESSION {regression}")
+    return "\n".join([f"Startup ({run['python']}):", *lines])
+
+
+def main(crew_class: type) -> None:
+    """
+    Benchmark the import time of every entry point of ``crew_class``'s package and compare with the last run.
+    """
+    parser = argparse.ArgumentParser(prog="bench_startup")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per entry point")
+    parser.add_argument("--history", default=HISTORY_FILE, help="JSONL file the results are appended to")
+    parser.add_argument("--no-crew", action="store_true", help="skip the crew() construction probe")
+    args = parser.parse_args(sys.argv[1:])
+
+    run = record(run_benchmark(crew_class, repeat=args.repeat, include_crew=not args.no_crew), args.history)
+    print(format_report(run))
+    if run["regressions"]:
+        sys.exit(1)
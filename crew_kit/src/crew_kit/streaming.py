@@ -0,0 +1,233 @@
+"""Stream task outputs to disk while the model is still generating them.
+
+With streaming on (``CREW_STREAM_OUTPUTS=1``), every agent's provider call
+is made with ``stream=True``. crewAI emits the tokens as stream chunk events,
+and these are delivered in order. :class:`OutputStreams` appends each task's
+final answer to ``<output_file>.partial`` as it arrives, so people and tools
+can follow the work in progress. Subscribers see every new piece of text;
+:class:`SyntaxWatch` syntax-checks a partially generated Python module at
+each new top-level statement, so a broken module is spotted before the task
+finishes. When the task completes, its output file is written to a
+temporary file and renamed into place (:func:`atomic_write`), and the
+partial file is removed. The file is never half-written, streaming or not.
+"""
+import contextlib
+import os
+import tempfile
+import threading
+from collections.abc import Callable
+from typing import Any
+
+FINAL_ANSWER = "Final Answer:"
+PARTIAL_SUFFIX = ".partial"
+STREAM_ENV = "CREW_STREAM_OUTPUTS"
+
+# Errors that more text could still fix, e.g. a docstring not yet closed
+_INCOMPLETE = ("unterminated", "was never closed", "unexpected EOF", "expected an indented block")
+# A line at column 0 starting with these continues the previous statement
+_CONTINUATIONS = ("else", "elif", "except", "finally", ")", "]", "}")
+
+
+def atomic_write(path: str, text: str) -> None:
+    """Write ``text`` to ``path`` by writing a temp file and renaming it."""
+    # A unique name, so concurrent writers of one path never share a temp file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".")
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp)
+        raise
+
+
+def partial_path(output_file: str) -> str:
+    return output_file + PARTIAL_SUFFIX
+
+
+class TaskStream:
+    """The final answer of one task's LLM call, as it is being generated."""
+
+    def __init__(self, task: str, output_file: str, subscribers: list[Callable[["TaskStream", str], None]]):
+        self.task = task
+        self.output_file = output_file
+        self.path = partial_path(output_file)
+        self.subscribers = subscribers
+        self.chunks = 0
+        self._raw = ""
+        self._start: int | None = None
+        self._file = None
+
+    @property
+    def text(self) -> str:
+        """The final answer so far, without the agent's thoughts before it."""
+        return self._raw[self._start:].lstrip() if self._start is not None else ""
+
+    def feed(self, chunk: str) -> None:
+        before = self.text
+        self._raw += chunk
+        self.chunks += 1
+        if self._start is None:
+            marker = self._raw.find(FINAL_ANSWER)
+            if marker < 0:
+                return
+            self._start = marker + len(FINAL_ANSWER)
+        added = self.text[len(before):]
+        if not added:
+            return
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(added)
+        self._file.flush()
+        for subscriber in self.subscribers:
+            subscriber(self, added)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SyntaxWatch:
+    """Syntax-checks partially generated ``.py`` outputs as they stream.
+
+    Everything before a new line at column 0 is a run of complete top-level
+    statements, so a syntax error in it will still be there when the task
+    finishes. Errors that more text could fix are ignored.
+    """
+
+    def __init__(self):
+        self.errors: dict[str, str] = {}
+        self.checks = 0
+        self._checked: dict[TaskStream, int] = {}
+
+    def _boundary(self, text: str, start: int) -> int:
+        """Offset of the last statement-starting line at column 0 after ``start``."""
+        at = len(text)
+        while True:
+            at = text.rfind("\n", start, at)
+            if at < 0:
+                return -1
+            line = text[at + 1:]
+            if not line[:1] or line[:1].isspace() or line[:1] == "#" or "\n" not in line:
+                continue
+            # Not after a decorator: it belongs to the def or class that follows
+            previous = text[:at].rstrip().rpartition("\n")[2]
+            if not line.startswith(_CONTINUATIONS) and not previous.startswith("@"):
+                return at + 1
+
+    def __call__(self, stream: TaskStream, added: str) -> None:
+        if not stream.output_file.endswith(".py") or stream.task in self.errors:
+            return
+        text = stream.text
+        boundary = self._boundary(text, self._checked.get(stream, 0))
+        if boundary <= 0:
+            return
+        self._checked[stream] = boundary
+        self.checks += 1
+        try:
+            compile(text[:boundary], stream.output_file, "exec")
+        except SyntaxError as e:
+            if not any(hint in str(e.msg) for hint in _INCOMPLETE):
+                self.errors[stream.task] = f"line {e.lineno}: {e.msg}"
+        except ValueError as e:
+            self.errors[stream.task] = str(e)
+
+
+class _StreamListener:
+    """Forwards crewAI stream chunk events to every enabled :class:`OutputStreams`.
+
+    Registered on the event bus on first use, like the metrics listener.
+    """
+
+    def __init__(self):
+        from crewai.events import LLMStreamChunkEvent, crewai_event_bus
+
+        self.active: set["OutputStreams"] = set()
+        self.lock = threading.Lock()
+
+        @crewai_event_bus.on(LLMStreamChunkEvent)
+        def on_chunk(source, event):
+            if event.task_id is None or event.tool_call is not None:
+                return
+            with self.lock:
+                targets = list(self.active)
+            for streams in targets:
+                streams.feed(event.task_id, event.chunk)
+
+
+_listener: _StreamListener | None = None
+_listener_lock = threading.Lock()
+
+
+def _get_listener() -> _StreamListener:
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = _StreamListener()
+        return _listener
+
+
+class OutputStreams:
+    """Open task output streams, keyed by crewAI task id."""
+
+    def __init__(self, enabled: bool = False, subscribers: list[Callable[[TaskStream, str], None]] | None = None):
+        self.enabled = enabled
+        self.syntax = SyntaxWatch()
+        self.subscribers = [self.syntax, *(subscribers or [])]
+        self.streams: dict[str, TaskStream] = {}
+        self.tasks_streamed: set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "OutputStreams":
+        return cls(enabled=os.environ.get(STREAM_ENV, "").lower() in ("1", "true", "on", "yes"))
+
+    def subscribe(self, subscriber: Callable[[TaskStream, str], None]) -> None:
+        """Call ``subscriber(stream, added_text)`` for every piece of streamed output."""
+        self.subscribers.append(subscriber)
+
+    def begin(self, task: Any) -> TaskStream | None:
+        """Start streaming ``task``'s next LLM call to its partial output file."""
+        output_file = getattr(task, "output_file", None)
+        if not self.enabled or not output_file:
+            return None
+        listener = _get_listener()
+        with listener.lock:
+            listener.active.add(self)
+        stream = TaskStream(getattr(task, "name", None) or "-", output_file, self.subscribers)
+        with self._lock:
+            previous = self.streams.pop(str(task.id), None)
+            self.streams[str(task.id)] = stream
+        if previous is not None:
+            previous.close()
+        return stream
+
+    def feed(self, task_id: str, chunk: str) -> None:
+        with self._lock:
+            stream = self.streams.get(task_id)
+        if stream is not None:
+            stream.feed(chunk)
+            self.tasks_streamed.add(stream.task)
+
+    def end(self, stream: TaskStream) -> None:
+        """The call is over; the partial file stays until the output is saved."""
+        stream.close()
+        with self._lock:
+            for task_id, open_stream in list(self.streams.items()):
+                if open_stream is stream:
+                    del self.streams[task_id]
+
+    def report(self) -> str:
+        lines = [f"Output streaming: {len(self.tasks_streamed)} tasks streamed to disk, "
+                 f"{self.syntax.checks} partial syntax checks"]
+        for task, error in sorted(self.syntax.errors.items()):
+            lines.append(f"  {task}: syntax error while streaming, {error}")
+        return "\n".join(lines)
+
+
+def remove_partial(output_file: str) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(partial_path(output_file))
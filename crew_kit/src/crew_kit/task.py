@@ -0,0 +1,32 @@
+"""crewAI task whose output file is replaced atomically.
+
+crewAI opens ``output_file`` for writing and writes the whole output into
+it, so a reader (or a crash) can see a truncated file. :class:`AtomicOutputTask`
+writes a temporary file and renames it into place, then removes the
+``.partial`` file that :mod:`~crew_kit.streaming` wrote while the output
+was being generated.
+"""
+import json
+from pathlib import Path
+from typing import Any
+
+from crewai import Task
+
+from crew_kit.streaming import atomic_write, remove_partial
+
+
+class AtomicOutputTask(Task):
+    def _save_file(self, result: dict[str, Any] | str | Any) -> None:
+        if self.output_file is None:
+            raise ValueError("output_file is not set.")
+        path = Path(self.output_file).expanduser().resolve()
+        if self.create_directory:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        elif not path.parent.exists():
+            raise RuntimeError(f"Directory {path.parent} does not exist and create_directory is False")
+        text = json.dumps(result, ensure_ascii=False, indent=2) if isinstance(result, dict) else str(result)
+        try:
+            atomic_write(str(path), text)
+        except OSError as e:
+            raise RuntimeError(f"Failed to save output file: {e}") from e
+        remove_partial(self.output_file)
@@ -0,0 +1,34 @@
+from typing import Any, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, ConfigDict, Field
+
+from crew_kit.sandbox import SandboxPool
+
+
+class CodeExecutionInput(BaseModel):
+    """Input schema for SandboxCodeTool."""
+    code: str = Field(
+        ...,
+        description="Python 3 code to run. Print anything you want to see; the generated modules in output/ can be imported.",
+    )
+
+
+class SandboxCodeTool(BaseTool):
+    """Runs agent code in a warm local sandbox leased from a SandboxPool."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str = "Code Interpreter"
+    description: str = (
+        "Run Python 3 code in an isolated local sandbox and get back its exit code, stdout and stderr. "
+        "The generated project files are available under output/ and importable by module name."
+    )
+    args_schema: Type[BaseModel] = CodeExecutionInput
+    pool: Any = Field(exclude=True)
+    # Results depend on the files in output/, which change between calls
+    cache_function: Any = lambda _args=None, _result=None: False
+
+    def _run(self, code: str) -> str:
+        pool: SandboxPool = self.pool
+        return pool.run(code).format()
@@ -0,0 +1,116 @@
+from typing import Any, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, ConfigDict, Field
+
+from crew_kit.codeintel import SymbolIndex
+
+# Results depend on the files in output/, which change between calls; the
+# symbol index does its own caching, invalidated by mtime
+_NEVER_CACHE = lambda _args=None, _result=None: False  # noqa: E731
+
+
+class CodeSearchInput(BaseModel):
+    """Input schema for CodeSearchTool."""
+    query: str = Field(
+        ...,
+        description="A class, function or method name (e.g. Account.buy or withdraw), or text to find in the code.",
+    )
+
+
+class CodeSearchTool(BaseTool):
+    """Finds symbols and matching lines in the generated modules."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str = "Search Code"
+    description: str = (
+        "Search the generated Python modules under output/. Returns the classes, functions and methods whose "
+        "name matches, with their file, line range and signature, and the lines of code containing the text. "
+        "Use Read Code to see a symbol's source."
+    )
+    args_schema: Type[BaseModel] = CodeSearchInput
+    index: Any = Field(exclude=True)
+    cache_function: Any = _NEVER_CACHE
+
+    def _run(self, query: str) -> str:
+        index: SymbolIndex = self.index
+        symbols = index.find(query)
+        lines = index.grep(query)
+        if not symbols and not lines:
+            return f"Nothing matches {query!r} in {', '.join(index.paths()) or 'output/ (no modules yet)'}."
+        parts = []
+        if symbols:
+            parts.append("Symbols:\n" + "\n".join(s.format() for s in symbols))
+        if lines:
+            parts.append("Lines:\n" + "\n".join(f"{path}:{number}: {text.strip()}" for path, number, text in lines))
+        return "\n\n".join(parts)
+
+
+class ReadCodeInput(BaseModel):
+    """Input schema for ReadCodeTool."""
+    path: str = Field(..., description="Module path relative to output/, e.g. accounts.py.")
+    symbol: str | None = Field(None, description="Class, function or method to show, e.g. Account.buy.")
+    start_line: int | None = Field(None, description="First line to show, when no symbol is given.")
+    end_line: int | None = Field(None, description="Last line to show, when no symbol is given.")
+
+
+class ReadCodeTool(BaseTool):
+    """Shows a module's outline, one symbol's source or a line range."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str = "Read Code"
+    description: str = (
+        "Read a generated module under output/. With only a path you get its outline: every class, function "
+        "and method with its signature and line range. Add a symbol to get just that symbol's numbered "
+        "source, or start_line and end_line for a range of lines."
+    )
+    args_schema: Type[BaseModel] = ReadCodeInput
+    index: Any = Field(exclude=True)
+    cache_function: Any = _NEVER_CACHE
+
+    def _run(self, path: str, symbol: str | None = None, start_line: int | None = None,
+             end_line: int | None = None) -> str:
+        index: SymbolIndex = self.index
+        try:
+            if symbol is None and start_line is None and end_line is None:
+                return index.outline(path)
+            return index.read(path, symbol, start_line, end_line)
+        except FileNotFoundError:
+            return f"{path} does not exist; modules under output/: {', '.join(index.paths()) or 'none yet'}."
+        except (KeyError, ValueError) as e:
+            return str(e).strip("'\"")
+
+
+class RunTestsInput(BaseModel):
+    """Input schema for RunTestsTool."""
+    targets: list[str] = Field(
+        ...,
+        description="Test files or pytest node ids relative to output/, e.g. test_accounts.py::AccountTest::test_buy.",
+    )
+    keyword: str | None = Field(None, description="Optional pytest -k expression to narrow the selection.")
+
+
+class RunTestsTool(BaseTool):
+    """Runs a pytest selection in the sandbox pool and reports only the failures."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str = "Run Tests"
+    description: str = (
+        "Run selected pytest tests against the generated modules in an isolated sandbox. Returns how many "
+        "tests ran and, for failing ones, their names and tracebacks."
+    )
+    args_schema: Type[BaseModel] = RunTestsInput
+    pool: Any = Field(exclude=True)
+    cache_function: Any = _NEVER_CACHE
+
+    def _run(self, targets: list[str], keyword: str | None = None) -> str:
+        from crew_kit.verify import run_selection
+
+        try:
+            report = run_selection(self.pool, targets, keyword)
+        except ValueError as e:
+            return str(e)
+        return "\n".join(filter(None, [report.summary(), report.feedback()]))
@@ -0,0 +1,34 @@
+from typing import Any, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, ConfigDict, Field
+
+from crew_kit.knowledge import KnowledgeIndex
+
+
+class KnowledgeSearchInput(BaseModel):
+    """Input schema for KnowledgeSearchTool."""
+    query: str = Field(..., description="What you want to know, in a few words or a short question.")
+
+
+class KnowledgeSearchTool(BaseTool):
+    """Returns the top-k chunks of the local knowledge index for a query."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str = "Knowledge Search"
+    description: str = (
+        "Search the project's knowledge files (user preferences, notes, reference material) "
+        "and get back the most relevant passages with their source file."
+    )
+    args_schema: Type[BaseModel] = KnowledgeSearchInput
+    index: Any = Field(exclude=True)
+
+    def _run(self, query: str) -> str:
+        index: KnowledgeIndex = self.index
+        # Cheap when nothing changed: only files whose hash differs are re-embedded
+        index.refresh()
+        hits = index.search(query)
+        if not hits:
+            return "No relevant knowledge found."
+        return "\n\n".join(hit.format() for hit in hits)
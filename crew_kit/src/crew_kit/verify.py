@@ -0,0 +1,267 @@
+"""Generate-compile-test loop that runs after the crew's last task.
+
+:func:`verify` byte-compiles every Python file the crew wrote and runs the
+generated tests in the warm sandbox pool, sharded over its sandboxes.
+:func:`verify_and_repair` turns a failed verification into feedback for the
+one task that has to change and reruns only that task, up to a bounded
+number of times:
+
+- a file that does not compile is regenerated by the task that wrote it;
+- a test file with no tests in it goes back to ``test_task``, since a
+  verification that ran nothing proves nothing;
+- failing tests go back to the backend engineer's ``code_task`` with the
+  failing test names and their tracebacks, never the full test output.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from crewai import Crew, Task
+
+from crew_kit.checkpoint import CheckpointStore, task_input_hash
+from crew_kit.sandbox import MOUNT_NAME, SandboxPool
+
+MAX_REPAIRS = 2
+# Feedback limits, so a broken test file cannot flood the repair prompt
+MAX_FAILURES_SHOWN = 10
+MAX_TRACEBACK_CHARS = 2000
+
+RESULT_MARKER = "@@pytest-result@@"
+
+# Runs inside a sandbox: pytest with a plugin that reports back as JSON
+_PYTEST_SNIPPET = """
+import json, sys
+sys.dont_write_bytecode = True
+import pytest
+
+class _Collector:
+    def __init__(self):
+        self.ids, self.failures = [], []
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, items):
+        self.ids = [item.nodeid for item in items]
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.failures.append({"nodeid": report.nodeid, "when": "collect", "message": str(report.longrepr)})
+
+    def pytest_runtest_logreport(self, report):
+        if report.failed:
+            self.failures.append({"nodeid": report.nodeid, "when": report.when, "message": str(report.longrepr)})
+
+collector = _Collector()
+code = pytest.main(%(args)r, plugins=[collector])
+print(%(marker)r + json.dumps({"exit_code": int(code), "ids": collector.ids, "failures": collector.failures}))
+"""
+
+
+@dataclass
+class FailedTest:
+    nodeid: str
+    when: str
+    message: str
+
+
+@dataclass
+class VerifyReport:
+    # task name -> compiler error for the Python file it wrote
+    compile_errors: dict[str, str] = field(default_factory=dict)
+    failures: list[FailedTest] = field(default_factory=list)
+    tests_run: int = 0
+    seconds: float = 0.0
+    # Set when pytest could not run at all (e.g. the sandbox timed out)
+    error: str | None = None
+
+    @property
+    def no_tests(self) -> bool:
+        """Nothing failed, but no test was collected either."""
+        return self.tests_run == 0 and not self.failures and self.error is None
+
+    @property
+    def ok(self) -> bool:
+        return not self.compile_errors and not self.failures and self.error is None and not self.no_tests
+
+    def feedback(self) -> str:
+        """Failing test names and tracebacks, trimmed for a repair prompt."""
+        lines = []
+        for failure in self.failures[:MAX_FAILURES_SHOWN]:
+            lines.append(f"FAILED {failure.nodeid} ({failure.when}):")
+            lines.append(failure.message[-MAX_TRACEBACK_CHARS:])
+        hidden = len(self.failures) - MAX_FAILURES_SHOWN
+        if hidden > 0:
+            lines.append(f"... and {hidden} more failing tests.")
+        if self.error:
+            lines.append(self.error[-MAX_TRACEBACK_CHARS:])
+        if self.no_tests:
+            lines.append("No tests were collected. The test file must define pytest tests "
+                         "(test_* functions or Test* classes) that exercise the module.")
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        if self.ok:
+            return f"Verification passed: {self.tests_run} tests in {self.seconds:.1f}s"
+        parts = [f"{len(self.compile_errors)} files failed to compile"] if self.compile_errors else []
+        if self.failures:
+            parts.append(f"{len(self.failures)} of {self.tests_run} tests failed")
+        if self.error:
+            parts.append(self.error.strip().splitlines()[-1])
+        if self.no_tests:
+            parts.append("no tests ran")
+        return f"Verification failed: {', '.join(parts)} ({self.seconds:.1f}s)"
+
+
+def compile_errors(files: dict[str, str]) -> dict[str, str]:
+    """Byte-compile each ``{task: path}``; return the errors by task."""
+    errors = {}
+    for task, path in files.items():
+        try:
+            with open(path, encoding="utf-8") as f:
+                compile(f.read(), path, "exec")
+        except FileNotFoundError:
+            errors[task] = f"{path} was not written."
+        except (SyntaxError, ValueError) as e:
+            errors[task] = f"{type(e).__name__}: {e}"
+    return errors
+
+
+def _sandbox_path(pool: SandboxPool, path: str) -> str:
+    relative = os.path.relpath(os.path.abspath(path), os.path.abspath(pool.mount))
+    if relative.startswith(os.pardir):
+        raise ValueError(f"{path} is outside the sandbox mount {pool.mount}.")
+    return os.path.join(MOUNT_NAME, relative)
+
+
+def _pytest(pool: SandboxPool, args: list[str]) -> dict[str, Any]:
+    code = _PYTEST_SNIPPET % {"args": ["-q", "-p", "no:cacheprovider", *args], "marker": RESULT_MARKER}
+    result = pool.run(code)
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    return {"exit_code": result.exit_code, "ids": [], "failures": [], "error": result.format()}
+
+
+def run_tests(pool: SandboxPool, test_file: str) -> VerifyReport:
+    """Run ``test_file`` in the sandbox pool, one shard per sandbox."""
+    started = time.monotonic()
+    target = _sandbox_path(pool, test_file)
+    collected = _pytest(pool, ["--collect-only", target])
+    report = VerifyReport(
+        failures=[FailedTest(**f) for f in collected["failures"]], error=collected.get("error")
+    )
+    ids = collected["ids"]
+    if ids and not report.failures and report.error is None:
+        shards = [ids[i::pool.size] for i in range(min(pool.size, len(ids)))]
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            for result in executor.map(lambda shard: _pytest(pool, shard), shards):
+                report.failures += [FailedTest(**f) for f in result["failures"]]
+                report.error = report.error or result.get("error")
+    report.tests_run = len(ids)
+    report.seconds = time.monotonic() - started
+    return report
+
+
+def run_selection(pool: SandboxPool, targets: list[str], keyword: str | None = None) -> VerifyReport:
+    """Run only ``targets`` (files or node ids under the mount, optionally ``-k keyword``) in one sandbox."""
+    started = time.monotonic()
+    args = []
+    for target in targets:
+        path, separator, rest = target.partition("::")
+        args.append(_sandbox_path(pool, os.path.join(pool.mount, path)) + separator + rest)
+    if keyword:
+        args += ["-k", keyword]
+    result = _pytest(pool, args)
+    return VerifyReport(
+        failures=[FailedTest(**f) for f in result["failures"]],
+        tests_run=len(result["ids"]),
+        seconds=time.monotonic() - started,
+        error=result.get("error"),
+    )
+
+
+def verify(crew: Crew, pool: SandboxPool, test_task: str = "test_task") -> VerifyReport:
+    """Compile every ``.py`` output of ``crew`` and run its generated tests."""
+    started = time.monotonic()
+    files = {t.name: t.output_file for t in crew.tasks if t.output_file and t.output_file.endswith(".py")}
+    report = VerifyReport(compile_errors=compile_errors(files))
+    if test_task in files and test_task not in report.compile_errors:
+        tests = run_tests(pool, files[test_task])
+        report.failures, report.tests_run, report.error = tests.failures, tests.tests_run, tests.error
+    report.seconds = time.monotonic() - started
+    return report
+
+
+def _context(task: Task) -> str:
+    upstream = task.context if isinstance(task.context, list) else []
+    return "\n\n----------\n\n".join(t.output.raw for t in upstream if t.output is not None)
+
+
+def regenerate(task: Task, feedback: str, inputs: dict[str, Any], store: CheckpointStore | None = None) -> None:
+    """Rerun ``task`` alone with ``feedback`` and its current output appended."""
+    try:
+        with open(task.output_file, encoding="utf-8") as f:
+            current = f.read()
+    except (FileNotFoundError, TypeError):
+        current = task.output.raw if task.output else ""
+    # Same task class, so the repaired file is also replaced atomically
+    repair = type(task)(
+        name=task.name,
+        description=(
+            f"{task.description}\n\n"
+            f"Your previous version of {task.output_file} failed verification. "
+            f"Fix it so that it compiles and the tests pass, changing only what is needed.\n"
+            f"{feedback}\n\nPrevious version:\n{current}"
+        ),
+        expected_output=task.expected_output,
+        agent=task.agent,
+        output_file=task.output_file,
+    )
+    task.output = repair.execute_sync(agent=task.agent, context=_context(task) or None)
+    if store is not None:
+        # Its own inputs did not change, so the repair keeps the task's fingerprint;
+        # tasks downstream see a new output hash and rerun on the next incremental run
+        previous = store.load(task.name) or {}
+        store.save(task.name, task_input_hash(task, inputs), task.output, task.output_file,
+                   previous.get("fingerprint"))
+
+
+def verify_and_repair(
+    crew: Crew,
+    inputs: dict[str, Any],
+    pool: SandboxPool,
+    max_repairs: int = MAX_REPAIRS,
+    code_task: str = "code_task",
+    test_task: str = "test_task",
+    store: CheckpointStore | None = None,
+) -> VerifyReport:
+    """Verify the crew's outputs, regenerating the failing task until they pass.
+
+    ``store`` keeps the task checkpoints in step with the repaired files.
+    """
+    tasks = {task.name: task for task in crew.tasks}
+    missing = [name for name in (code_task, test_task) if name not in tasks]
+    if missing:
+        raise ValueError(f"Crew has no {', '.join(missing)} to verify.")
+    # Restored checkpoints skip crewAI's interpolation; output paths need it
+    for task in crew.tasks:
+        task.interpolate_inputs_and_add_conversation_history(inputs)
+    for agent in crew.agents:
+        agent.interpolate_inputs(inputs)
+
+    report = verify(crew, pool, test_task)
+    for attempt in range(max_repairs):
+        if report.ok:
+            break
+        print(f"{report.summary()}; repair {attempt + 1} of {max_repairs}")
+        if report.compile_errors:
+            for name, error in report.compile_errors.items():
+                regenerate(tasks[name], f"Compile error:\n{error}", inputs, store)
+        elif report.no_tests:
+            regenerate(tasks[test_task], report.feedback(), inputs, store)
+        else:
+            regenerate(tasks[code_task], f"Failing tests:\n{report.feedback()}", inputs, store)
+        report = verify(crew, pool, test_task)
+    return report
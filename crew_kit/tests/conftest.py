@@ -0,0 +1,54 @@
+import pytest
+from crewai.llms.base_llm import BaseLLM
+
+from crew_kit.fake_openai import FakeOpenAIServer
+
+
+class FakeLLM(BaseLLM):
+    """Stand-in provider that answers every call with a numbered reply."""
+
+    def __init__(self, fail: bool = False):
+        super().__init__(model="fake/model")
+        self.calls = 0
+        self.fail = fail
+        self.received = []
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        if self.fail:
+            raise RuntimeError("provider unavailable")
+        self.calls += 1
+        self.received.append(messages)
+        return f"Final Answer: reply {self.calls}"
+
+
+@pytest.fixture
+def fake_llm():
+    return FakeLLM()
+
+
+class ScriptedLLM(FakeLLM):
+    """Answers with the given replies in order, repeating the last one."""
+
+    def __init__(self, replies):
+        super().__init__()
+        self.replies = list(replies)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        super().call(messages)
+        return f"Final Answer: {self.replies[min(self.calls, len(self.replies)) - 1]}"
+
+
+@pytest.fixture
+def fake_openai():
+    servers = []
+
+    def start(**options):
+        server = FakeOpenAIServer(**options).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
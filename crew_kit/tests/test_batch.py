@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+from conftest import FakeLLM
+from crewai import Agent, Crew, Task
+
+from crew_kit.batch import format_summary, load_specs, run_batch
+from crew_kit.cache import LLMCache
+from crew_kit.llm import CachedLLM
+
+
+class FakeCrew:
+    """Minimal stand-in for CodingCrew: one task written to the spec's output_dir."""
+
+    llm_cache = LLMCache(mode="off")
+    limits_config = {"requests_per_minute": 6000}
+    sandbox_config = {"pool_size": 1}
+    llm_limiter = None
+
+    def crew(self):
+        llm = CachedLLM("fake/model", cache=self.llm_cache, llm=FakeLLM(), limiter=self.llm_limiter)
+        agent = Agent(role="Engineer", goal="Build", backstory="Seasoned", llm=llm)
+        task = Task(name="code_task", description="Write {module_name}: {requirements}",
+                    expected_output="Code", agent=agent, output_file="{output_dir}/{module_name}")
+        return Crew(agents=[agent], tasks=[task])
+
+
+class BrokenCrew(FakeCrew):
+    def crew(self):
+        raise RuntimeError("crew misconfigured")
+
+
+class MountCrew(FakeCrew):
+    def crew(self):
+        seen = {"mount": self.sandbox_pool.mount, "index": self.code_index.root}
+        with open(os.path.join(self.sandbox_pool.mount, "seen.json"), "w") as f:
+            json.dump(seen, f)
+        raise RuntimeError("recorded")
+
+
+def spec(stem, **extra):
+    return {"requirements": f"{stem} requirements", "module_name": f"{stem}.py", "class_name": "X", **extra}
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def test_load_specs_from_jsonl_names_and_deduplicates(tmp_path):
+    path = tmp_path / "specs.jsonl"
+    path.write_text("\n".join(json.dumps(s) for s in [spec("ledger"), spec("ledger"), spec("x", name="my spec")]))
+    assert [s["name"] for s in load_specs(str(path))] == ["ledger", "ledger-2", "my_spec"]
+
+
+def test_load_specs_from_directory(tmp_path):
+    (tmp_path / "specs").mkdir()
+    (tmp_path / "specs" / "a.json").write_text(json.dumps(spec("alpha")))
+    (tmp_path / "specs" / "b.yaml").write_text("requirements: r\nmodule_name: b.py\nclass_name: B\n")
+    (tmp_path / "specs" / "notes.txt").write_text("ignored")
+    assert [s["name"] for s in load_specs(str(tmp_path / "specs"))] == ["a", "b"]
+
+
+def test_load_specs_rejects_incomplete_spec(tmp_path):
+    path = tmp_path / "specs.jsonl"
+    path.write_text(json.dumps({"requirements": "r", "module_name": "m.py"}))
+    with pytest.raises(ValueError, match="class_name"):
+        load_specs(str(path))
+
+
+def test_run_batch_isolates_outputs_and_summarises():
+    results = run_batch(
+        FakeCrew, [spec("alpha", name="alpha"), spec("beta", name="beta")], workers=2, verify=False
+    )
+    assert [(r.name, r.ok) for r in results] == [("alpha", True), ("beta", True)]
+    assert open("output/alpha/alpha.py").read() == "reply 1"
+    assert open("output/beta/beta.py").read() == "reply 1"
+    assert os.path.exists("output/alpha/.checkpoints/code_task.json")
+    assert os.path.exists("output/beta/run.log")
+    summary = json.load(open("output/batch_summary.json"))
+    assert [s["name"] for s in summary] == ["alpha", "beta"]
+    assert "2 specs, 0 failed" in format_summary(results)
+    # Both workers drew from the same file-locked buckets
+    assert os.path.exists("output/.ratelimit.json")
+
+
+def test_run_batch_reports_failures():
+    results = run_batch(BrokenCrew, [spec("alpha", name="alpha")], workers=1, verify=False)
+    assert not results[0].ok
+    assert "crew misconfigured" in results[0].error
+    assert "crew misconfigured" in open("output/alpha/run.log").read()
+    assert "FAILED" in format_summary(results)
+
+
+def test_run_batch_mounts_each_spec_in_its_own_directory():
+    run_batch(MountCrew, [spec("alpha", name="alpha"), spec("beta", name="beta")], workers=1)
+    for name in ("alpha", "beta"):
+        seen = json.load(open(f"output/{name}/seen.json"))
+        assert seen == {"mount": os.path.join("output", name), "index": os.path.join("output", name)}
@@ -0,0 +1,25 @@
+import json
+
+from crew_kit.benchmark import PipelineResult, format_report, record, regressions
+
+
+def result(overhead):
+    return PipelineResult(
+        scenario="instant", runs=1, llm_calls=4, wall_seconds=overhead + 1, llm_seconds=1.0, queued_seconds=0.0,
+        overhead_seconds=overhead, scheduling_seconds=0.01, file_output_seconds=0.001, checkpoint_seconds=0.01,
+        output_bytes=5000,
+    )
+
+
+def test_overhead_regressions_against_history_or_baseline(tmp_path):
+    history, baseline = str(tmp_path / "pipeline.jsonl"), str(tmp_path / "baseline.jsonl")
+    assert record([result(0.5)], "Crew", history)["regressions"] == []
+    run = record([result(1.0)], "Crew", history)
+    assert run["regressions"] == ["instant: overhead 0.50s -> 1.00s (+100%)"]
+    assert "REGRESSION instant" in format_report(run)
+
+    with open(baseline, "w") as f:
+        f.write(json.dumps({"results": [{"scenario": "instant", "overhead_seconds": 0.95}]}) + "\n")
+    assert record([result(1.0)], "Crew", history, baseline=baseline)["regressions"] == []
+    # Noise below the minimum is not a regression
+    assert regressions([result(0.08)], {"results": [{"scenario": "instant", "overhead_seconds": 0.04}]}) == []
@@ -0,0 +1,106 @@
+import pytest
+from conftest import FakeLLM
+from crewai import Agent, Crew, Task
+
+from crew_kit.cache import CacheMissError, LLMCache, cache_key
+from crew_kit.llm import CachedLLM
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / "cache")
+
+
+MESSAGES = [{"role": "user", "content": "design the accounts module"}]
+
+
+def test_cache_key_depends_on_model_prompt_and_tools():
+    base = cache_key("openai/gpt-4o", MESSAGES)
+    assert base == cache_key("openai/gpt-4o", MESSAGES)
+    assert base != cache_key("openai/gpt-4.1", MESSAGES)
+    assert base != cache_key("openai/gpt-4o", [{"role": "user", "content": "other"}])
+    assert base != cache_key("openai/gpt-4o", MESSAGES, tools=[{"type": "function", "function": {"name": "f"}}])
+    assert cache_key("m", "hi") == cache_key("m", [{"role": "user", "content": "hi"}])
+
+
+def test_cache_key_hashes_whole_messages_but_not_their_ids():
+    def turn(call_id, path, result):
+        call = {"id": call_id, "type": "function", "function": {"name": "read_code", "arguments": path}}
+        return MESSAGES + [
+            {"role": "assistant", "content": None, "tool_calls": [call]},
+            {"role": "tool", "tool_call_id": call_id, "name": "read_code", "content": result},
+        ]
+
+    base = cache_key("m", turn("call_1", "accounts.py", "class Account"))
+    assert base == cache_key("m", turn("call_2", "accounts.py", "class Account"))
+    assert base != cache_key("m", turn("call_1", "orders.py", "class Account"))
+    assert base != cache_key("m", turn("call_1", "accounts.py", "class Ledger"))
+
+
+def test_miss_then_hit(cache_dir):
+    fake = FakeLLM()
+    llm = CachedLLM("fake/model", cache=LLMCache(cache_dir), llm=fake)
+    assert llm.call(MESSAGES) == "Final Answer: reply 1"
+    assert llm.call(MESSAGES) == "Final Answer: reply 1"
+    assert fake.calls == 1
+    assert (llm.cache.stats.hits, llm.cache.stats.misses) == (1, 1)
+
+
+def test_replay_serves_recorded_responses_without_provider(cache_dir):
+    recorder = CachedLLM("openai/gpt-4o", cache=LLMCache(cache_dir), llm=FakeLLM())
+    recorder.call(MESSAGES)
+
+    # No llm and no API key: a miss would have to construct the real provider
+    replay = CachedLLM("openai/gpt-4o", cache=LLMCache(cache_dir, mode="replay"))
+    assert replay.call(MESSAGES) == "Final Answer: reply 1"
+    with pytest.raises(CacheMissError):
+        replay.call([{"role": "user", "content": "never recorded"}])
+    assert replay._llm is None
+
+
+def test_record_mode_overwrites(cache_dir):
+    CachedLLM("fake/model", cache=LLMCache(cache_dir), llm=FakeLLM()).call(MESSAGES)
+    fake = FakeLLM()
+    fake.calls = 10
+    CachedLLM("fake/model", cache=LLMCache(cache_dir, mode="record"), llm=fake).call(MESSAGES)
+    assert CachedLLM("fake/model", cache=LLMCache(cache_dir), llm=FakeLLM()).call(MESSAGES) == "Final Answer: reply 11"
+
+
+def test_size_bounded_eviction_drops_least_recently_used(cache_dir):
+    cache = LLMCache(cache_dir, max_bytes=250)
+    for i in range(3):
+        cache.put(f"k{i}", "m", "x" * 100)
+    entries, stored = cache.size()
+    assert entries == 2 and stored <= 250
+    assert cache.get("k0") is None
+    assert cache.get("k2") == "x" * 100
+    assert cache.stats.evictions == 1
+
+
+def test_off_mode_bypasses_cache(cache_dir):
+    fake = FakeLLM()
+    llm = CachedLLM("fake/model", cache=LLMCache(cache_dir, mode="off"), llm=fake)
+    llm.call(MESSAGES)
+    llm.call(MESSAGES)
+    assert fake.calls == 2
+
+
+def test_report_lists_agents(cache_dir):
+    llm = CachedLLM("fake/model", cache=LLMCache(cache_dir), llm=FakeLLM())
+    agent = type("A", (), {"role": "Engineering Lead\n"})()
+    llm.call(MESSAGES, from_agent=agent)
+    llm.call(MESSAGES, from_agent=agent)
+    report = llm.cache.report()
+    assert "1 hits, 1 misses (50% hit rate)" in report
+    assert "Engineering Lead: 1 hits, 1 misses" in report
+
+
+def test_crew_replays_recorded_run_offline(cache_dir):
+    def run(llm):
+        agent = Agent(role="Engineering Lead", goal="Design", backstory="Seasoned", llm=llm)
+        task = Task(description="Design {module_name}", expected_output="A design", agent=agent)
+        return Crew(agents=[agent], tasks=[task]).kickoff(inputs={"module_name": "accounts.py"})
+
+    recorded = run(CachedLLM("openai/gpt-4o", cache=LLMCache(cache_dir), llm=FakeLLM()))
+    replayed = run(CachedLLM("openai/gpt-4o", cache=LLMCache(cache_dir, mode="replay")))
+    assert replayed.raw == recorded.raw == "reply 1"
@@ -0,0 +1,140 @@
+import json
+import os
+
+import pytest
+from conftest import FakeLLM
+from crewai import Agent, Crew, Task
+from crewai.tasks.task_output import TaskOutput
+
+from crew_kit.checkpoint import CheckpointStore, kickoff_with_checkpoints
+
+INPUTS = {"module_name": "accounts.py"}
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def make_crew(llm, code_description="Write {module_name}"):
+    agent = Agent(role="Engineer", goal="Build", backstory="Seasoned", llm=llm)
+    design = Task(name="design_task", description="Design {module_name}", expected_output="A design",
+                  agent=agent, output_file="output/{module_name}_design.md")
+    code = Task(name="code_task", description=code_description, expected_output="Code",
+                agent=agent, context=[design], output_file="output/{module_name}")
+    return Crew(agents=[agent], tasks=[design, code])
+
+
+def test_run_writes_a_checkpoint_per_task(fake_llm):
+    kickoff_with_checkpoints(make_crew(fake_llm), INPUTS)
+    record = CheckpointStore().load("code_task")
+    assert record["raw"] == "reply 2"
+    assert record["output_file"] == "output/accounts.py"
+    assert sorted(os.listdir("output/.checkpoints")) == ["code_task.json", "design_task.json"]
+
+
+def test_resume_skips_tasks_with_unchanged_inputs(fake_llm):
+    kickoff_with_checkpoints(make_crew(fake_llm), INPUTS)
+    llm = FakeLLM()
+    result = kickoff_with_checkpoints(make_crew(llm), INPUTS, resume=True)
+    assert llm.calls == 0
+    assert [t.raw for t in result.tasks_output] == ["reply 1", "reply 2"]
+
+    # Only the edited task and what follows it reruns
+    result = kickoff_with_checkpoints(make_crew(llm, "Write {module_name} well"), INPUTS, resume=True)
+    assert llm.calls == 1
+    assert [t.raw for t in result.tasks_output] == ["reply 1", "reply 1"]
+
+
+def test_resume_after_failure_continues_from_failed_task(fake_llm):
+    crew = make_crew(fake_llm)
+    crew.tasks[1].agent = Agent(role="Flaky", goal="Fail", backstory="Down", llm=FakeLLM(fail=True))
+    with pytest.raises(Exception):
+        kickoff_with_checkpoints(crew, INPUTS)
+    assert CheckpointStore().load("design_task") is not None
+    assert CheckpointStore().load("code_task") is None
+
+    llm = FakeLLM()
+    kickoff_with_checkpoints(make_crew(llm), INPUTS, resume=True)
+    assert llm.calls == 1
+
+
+def test_replay_from_task_restores_missing_upstream_files(fake_llm):
+    kickoff_with_checkpoints(make_crew(fake_llm), INPUTS)
+    os.remove("output/accounts.py_design.md")
+    llm = FakeLLM()
+    result = kickoff_with_checkpoints(make_crew(llm), INPUTS, from_task="code_task")
+    assert llm.calls == 1
+    assert open("output/accounts.py_design.md").read() == "reply 1"
+    assert result.raw == "reply 1"
+
+
+def test_replay_requires_upstream_checkpoints(fake_llm):
+    with pytest.raises(ValueError, match="No checkpoint for 'design_task'"):
+        kickoff_with_checkpoints(make_crew(fake_llm), INPUTS, from_task="code_task")
+    with pytest.raises(ValueError, match="Unknown task"):
+        kickoff_with_checkpoints(make_crew(fake_llm), INPUTS, from_task="nope")
+
+
+def test_checkpoint_records_input_hash(fake_llm):
+    kickoff_with_checkpoints(make_crew(fake_llm), INPUTS)
+    first = json.load(open("output/.checkpoints/design_task.json"))["input_hash"]
+    kickoff_with_checkpoints(make_crew(FakeLLM()), {"module_name": "ledger.py"})
+    assert json.load(open("output/.checkpoints/design_task.json"))["input_hash"] != first
+
+
+def make_three_task_crew(llm, code_description="Write {module_name}", docs_description="Document {module_name}"):
+    crew = make_crew(llm, code_description)
+    design = crew.tasks[0]
+    docs = Task(name="docs_task", description=docs_description, expected_output="Docs",
+                agent=crew.agents[0], context=[design], output_file="output/README.md")
+    return Crew(agents=crew.agents, tasks=[*crew.tasks, docs])
+
+
+def test_incremental_run_only_executes_changed_tasks_and_their_dependents(fake_llm):
+    kickoff_with_checkpoints(make_three_task_crew(fake_llm), INPUTS, incremental=True)
+    assert fake_llm.calls == 3
+    record = CheckpointStore().load("code_task")
+    assert len(record["fingerprint"]) == 64 and len(record["output_hash"]) == 64
+
+    llm = FakeLLM()
+    result = kickoff_with_checkpoints(make_three_task_crew(llm), INPUTS, incremental=True)
+    assert llm.calls == 0
+    assert [t.raw for t in result.tasks_output] == ["reply 1", "reply 2", "reply 3"]
+
+    # The edited task reruns; tasks before and beside it are loaded from disk
+    result = kickoff_with_checkpoints(make_three_task_crew(llm, "Write {module_name} well"), INPUTS,
+                                      incremental=True)
+    assert llm.calls == 1
+    assert [t.raw for t in result.tasks_output] == ["reply 1", "reply 1", "reply 3"]
+    assert open("output/accounts.py").read() == "reply 1"
+
+    # An edit upstream reruns everything that reads it
+    llm = FakeLLM()
+    crew = make_three_task_crew(llm, "Write {module_name} well")
+    crew.tasks[0].description = "Design {module_name} carefully"
+    kickoff_with_checkpoints(crew, INPUTS, incremental=True)
+    assert llm.calls == 3
+
+
+def test_fingerprint_covers_inputs_model_and_upstream_outputs(fake_llm):
+    kickoff_with_checkpoints(make_three_task_crew(fake_llm), INPUTS, incremental=True)
+    crew = make_three_task_crew(FakeLLM())
+    store = CheckpointStore()
+    assert store.stale_tasks(crew.tasks, INPUTS) == {}
+    # Inputs no task refers to do not invalidate anything
+    assert store.stale_tasks(crew.tasks, {**INPUTS, "class_name": "Ledger"}) == {}
+    assert store.stale_tasks(crew.tasks, {"module_name": "ledger.py"}) == {
+        "design_task": "inputs changed",
+        "code_task": "upstream design_task reruns",
+        "docs_task": "upstream design_task reruns",
+    }
+    crew.agents[0].llm.model = "fake/bigger-model"
+    assert set(store.stale_tasks(crew.tasks, INPUTS)) == {"design_task", "code_task", "docs_task"}
+
+    # A design rewritten outside the crew changes what the code task reads
+    crew = make_three_task_crew(FakeLLM())
+    record = store.load("design_task")
+    store.save("design_task", record["input_hash"], TaskOutput(description="d", raw="new design", agent="a"),
+               record["output_file"], record["fingerprint"])
+    assert store.stale_tasks(crew.tasks, INPUTS) == {"code_task": "inputs changed", "docs_task": "inputs changed"}
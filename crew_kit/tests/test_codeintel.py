@@ -0,0 +1,133 @@
+import os
+
+import pytest
+
+from crew_kit.codeintel import MAX_READ_LINES, SymbolIndex
+from crew_kit.sandbox import SandboxLimits, SandboxPool
+from crew_kit.tools.code_intelligence import CodeSearchTool, ReadCodeTool, RunTestsTool
+
+ACCOUNTS = '''from dataclasses import dataclass
+
+
+@dataclass
+class Transaction:
+    """One deposit, withdrawal or trade."""
+    kind: str
+    amount: float
+
+
+class Account:
+    def __init__(self, owner: str):
+        self.owner = owner
+        self.balance = 0.0
+
+    def deposit(self, amount: float) -> None:
+        """Add funds."""
+        self.balance += amount
+
+    def withdraw(self, amount: float) -> None:
+        if amount > self.balance:
+            raise ValueError("Insufficient funds")
+        self.balance -= amount
+
+
+def get_share_price(symbol: str) -> float:
+    return 100.0
+'''
+
+TESTS = '''from accounts import Account
+
+
+def test_deposit():
+    account = Account("a")
+    account.deposit(5)
+    assert account.balance == 5
+
+
+def test_withdraw():
+    account = Account("a")
+    account.withdraw(1)
+'''
+
+
+@pytest.fixture
+def output(tmp_path):
+    (tmp_path / "accounts.py").write_text(ACCOUNTS)
+    (tmp_path / "test_accounts.py").write_text(TESTS)
+    return tmp_path
+
+
+def test_symbols_have_signatures_and_line_ranges(output):
+    index = SymbolIndex(str(output))
+    symbols = {s.qualname: s for s in index.symbols("accounts.py")}
+    assert list(symbols) == ["Transaction", "Account", "Account.__init__", "Account.deposit", "Account.withdraw",
+                             "get_share_price"]
+    assert (symbols["Transaction"].line, symbols["Transaction"].doc) == (4, "One deposit, withdrawal or trade.")
+    assert symbols["Account.deposit"].signature == "def deposit(self, amount: float) -> None"
+    assert (symbols["Account.withdraw"].kind, symbols["get_share_price"].kind) == ("method", "function")
+    # Exact names first, then anything containing the query
+    assert [s.qualname for s in index.find("withdraw")] == ["Account.withdraw", "test_withdraw"]
+    assert index.find("account")[0].qualname == "Account"
+    assert [(p, n) for p, n, _ in index.grep("Insufficient")] == [("accounts.py", 22)]
+
+
+def test_modules_are_parsed_again_only_when_they_change(output):
+    index = SymbolIndex(str(output))
+    index.symbols()
+    index.find("deposit")
+    index.read("accounts.py", "Account.deposit")
+    assert index.stats.modules == {"accounts.py": 1, "test_accounts.py": 1}
+
+    (output / "accounts.py").write_text(ACCOUNTS.replace("def withdraw", "def take"))
+    assert [s.qualname for s in index.find("withdraw")] == ["test_withdraw"]
+    assert [s.qualname for s in index.find("take")] == ["Account.take"]
+    assert index.stats.modules["accounts.py"] == 2 and index.stats.hits >= 3
+
+    (output / "accounts.py").write_text("def broken(:\n    pass\n")
+    assert index.symbols("accounts.py") == []
+    assert "does not parse: SyntaxError" in index.outline("accounts.py")
+    assert index.read("accounts.py", start=2) == "2      pass"
+
+
+def test_read_returns_a_symbol_or_a_bounded_range(output):
+    index = SymbolIndex(str(output))
+    assert index.read("accounts.py", "deposit").splitlines() == [
+        "16      def deposit(self, amount: float) -> None:",
+        '17          """Add funds."""',
+        "18          self.balance += amount",
+    ]
+    (output / "long.py").write_text("x = 1\n" * (MAX_READ_LINES + 50))
+    excerpt = index.read("long.py").splitlines()
+    assert len(excerpt) == MAX_READ_LINES + 1 and excerpt[-1].startswith("... 50 more lines")
+    with pytest.raises(KeyError):
+        index.read("accounts.py", "Account.sell")
+    with pytest.raises(ValueError, match="outside"):
+        index.read("../secrets.py")
+
+
+def test_tools_answer_from_the_index(output):
+    index = SymbolIndex(str(output))
+    found = CodeSearchTool(index=index).run(query="Account.deposit")
+    assert "accounts.py:16-18  def deposit(self, amount: float) -> None  # Add funds." in found
+    assert "test_accounts.py:6: account.deposit(5)" in found
+
+    reader = ReadCodeTool(index=index)
+    outline = reader.run(path="accounts.py")
+    assert "    16-18: def deposit(self, amount: float) -> None  # Add funds." in outline
+    assert "self.balance += amount" not in outline
+    assert "self.balance += amount" in reader.run(path="accounts.py", symbol="Account.deposit")
+    assert reader.run(path="missing.py").startswith("missing.py does not exist; modules under output/: accounts.py")
+    assert reader.run(path="accounts.py", symbol="sell") == "No symbol sell in accounts.py."
+
+
+def test_run_tests_tool_runs_only_the_selection(output, monkeypatch):
+    monkeypatch.chdir(output.parent)
+    pool = SandboxPool(size=1, mount=os.path.basename(output), limits=SandboxLimits(timeout_seconds=30))
+    try:
+        tool = RunTestsTool(pool=pool)
+        assert tool.run(targets=["test_accounts.py::test_deposit"]).startswith("Verification passed: 1 tests")
+        failed = tool.run(targets=["test_accounts.py"], keyword="withdraw")
+        assert failed.startswith("Verification failed: 1 of 1 tests failed")
+        assert "FAILED" in failed and "Insufficient funds" in failed
+    finally:
+        pool.close()
@@ -0,0 +1,78 @@
+import pytest
+
+from crew_kit.crew import ConfigCrew
+
+AGENTS = """
+writer:
+  role: Writer
+  goal: Write {topic}
+  backstory: Seasoned
+  llm: fake/model
+  max_retry_limit: 5
+coder:
+  role: Coder
+  goal: Code
+  backstory: Seasoned
+  llm: fake/model
+  tools:
+    - code_interpreter
+"""
+
+TASKS = """
+draft_task:
+  description: Draft {topic}
+  expected_output: Draft
+  agent: writer
+code_task:
+  description: Code it
+  expected_output: Code
+  agent: coder
+  context:
+    - draft_task
+  output_file: "{output_dir}/code.py"
+"""
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    (tmp_path / "agents.yaml").write_text(AGENTS)
+    (tmp_path / "tasks.yaml").write_text(TASKS)
+    (tmp_path / "sandbox.yaml").write_text("pool_size: 1\n")
+    return tmp_path
+
+
+def test_crew_from_another_config_dir(config_dir):
+    crew_class = ConfigCrew.from_config_dir(str(config_dir))
+    crew = crew_class().crew()
+    writer, coder = crew.agents
+    draft, code = crew.tasks
+    assert (draft.agent, code.agent, code.context) == (writer, coder, [draft])
+    assert writer.max_retry_limit == 5 and writer.tools == []
+    assert [tool.name for tool in coder.tools] == ["Code Interpreter"]
+    assert coder.tools[0].pool is crew_class.sandbox_pool
+    # Missing optional config files mean defaults
+    assert crew_class.sandbox_pool.size == 1
+    assert crew_class.limits_config == {} and crew_class.llm_limiter.report()
+
+
+def test_each_crew_class_has_its_own_shared_state(config_dir):
+    path = str(config_dir)
+
+    class Team(ConfigCrew):
+        config_dir = path
+
+    assert [task.name for task in Team().crew().tasks] == ["draft_task", "code_task"]
+    copy = Team.from_config_dir(str(config_dir))
+    assert issubclass(copy, Team) and copy.__module__ == Team.__module__
+    assert copy.sandbox_pool is not Team.sandbox_pool and copy.llm_limiter is not Team.llm_limiter
+
+
+def test_unknown_tool_or_agent_is_rejected(config_dir):
+    (config_dir / "agents.yaml").write_text(AGENTS.replace("code_interpreter", "web_search"))
+    with pytest.raises(ValueError, match="unknown tools"):
+        ConfigCrew.from_config_dir(str(config_dir))().crew()
+
+    (config_dir / "agents.yaml").write_text(AGENTS)
+    (config_dir / "tasks.yaml").write_text(TASKS.replace("agent: coder", "agent: reviewer"))
+    with pytest.raises(ValueError, match="unknown agent reviewer"):
+        ConfigCrew.from_config_dir(str(config_dir))().crew()
@@ -0,0 +1,59 @@
+import time
+
+import openai
+import pytest
+
+from crew_kit.fake_openai import Recording, ResponseScript, Rule
+
+MESSAGES = [{"role": "system", "content": "You are Engineering Lead"}, {"role": "user", "content": "Design it"}]
+
+
+def client(server):
+    return openai.OpenAI(base_url=server.base_url, api_key="fake", max_retries=0)
+
+
+def ask(server, messages=MESSAGES, **options):
+    return client(server).chat.completions.create(model="gpt-4o", messages=messages, **options)
+
+
+def test_script_rules_pick_the_reply(fake_openai):
+    script = ResponseScript([Rule("Final Answer: design", match="Engineering Lead")], default="Final Answer: ok")
+    server = fake_openai(script=script)
+    response = ask(server)
+    assert response.choices[0].message.content == "Final Answer: design"
+    assert response.usage.completion_tokens == 3
+    other = ask(server, [{"role": "user", "content": "anything"}])
+    assert other.choices[0].message.content == "Final Answer: ok"
+
+
+def test_streaming_paces_tokens_and_reports_usage(fake_openai):
+    server = fake_openai(script=ResponseScript(default="one two three four five"), latency=0.05, tokens_per_second=50)
+    started = time.monotonic()
+    chunks = list(ask(server, stream=True, stream_options={"include_usage": True}))
+    assert time.monotonic() - started >= 0.05 + 4 / 50
+    text = "".join(c.choices[0].delta.content or "" for c in chunks if c.choices)
+    assert text == "one two three four five"
+    assert chunks[-1].usage.completion_tokens == 5
+    assert server.completion_tokens == 5
+
+
+def test_quota_answers_429(fake_openai):
+    server = fake_openai(quota=1, window=5)
+    ask(server)
+    with pytest.raises(openai.RateLimitError):
+        ask(server)
+    assert server.rejected == 1
+
+
+def test_misses_are_recorded_from_upstream_and_replayed(fake_openai, tmp_path):
+    path = str(tmp_path / "recording.jsonl")
+    upstream = fake_openai(script=ResponseScript(default="Final Answer: from the provider"))
+    recorder = fake_openai(recording=Recording(path), upstream=upstream.base_url)
+    assert ask(recorder).choices[0].message.content == "Final Answer: from the provider"
+    assert len(upstream.accepted) == 1
+
+    # Offline: the same prompt is answered from the recording, not the script
+    replay = fake_openai(recording=Recording(path), script=ResponseScript(default="Final Answer: scripted"))
+    assert ask(replay).choices[0].message.content == "Final Answer: from the provider"
+    # Once the recording is used up the script answers
+    assert ask(replay).choices[0].message.content == "Final Answer: scripted"
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from crew_kit.knowledge import HashingEmbedder, KnowledgeIndex, chunk_text
+from crew_kit.tools.knowledge_search import KnowledgeSearchTool
+
+PREFERENCES = """User name is John Doe.
+User is an AI Engineer.
+User is interested in AI Agents.
+User is based in San Francisco, California."""
+
+TRADING = "\n\n".join(
+    f"Rule {n}: a trading account may not buy shares it cannot afford, and every trade is recorded." for n in range(30)
+)
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+
+@pytest.fixture
+def knowledge(tmp_path):
+    directory = tmp_path / "knowledge"
+    directory.mkdir()
+    (directory / "user_preference.txt").write_text(PREFERENCES)
+    (directory / "trading.md").write_text(TRADING)
+    return directory
+
+
+def make_index(tmp_path, embedder=None, **options):
+    return KnowledgeIndex(str(tmp_path / "knowledge"), str(tmp_path / "index" / "index.json"),
+                          embedder=embedder or CountingEmbedder(), **options)
+
+
+def test_chunks_are_bounded_overlapping_and_end_at_breaks():
+    chunks = chunk_text(TRADING, max_chars=300, overlap=60)
+    assert len(chunks) > 5 and all(len(c) <= 300 for c in chunks)
+    assert all(c.endswith("recorded.") for c in chunks)
+    # Consecutive chunks share text, so nothing cut at a boundary is lost
+    assert all(a[-40:] in b or a.split("\n\n")[-1] in b for a, b in zip(chunks, chunks[1:]))
+    assert chunk_text("") == []
+    with pytest.raises(ValueError, match="overlap"):
+        chunk_text(TRADING, max_chars=100, overlap=100)
+
+
+def test_search_returns_the_relevant_chunks_only(tmp_path, knowledge):
+    index = make_index(tmp_path, chunk_chars=300, overlap_chars=60, top_k=2)
+    hits = index.search("Where is the user based?")
+    assert len(hits) == 2
+    assert hits[0].source == "user_preference.txt" and "San Francisco" in hits[0].text
+    assert hits[0].score > hits[1].score
+    assert index.search("zebra quokka") == []
+
+
+def test_reindex_only_embeds_changed_files(tmp_path, knowledge):
+    first = make_index(tmp_path, chunk_chars=300, overlap_chars=60)
+    stats = first.refresh()
+    assert (stats.added, stats.chunks_embedded) == (2, first.chunk_count)
+
+    # A new process loads the persisted index and embeds nothing
+    embedder = CountingEmbedder()
+    second = make_index(tmp_path, embedder, chunk_chars=300, overlap_chars=60)
+    assert second.refresh().unchanged == 2 and embedder.embedded == []
+    assert second.search("San Francisco")[0].source == "user_preference.txt"
+
+    (knowledge / "user_preference.txt").write_text(PREFERENCES.replace("San Francisco", "Lisbon"))
+    (knowledge / "trading.md").unlink()
+    (knowledge / "notes.txt").write_text("The frontend should use Gradio.")
+    embedder.embedded.clear()
+    stats = second.refresh()
+    assert (stats.added, stats.updated, stats.removed, stats.unchanged) == (1, 1, 1, 0)
+    assert sorted(embedder.embedded) == ["The frontend should use Gradio.", PREFERENCES.replace("San Francisco", "Lisbon")]
+    assert [h.source for h in second.search("Which frontend framework?")][:1] == ["notes.txt"]
+    with open(second.index_file) as f:
+        assert sorted(json.load(f)["files"]) == ["notes.txt", "user_preference.txt"]
+
+
+def test_new_chunking_or_embedder_rebuilds_the_index(tmp_path, knowledge):
+    make_index(tmp_path, chunk_chars=300, overlap_chars=60).refresh()
+    assert make_index(tmp_path, chunk_chars=500, overlap_chars=60).refresh().added == 2
+    assert make_index(tmp_path, HashingEmbedder(1024), chunk_chars=500, overlap_chars=60).refresh().added == 2
+    with pytest.raises(ValueError, match="Unknown embedder"):
+        KnowledgeIndex.from_config({"embedder": "word2vec"}).embedder
+
+
+def test_tool_gives_agents_the_top_chunks_with_their_source(tmp_path, knowledge):
+    tool = KnowledgeSearchTool(index=make_index(tmp_path, top_k=1))
+    found = tool.run(query="user location")
+    assert found.startswith("[user_preference.txt #0, score ") and found.endswith(PREFERENCES)
+    assert tool.run(query="zebra") == "No relevant knowledge found."
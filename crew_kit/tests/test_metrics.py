@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from conftest import FakeLLM
+from crewai import Agent, Crew, Task
+from crewai.events import ToolUsageFinishedEvent
+
+from crew_kit.cache import LLMCache
+from crew_kit.llm import CachedLLM
+from crew_kit import metrics as metrics_module
+from crew_kit.metrics import RunMetrics
+from crew_kit.ratelimit import BackoffPolicy, RateLimiter
+
+
+@pytest.fixture
+def metrics(tmp_path):
+    return RunMetrics(str(tmp_path / "metrics"))
+
+
+def build_crew(llm):
+    lead = Agent(role="Engineering Lead", goal="Design", backstory="Seasoned", llm=llm)
+    dev = Agent(role="Backend Engineer", goal="Build", backstory="Seasoned", llm=llm)
+    design = Task(name="design_task", description="Design {module_name}", expected_output="Design", agent=lead)
+    code = Task(name="code_task", description="Write {module_name}", expected_output="Code", agent=dev)
+    return Crew(agents=[lead, dev], tasks=[design, code])
+
+
+def read_trace(metrics):
+    with open(os.path.join(metrics.path, f"{metrics.run_id}.jsonl")) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_crew_run_is_traced_per_task_and_agent(metrics, tmp_path):
+    llm = CachedLLM("fake/model", cache=LLMCache(str(tmp_path / "cache")), llm=FakeLLM(), metrics=metrics)
+    with metrics.collect():
+        build_crew(llm).kickoff(inputs={"module_name": "accounts.py"})
+
+    summary = metrics.last_summary
+    assert set(summary["tasks"]) == {"design_task", "code_task"}
+    design = summary["tasks"]["design_task"]
+    assert (design["agent"], design["status"], design["llm_calls"]) == ("Engineering Lead", "completed", 1)
+    assert design["wall_seconds"] > 0
+    assert summary["agents"]["Backend Engineer"]["llm_calls"] == 1
+
+    types = [record["type"] for record in read_trace(metrics)]
+    assert types.count("llm_call") == 2
+    assert types.count("task_completed") == 2
+    assert types[-1] == "summary"
+    with open(os.path.join(metrics.path, "summary.json")) as f:
+        assert json.load(f)["run_id"] == metrics.run_id
+
+
+def test_cache_hits_are_counted_separately(metrics, tmp_path):
+    llm = CachedLLM("fake/model", cache=LLMCache(str(tmp_path / "cache")), llm=FakeLLM(), metrics=metrics)
+    with metrics.collect():
+        llm.call("hello")
+        llm.call("hello")
+    assert [call.cache_hit for call in metrics.calls] == [False, True]
+    assert metrics.last_summary["tasks"]["-"]["cache_hits"] == 1
+
+
+def test_provider_tokens_queue_time_and_retries_are_recorded(metrics, fake_openai):
+    server = fake_openai(quota=1, window=0.3)
+    limiter = RateLimiter(backoff=BackoffPolicy(initial_seconds=0.05, max_seconds=0.2, max_retries=8))
+    llm = CachedLLM(
+        "openai/gpt-4o",
+        cache=LLMCache(mode="off"),
+        limiter=limiter,
+        metrics=metrics,
+        base_url=server.base_url,
+        api_key="test",
+        max_retries=0,
+    )
+    with metrics.collect():
+        llm.call([{"role": "user", "content": "x" * 400}])
+        llm.call([{"role": "user", "content": "x" * 400}])
+
+    first, second = metrics.calls
+    assert (first.prompt_tokens, first.completion_tokens) == (100, 3)
+    assert second.retries >= 1
+    assert second.queued_seconds > 0
+    assert metrics.last_summary["agents"]["-"]["retries"] == second.retries
+
+
+def test_tool_calls_are_attributed_to_task_and_agent(metrics):
+    now = datetime.now()
+    with metrics.collect():
+        metrics._tool_finished(ToolUsageFinishedEvent(
+            tool_name="search", tool_args={}, agent_role="Backend Engineer", task_name="code_task",
+            started_at=now, finished_at=now + timedelta(seconds=1), output="ok",
+        ))
+    assert metrics.last_summary["tasks"]["code_task"]["tool_calls"] == 1
+    assert metrics.last_summary["agents"]["Backend Engineer"]["tool_calls"] == 1
+
+
+def test_regressions_against_previous_run(metrics):
+    previous = {"tasks": {"code_task": {"wall_seconds": 10.0, "tokens": 1000}}, "agents": {}}
+    current = {"tasks": {"code_task": {"wall_seconds": 20.0, "tokens": 1100}}, "agents": {}}
+    assert metrics.regressions(current, previous) == ["task code_task: wall_seconds 10s -> 20s (+100%)"]
+    # Sub-second noise on fast tasks is not a regression
+    tiny = {"tasks": {"code_task": {"wall_seconds": 0.5, "tokens": 0}}, "agents": {}}
+    assert metrics.regressions({"tasks": {"code_task": {"wall_seconds": 1.2}}, "agents": {}}, tiny) == []
+
+
+def test_second_run_is_compared_with_the_first(metrics, tmp_path):
+    llm = CachedLLM("fake/model", cache=LLMCache(mode="off"), llm=FakeLLM(), metrics=metrics)
+    for _ in range(2):
+        with metrics.collect():
+            build_crew(llm).kickoff(inputs={"module_name": "accounts.py"})
+    assert metrics.previous_summary["run_id"] != metrics.last_summary["run_id"]
+    report = metrics.report()
+    assert "design_task" in report and "agent Backend Engineer" in report
+
+
+def task_event(name, when):
+    task = SimpleNamespace(id=name, name=name, agent=SimpleNamespace(role="Backend Engineer"))
+    return SimpleNamespace(task=task, timestamp=datetime.fromtimestamp(when))
+
+
+def test_finish_wakes_on_late_task_events_and_fails_lost_ones(metrics, monkeypatch):
+    metrics.start()
+    now = time.time()
+    metrics._task_started(task_event("code_task", now))
+    late = threading.Timer(0.2, metrics._task_completed, [task_event("code_task", now + 1)])
+    late.start()
+    started = time.monotonic()
+    metrics.finish()
+    assert time.monotonic() - started < 2
+    assert metrics.last_summary["tasks"]["code_task"]["status"] == "completed"
+
+    # A task whose end event never comes is closed as failed after the grace
+    monkeypatch.setattr(metrics_module, "EVENT_GRACE_SECONDS", 0.1)
+    metrics.start()
+    metrics._task_started(task_event("test_task", time.time()))
+    metrics.finish()
+    assert metrics.last_summary["tasks"]["test_task"]["status"] == "failed"
+    assert metrics.spans["test_task"].finished is not None
+    metrics._task_completed(task_event("test_task", time.time()))
+    assert metrics.spans["test_task"].status == "failed"
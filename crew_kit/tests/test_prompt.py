@@ -0,0 +1,105 @@
+import pytest
+from conftest import FakeLLM
+from crewai import Agent, Crew, Task
+
+from crew_kit.cache import LLMCache
+from crew_kit.llm import CachedLLM
+from crew_kit.metrics import RunMetrics
+from crew_kit.prompt import PromptAssembler, python_outline
+
+REQUIREMENTS = "\n".join(
+    f"The system should support requirement number {n} of the trading simulation platform." for n in range(6)
+)
+
+BACKEND = '''import sqlite3
+
+
+class Account:
+    """A trading account."""
+
+    def __init__(self, user: str):
+        self.user = user
+        self.balance = 0.0
+
+    def deposit(self, amount: float) -> None:
+        """Add funds to the account."""
+        if amount <= 0:
+            raise ValueError("Deposit must be positive")
+        self.balance += amount
+
+
+if __name__ == "__main__":
+    Account("demo").deposit(10)
+'''
+
+
+def test_repeated_shared_input_is_sent_once():
+    messages = [
+        {"role": "system", "content": f"You are the lead. Requirements: {REQUIREMENTS}"},
+        {"role": "user", "content": f"Design it.\nHere are the requirements: {REQUIREMENTS}\nBegin!"},
+    ]
+    prompt = PromptAssembler().assemble(messages)
+    user = prompt.messages[1]["content"]
+    assert "repeated lines omitted" in user
+    assert "requirement number 3" not in user
+    assert "requirement number 3" in prompt.messages[0]["content"]
+    assert prompt.saved_chars > 300
+    # crewAI keeps appending to its own list; it must not be modified
+    assert REQUIREMENTS in messages[1]["content"]
+
+
+def test_short_repeated_lines_are_kept():
+    code = "def a():\n    return None\n\ndef b():\n    return None\n"
+    prompt = PromptAssembler().assemble([{"role": "user", "content": code}])
+    assert prompt.messages[0]["content"] == code
+    assert prompt.saved_chars == 0
+
+
+def test_python_outline_keeps_api_and_drops_bodies():
+    outline = python_outline(BACKEND)
+    assert "def deposit(self, amount: float) -> None:" in outline
+    assert "Add funds to the account." in outline
+    assert "raise ValueError" not in outline
+    assert "__main__" not in outline
+    assert python_outline("# Design\n\nThe Account class stores a balance.") is None
+    assert python_outline("balance") is None
+
+
+def test_outline_mode_compacts_python_context_only():
+    backend = Task(description="Write it", expected_output="Code", output_file="output/accounts.py")
+    frontend = Task(name="frontend_task", description="UI", expected_output="UI", context=[backend])
+    assembler = PromptAssembler(context={"frontend_task": "outline"})
+    content = (
+        "Current Task: Write a UI\n\nThis is the context you're working with:\n"
+        + BACKEND + "\n\n----------\n\nSome design notes.\n\nBegin! Give your best answer."
+    )
+    prompt = assembler.assemble([{"role": "user", "content": content}], frontend)
+    compacted = prompt.messages[0]["content"]
+    assert "Outline of output/accounts.py" in compacted
+    assert "self.balance += amount" not in compacted
+    assert "Some design notes." in compacted
+    assert compacted.endswith("Begin! Give your best answer.")
+    # Other tasks still get the full upstream output
+    assert assembler.assemble([{"role": "user", "content": content}], backend).messages[0]["content"] == content
+
+
+def test_unknown_context_mode_is_rejected():
+    with pytest.raises(ValueError, match="summary"):
+        PromptAssembler(context={"code_task": "summary"})
+
+
+def test_cached_llm_sends_and_records_compacted_prompt(tmp_path):
+    fake = FakeLLM()
+    metrics = RunMetrics(str(tmp_path / "metrics"))
+    llm = CachedLLM("fake/model", cache=LLMCache(mode="off"), llm=fake, metrics=metrics,
+                    assembler=PromptAssembler())
+    agent = Agent(role="Engineering Lead", goal=f"Design for: {REQUIREMENTS}", backstory="Seasoned", llm=llm)
+    task = Task(name="design_task", description=f"Design for: {REQUIREMENTS}", expected_output="Design", agent=agent)
+    with metrics.collect():
+        Crew(agents=[agent], tasks=[task]).kickoff()
+
+    sent = fake.received[0]
+    assert sum(m["content"].count("requirement number 3") for m in sent) == 1
+    call = metrics.calls[0]
+    assert call.saved_chars > 300
+    assert call.prompt_chars == sum(len(m["content"]) for m in sent)
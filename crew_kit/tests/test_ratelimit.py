@@ -0,0 +1,139 @@
+import asyncio
+import threading
+
+import pytest
+
+from crew_kit.cache import LLMCache
+from crew_kit.llm import CachedLLM
+from crew_kit.ratelimit import (
+    BackoffPolicy,
+    Lane,
+    RateLimiter,
+    is_rate_limit_error,
+)
+
+FAST_BACKOFF = BackoffPolicy(initial_seconds=0.05, max_seconds=0.2, max_retries=8)
+
+
+def provider_llm(server, limiter, lane=None):
+    """A real OpenAI provider client pointed at the fake server, uncached."""
+    return CachedLLM(
+        "openai/gpt-4o",
+        cache=LLMCache(mode="off"),
+        limiter=limiter,
+        lane=lane,
+        base_url=server.base_url,
+        api_key="test",
+        max_retries=0,
+    )
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    limiter = RateLimiter(tokens_per_minute=600)  # refills 10 tokens/s
+    assert limiter.acquire(tokens=600) < 0.05
+    waited = limiter.acquire(tokens=5)
+    assert 0.3 < waited < 1.0
+
+
+def test_low_priority_lane_leaves_reserve_for_high_priority():
+    limiter = RateLimiter(requests_per_minute=10, lanes={"frontend": Lane("frontend", reserve=0.5)})
+    for _ in range(5):
+        limiter.acquire("backend")
+    # Half the bucket is left: only lanes without a reserve may take it
+    assert limiter._try_take(limiter._lane("frontend"), {"requests": 1}) > 0
+    assert limiter.acquire("backend") < 0.05
+    assert limiter.stats["backend"].requests == 6
+
+
+def test_file_state_is_shared_between_limiters(tmp_path):
+    state = str(tmp_path / "ratelimit.json")
+    first = RateLimiter(requests_per_minute=2, state_file=state)
+    second = RateLimiter(requests_per_minute=2, state_file=state)
+    first.acquire()
+    first.acquire()
+    assert second._try_take(second._lane(None), {"requests": 1}) > 0
+
+
+def test_is_rate_limit_error():
+    throttled = RuntimeError("Error code: 429")
+    throttled.status_code = 429
+    assert is_rate_limit_error(throttled)
+    assert not is_rate_limit_error(RuntimeError("request 7f429c failed"))
+    wrapped = ValueError("call failed")
+    wrapped.__cause__ = type("RateLimitError", (Exception,), {})()
+    assert is_rate_limit_error(wrapped)
+    assert not is_rate_limit_error(ValueError("bad request"))
+
+
+def test_backoff_recovers_from_provider_429s(fake_openai):
+    server = fake_openai(quota=2, window=0.5)
+    limiter = RateLimiter(backoff=FAST_BACKOFF)
+    llm = provider_llm(server, limiter)
+    for i in range(6):
+        assert llm.call(f"request {i}") == "Final Answer: ok"
+    assert server.rejected > 0
+    assert limiter.stats["-"].retries == server.rejected
+
+
+def test_limiter_keeps_provider_under_quota(fake_openai):
+    server = fake_openai(quota=3, window=1.0)
+    limiter = RateLimiter(requests_per_minute=120, backoff=FAST_BACKOFF)  # 2/s
+    for _ in range(119):  # spend the burst so the calls below are paced
+        limiter.acquire()
+    llm = provider_llm(server, limiter, lane="backend_engineer")
+    for i in range(4):
+        llm.call(f"request {i}")
+    assert server.rejected == 0
+    assert limiter.stats["backend_engineer"].waited_seconds > 0.5
+
+
+def test_concurrency_cap(fake_openai):
+    server = fake_openai(latency=0.1)
+    limiter = RateLimiter(max_concurrency=2)
+    llm = provider_llm(server, limiter)
+    threads = [threading.Thread(target=llm.call, args=(f"request {i}",)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(server.accepted) == 6
+    assert server.max_in_flight == 2
+
+
+def test_settle_charges_actual_usage(fake_openai):
+    server = fake_openai()
+    limiter = RateLimiter(tokens_per_minute=10000)
+    llm = provider_llm(server, limiter)
+    llm.call("x" * 400)
+    # Estimated ~101 tokens, the server reported 100 prompt + 3 completion
+    assert limiter.stats["-"].tokens == 103
+
+
+def test_cancelled_async_call_frees_its_slot():
+    limiter = RateLimiter(max_concurrency=1)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "slow"
+
+        first = asyncio.create_task(limiter.asubmit(slow))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(limiter.asubmit(slow))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        release.set()
+        assert await first == "slow"
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        async def fast():
+            return "fast"
+
+        return await asyncio.wait_for(limiter.asubmit(fast), 1)
+
+    assert asyncio.run(scenario()) == "fast"
+    # A new loop gets its own semaphore
+    assert asyncio.run(scenario()) == "fast"
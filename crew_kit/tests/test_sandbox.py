@@ -0,0 +1,93 @@
+import pytest
+
+from crew_kit.sandbox import Sandbox, SandboxLimits, SandboxPool
+from crew_kit.tools.code_execution import SandboxCodeTool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SandboxPool(size=1, mount=str(tmp_path / "output"), limits=SandboxLimits(timeout_seconds=5, memory_mb=512))
+    yield pool
+    pool.close()
+
+
+def test_run_returns_exit_code_and_output(pool):
+    ok = pool.run("print('hello')")
+    assert (ok.exit_code, ok.stdout, ok.ok) == (0, "hello\n", True)
+
+    failed = pool.run("raise ValueError('bad input')")
+    assert failed.exit_code == 1
+    assert "ValueError: bad input" in failed.stderr
+    assert "sandbox.py" not in failed.stderr
+
+    assert pool.run("import sys; sys.exit(3)").exit_code == 3
+
+
+def test_sandbox_is_warm_and_reused(pool):
+    with pool.lease() as sandbox:
+        pid = sandbox.pid
+    for _ in range(3):
+        pool.run("import sqlite3")
+    with pool.lease() as sandbox:
+        assert sandbox.pid == pid
+    assert pool.stats.cold_starts == 1
+    assert pool.stats.runs == 3
+
+
+def test_state_is_reset_between_runs(pool):
+    assert pool.run("x = 1\nopen('scratch.txt', 'w').write('tmp')").ok
+    result = pool.run("import os\nprint(sorted(os.listdir('.')))\nprint('x' in globals())")
+    assert result.stdout == "['output']\nFalse\n"
+
+
+def test_generated_output_is_mounted(pool, tmp_path):
+    (tmp_path / "output").mkdir(exist_ok=True)
+    (tmp_path / "output" / "accounts.py").write_text("class Account:\n    balance = 42\n")
+    result = pool.run("from accounts import Account\nprint(Account.balance, open('output/accounts.py').read()[:5])")
+    assert result.stdout == "42 class\n"
+
+
+def test_timeout_kills_run_and_keeps_sandbox(pool):
+    result = pool.run("while True:\n    pass", timeout=0.3)
+    assert result.timed_out and not result.ok
+    assert "Timed out" in result.format()
+    assert pool.run("print('still warm')").stdout == "still warm\n"
+    assert pool.stats.timeouts == 1
+
+
+def test_memory_limit_is_enforced(pool):
+    result = pool.run("data = bytearray(2 * 1024 ** 3)")
+    assert "MemoryError" in result.stderr
+
+
+def test_dead_sandbox_is_restarted(pool):
+    with pool.lease() as sandbox:
+        sandbox._process.kill()
+        sandbox._process.wait()
+    assert pool.run("print(1)").stdout == "1\n"
+    assert pool.stats.restarts == 1
+
+
+def test_failed_restart_gives_up_the_slot(pool, monkeypatch):
+    start = Sandbox.start
+
+    def failing(self):
+        raise OSError("cannot fork")
+
+    with pytest.raises(OSError, match="cannot fork"):
+        with pool.lease() as sandbox:
+            sandbox._process.kill()
+            sandbox._process.wait()
+            monkeypatch.setattr(Sandbox, "start", failing)
+    assert not sandbox.alive and pool._created == 0
+    monkeypatch.setattr(Sandbox, "start", start)
+    # The next lease starts a new sandbox instead of waiting for the lost one
+    assert pool.run("print(1)").stdout == "1\n"
+    assert pool.stats.cold_starts == 2
+
+
+def test_tool_formats_result_for_agent(pool):
+    tool = SandboxCodeTool(pool=pool)
+    output = tool.run(code="print(2 + 2)")
+    assert output.startswith("Exit code 0")
+    assert "stdout:\n4" in output
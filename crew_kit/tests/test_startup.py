@@ -0,0 +1,39 @@
+import json
+
+from crew_kit.startup import (
+    StartupResult,
+    format_report,
+    parse_importtime,
+    record,
+    regressions,
+)
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       500 |        500 |   yaml.error
+import time:      1500 |       2000 | yaml
+import time:       300 |        300 |   crew_kit.cache
+import time:       700 |       3000 | crew_kit.crew
+"""
+
+
+def result(name, seconds, crewai_loaded=False):
+    return StartupResult(name=name, code="", seconds=seconds, import_seconds=seconds, crewai_loaded=crewai_loaded)
+
+
+def test_parse_importtime_charges_modules_to_their_package():
+    total, packages = parse_importtime(IMPORTTIME)
+    assert packages == {"yaml": 0.002, "crew_kit": 0.001}
+    assert total == 0.003
+
+
+def test_history_and_regressions(tmp_path):
+    path = str(tmp_path / "startup.jsonl")
+    first = record([result("run_crew", 0.2), result("batch", 0.2)], path)
+    assert first["regressions"] == []
+    # Jitter below the minimum is ignored; new crewai imports always count
+    second = record([result("run_crew", 0.5), result("batch", 0.22, crewai_loaded=True)], path)
+    assert second["regressions"] == ["run_crew: 0.20s -> 0.50s (+150%)", "batch: now imports crewai at startup"]
+    with open(path) as f:
+        assert len([json.loads(line) for line in f]) == 2
+    assert "REGRESSION run_crew" in format_report(second)
+    assert regressions([result("run_crew", 0.5)], None) == []
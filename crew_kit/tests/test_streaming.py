@@ -0,0 +1,90 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import FakeLLM
+from crewai import Agent
+
+from crew_kit.fake_openai import tokenize
+from crew_kit.streaming import OutputStreams, SyntaxWatch, TaskStream, atomic_write
+from crew_kit.task import AtomicOutputTask
+
+MODULE = '''"""Accounts.
+
+Column-0 lines in a docstring are not statements.
+"""
+import functools
+
+
+@functools.cache
+def balance():
+    return 1
+'''
+
+
+class Task:
+    def __init__(self, name, output_file):
+        self.name, self.output_file, self.id = name, output_file, uuid.uuid4()
+
+
+def feed(streams, task, text):
+    stream = streams.begin(task)
+    for token in tokenize(text):
+        streams.feed(str(task.id), token)
+    streams.end(stream)
+    return stream
+
+
+def test_only_the_final_answer_is_streamed_to_the_partial_file(tmp_path):
+    seen = []
+    streams = OutputStreams(enabled=True, subscribers=[lambda stream, added: seen.append(added)])
+    task = Task("code_task", str(tmp_path / "out" / "accounts.py"))
+    stream = feed(streams, task, "Thought: I now can give a great answer\nFinal Answer: " + MODULE)
+
+    assert stream.text == MODULE
+    assert "".join(seen) == MODULE
+    with open(str(tmp_path / "out" / "accounts.py.partial")) as f:
+        assert f.read() == MODULE
+    # A valid module, docstring included, is never flagged while it streams
+    assert streams.syntax.checks > 0 and streams.syntax.errors == {}
+
+
+def test_syntax_errors_are_caught_before_the_module_is_finished(tmp_path):
+    watch = SyntaxWatch()
+    checked_at = []
+    stream = TaskStream("code_task", str(tmp_path / "accounts.py"), [watch, lambda s, added: checked_at.append(
+        ("code_task" in watch.errors, len(s.text)))])
+    broken = "```python\nimport json\n\n\ndef balance():\n    return 1\n" + "x = 1\n" * 50
+    for token in tokenize("Final Answer: " + broken):
+        stream.feed(token)
+    stream.close()
+
+    assert watch.errors["code_task"].startswith("line 1:")
+    first = next(length for flagged, length in checked_at if flagged)
+    assert first < len(broken) / 2
+
+
+def test_disabled_or_fileless_tasks_are_not_streamed(tmp_path):
+    assert OutputStreams(enabled=False).begin(Task("t", str(tmp_path / "a.py"))) is None
+    assert OutputStreams(enabled=True).begin(Task("t", None)) is None
+
+
+def test_output_file_is_replaced_atomically(tmp_path, monkeypatch):
+    # crewAI strips the leading slash from absolute output paths
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "accounts.py"
+    path.write_text("old")
+    (tmp_path / "accounts.py.partial").write_text("half")
+    agent = Agent(role="Engineer", goal="Build", backstory="Seasoned", llm=FakeLLM())
+    task = AtomicOutputTask(description="Write it", expected_output="Code", agent=agent, output_file="accounts.py")
+    task.execute_sync()
+    assert path.read_text() == "reply 1"
+    assert sorted(os.listdir(tmp_path)) == ["accounts.py"]
+
+
+def test_concurrent_atomic_writes_use_their_own_temp_files(tmp_path):
+    path = str(tmp_path / "summary.json")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda n: atomic_write(path, chr(ord("a") + n) * 10000), range(26)))
+    assert len(set(open(path).read())) == 1
+    assert os.listdir(tmp_path) == ["summary.json"]
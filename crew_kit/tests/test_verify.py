@@ -0,0 +1,130 @@
+import pytest
+from conftest import ScriptedLLM
+from crewai import Agent, Crew, Task
+
+from crew_kit.cache import LLMCache
+from crew_kit.llm import CachedLLM
+from crew_kit.checkpoint import CheckpointStore
+from crew_kit.sandbox import SandboxLimits, SandboxPool
+from crew_kit.verify import compile_errors, run_tests, verify, verify_and_repair
+
+BUGGY = "def add(a, b):\n    return a - b\n"
+FIXED = "def add(a, b):\n    return a + b\n"
+TESTS = (
+    "from calc import add\n\n\n"
+    "def test_add():\n    assert add(2, 2) == 4\n\n\n"
+    "def test_zero():\n    assert add(0, 0) == 0\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "output").mkdir()
+
+
+@pytest.fixture
+def pool():
+    pool = SandboxPool(size=2, mount="output", limits=SandboxLimits(timeout_seconds=30))
+    yield pool
+    pool.close()
+
+
+def build_crew(replies):
+    llm = ScriptedLLM(replies)
+    cached = CachedLLM("fake/model", cache=LLMCache(mode="off"), llm=llm)
+    dev = Agent(role="Backend Engineer", goal="Build {module_name}", backstory="Seasoned", llm=cached)
+    tester = Agent(role="Test Engineer", goal="Test", backstory="Seasoned", llm=cached)
+    code = Task(name="code_task", description="Write {module_name}", expected_output="Code",
+                agent=dev, output_file="output/{module_name}")
+    tests = Task(name="test_task", description="Test {module_name}", expected_output="Tests",
+                 agent=tester, context=[code], output_file="output/test_{module_name}")
+    return Crew(agents=[dev, tester], tasks=[code, tests]), llm
+
+
+INPUTS = {"module_name": "calc.py"}
+
+
+def test_compile_errors_are_reported_per_task(tmp_path):
+    (tmp_path / "output" / "ok.py").write_text(FIXED)
+    (tmp_path / "output" / "bad.py").write_text("```python\nx = 1\n```")
+    errors = compile_errors({"a": "output/ok.py", "b": "output/bad.py", "c": "output/missing.py"})
+    assert set(errors) == {"b", "c"}
+    assert errors["b"].startswith("SyntaxError")
+
+
+def test_tests_are_sharded_across_sandboxes(pool, tmp_path):
+    (tmp_path / "output" / "calc.py").write_text(BUGGY)
+    (tmp_path / "output" / "test_calc.py").write_text(
+        TESTS + "\n\ndef test_one():\n    assert add(1, 0) == 1\n\n\ndef test_two():\n    assert add(1, 1) == 2\n"
+    )
+    report = run_tests(pool, "output/test_calc.py")
+    assert report.tests_run == 4
+    assert sorted(f.nodeid.split("::")[-1] for f in report.failures) == ["test_add", "test_two"]
+    assert "assert 0 == 4" in report.feedback()
+    assert pool.stats.cold_starts == 2
+
+
+def test_test_file_outside_mount_is_rejected(pool, tmp_path):
+    (tmp_path / "elsewhere.py").write_text(TESTS)
+    with pytest.raises(ValueError, match="outside the sandbox mount"):
+        run_tests(pool, "elsewhere.py")
+
+
+def test_failing_tests_are_repaired_by_rerunning_code_task_only(pool, tmp_path):
+    crew, llm = build_crew([BUGGY, TESTS, FIXED])
+    crew.kickoff(inputs=INPUTS)
+    store = CheckpointStore("output/.checkpoints")
+
+    report = verify_and_repair(crew, INPUTS, pool, store=store)
+
+    assert report.ok and report.tests_run == 2
+    assert llm.calls == 3
+    repair_prompt = str(llm.received[-1])
+    assert "test_add" in repair_prompt and "test_zero" not in repair_prompt
+    assert (tmp_path / "output" / "calc.py").read_text().strip() == FIXED.strip()
+    assert (tmp_path / "output" / "test_calc.py").read_text().strip() == TESTS.strip()
+    assert store.load("code_task")["raw"] == FIXED.strip()
+
+
+def test_file_that_does_not_compile_is_regenerated_by_its_task(pool, tmp_path):
+    crew, llm = build_crew([FIXED, "def test_add(:\n", TESTS])
+    crew.kickoff(inputs=INPUTS)
+
+    report = verify_and_repair(crew, INPUTS, pool)
+
+    assert report.ok
+    assert "Compile error" in str(llm.received[-1])
+    assert (tmp_path / "output" / "test_calc.py").read_text().strip() == TESTS.strip()
+    assert (tmp_path / "output" / "calc.py").read_text().strip() == FIXED.strip()
+
+
+def test_a_test_file_without_tests_is_regenerated_by_test_task(pool, tmp_path):
+    crew, llm = build_crew([FIXED, "from calc import add\n", TESTS])
+    crew.kickoff(inputs=INPUTS)
+    assert verify(crew, pool).summary().startswith("Verification failed: no tests ran")
+
+    report = verify_and_repair(crew, INPUTS, pool)
+
+    assert report.ok and report.tests_run == 2
+    assert "No tests were collected" in str(llm.received[-1])
+    assert (tmp_path / "output" / "test_calc.py").read_text().strip() == TESTS.strip()
+
+
+def test_repairs_are_bounded(pool):
+    crew, llm = build_crew([BUGGY, TESTS, BUGGY])
+    crew.kickoff(inputs=INPUTS)
+
+    report = verify_and_repair(crew, INPUTS, pool, max_repairs=2)
+
+    assert not report.ok
+    assert llm.calls == 4
+    assert report.summary().startswith("Verification failed: 1 of 2 tests failed")
+
+
+def test_verify_requires_code_and_test_tasks(pool):
+    crew, _ = build_crew([FIXED])
+    crew.tasks = crew.tasks[:1]
+    with pytest.raises(ValueError, match="test_task"):
+        verify_and_repair(crew, INPUTS, pool)
+    assert verify(crew, pool).tests_run == 0
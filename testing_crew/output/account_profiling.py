@@ -0,0 +1,179 @@
+"""Optional profiling hooks for the SQLite account engine in ``accounts.py``.
+
+While an :class:`AccountProfiler` is installed, ``Account._execute``,
+``Account._init_db`` and ``get_share_price`` report to it where a call spends
+its time:
+
+- per SQL statement: calls, cumulative and worst time, and rows returned or
+  changed;
+- per phase: opening connections (``connect``), schema setup (``init_db``),
+  ``commit`` and ``price_lookup``.
+
+A statement slower than ``slow_query_seconds`` is logged on the
+``accounts.profiling`` logger with its ``EXPLAIN QUERY PLAN``. The last
+:data:`MAX_SLOW_QUERIES` are kept on the profiler. :meth:`AccountProfiler.snapshot`
+returns everything as a dict, and :meth:`AccountProfiler.prometheus_text`
+dumps it in the Prometheus text exposition format. Without a profiler the
+hooks cost one global lookup per call::
+
+    with AccountProfiler(slow_query_seconds=0.05) as profiler:
+        account.buy("AAPL", 10)
+    print(profiler.report())
+"""
+import logging
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import accounts
+
+logger = logging.getLogger("accounts.profiling")
+
+DEFAULT_SLOW_QUERY_SECONDS = 0.1
+MAX_SLOW_QUERIES = 100
+
+
+@dataclass
+class StatementStats:
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    total_seconds: float = 0.0
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    params: tuple
+    seconds: float
+    rows: int
+    # One line per EXPLAIN QUERY PLAN row, e.g. "SCAN transactions"
+    plan: list[str] = field(default_factory=list)
+
+
+def normalize(query: str) -> str:
+    """``query`` on one line, so the same statement is always one key."""
+    return " ".join(query.split())
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class AccountProfiler:
+    """Statement and phase statistics for the account engine."""
+
+    def __init__(self, slow_query_seconds: float | None = DEFAULT_SLOW_QUERY_SECONDS):
+        self.slow_query_seconds = slow_query_seconds
+        self.statements: dict[str, StatementStats] = {}
+        self.phases: dict[str, PhaseStats] = {}
+        self.slow_queries: deque[SlowQuery] = deque(maxlen=MAX_SLOW_QUERIES)
+        self.slow_query_count = 0
+        self._lock = threading.Lock()
+
+    # === Installing ===
+    def install(self) -> "AccountProfiler":
+        accounts.set_profiler(self)
+        return self
+
+    def uninstall(self) -> None:
+        if accounts._profiler is self:
+            accounts.set_profiler(None)
+
+    def __enter__(self) -> "AccountProfiler":
+        return self.install()
+
+    def __exit__(self, *exc_info) -> None:
+        self.uninstall()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.statements.clear()
+            self.phases.clear()
+            self.slow_queries.clear()
+            self.slow_query_count = 0
+
+    # === Hooks called by accounts.py ===
+    def phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.phases.setdefault(name, PhaseStats())
+            stats.calls += 1
+            stats.total_seconds += seconds
+
+    def statement(self, conn: Any, query: str, params: tuple, seconds: float, rows: int) -> None:
+        key = normalize(query)
+        with self._lock:
+            stats = self.statements.setdefault(key, StatementStats())
+            stats.calls += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += rows
+        if self.slow_query_seconds is None or seconds < self.slow_query_seconds:
+            return
+        try:
+            plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()]
+        except Exception as e:
+            plan = [f"no plan: {e}"]
+        slow = SlowQuery(key, tuple(params), seconds, rows, plan)
+        with self._lock:
+            self.slow_queries.append(slow)
+            self.slow_query_count += 1
+        logger.warning("Slow query (%.1f ms, %d rows): %s\n  %s", seconds * 1000, rows, key, "\n  ".join(plan))
+
+    # === Reporting ===
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "statements": {key: asdict(stats) for key, stats in self.statements.items()},
+                "phases": {name: asdict(stats) for name, stats in self.phases.items()},
+                "slow_queries": [asdict(slow) for slow in self.slow_queries],
+                "slow_query_count": self.slow_query_count,
+            }
+
+    def prometheus_text(self, prefix: str = "account") -> str:
+        """The statistics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        metrics = [
+            ("sql_statements_total", "counter", "SQL statements executed.", "statements", "statement", "calls"),
+            ("sql_seconds_total", "counter", "Time spent executing SQL statements.", "statements", "statement",
+             "total_seconds"),
+            ("sql_seconds_max", "gauge", "Slowest execution of a SQL statement.", "statements", "statement",
+             "max_seconds"),
+            ("sql_rows_total", "counter", "Rows returned or changed by SQL statements.", "statements", "statement",
+             "rows"),
+            ("phase_calls_total", "counter", "Calls per engine phase.", "phases", "phase", "calls"),
+            ("phase_seconds_total", "counter", "Time spent per engine phase.", "phases", "phase", "total_seconds"),
+        ]
+        lines = []
+        for name, kind, help_text, scope, label, field_name in metrics:
+            lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} {kind}"]
+            for key, stats in sorted(snapshot[scope].items()):
+                lines.append(f'{prefix}_{name}{{{label}="{_label(key)}"}} {stats[field_name]}')
+        lines += [
+            f"# HELP {prefix}_slow_queries_total SQL statements slower than the slow query threshold.",
+            f"# TYPE {prefix}_slow_queries_total counter",
+            f"{prefix}_slow_queries_total {snapshot['slow_query_count']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def report(self) -> str:
+        snapshot = self.snapshot()
+        lines = ["Account engine profile:"]
+        for name, stats in sorted(snapshot["phases"].items()):
+            lines.append(f"  {name:<14} {stats['calls']:7} calls  {stats['total_seconds'] * 1000:9.1f} ms")
+        ranked = sorted(snapshot["statements"].items(), key=lambda item: -item[1]["total_seconds"])
+        for key, stats in ranked:
+            lines.append(
+                f"  {stats['calls']:7} x {stats['total_seconds'] * 1000:9.1f} ms "
+                f"(max {stats['max_seconds'] * 1000:.1f} ms, {stats['rows']} rows)  {key}"
+            )
+        if snapshot["slow_query_count"]:
+            lines.append(f"  {snapshot['slow_query_count']} slow queries")
+        return "\n".join(lines)
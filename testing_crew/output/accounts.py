@@ -1,9 +1,221 @@
+import pathlib
 import sqlite3
+import sys
+import threading
 import time
-from typing import Optional, Dict, List
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterator, Optional, Dict, List
+
+# A shared-cache in-memory database: every Account on this path in the
+# process sees the same data, with no file I/O (see shared_connection)
+MEMORY_DB = "file:accounts?mode=memory&cache=shared"
+
+COST_BASIS_METHODS = ("fifo", "average")
+
+# Ledger rows with the symbol name looked up from its id
+_LEDGER = (
+    "SELECT t.id, t.username, t.timestamp, t.type, s.symbol, t.quantity, t.price, t.amount, t.balance_after "
+    "FROM transactions t LEFT JOIN symbols s ON s.id = t.symbol_id"
+)
+
+# Columns added to databases created before cost-basis tracking
+_MIGRATIONS = {
+    "users": [
+        ("cost_tracked", "INTEGER NOT NULL DEFAULT 0"),
+        ("version", "INTEGER NOT NULL DEFAULT 0"),
+        ("trading_day", "INTEGER NOT NULL DEFAULT 0"),
+        ("day_realized", "REAL NOT NULL DEFAULT 0"),
+    ],
+    "holdings": [("fifo_cost", "REAL NOT NULL DEFAULT 0"), ("average_cost", "REAL NOT NULL DEFAULT 0")],
+}
+
+_TABLES = {
+    # holdings table, with the cost of the open shares under each method
+    "holdings": """
+        CREATE TABLE IF NOT EXISTS {name} (
+            username TEXT,
+            symbol_id INTEGER,
+            quantity INTEGER,
+            fifo_cost REAL NOT NULL DEFAULT 0,
+            average_cost REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (username, symbol_id)
+        )
+    """,
+    # realized P/L per symbol, under each method
+    "realized": """
+        CREATE TABLE IF NOT EXISTS {name} (
+            username TEXT,
+            symbol_id INTEGER,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            fifo REAL NOT NULL DEFAULT 0,
+            average REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (username, symbol_id)
+        )
+    """,
+    # lots table: one row per buy; sells consume the oldest open lots first
+    "lots": """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            symbol_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            remaining INTEGER NOT NULL,
+            price REAL NOT NULL,
+            opened_at REAL NOT NULL
+        )
+    """,
+    # transactions table
+    "transactions": """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            type TEXT NOT NULL,
+            symbol_id INTEGER,
+            quantity REAL,
+            price REAL,
+            amount REAL,
+            balance_after REAL NOT NULL
+        )
+    """,
+}
+
+# Tables that stored symbols as free text, and how their rows move to
+# symbol ids. Positions whose symbols differ only in case are merged.
+_SYMBOL_MIGRATIONS = {
+    "holdings": (
+        "username, symbol_id, quantity, fifo_cost, average_cost",
+        "SELECT t.username, s.id, SUM(t.quantity), SUM(t.fifo_cost), SUM(t.average_cost) FROM holdings t "
+        "JOIN symbols s ON s.symbol = UPPER(TRIM(t.symbol)) GROUP BY t.username, s.id",
+    ),
+    "realized": (
+        "username, symbol_id, quantity, fifo, average",
+        "SELECT t.username, s.id, SUM(t.quantity), SUM(t.fifo), SUM(t.average) FROM realized t "
+        "JOIN symbols s ON s.symbol = UPPER(TRIM(t.symbol)) GROUP BY t.username, s.id",
+    ),
+    "lots": (
+        "id, username, symbol_id, quantity, remaining, price, opened_at",
+        "SELECT t.id, t.username, s.id, t.quantity, t.remaining, t.price, t.opened_at FROM lots t "
+        "JOIN symbols s ON s.symbol = UPPER(TRIM(t.symbol))",
+    ),
+    "transactions": (
+        "id, username, timestamp, type, symbol_id, quantity, price, amount, balance_after",
+        "SELECT t.id, t.username, t.timestamp, t.type, s.id, t.quantity, t.price, t.amount, t.balance_after "
+        "FROM transactions t LEFT JOIN symbols s ON s.symbol = UPPER(TRIM(t.symbol))",
+    ),
+}
+
+# Optional instrumentation, installed by account_profiling.AccountProfiler
+_profiler = None
+
+
+def set_profiler(profiler) -> None:
+    global _profiler
+    _profiler = profiler
+
+
+# Change feeds per database path, registered by change_feed.ChangeFeed
+_feeds: Dict[str, list] = {}
+
+
+def add_feed(db_path: str, feed) -> None:
+    _feeds.setdefault(db_path, []).append(feed)
+
+
+def remove_feed(db_path: str, feed) -> None:
+    feeds = _feeds.get(db_path, [])
+    if feed in feeds:
+        feeds.remove(feed)
+    if not feeds:
+        _feeds.pop(db_path, None)
+
+
+def publish(db_path: str) -> None:
+    """Let the change feeds on ``db_path`` pick up newly committed mutations."""
+    for feed in list(_feeds.get(db_path, ())):
+        feed.poll()
+
+
+# Pre-trade risk caches per database path, installed by risk.RiskCache
+_risk_caches: Dict[str, object] = {}
+
+
+def set_risk_cache(db_path: str, cache) -> None:
+    if cache is None:
+        _risk_caches.pop(db_path, None)
+    else:
+        _risk_caches[db_path] = cache
+
+
+def trading_day(timestamp: float) -> int:
+    """The UTC day of ``timestamp``, as days since the epoch."""
+    return int(timestamp // 86400)
+
+
+# In-memory databases live only while a connection to them is open, so each
+# one is served by a single long-lived connection
+_shared: Dict[str, sqlite3.Connection] = {}
+_shared_lock = threading.Lock()
+# id() of each shared connection -> the lock its users hold (see connection_lock)
+_connection_locks: Dict[int, threading.RLock] = {}
+
+
+def is_memory_db(db_path: str) -> bool:
+    return db_path == ":memory:" or (db_path.startswith("file:") and "mode=memory" in db_path)
+
+
+def shared_connection(db_path: str) -> sqlite3.Connection:
+    """The process-wide connection to the in-memory database ``db_path``."""
+    with _shared_lock:
+        conn = _shared.get(db_path)
+        if conn is None:
+            conn = sqlite3.connect(db_path, uri=db_path.startswith("file:"), check_same_thread=False)
+            _shared[db_path] = conn
+            _connection_locks[id(conn)] = threading.RLock()
+        return conn
+
+
+def connection_lock(conn: sqlite3.Connection) -> ContextManager:
+    """The lock that serializes threads on a shared in-memory connection.
+
+    Every thread uses the same connection, so one thread's transaction is
+    open for all of them. A mutation holds this lock from its ``BEGIN`` to its
+    commit or rollback, and a single statement holds it while it runs. Code
+    that opens its own transaction on a shared connection must hold it too.
+    Any other connection gets a no-op.
+    """
+    lock = _connection_locks.get(id(conn))
+    return lock if lock is not None else nullcontext()
+
+
+def connect_read_only(db_path: str) -> sqlite3.Connection:
+    """A connection that can only read ``db_path``; in-memory databases get the shared one."""
+    if is_memory_db(db_path):
+        return shared_connection(db_path)
+    uri = pathlib.Path(db_path).resolve().as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+
+def close_shared(db_path: Optional[str] = None) -> None:
+    """Close (and so drop) one in-memory database, or all of them."""
+    with _shared_lock:
+        paths = [db_path] if db_path else list(_shared)
+        for path in paths:
+            conn = _shared.pop(path, None)
+            if conn is not None:
+                _connection_locks.pop(id(conn), None)
+                conn.close()
+
+
+def normalize_symbol(symbol: str) -> str:
+    """The canonical form of a ticker symbol: upper case and interned."""
+    return sys.intern(symbol.strip().upper())
+
 
 # Share price lookup (static for test)
 def get_share_price(symbol: str) -> float:
+    profiler = _profiler
+    started = time.perf_counter() if profiler else 0.0
     prices = {
         'AAPL': 175.0,
         'TSLA': 750.0,
@@ -13,13 +225,42 @@ def get_share_price(symbol: str) -> float:
         return prices[symbol.upper()]
     except KeyError:
         raise ValueError(f"Symbol '{symbol}' not supported.")
+    finally:
+        if profiler:
+            profiler.phase("price_lookup", time.perf_counter() - started)
 
 
 class Account:
-    def __init__(self, username: str, db_path: str = "accounts.db"):
+    """A trading account stored in SQLite.
+
+    ``db_path`` is a database file, or an in-memory database (``:memory:`` or
+    a ``mode=memory`` URI such as :data:`MEMORY_DB`). Pass ``conn`` to run
+    every statement on that connection instead. Each mutation (``deposit``,
+    ``buy``, ...) runs as one transaction: it commits all of its rows or,
+    if any statement fails, none of them. A caller already holding a
+    transaction or savepoint on ``conn`` keeps control of it, and the
+    mutation's rows are committed or rolled back with the caller's. Threads
+    on one in-memory database take turns (see :func:`connection_lock`).
+
+    With ``read_only`` the account is for reporting: it opens read-only
+    connections, leaves the schema alone and refuses every mutation (see
+    ``reporting.LedgerReader``).
+    """
+
+    read_only = False
+    # The connection of the mutation in progress, inside _transaction()
+    _txn_conn: Optional[sqlite3.Connection] = None
+
+    def __init__(self, username: str, db_path: str = "accounts.db", conn: Optional[sqlite3.Connection] = None,
+                 read_only: bool = False):
         self.db_path = db_path
         self.username = username
-        self._init_db()
+        self.conn = conn
+        self.read_only = read_only
+        # Symbol ids known to be committed; ids never change once they are
+        self._symbol_ids: Dict[str, int] = {}
+        if not read_only:
+            self._init_db()
 
         user = self._execute(
             "SELECT username FROM users WHERE username = ?",
@@ -30,187 +271,434 @@ class Account:
             raise ValueError(f"Account '{self.username}' does not exist.")
 
     @classmethod
-    def create_account(cls, username: str, initial_deposit: float, db_path: str = "accounts.db") -> "Account":
+    def create_account(cls, username: str, initial_deposit: float, db_path: str = "accounts.db",
+                       conn: Optional[sqlite3.Connection] = None) -> "Account":
         # Init DB
         inst = cls.__new__(cls)
         inst.db_path = db_path
         inst.username = username
+        inst.conn = conn
+        inst._symbol_ids = {}
         inst._init_db()
-        cur = inst._execute("SELECT username FROM users WHERE username = ?", (username,), fetchone=True)
-        if cur:
-            raise ValueError(f"Account '{username}' already exists.")
-        if initial_deposit < 0:
-            raise ValueError("Initial deposit must be non-negative.")
-        inst._execute(
-            "INSERT INTO users (username, balance, total_deposit) VALUES (?, ?, ?)",
-            (username, initial_deposit, initial_deposit)
-        )
-        now = time.time()
-        inst._execute(
-            "INSERT INTO transactions (username, timestamp, type, symbol, quantity, price, amount, balance_after) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (username, now, "deposit", None, initial_deposit, None, initial_deposit, initial_deposit)
-        )
-        return cls(username, db_path)
+        with inst._transaction():
+            cur = inst._execute("SELECT username FROM users WHERE username = ?", (username,), fetchone=True)
+            if cur:
+                raise ValueError(f"Account '{username}' already exists.")
+            if initial_deposit < 0:
+                raise ValueError("Initial deposit must be non-negative.")
+            inst._execute(
+                "INSERT INTO users (username, balance, total_deposit, cost_tracked) VALUES (?, ?, ?, 1)",
+                (username, initial_deposit, initial_deposit)
+            )
+            now = time.time()
+            inst._execute(
+                "INSERT INTO transactions (username, timestamp, type, symbol_id, quantity, price, amount, "
+                "balance_after) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (username, now, "deposit", None, initial_deposit, None, initial_deposit, initial_deposit)
+            )
+        inst._publish()
+        return cls(username, db_path, conn=conn)
+
+    def _connect(self):
+        """The connection for the next statement, and whether to close it afterwards."""
+        if self._txn_conn is not None:
+            return self._txn_conn, False
+        if self.conn is not None:
+            return self.conn, False
+        if is_memory_db(self.db_path):
+            return shared_connection(self.db_path), False
+        if self.read_only:
+            return connect_read_only(self.db_path), True
+        return sqlite3.connect(self.db_path), True
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise RuntimeError(f"Account '{self.username}' is open read-only for reporting.")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Run the statements of one mutation as a single transaction.
+
+        Commits when the block ends and rolls back if it raises. Inside a
+        transaction the caller holds, the block just joins it. On a shared
+        in-memory connection the block holds :func:`connection_lock`, so
+        another thread's mutation waits instead of joining this one.
+        """
+        if self._txn_conn is not None:
+            yield
+            return
+        conn, owned = self._connect()
+        with connection_lock(conn):
+            if conn.in_transaction:
+                # Opened by this thread's caller, which commits or rolls back:
+                # other threads cannot hold a transaction open without the lock
+                yield
+                return
+            profiler = _profiler
+            self._txn_conn = conn
+            self._new_symbol_ids: Dict[str, int] = {}
+            try:
+                # Write lock up front: the reads a mutation checks stay valid
+                # until it commits
+                conn.execute("BEGIN IMMEDIATE")
+                yield
+                started = time.perf_counter() if profiler else 0.0
+                conn.commit()
+                if profiler:
+                    profiler.phase("commit", time.perf_counter() - started)
+                self._symbol_ids.update(self._new_symbol_ids)
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._txn_conn = None
+                if owned:
+                    conn.close()
+
+    def _in_transaction(self) -> bool:
+        """Whether statements run inside a transaction that the caller commits."""
+        if self.conn is not None:
+            conn = self.conn
+        elif is_memory_db(self.db_path):
+            conn = shared_connection(self.db_path)
+        else:
+            return False
+        # Not another thread's mutation, which holds the lock until it ends
+        with connection_lock(conn):
+            return conn.in_transaction
+
+    def _publish(self) -> None:
+        """Called after each mutation; publishes it once it is committed."""
+        if self.db_path not in _feeds or self._in_transaction():
+            # The caller commits, then calls publish()
+            return
+        publish(self.db_path)
+
+    def _write_through(self, version: int, balance: float, symbol: Optional[str] = None,
+                       quantity: Optional[int] = None, day: Optional[int] = None,
+                       day_realized: Optional[float] = None) -> None:
+        """Bring the risk cache's copy of the account up to ``version + 1``."""
+        risk = _risk_caches.get(self.db_path)
+        if risk is not None:
+            risk.applied(self.username, version + 1, balance, symbol, quantity, day, day_realized)
+
+    def _symbol_id(self, symbol: str, create: bool = True) -> Optional[int]:
+        """The id of ``symbol`` (already normalized), adding it if ``create``."""
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is not None:
+            return symbol_id
+        row = self._execute("SELECT id FROM symbols WHERE symbol = ?", (symbol,), fetchone=True)
+        if row is None:
+            if not create:
+                return None
+            self._execute("INSERT INTO symbols (symbol) VALUES (?)", (symbol,))
+            row = self._execute("SELECT id FROM symbols WHERE symbol = ?", (symbol,), fetchone=True)
+        if self._txn_conn is not None:
+            # Known to be committed once this mutation is
+            self._new_symbol_ids[symbol] = row['id']
+        elif not self._in_transaction():
+            # A caller's rollback could still take an uncommitted id away
+            self._symbol_ids[symbol] = row['id']
+        return row['id']
 
     def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        # users table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                username TEXT PRIMARY KEY,
-                balance REAL NOT NULL,
-                total_deposit REAL NOT NULL
+        profiler = _profiler
+        started = time.perf_counter() if profiler else 0.0
+        conn, owned = self._connect()
+        with connection_lock(conn):
+            began = conn.in_transaction
+            cur = conn.cursor()
+            # users table; version is bumped by every mutation, so cached state
+            # can tell it is stale, and day_realized is the realized P/L (average
+            # cost) of the sells on trading_day
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT PRIMARY KEY,
+                    balance REAL NOT NULL,
+                    total_deposit REAL NOT NULL,
+                    cost_tracked INTEGER NOT NULL DEFAULT 0,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    trading_day INTEGER NOT NULL DEFAULT 0,
+                    day_realized REAL NOT NULL DEFAULT 0
+                )
+            """)
+            # symbols table: each ticker once, referenced by id everywhere else
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS symbols (
+                    id INTEGER PRIMARY KEY,
+                    symbol TEXT NOT NULL UNIQUE
+                )
+            """)
+            for table in _SYMBOL_MIGRATIONS:
+                cur.execute(_TABLES[table].format(name=table))
+            for table, columns in _MIGRATIONS.items():
+                existing = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+                for name, definition in columns:
+                    if name not in existing:
+                        cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+            legacy = [row[0] for row in cur.execute(
+                "SELECT m.name FROM sqlite_master m JOIN pragma_table_info(m.name) p "
+                f"WHERE m.type = 'table' AND p.name = 'symbol' AND m.name IN ({', '.join('?' * len(_SYMBOL_MIGRATIONS))})",
+                tuple(_SYMBOL_MIGRATIONS),
+            )]
+            if legacy:
+                if not began:
+                    cur.execute("BEGIN")
+                self._migrate_symbols(cur, legacy)
+            # Only open lots are indexed, so a sell finds the oldest one directly
+            # however many consumed lots the account has
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS lots_open ON lots (username, symbol_id, id) WHERE remaining > 0"
             )
-        """)
-        # holdings table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS holdings (
-                username TEXT,
-                symbol TEXT,
-                quantity INTEGER,
-                PRIMARY KEY (username, symbol)
-            )
-        """)
-        # transactions table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL,
-                timestamp REAL NOT NULL,
-                type TEXT NOT NULL,
-                symbol TEXT,
-                quantity REAL,
-                price REAL,
-                amount REAL,
-                balance_after REAL NOT NULL
+            if not began:
+                conn.commit()
+        if owned:
+            conn.close()
+        if profiler:
+            profiler.phase("init_db", time.perf_counter() - started)
+
+    @staticmethod
+    def _migrate_symbols(cur: sqlite3.Cursor, legacy: List[str]) -> None:
+        """Rewrite ``legacy`` tables from free-text symbols to symbol ids."""
+        for table in legacy:
+            cur.execute(
+                f"INSERT OR IGNORE INTO symbols (symbol) SELECT DISTINCT UPPER(TRIM(symbol)) FROM {table} "
+                "WHERE symbol IS NOT NULL ORDER BY 1"
             )
-        """)
-        conn.commit()
-        conn.close()
+        for table in legacy:
+            columns, rows = _SYMBOL_MIGRATIONS[table]
+            cur.execute(_TABLES[table].format(name=f"{table}_migrated"))
+            cur.execute(f"INSERT INTO {table}_migrated ({columns}) {rows}")
+            cur.execute(f"DROP TABLE {table}")
+            cur.execute(f"ALTER TABLE {table}_migrated RENAME TO {table}")
 
     def _execute(self, query: str, params: tuple = (), fetchone: bool = False, fetchall: bool = False):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-        cur.execute(query, params)
-        result = None
-        if fetchone:
-            result = cur.fetchone()
-        elif fetchall:
-            result = cur.fetchall()
-        conn.commit()
-        conn.close()
+        profiler = _profiler
+        started = time.perf_counter() if profiler else 0.0
+        conn, owned = self._connect()
+        if profiler:
+            connected = time.perf_counter()
+            profiler.phase("connect", connected - started)
+        with connection_lock(conn):
+            began = conn.in_transaction
+            cur = conn.cursor()
+            cur.row_factory = sqlite3.Row
+            cur.execute(query, params)
+            result = None
+            if fetchone:
+                result = cur.fetchone()
+            elif fetchall:
+                result = cur.fetchall()
+            if profiler:
+                executed = time.perf_counter()
+                if fetchone:
+                    rows = int(result is not None)
+                else:
+                    rows = len(result) if fetchall else max(cur.rowcount, 0)
+                profiler.statement(conn, query, params, executed - connected, rows)
+            if not began:
+                conn.commit()
+                if profiler:
+                    profiler.phase("commit", time.perf_counter() - executed)
+        if owned:
+            conn.close()
         return result
 
     # === Funds Management ===
     def deposit(self, amount: float) -> None:
+        self._check_writable()
         if amount <= 0:
             raise ValueError("Deposit amount must be positive.")
-        current = self._execute(
-            "SELECT balance, total_deposit FROM users WHERE username = ?",
-            (self.username,), fetchone=True
-        )
-        new_balance = current['balance'] + amount
-        new_total_deposit = current['total_deposit'] + amount
-        self._execute(
-            "UPDATE users SET balance = ?, total_deposit = ? WHERE username = ?",
-            (new_balance, new_total_deposit, self.username)
-        )
-        now = time.time()
-        self._execute(
-            "INSERT INTO transactions (username, timestamp, type, symbol, quantity, price, amount, balance_after) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (self.username, now, "deposit", None, amount, None, amount, new_balance)
-        )
+        with self._transaction():
+            current = self._execute(
+                "SELECT balance, total_deposit, version FROM users WHERE username = ?",
+                (self.username,), fetchone=True
+            )
+            new_balance = current['balance'] + amount
+            new_total_deposit = current['total_deposit'] + amount
+            self._execute(
+                "UPDATE users SET balance = ?, total_deposit = ?, version = version + 1 WHERE username = ?",
+                (new_balance, new_total_deposit, self.username)
+            )
+            now = time.time()
+            self._execute(
+                "INSERT INTO transactions (username, timestamp, type, symbol_id, quantity, price, amount, balance_after) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.username, now, "deposit", None, amount, None, amount, new_balance)
+            )
+        self._write_through(current['version'], new_balance)
+        self._publish()
 
     def withdraw(self, amount: float) -> None:
+        self._check_writable()
         if amount <= 0:
             raise ValueError("Withdrawal amount must be positive.")
-        current = self._execute(
-            "SELECT balance FROM users WHERE username = ?",
-            (self.username,), fetchone=True
-        )
-        if current['balance'] < amount:
-            raise ValueError("Insufficient funds for withdrawal.")
-        new_balance = current['balance'] - amount
-        self._execute(
-            "UPDATE users SET balance = ? WHERE username = ?",
-            (new_balance, self.username)
-        )
-        now = time.time()
-        self._execute(
-            "INSERT INTO transactions (username, timestamp, type, symbol, quantity, price, amount, balance_after) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (self.username, now, "withdraw", None, amount, None, -amount, new_balance)
-        )
+        with self._transaction():
+            current = self._execute(
+                "SELECT balance, version FROM users WHERE username = ?",
+                (self.username,), fetchone=True
+            )
+            if current['balance'] < amount:
+                raise ValueError("Insufficient funds for withdrawal.")
+            new_balance = current['balance'] - amount
+            self._execute(
+                "UPDATE users SET balance = ?, version = version + 1 WHERE username = ?",
+                (new_balance, self.username)
+            )
+            now = time.time()
+            self._execute(
+                "INSERT INTO transactions (username, timestamp, type, symbol_id, quantity, price, amount, balance_after) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.username, now, "withdraw", None, amount, None, -amount, new_balance)
+            )
+        self._write_through(current['version'], new_balance)
+        self._publish()
 
     # === Trading ===
-    def buy(self, symbol: str, quantity: int) -> None:
+    def buy(self, symbol: str, quantity: int, price: Optional[float] = None) -> None:
+        """Buy at ``price`` (a limit order's fill), or at the current share price."""
+        self._check_writable()
         if quantity <= 0:
             raise ValueError("Must buy a positive quantity.")
-        price = get_share_price(symbol)
+        symbol = normalize_symbol(symbol)
+        price = get_share_price(symbol) if price is None else price
+        risk = _risk_caches.get(self.db_path)
+        if risk is not None:
+            # Rejects in memory, before any round trip
+            risk.check(self, "buy", symbol, quantity, price)
         total_cost = price * quantity
-        user = self._execute(
-            "SELECT balance FROM users WHERE username = ?",
-            (self.username,), fetchone=True
-        )
-        if user['balance'] < total_cost:
-            raise ValueError("Insufficient funds to buy.")
-        # Update holdings
-        hold = self._execute("SELECT quantity FROM holdings WHERE username = ? AND symbol = ?", (self.username, symbol), fetchone=True)
-        if hold:
-            new_q = hold['quantity'] + quantity
-            self._execute("UPDATE holdings SET quantity = ? WHERE username = ? AND symbol = ?", (new_q, self.username, symbol))
-        else:
-            self._execute("INSERT INTO holdings (username, symbol, quantity) VALUES (?, ?, ?)", (self.username, symbol, quantity))
-        # Update balance
-        new_balance = user['balance'] - total_cost
-        self._execute("UPDATE users SET balance = ? WHERE username = ?", (new_balance, self.username))
-        # Transaction
-        now = time.time()
-        self._execute(
-            "INSERT INTO transactions (username, timestamp, type, symbol, quantity, price, amount, balance_after) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (self.username, now, "buy", symbol, quantity, price, -total_cost, new_balance)
-        )
+        with self._transaction():
+            user = self._execute(
+                "SELECT balance, version FROM users WHERE username = ?",
+                (self.username,), fetchone=True
+            )
+            if risk is not None and not risk.is_current(self.username, user['version']):
+                risk.check(self, "buy", symbol, quantity, price, reload=True)
+            if user['balance'] < total_cost:
+                raise ValueError("Insufficient funds to buy.")
+            now = time.time()
+            symbol_id = self._symbol_id(symbol)
+            # Update holdings; the new shares cost the same under both methods
+            hold = self._execute("SELECT quantity FROM holdings WHERE username = ? AND symbol_id = ?", (self.username, symbol_id), fetchone=True)
+            new_q = hold['quantity'] + quantity if hold else quantity
+            if hold:
+                self._execute(
+                    "UPDATE holdings SET quantity = ?, fifo_cost = fifo_cost + ?, average_cost = average_cost + ? "
+                    "WHERE username = ? AND symbol_id = ?",
+                    (new_q, total_cost, total_cost, self.username, symbol_id)
+                )
+            else:
+                self._execute(
+                    "INSERT INTO holdings (username, symbol_id, quantity, fifo_cost, average_cost) VALUES (?, ?, ?, ?, ?)",
+                    (self.username, symbol_id, quantity, total_cost, total_cost)
+                )
+            self._execute(
+                "INSERT INTO lots (username, symbol_id, quantity, remaining, price, opened_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.username, symbol_id, quantity, quantity, price, now)
+            )
+            # Update balance
+            new_balance = user['balance'] - total_cost
+            self._execute("UPDATE users SET balance = ?, version = version + 1 WHERE username = ?",
+                          (new_balance, self.username))
+            # Transaction
+            self._execute(
+                "INSERT INTO transactions (username, timestamp, type, symbol_id, quantity, price, amount, balance_after) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.username, now, "buy", symbol_id, quantity, price, -total_cost, new_balance)
+            )
+        self._write_through(user['version'], new_balance, symbol, new_q)
+        self._publish()
 
-    def sell(self, symbol: str, quantity: int) -> None:
+    def sell(self, symbol: str, quantity: int, price: Optional[float] = None) -> None:
+        """Sell at ``price`` (a limit order's fill), or at the current share price."""
+        self._check_writable()
         if quantity <= 0:
             raise ValueError("Must sell a positive quantity.")
-        price = get_share_price(symbol)
-        hold = self._execute(
-            "SELECT quantity FROM holdings WHERE username = ? AND symbol = ?",
-            (self.username, symbol), fetchone=True
-        )
-        if not hold or hold['quantity'] < quantity:
-            raise ValueError("Insufficient shares to sell.")
-        # Update holdings
-        new_q = hold['quantity'] - quantity
-        if new_q > 0:
-            self._execute("UPDATE holdings SET quantity = ? WHERE username = ? AND symbol = ?", (new_q, self.username, symbol))
-        else:
-            self._execute("DELETE FROM holdings WHERE username = ? AND symbol = ?", (self.username, symbol))
-        proceeds = price * quantity
-        user = self._execute(
-            "SELECT balance FROM users WHERE username = ?",
-            (self.username,), fetchone=True
-        )
-        new_balance = user['balance'] + proceeds
-        self._execute("UPDATE users SET balance = ? WHERE username = ?", (new_balance, self.username))
-        now = time.time()
-        self._execute(
-            "INSERT INTO transactions (username, timestamp, type, symbol, quantity, price, amount, balance_after) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (self.username, now, "sell", symbol, quantity, price, proceeds, new_balance)
-        )
+        symbol = normalize_symbol(symbol)
+        price = get_share_price(symbol) if price is None else price
+        risk = _risk_caches.get(self.db_path)
+        if risk is not None:
+            risk.check(self, "sell", symbol, quantity, price)
+        with self._transaction():
+            user = self._execute(
+                "SELECT balance, version, trading_day, day_realized FROM users WHERE username = ?",
+                (self.username,), fetchone=True
+            )
+            if risk is not None and not risk.is_current(self.username, user['version']):
+                risk.check(self, "sell", symbol, quantity, price, reload=True)
+            symbol_id = self._symbol_id(symbol, create=False)
+            hold = symbol_id is not None and self._execute(
+                "SELECT quantity, fifo_cost, average_cost FROM holdings WHERE username = ? AND symbol_id = ?",
+                (self.username, symbol_id), fetchone=True
+            )
+            if not hold or hold['quantity'] < quantity:
+                raise ValueError("Insufficient shares to sell.")
+            proceeds = price * quantity
+            # Cost of the shares sold: the oldest lots, or the average cost
+            fifo_sold = self._consume_lots(symbol_id, quantity)
+            average_sold = hold['average_cost'] * quantity / hold['quantity']
+            # Update holdings
+            new_q = hold['quantity'] - quantity
+            if new_q > 0:
+                self._execute(
+                    "UPDATE holdings SET quantity = ?, fifo_cost = fifo_cost - ?, average_cost = average_cost - ? "
+                    "WHERE username = ? AND symbol_id = ?",
+                    (new_q, fifo_sold, average_sold, self.username, symbol_id)
+                )
+            else:
+                self._execute("DELETE FROM holdings WHERE username = ? AND symbol_id = ?", (self.username, symbol_id))
+            self._execute(
+                "INSERT INTO realized (username, symbol_id, quantity, fifo, average) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (username, symbol_id) DO UPDATE SET quantity = quantity + excluded.quantity, "
+                "fifo = fifo + excluded.fifo, average = average + excluded.average",
+                (self.username, symbol_id, quantity, proceeds - fifo_sold, proceeds - average_sold)
+            )
+            now = time.time()
+            new_balance = user['balance'] + proceeds
+            day = trading_day(now)
+            day_realized = (user['day_realized'] if user['trading_day'] == day else 0.0) + proceeds - average_sold
+            self._execute(
+                "UPDATE users SET balance = ?, version = version + 1, trading_day = ?, day_realized = ? "
+                "WHERE username = ?",
+                (new_balance, day, day_realized, self.username)
+            )
+            self._execute(
+                "INSERT INTO transactions (username, timestamp, type, symbol_id, quantity, price, amount, balance_after) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.username, now, "sell", symbol_id, quantity, price, proceeds, new_balance)
+            )
+        self._write_through(user['version'], new_balance, symbol, new_q, day, day_realized)
+        self._publish()
+
+    def _consume_lots(self, symbol_id: int, quantity: int) -> float:
+        """Take ``quantity`` shares from the oldest open lots; return their cost."""
+        cost = 0.0
+        while quantity > 0:
+            lots = self._execute(
+                "SELECT id, remaining, price FROM lots WHERE username = ? AND symbol_id = ? AND remaining > 0 "
+                "ORDER BY id LIMIT 16",
+                (self.username, symbol_id), fetchall=True
+            )
+            if not lots:
+                # Shares bought before lots were tracked; backfill_lots.py rebuilds them
+                break
+            for lot in lots:
+                taken = min(quantity, lot['remaining'])
+                self._execute("UPDATE lots SET remaining = ? WHERE id = ?", (lot['remaining'] - taken, lot['id']))
+                cost += taken * lot['price']
+                quantity -= taken
+                if quantity == 0:
+                    break
+        return cost
 
     # === Portfolio and Reporting ===
     def get_portfolio_value(self) -> float:
         user = self._execute("SELECT balance FROM users WHERE username = ?", (self.username,), fetchone=True)
         balance = user['balance']
-        holdings = self._execute("SELECT symbol, quantity FROM holdings WHERE username = ?", (self.username,), fetchall=True)
+        holdings = self._execute(
+            "SELECT s.symbol, h.quantity FROM holdings h JOIN symbols s ON s.id = h.symbol_id WHERE h.username = ?",
+            (self.username,), fetchall=True
+        )
         value = balance
         for row in holdings:
             value += row['quantity'] * get_share_price(row['symbol'])
@@ -218,16 +706,69 @@ class Account:
 
     def get_profit_loss(self) -> float:
         user = self._execute("SELECT balance, total_deposit FROM users WHERE username = ?", (self.username,), fetchone=True)
-        holdings = self._execute("SELECT symbol, quantity FROM holdings WHERE username = ?", (self.username,), fetchall=True)
+        holdings = self._execute(
+            "SELECT s.symbol, h.quantity FROM holdings h JOIN symbols s ON s.id = h.symbol_id WHERE h.username = ?",
+            (self.username,), fetchall=True
+        )
         value = user['balance']
         for row in holdings:
             value += row['quantity'] * get_share_price(row['symbol'])
         return value - user['total_deposit']
 
+    def _check_cost_basis(self, method: str) -> None:
+        if method not in COST_BASIS_METHODS:
+            raise ValueError(f"Cost basis method must be one of {', '.join(COST_BASIS_METHODS)}.")
+        user = self._execute("SELECT cost_tracked FROM users WHERE username = ?", (self.username,), fetchone=True)
+        if not user['cost_tracked']:
+            raise RuntimeError(
+                f"Cost basis of '{self.username}' predates lot tracking; run backfill_lots.py on {self.db_path}."
+            )
+
+    def get_profit_loss_by_symbol(self, method: str = "fifo") -> Dict[str, dict]:
+        """Realized and unrealized P/L per symbol under ``method`` ("fifo" or "average").
+
+        Reads one row per held or sold symbol; the costs are kept up to date
+        by ``buy`` and ``sell``.
+        """
+        self._check_cost_basis(method)
+        column = "fifo_cost" if method == "fifo" else "average_cost"
+        holdings = self._execute(
+            f"SELECT s.symbol, h.quantity, h.{column} AS cost FROM holdings h JOIN symbols s ON s.id = h.symbol_id "
+            "WHERE h.username = ?",
+            (self.username,), fetchall=True
+        )
+        realized = self._execute(
+            f"SELECT s.symbol, r.{method} AS pl FROM realized r JOIN symbols s ON s.id = r.symbol_id "
+            "WHERE r.username = ?",
+            (self.username,), fetchall=True
+        )
+        report = {}
+        for row in holdings:
+            value = row['quantity'] * get_share_price(row['symbol'])
+            report[row['symbol']] = {
+                'quantity': row['quantity'],
+                'cost_basis': row['cost'],
+                'market_value': value,
+                'unrealized': value - row['cost'],
+                'realized': 0.0,
+            }
+        for row in realized:
+            entry = report.setdefault(row['symbol'], {
+                'quantity': 0, 'cost_basis': 0.0, 'market_value': 0.0, 'unrealized': 0.0, 'realized': 0.0,
+            })
+            entry['realized'] = row['pl']
+        return report
+
+    def get_realized_profit_loss(self, method: str = "fifo") -> float:
+        return sum(entry['realized'] for entry in self.get_profit_loss_by_symbol(method).values())
+
+    def get_unrealized_profit_loss(self, method: str = "fifo") -> float:
+        return sum(entry['unrealized'] for entry in self.get_profit_loss_by_symbol(method).values())
+
     def get_profit_loss_at(self, timestamp: float) -> float:
         # Reconstruct user balance and holdings as of timestamp
         txs = self._execute(
-            "SELECT * FROM transactions WHERE username = ? AND timestamp <= ? ORDER BY id ASC",
+            _LEDGER + " WHERE t.username = ? AND t.timestamp <= ? ORDER BY t.id ASC",
             (self.username, timestamp), fetchall=True
         )
         balance = 0.0
@@ -263,12 +804,15 @@ class Account:
 
     # === Holdings and Transactions ===
     def get_holdings(self) -> Dict[str, int]:
-        holdings = self._execute("SELECT symbol, quantity FROM holdings WHERE username = ?", (self.username,), fetchall=True)
-        return {row['symbol']: row['quantity'] for row in holdings}
+        holdings = self._execute(
+            "SELECT s.symbol, h.quantity FROM holdings h JOIN symbols s ON s.id = h.symbol_id WHERE h.username = ?",
+            (self.username,), fetchall=True
+        )
+        return {sys.intern(row['symbol']): row['quantity'] for row in holdings}
 
     def get_holdings_at(self, timestamp: float) -> Dict[str, int]:
         txs = self._execute(
-            "SELECT * FROM transactions WHERE username = ? AND timestamp <= ? ORDER BY id ASC",
+            _LEDGER + " WHERE t.username = ? AND t.timestamp <= ? ORDER BY t.id ASC",
             (self.username, timestamp), fetchall=True
         )
         holdings = {}
@@ -289,8 +833,7 @@ class Account:
 
     def list_transactions(self, limit: int = 100, offset: int = 0) -> List[dict]:
         rows = self._execute(
-            "SELECT * FROM transactions WHERE username = ? "
-            "ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+            _LEDGER + " WHERE t.username = ? ORDER BY t.timestamp DESC, t.id DESC LIMIT ? OFFSET ?",
             (self.username, limit, offset),
             fetchall=True
         )
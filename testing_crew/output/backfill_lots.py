@@ -0,0 +1,191 @@
+"""Backfill cost-basis lots for accounts created before lot tracking.
+
+``Account`` keeps the ``lots`` and ``realized`` tables and the cost columns
+of ``holdings`` up to date on every ``buy`` and ``sell``. Accounts that were
+already in a database when those appeared have ``users.cost_tracked = 0``,
+and their P/L by symbol cannot be read until this job has replayed their
+ledger:
+
+    python backfill_lots.py accounts.db
+
+Accounts are rebuilt ``--batch`` at a time. Each batch's lots (FIFO),
+average cost and realized P/L are rebuilt from its buys and sells in one
+``BEGIN IMMEDIATE`` transaction, so trades made while the job runs wait for
+the batch instead of slipping past it, and an interrupted run picks up where
+it stopped.
+``--all`` rebuilds every account, tracked or not.
+"""
+import argparse
+import itertools
+import sqlite3
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from accounts import Account, connection_lock
+
+DEFAULT_BATCH = 500
+
+
+@dataclass
+class BackfillStats:
+    users: int = 0
+    transactions: int = 0
+    lots: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class _Position:
+    quantity: int = 0
+    average_cost: float = 0.0
+    realized_quantity: int = 0
+    realized_fifo: float = 0.0
+    realized_average: float = 0.0
+    # [quantity, remaining, price, opened_at] per buy, oldest first
+    lots: list = field(default_factory=list)
+    open_lots: deque = field(default_factory=deque)
+
+    @property
+    def fifo_cost(self) -> float:
+        return sum(lot[1] * lot[2] for lot in self.open_lots)
+
+
+def replay(transactions) -> Dict[int, _Position]:
+    """Positions after ``transactions`` (rows with type, symbol id, quantity, price, timestamp)."""
+    positions: Dict[int, _Position] = {}
+    for kind, symbol, quantity, price, timestamp in transactions:
+        if kind not in ("buy", "sell"):
+            continue
+        quantity = int(quantity)
+        position = positions.setdefault(symbol, _Position())
+        if kind == "buy":
+            lot = [quantity, quantity, price, timestamp]
+            position.lots.append(lot)
+            position.open_lots.append(lot)
+            position.quantity += quantity
+            position.average_cost += quantity * price
+            continue
+        fifo_sold, left = 0.0, quantity
+        while left and position.open_lots:
+            lot = position.open_lots[0]
+            taken = min(left, lot[1])
+            lot[1] -= taken
+            fifo_sold += taken * lot[2]
+            left -= taken
+            if lot[1] == 0:
+                position.open_lots.popleft()
+        average_sold = position.average_cost * quantity / position.quantity if position.quantity else 0.0
+        position.quantity -= quantity
+        position.average_cost -= average_sold
+        position.realized_quantity += quantity
+        position.realized_fifo += quantity * price - fifo_sold
+        position.realized_average += quantity * price - average_sold
+    return positions
+
+
+def _write(conn: sqlite3.Connection, username: str, positions: Dict[int, _Position]) -> int:
+    lots = [(username, symbol, *lot) for symbol, p in positions.items() for lot in p.lots]
+    lots.sort(key=lambda row: row[5])
+    conn.executemany(
+        "INSERT INTO lots (username, symbol_id, quantity, remaining, price, opened_at) VALUES (?, ?, ?, ?, ?, ?)", lots
+    )
+    conn.executemany(
+        "UPDATE holdings SET fifo_cost = ?, average_cost = ? WHERE username = ? AND symbol_id = ?",
+        [(p.fifo_cost, p.average_cost, username, symbol) for symbol, p in positions.items() if p.quantity > 0],
+    )
+    conn.executemany(
+        "INSERT INTO realized (username, symbol_id, quantity, fifo, average) VALUES (?, ?, ?, ?, ?)",
+        [(username, symbol, p.realized_quantity, p.realized_fifo, p.realized_average)
+         for symbol, p in positions.items() if p.realized_quantity],
+    )
+    conn.execute("UPDATE users SET cost_tracked = 1 WHERE username = ?", (username,))
+    return len(lots)
+
+
+def _backfill_batch(conn: sqlite3.Connection, usernames: list, rebuild_all: bool, stats: BackfillStats) -> None:
+    """Rebuild ``usernames`` under one write lock.
+
+    The lots are deleted, the ledger read and the rebuilt rows written in the
+    same transaction, so a trade cannot land in between and be lost.
+    """
+    with connection_lock(conn):
+        began = conn.in_transaction
+        if not began:
+            conn.execute("BEGIN IMMEDIATE")
+        try:
+            marks = ", ".join("?" * len(usernames))
+            if not rebuild_all:
+                # Another run may have tracked some of them since they were listed
+                usernames = [row[0] for row in conn.execute(
+                    f"SELECT username FROM users WHERE username IN ({marks}) AND cost_tracked = 0", usernames
+                )]
+                marks = ", ".join("?" * len(usernames))
+            for table in ("lots", "realized"):
+                conn.execute(f"DELETE FROM {table} WHERE username IN ({marks})", usernames)
+            rows = conn.execute(
+                "SELECT username, type, symbol_id, quantity, price, timestamp FROM transactions "
+                f"WHERE username IN ({marks}) ORDER BY username, id", usernames
+            ).fetchall()
+            ledgers = {username: [row[1:] for row in txs]
+                       for username, txs in itertools.groupby(rows, key=lambda row: row[0])}
+            transactions = lots = 0
+            # Accounts without any ledger rows have nothing to rebuild
+            for username in usernames:
+                txs = ledgers.get(username, [])
+                transactions += len(txs)
+                lots += _write(conn, username, replay(txs))
+        except BaseException:
+            if not began:
+                conn.rollback()
+            raise
+        if not began:
+            conn.commit()
+    stats.users += len(usernames)
+    stats.transactions += transactions
+    stats.lots += lots
+
+
+def backfill(
+    db_path: str = "accounts.db",
+    conn: Optional[sqlite3.Connection] = None,
+    rebuild_all: bool = False,
+    batch: int = DEFAULT_BATCH,
+) -> BackfillStats:
+    """Rebuild lots and realized P/L of untracked accounts (or all of them)."""
+    started = time.perf_counter()
+    # Adds the lot tables and cost columns to an older database
+    schema = Account.__new__(Account)
+    schema.db_path, schema.conn = db_path, conn
+    schema._init_db()
+    own = conn is None
+    conn = conn or sqlite3.connect(db_path)
+    stats = BackfillStats()
+    try:
+        where = "" if rebuild_all else " WHERE cost_tracked = 0"
+        pending = sorted(row[0] for row in conn.execute(f"SELECT username FROM users{where}"))
+        for start in range(0, len(pending), batch):
+            _backfill_batch(conn, pending[start:start + batch], rebuild_all, stats)
+    finally:
+        if own:
+            conn.close()
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="backfill_lots")
+    parser.add_argument("db_path", nargs="?", default="accounts.db")
+    parser.add_argument("--all", dest="rebuild_all", action="store_true", help="rebuild tracked accounts too")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="accounts per commit")
+    args = parser.parse_args(sys.argv[1:])
+
+    stats = backfill(args.db_path, rebuild_all=args.rebuild_all, batch=args.batch)
+    print(f"Backfilled {stats.users} accounts: {stats.transactions} transactions, {stats.lots} lots "
+          f"in {stats.seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""Monte Carlo backtests of trading strategies over ``Account``, across processes.
+
+:func:`backtest` runs every strategy on every price path. A strategy is a
+picklable callable, ``strategy(ctx)``, called once per step with a
+:class:`Context` that trades through a real ``Account`` at the path's
+prices. A path is either a seed for :func:`random_walk` or an explicit
+``{symbol: [price per step]}``.
+
+The simulations are sharded in chunks over a process pool. Every worker
+has its own private engine:
+
+- ``memory``: a shared-cache in-memory database for that worker;
+- ``sqlite``: a shard file per worker in ``shard_dir``.
+
+Each simulation runs inside a savepoint that is rolled back afterwards, so
+an engine never grows past one simulation's ledger. With ``sqlite`` and
+``keep_ledgers``, the simulations are committed to the shards instead, for
+inspection afterwards.
+
+Workers never send a ledger back. For each strategy, a chunk returns a
+mergeable :class:`StrategyStats`: returns, drawdowns, volatility, and an
+equity curve summed at ``curve_points`` points. The parent merges chunks as
+they complete and can report progress on the way:
+
+    python backtest.py --paths 1000 --steps 252 --workers 8
+"""
+import argparse
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import accounts
+from accounts import Account
+
+ENGINES = ("memory", "sqlite")
+DEFAULT_SYMBOLS = {"AAPL": 175.0, "TSLA": 750.0, "GOOGL": 2650.0}
+INITIAL_CASH = 100_000.0
+CURVE_POINTS = 50
+TRADING_DAYS = 252
+
+PricePath = Dict[str, List[float]]
+Strategy = Callable[["Context"], None]
+
+
+def random_walk(seed: int, steps: int, start: Optional[Dict[str, float]] = None,
+                drift: float = 0.0002, volatility: float = 0.02) -> PricePath:
+    """A geometric random walk of ``steps`` prices per symbol."""
+    rng = random.Random(seed)
+    path = {}
+    for symbol, price in (start or DEFAULT_SYMBOLS).items():
+        prices = []
+        for _ in range(steps):
+            prices.append(price)
+            price *= math.exp(rng.gauss(drift - volatility ** 2 / 2, volatility))
+        path[symbol] = prices
+    return path
+
+
+class Context:
+    """What a strategy sees at one step: prices, its cash and holdings, and orders."""
+
+    def __init__(self, account: Account, path: PricePath, cash: float):
+        self.account = account
+        self.path = path
+        self.step = 0
+        self.cash = cash
+        self.holdings: Dict[str, int] = {}
+        self.trades = 0
+        self.rejected = 0
+        # Free for the strategy's own state between steps
+        self.state: dict = {}
+
+    def price(self, symbol: str, step: Optional[int] = None) -> float:
+        return self.path[symbol][self.step if step is None else step]
+
+    def history(self, symbol: str) -> List[float]:
+        return self.path[symbol][:self.step + 1]
+
+    def buy(self, symbol: str, quantity: int) -> bool:
+        return self._trade(self.account.buy, symbol, quantity, 1)
+
+    def sell(self, symbol: str, quantity: int) -> bool:
+        return self._trade(self.account.sell, symbol, quantity, -1)
+
+    def _trade(self, trade, symbol: str, quantity: int, sign: int) -> bool:
+        price = self.price(symbol)
+        try:
+            trade(symbol, quantity, price=price)
+        except ValueError:
+            self.rejected += 1
+            return False
+        # Mirrors what the account just recorded, so equity needs no query
+        self.cash -= sign * quantity * price
+        self.holdings[symbol] = self.holdings.get(symbol, 0) + sign * quantity
+        self.trades += 1
+        return True
+
+    def equity(self) -> float:
+        return self.cash + sum(q * self.price(s) for s, q in self.holdings.items())
+
+
+# === Example strategies (module level, so they pickle) ===
+def buy_and_hold(ctx: Context) -> None:
+    """Spread the cash over every symbol on the first step."""
+    if ctx.step == 0:
+        budget = ctx.cash / len(ctx.path)
+        for symbol in ctx.path:
+            ctx.buy(symbol, int(budget // ctx.price(symbol)))
+
+
+def momentum(ctx: Context, fast: int = 5, slow: int = 20) -> None:
+    """Hold a symbol while its fast moving average is above the slow one."""
+    if ctx.step < slow:
+        return
+    for symbol in ctx.path:
+        history = ctx.history(symbol)
+        rising = sum(history[-fast:]) / fast > sum(history[-slow:]) / slow
+        held = ctx.holdings.get(symbol, 0)
+        if rising and not held:
+            ctx.buy(symbol, int(ctx.cash / len(ctx.path) // ctx.price(symbol)))
+        elif not rising and held:
+            ctx.sell(symbol, held)
+
+
+STRATEGIES: Dict[str, Strategy] = {"buy_and_hold": buy_and_hold, "momentum": momentum}
+
+
+@dataclass
+class StrategyStats:
+    """Aggregated results of one strategy's simulations; chunks merge into one."""
+
+    simulations: int = 0
+    returns: List[float] = field(default_factory=list)
+    max_drawdowns: List[float] = field(default_factory=list)
+    volatility_sum: float = 0.0
+    trades: int = 0
+    rejected: int = 0
+    # Equity summed over simulations at CURVE_POINTS evenly spaced steps
+    curve_sum: List[float] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def add(self, curve: List[float], points: int, trades: int, rejected: int, seconds: float) -> None:
+        start = curve[0]
+        peak, drawdown = start, 0.0
+        for equity in curve:
+            peak = max(peak, equity)
+            drawdown = max(drawdown, (peak - equity) / peak if peak else 0.0)
+        step_returns = [b / a - 1 for a, b in zip(curve, curve[1:]) if a]
+        mean = sum(step_returns) / len(step_returns) if step_returns else 0.0
+        variance = sum((r - mean) ** 2 for r in step_returns) / len(step_returns) if step_returns else 0.0
+        sampled = [curve[round(i * (len(curve) - 1) / max(points - 1, 1))] for i in range(points)]
+        self.curve_sum = [a + b for a, b in zip(self.curve_sum, sampled)] if self.curve_sum else sampled
+        self.simulations += 1
+        self.returns.append(curve[-1] / start - 1)
+        self.max_drawdowns.append(drawdown)
+        self.volatility_sum += math.sqrt(variance * TRADING_DAYS)
+        self.trades += trades
+        self.rejected += rejected
+        self.seconds += seconds
+
+    def merge(self, other: "StrategyStats") -> None:
+        if not other.simulations:
+            return
+        self.curve_sum = ([a + b for a, b in zip(self.curve_sum, other.curve_sum)]
+                          if self.curve_sum else list(other.curve_sum))
+        self.simulations += other.simulations
+        self.returns += other.returns
+        self.max_drawdowns += other.max_drawdowns
+        self.volatility_sum += other.volatility_sum
+        self.trades += other.trades
+        self.rejected += other.rejected
+        self.seconds += other.seconds
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.returns)
+        return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))] if ordered else 0.0
+
+    @property
+    def mean_return(self) -> float:
+        return sum(self.returns) / self.simulations if self.simulations else 0.0
+
+    @property
+    def mean_curve(self) -> List[float]:
+        return [value / self.simulations for value in self.curve_sum] if self.simulations else []
+
+    def summary(self) -> dict:
+        n = self.simulations or 1
+        return {
+            "simulations": self.simulations,
+            "mean_return": self.mean_return,
+            "p5_return": self.percentile(0.05),
+            "median_return": self.percentile(0.5),
+            "p95_return": self.percentile(0.95),
+            "mean_max_drawdown": sum(self.max_drawdowns) / n,
+            "mean_volatility": self.volatility_sum / n,
+            "trades": self.trades,
+            "rejected": self.rejected,
+        }
+
+
+# === Worker side ===
+class _Worker:
+    """One process's private engine and the run's strategies and paths."""
+
+    def __init__(self, engine: str, shard_dir: Optional[str], keep_ledgers: bool,
+                 strategies: Dict[str, Strategy], paths: Optional[List[PricePath]], steps: int,
+                 initial_cash: float, curve_points: int):
+        if engine == "memory":
+            self.db_path = f"file:backtest-{os.getpid()}?mode=memory&cache=shared"
+            self.conn = accounts.shared_connection(self.db_path)
+        else:
+            self.db_path = os.path.join(shard_dir, f"shard-{os.getpid()}.db")
+            self.conn = sqlite3.connect(self.db_path)
+        # The schema outside any simulation's savepoint, so rollbacks keep it
+        schema = Account.__new__(Account)
+        schema.db_path, schema.conn = self.db_path, self.conn
+        schema._init_db()
+        self.keep_ledgers = keep_ledgers and engine == "sqlite"
+        self.strategies = strategies
+        self.paths = paths
+        self.steps = steps
+        self.initial_cash = initial_cash
+        self.curve_points = curve_points
+
+    def path(self, index: int) -> PricePath:
+        return self.paths[index] if self.paths is not None else random_walk(index, self.steps)
+
+    def simulate(self, name: str, index: int, stats: StrategyStats) -> None:
+        started = time.perf_counter()
+        strategy = self.strategies[name]
+        path = self.path(index)
+        steps = min(len(prices) for prices in path.values())
+        self.conn.execute("SAVEPOINT simulation")
+        try:
+            account = Account.create_account(f"{name}-{index}", self.initial_cash, conn=self.conn)
+            ctx = Context(account, path, self.initial_cash)
+            curve = []
+            for step in range(steps):
+                ctx.step = step
+                strategy(ctx)
+                curve.append(ctx.equity())
+        except BaseException:
+            self.conn.execute("ROLLBACK TO simulation")
+            self.conn.execute("RELEASE simulation")
+            raise
+        if not self.keep_ledgers:
+            self.conn.execute("ROLLBACK TO simulation")
+        self.conn.execute("RELEASE simulation")
+        if self.keep_ledgers:
+            self.conn.commit()
+        stats.add(curve, self.curve_points, ctx.trades, ctx.rejected, time.perf_counter() - started)
+
+
+_worker: Optional[_Worker] = None
+
+
+def _init_worker(*args) -> None:
+    global _worker
+    _worker = _Worker(*args)
+
+
+def _run_chunk(chunk: List[tuple]) -> Dict[str, StrategyStats]:
+    results: Dict[str, StrategyStats] = {}
+    for name, index in chunk:
+        _worker.simulate(name, index, results.setdefault(name, StrategyStats()))
+    return results
+
+
+# === Parent side ===
+def backtest(
+    strategies: Union[Dict[str, Strategy], Sequence[Strategy]],
+    paths: Union[int, List[PricePath]] = 100,
+    steps: int = TRADING_DAYS,
+    workers: Optional[int] = None,
+    engine: str = "memory",
+    shard_dir: Optional[str] = None,
+    keep_ledgers: bool = False,
+    initial_cash: float = INITIAL_CASH,
+    chunk_size: int = 16,
+    curve_points: int = CURVE_POINTS,
+    on_progress: Optional[Callable[[int, int, Dict[str, StrategyStats]], None]] = None,
+) -> Dict[str, StrategyStats]:
+    """Run every strategy on every path; return the merged stats per strategy.
+
+    ``paths`` is a number of random walks (seeds ``0..paths-1``) or a list of
+    explicit paths. ``on_progress(done, total, stats)`` is called as chunks
+    complete.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Engine must be one of {', '.join(ENGINES)}.")
+    if engine == "sqlite" and not shard_dir:
+        raise ValueError("The sqlite engine needs a shard_dir.")
+    if not isinstance(strategies, dict):
+        strategies = {strategy.__name__: strategy for strategy in strategies}
+    explicit = None if isinstance(paths, int) else list(paths)
+    count = paths if explicit is None else len(explicit)
+    if shard_dir:
+        os.makedirs(shard_dir, exist_ok=True)
+    jobs = [(name, index) for index in range(count) for name in strategies]
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    totals = {name: StrategyStats() for name in strategies}
+    init_args = (engine, shard_dir, keep_ledgers, strategies, explicit, steps, initial_cash, curve_points)
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+        for future in as_completed([pool.submit(_run_chunk, chunk) for chunk in chunks]):
+            for name, stats in future.result().items():
+                totals[name].merge(stats)
+            done += 1
+            if on_progress:
+                on_progress(done, len(chunks), totals)
+    return totals
+
+
+def format_report(totals: Dict[str, StrategyStats], seconds: float) -> str:
+    simulations = sum(stats.simulations for stats in totals.values())
+    lines = [
+        f"Backtest: {simulations} simulations in {seconds:.1f}s ({simulations / seconds:,.0f}/s)",
+        f"  {'strategy':<14}  {'runs':>6}  {'mean':>7}  {'p5':>7}  {'median':>7}  {'p95':>7}  "
+        f"{'max dd':>7}  {'vol':>6}  {'trades':>7}",
+    ]
+    for name, stats in totals.items():
+        s = stats.summary()
+        lines.append(
+            f"  {name:<14}  {s['simulations']:6}  {s['mean_return']:7.1%}  {s['p5_return']:7.1%}  "
+            f"{s['median_return']:7.1%}  {s['p95_return']:7.1%}  {s['mean_max_drawdown']:7.1%}  "
+            f"{s['mean_volatility']:6.1%}  {s['trades']:7}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="backtest")
+    parser.add_argument("--strategy", action="append", choices=sorted(STRATEGIES), help="default: all")
+    parser.add_argument("--paths", type=int, default=100, help="random price paths per strategy")
+    parser.add_argument("--steps", type=int, default=TRADING_DAYS, help="prices per path")
+    parser.add_argument("--workers", type=int, help="processes (default: one per CPU)")
+    parser.add_argument("--engine", choices=ENGINES, default="memory")
+    parser.add_argument("--shard-dir", help="directory for the sqlite engine's shard files")
+    parser.add_argument("--keep-ledgers", action="store_true", help="commit simulations to the sqlite shards")
+    parser.add_argument("--chunk-size", type=int, default=16, help="simulations per task")
+    args = parser.parse_args(sys.argv[1:])
+
+    strategies = {name: STRATEGIES[name] for name in args.strategy or STRATEGIES}
+    started = time.perf_counter()
+    totals = backtest(
+        strategies, args.paths, args.steps, args.workers, args.engine, args.shard_dir, args.keep_ledgers,
+        chunk_size=args.chunk_size,
+        on_progress=lambda done, total, _: print(f"\r{done}/{total} chunks", end="", file=sys.stderr),
+    )
+    print(file=sys.stderr)
+    print(format_report(totals, time.perf_counter() - started))
+
+
+if __name__ == "__main__":
+    main()
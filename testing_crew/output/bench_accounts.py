@@ -0,0 +1,320 @@
+"""Micro- and macro-benchmarks for the SQLite account engine in ``accounts.py``.
+
+Each cell of the grid seeds a fresh database with ``rows`` ledger rows spread
+over ``users`` accounts, then times every operation in :data:`OPERATIONS`
+one call at a time: ``deposit``, ``buy``, ``sell``, ``get_portfolio_value``,
+``get_holdings_at``, ``get_profit_loss_at`` and ``list_transactions``. The
+grid runs from 1e2 to 1e6 ledger rows and from 1 to 1e5 users. Cells with
+more users than rows are skipped, since every account has at least its
+opening deposit. For each operation and cell, the results hold the calls per
+second and the p50/p95/p99/max latency.
+
+The seeded ledger is consistent: every account's holdings and balance
+match its transactions, and rows of different accounts are interleaved in
+time as they would be in a shared database. The ``*_at`` queries ask for
+the middle of the ledger's time range.
+
+Results are appended to ``.bench/accounts.jsonl``. The p50 latencies are
+compared with the stored baseline (``--save-baseline`` writes it) or, when
+there is none, with the previous run. Any operation that got more than
+``--threshold`` slower (20% by default) is flagged, and the command exits
+non-zero:
+
+    python bench_accounts.py --rows 1000 --users 10 --save-baseline
+    python bench_accounts.py --rows 1000 --users 10
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from accounts import Account, get_share_price
+from backfill_lots import backfill
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = os.path.join(HERE, ".bench", "accounts.jsonl")
+BASELINE_FILE = os.path.join(HERE, ".bench", "baseline.jsonl")
+
+LEDGER_SIZES = (100, 1_000, 10_000, 100_000, 1_000_000)
+USER_COUNTS = (1, 10, 100, 1_000, 10_000, 100_000)
+
+REGRESSION_THRESHOLD = 0.2
+# Latency changes smaller than this are run-to-run noise
+MIN_REGRESSION_US = 20.0
+
+# Calls are spread over this many accounts of the cell
+SAMPLE_ACCOUNTS = 100
+MIN_ITERATIONS = 5
+MAX_ITERATIONS = 1_000
+OPENING_DEPOSIT = 1_000_000_000.0
+
+# Every account's ledger after its opening deposit cycles through these rows
+_PATTERN = (
+    ("buy", "AAPL", 2),
+    ("sell", "AAPL", 1),
+    ("deposit", None, 100.0),
+    ("buy", "TSLA", 1),
+    ("withdraw", None, 50.0),
+)
+
+
+@dataclass
+class Operation:
+    call: Callable[[Account, float], Any]
+    # Runs once per sampled account before timing, e.g. shares for ``sell``
+    setup: Callable[[Account], None] | None = None
+
+
+OPERATIONS: dict[str, Operation] = {
+    "deposit": Operation(lambda account, at: account.deposit(1.0)),
+    "buy": Operation(lambda account, at: account.buy("AAPL", 1)),
+    "sell": Operation(lambda account, at: account.sell("AAPL", 1),
+                      setup=lambda account: account.buy("AAPL", MAX_ITERATIONS + 1)),
+    "get_portfolio_value": Operation(lambda account, at: account.get_portfolio_value()),
+    "get_holdings_at": Operation(lambda account, at: account.get_holdings_at(at)),
+    "get_profit_loss_at": Operation(lambda account, at: account.get_profit_loss_at(at)),
+    "list_transactions": Operation(lambda account, at: account.list_transactions()),
+}
+
+
+@dataclass
+class OpResult:
+    op: str
+    rows: int
+    users: int
+    iterations: int
+    ops_per_second: float
+    p50_us: float
+    p95_us: float
+    p99_us: float
+    max_us: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.op}@{self.rows}/{self.users}"
+
+
+def username(i: int) -> str:
+    return f"user{i:06d}"
+
+
+def seed(db_path: str, rows: int, users: int, start: float | None = None) -> float:
+    """Fill a new database with ``rows`` ledger rows over ``users`` accounts.
+
+    Returns the timestamp in the middle of the ledger.
+    """
+    if users > rows:
+        raise ValueError(f"{users} users need at least {users} ledger rows.")
+    start = time.time() - rows - 1 if start is None else start
+    # The engine's own schema, created the way ``create_account`` does
+    owner = Account.__new__(Account)
+    owner.db_path = db_path
+    owner.conn = None
+    owner._init_db()
+    balance = [0.0] * users
+    deposited = [0.0] * users
+    holdings: list[dict[str, int]] = [{} for _ in range(users)]
+    transactions = []
+    for k in range(rows):
+        user = k % users
+        n = k // users
+        if n == 0:
+            kind, symbol, quantity = "deposit", None, OPENING_DEPOSIT
+        else:
+            kind, symbol, quantity = _PATTERN[(n - 1) % len(_PATTERN)]
+        price = get_share_price(symbol) if symbol else None
+        if kind == "deposit":
+            amount = quantity
+            deposited[user] += quantity
+        elif kind == "withdraw":
+            amount = -quantity
+        else:
+            amount = -price * quantity if kind == "buy" else price * quantity
+            sign = 1 if kind == "buy" else -1
+            holdings[user][symbol] = holdings[user].get(symbol, 0) + sign * quantity
+        balance[user] += amount
+        transactions.append((username(user), start + k, kind, symbol, quantity, price, amount, balance[user]))
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO symbols (symbol) VALUES (?)", sorted({(s,) for _, s, _ in _PATTERN if s}))
+        ids = dict(conn.execute("SELECT symbol, id FROM symbols"))
+        conn.executemany(
+            "INSERT INTO users (username, balance, total_deposit) VALUES (?, ?, ?)",
+            ((username(u), balance[u], deposited[u]) for u in range(users)),
+        )
+        conn.executemany(
+            "INSERT INTO holdings (username, symbol_id, quantity) VALUES (?, ?, ?)",
+            ((username(u), ids[s], q) for u in range(users) for s, q in holdings[u].items() if q > 0),
+        )
+        conn.executemany(
+            "INSERT INTO transactions (username, timestamp, type, symbol_id, quantity, price, amount, balance_after) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((*tx[:3], ids.get(tx[3]), *tx[4:]) for tx in transactions),
+        )
+    conn.close()
+    # Lots and cost basis, as accounts that traded through the engine have them
+    backfill(db_path)
+    return start + rows / 2
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+def time_operation(name: str, accounts: list[Account], at: float, budget: float) -> tuple[int, list[float]]:
+    """Time single calls of ``name`` until ``budget`` seconds have passed."""
+    operation = OPERATIONS[name]
+    if operation.setup:
+        for account in accounts:
+            operation.setup(account)
+    # Warm-up: page cache and statement cache
+    operation.call(accounts[0], at)
+    latencies = []
+    deadline = time.perf_counter() + budget
+    while len(latencies) < MAX_ITERATIONS and (len(latencies) < MIN_ITERATIONS or time.perf_counter() < deadline):
+        account = accounts[len(latencies) % len(accounts)]
+        started = time.perf_counter()
+        operation.call(account, at)
+        latencies.append(time.perf_counter() - started)
+    return len(latencies), latencies
+
+
+def run_cell(rows: int, users: int, operations: list[str] | None = None, budget: float = 1.0) -> list[OpResult]:
+    """Seed a ledger of ``rows`` rows over ``users`` accounts and time every operation on it."""
+    with tempfile.TemporaryDirectory(prefix="bench-accounts-") as workdir:
+        db_path = os.path.join(workdir, "accounts.db")
+        at = seed(db_path, rows, users)
+        step = max(1, users // SAMPLE_ACCOUNTS)
+        accounts = [Account(username(i), db_path) for i in range(0, users, step)][:SAMPLE_ACCOUNTS]
+        results = []
+        for name in operations or OPERATIONS:
+            iterations, latencies = time_operation(name, accounts, at, budget)
+            ordered = sorted(latencies)
+            results.append(OpResult(
+                op=name,
+                rows=rows,
+                users=users,
+                iterations=iterations,
+                ops_per_second=iterations / sum(latencies),
+                p50_us=percentile(ordered, 0.50) * 1e6,
+                p95_us=percentile(ordered, 0.95) * 1e6,
+                p99_us=percentile(ordered, 0.99) * 1e6,
+                max_us=ordered[-1] * 1e6,
+            ))
+    return results
+
+
+def run_grid(
+    ledger_sizes: tuple[int, ...] = LEDGER_SIZES,
+    user_counts: tuple[int, ...] = USER_COUNTS,
+    operations: list[str] | None = None,
+    budget: float = 1.0,
+) -> list[OpResult]:
+    results = []
+    for rows in ledger_sizes:
+        for users in user_counts:
+            if users <= rows:
+                results.extend(run_cell(rows, users, operations, budget))
+    return results
+
+
+def regressions(
+    current: list[OpResult], previous: dict[str, Any] | None, threshold: float = REGRESSION_THRESHOLD
+) -> list[str]:
+    """Operations whose p50 latency grew noticeably since ``previous``."""
+    if not previous:
+        return []
+    before = {f"{r['op']}@{r['rows']}/{r['users']}": r for r in previous.get("results", [])}
+    found = []
+    for result in current:
+        old = before.get(result.key, {}).get("p50_us", 0)
+        new = result.p50_us
+        if old > 0 and new > old * (1 + threshold) and new - old >= MIN_REGRESSION_US:
+            found.append(f"{result.key}: p50 {old:.0f}us -> {new:.0f}us (+{(new - old) / old:.0%})")
+    return found
+
+
+def load_previous(path: str) -> dict[str, Any] | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+    return json.loads(lines[-1]) if lines else None
+
+
+def _append(path: str, run: dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run) + "\n")
+
+
+def record(
+    results: list[OpResult],
+    path: str = HISTORY_FILE,
+    baseline: str | None = BASELINE_FILE,
+    threshold: float = REGRESSION_THRESHOLD,
+) -> dict[str, Any]:
+    """Append this run to ``path``; compare with ``baseline`` if stored, else the last entry."""
+    previous = load_previous(baseline) if baseline else None
+    run = {
+        "run_at": time.time(),
+        "results": [asdict(r) for r in results],
+        "regressions": regressions(results, previous or load_previous(path), threshold),
+    }
+    _append(path, run)
+    return run
+
+
+def save_baseline(run: dict[str, Any], path: str = BASELINE_FILE) -> None:
+    _append(path, {**run, "regressions": []})
+
+
+def format_report(run: dict[str, Any]) -> str:
+    lines = [
+        "Account engine benchmark (latency in microseconds):",
+        f"  {'operation':<20}  {'rows':>8}  {'users':>6}  {'calls':>5}  {'ops/s':>9}  "
+        f"{'p50':>9}  {'p95':>9}  {'p99':>9}  {'max':>9}",
+    ]
+    for r in run["results"]:
+        lines.append(
+            f"  {r['op']:<20}  {r['rows']:8}  {r['users']:6}  {r['iterations']:5}  {r['ops_per_second']:9.0f}  "
+            f"{r['p50_us']:9.0f}  {r['p95_us']:9.0f}  {r['p99_us']:9.0f}  {r['max_us']:9.0f}"
+        )
+    for regression in run["regressions"]:
+        lines.append(f"  REGRESSION {regression}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="bench_accounts")
+    parser.add_argument("--rows", type=int, action="append", help=f"ledger sizes (default: {LEDGER_SIZES})")
+    parser.add_argument("--users", type=int, action="append", help=f"user counts (default: {USER_COUNTS})")
+    parser.add_argument("--op", action="append", choices=list(OPERATIONS), help="default: all")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds of calls per operation and cell")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="flag p50 latencies that grew by more than this fraction")
+    parser.add_argument("--history", default=HISTORY_FILE, help="JSONL file the results are appended to")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="compare with the last entry of this file")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args(sys.argv[1:])
+
+    results = run_grid(tuple(args.rows or LEDGER_SIZES), tuple(args.users or USER_COUNTS), args.op, args.budget)
+    run = record(results, args.history, None if args.save_baseline else args.baseline, args.threshold)
+    if args.save_baseline:
+        save_baseline(run, args.baseline)
+    print(format_report(run))
+    if run["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Throughput benchmark for the matching engine in ``orderbook.py``.
+
+Replays a seeded random stream of order events: new limit orders around the
+current price, cancels and replaces of resting orders, and price ticks that
+random-walk each symbol. It reports events per second per event type,
+fills, and the orders still resting at the end. With ``--ledger``, the fills
+are also posted in batches to a temporary accounts database funded for
+every trader, and the posting rate is reported:
+
+    python bench_orderbook.py --events 2000000
+    python bench_orderbook.py --events 200000 --ledger
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from accounts import Account
+from orderbook import DEFAULT_BATCH_SIZE, Ledger, MatchingEngine
+
+DEFAULT_EVENTS = 1_000_000
+SYMBOLS = {"AAPL": 175.0, "TSLA": 750.0, "GOOGL": 2650.0}
+# Share of events per type
+MIX = {"submit": 0.55, "cancel": 0.15, "replace": 0.15, "tick": 0.15}
+TRADERS = 1000
+
+
+@dataclass
+class OrderBookResult:
+    events: int
+    seconds: float
+    events_per_second: float
+    fills: int
+    resting: int
+    # event type -> (count, seconds)
+    by_type: Dict[str, tuple] = field(default_factory=dict)
+    posted: int = 0
+    rejected: int = 0
+    post_seconds: float = 0.0
+
+
+def run(events: int = DEFAULT_EVENTS, seed: int = 1, ledger: Optional[Ledger] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE, traders: int = TRADERS) -> OrderBookResult:
+    rng = random.Random(seed)
+    engine = MatchingEngine(ledger, batch_size)
+    prices = dict(SYMBOLS)
+    for symbol, price in prices.items():
+        engine.on_price(symbol, price)
+    symbols = list(prices)
+    kinds = rng.choices(list(MIX), weights=list(MIX.values()), k=events)
+    open_ids = []
+    counts = dict.fromkeys(MIX, 0)
+    seconds = dict.fromkeys(MIX, 0.0)
+    clock = time.perf_counter
+    started = clock()
+    for kind in kinds:
+        # Cancels and replaces need a resting order; fall back to a new one
+        if kind in ("cancel", "replace") and not open_ids:
+            kind = "submit"
+        t = clock()
+        if kind == "submit":
+            symbol = rng.choice(symbols)
+            side = "buy" if rng.random() < 0.5 else "sell"
+            offset = rng.uniform(0.001, 0.02) * prices[symbol]
+            limit = prices[symbol] - offset if side == "buy" else prices[symbol] + offset
+            order = engine.submit(f"trader{rng.randrange(traders):04d}", symbol, side, rng.randint(1, 10), limit)
+            if order.status == "open":
+                open_ids.append(order.id)
+        elif kind == "tick":
+            symbol = rng.choice(symbols)
+            prices[symbol] *= rng.uniform(0.995, 1.005)
+            engine.on_price(symbol, prices[symbol])
+        else:
+            # A random resting order; ids of orders filled since are dropped
+            i = rng.randrange(len(open_ids))
+            open_ids[i], open_ids[-1] = open_ids[-1], open_ids[i]
+            order = engine.orders.get(open_ids[-1])
+            if kind == "cancel" or order is None:
+                open_ids.pop()
+            if order is not None and kind == "cancel":
+                engine.cancel(order.id)
+            elif order is not None:
+                engine.replace(order.id, quantity=max(1, order.quantity + rng.choice((-1, 1))),
+                               limit=order.limit * rng.uniform(0.999, 1.001))
+        counts[kind] += 1
+        seconds[kind] += clock() - t
+        if ledger is None and len(engine.pending) >= batch_size:
+            engine.flush()
+    engine.flush()
+    total = clock() - started
+    result = OrderBookResult(
+        events=events, seconds=total, events_per_second=events / total, fills=engine.fills,
+        resting=engine.resting(), by_type={kind: (counts[kind], seconds[kind]) for kind in MIX},
+    )
+    if ledger is not None:
+        result.posted, result.rejected = ledger.stats.posted, len(ledger.stats.rejected)
+        result.post_seconds = ledger.stats.seconds
+    return result
+
+
+def funded_ledger(workdir: str, traders: int = TRADERS) -> Ledger:
+    """A ledger in ``workdir`` where every trader can cover any fill of the run."""
+    db_path = os.path.join(workdir, "accounts.db")
+    for i in range(traders):
+        account = Account.create_account(f"trader{i:04d}", 1e12, db_path=db_path)
+        account.buy("AAPL", 100_000)
+        account.buy("TSLA", 100_000)
+        account.buy("GOOGL", 100_000)
+    return Ledger(db_path)
+
+
+def format_report(result: OrderBookResult) -> str:
+    lines = [
+        f"Matching engine: {result.events} events in {result.seconds:.2f}s "
+        f"({result.events_per_second:,.0f} events/s), {result.fills} fills, {result.resting} orders resting",
+    ]
+    for kind, (count, seconds) in result.by_type.items():
+        rate = count / seconds if seconds else 0.0
+        lines.append(f"  {kind:<8} {count:9}  {rate:12,.0f}/s")
+    if result.post_seconds:
+        lines.append(f"  ledger: {result.posted} fills posted ({result.rejected} rejected) in "
+                     f"{result.post_seconds:.2f}s, {result.posted / result.post_seconds:,.0f} fills/s")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="bench_orderbook")
+    parser.add_argument("--events", type=int, default=DEFAULT_EVENTS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--ledger", action="store_true", help="also post fills to a temporary accounts database")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH_SIZE, help="fills per ledger transaction")
+    parser.add_argument("--traders", type=int, default=TRADERS)
+    args = parser.parse_args(sys.argv[1:])
+
+    with tempfile.TemporaryDirectory(prefix="bench-orderbook-") as workdir:
+        ledger = funded_ledger(workdir, args.traders) if args.ledger else None
+        try:
+            result = run(args.events, args.seed, ledger, args.batch, args.traders)
+        finally:
+            if ledger is not None:
+                ledger.close()
+    print(format_report(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Mixed read/write benchmark: trade latency while reports run.
+
+One thread trades: it buys and sells one share at a time across a sample
+of accounts, and each trade commits. Meanwhile ``--readers`` threads run
+heavy reports back to back. A report is a full scan of the ledger
+(``reporting.volume_by_symbol``), followed by one account's
+``get_holdings_at`` and ``list_transactions(500)``. Each mode starts from a
+copy of the same seeded database:
+
+- ``direct``: reports go through ordinary accounts and connections on the
+  live database, in its default rollback-journal mode;
+- ``wal``: the database is in WAL mode, and reports run in read-only
+  snapshots from a ``LedgerReader``;
+- ``replica``: as ``wal``, but reports read a ``VACUUM INTO`` copy, which is
+  refreshed every ``--max-age`` seconds.
+
+For each mode it reports trades per second, trade latency, trades that
+failed on a locked database, and reports completed::
+
+    python bench_reporting.py --rows 200000 --readers 2 --seconds 5
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from accounts import Account
+from bench_accounts import percentile, seed, username
+from reporting import LedgerReader, enable_wal, volume_by_symbol
+
+MODES = ("direct", "wal", "replica")
+DEFAULT_ROWS = 200_000
+DEFAULT_USERS = 1_000
+DEFAULT_SECONDS = 5.0
+DEFAULT_READERS = 2
+DEFAULT_MAX_AGE = 1.0
+TRADING_ACCOUNTS = 50
+
+
+@dataclass
+class MixedResult:
+    mode: str
+    seconds: float
+    trades: int
+    # Trades that gave up on a locked database
+    trade_errors: int
+    trade_p50_ms: float
+    trade_p99_ms: float
+    trade_max_ms: float
+    reports: int
+    report_p50_ms: float
+    refreshes: int = 0
+
+    @property
+    def trades_per_second(self) -> float:
+        return self.trades / self.seconds if self.seconds else 0.0
+
+
+def _report(db_path: str, reader: Optional[LedgerReader], user: str) -> None:
+    if reader is None:
+        conn = sqlite3.connect(db_path)
+        try:
+            volume_by_symbol(conn)
+        finally:
+            conn.close()
+        account = Account(user, db_path)
+        account.get_holdings_at(time.time())
+        account.list_transactions(500)
+        return
+    with reader.snapshot():
+        reader.volume_by_symbol()
+        account = reader.account(user)
+        account.get_holdings_at(time.time())
+        account.list_transactions(500)
+
+
+def run_mode(mode: str, db_path: str, users: int, seconds: float = DEFAULT_SECONDS,
+             readers: int = DEFAULT_READERS, max_age: float = DEFAULT_MAX_AGE) -> MixedResult:
+    """Trade on ``db_path`` (a seeded copy, changed by the run) while reports run."""
+    if mode not in MODES:
+        raise ValueError(f"Mode must be one of {', '.join(MODES)}.")
+    if mode != "direct":
+        enable_wal(db_path)
+    step = max(1, users // TRADING_ACCOUNTS)
+    traders = [Account(username(i), db_path) for i in range(0, users, step)][:TRADING_ACCOUNTS]
+    ledger_readers: List[Optional[LedgerReader]] = []
+    for i in range(readers):
+        if mode == "direct":
+            ledger_readers.append(None)
+        else:
+            replica = f"{db_path}.replica{i}" if mode == "replica" else None
+            ledger_readers.append(LedgerReader(db_path, replica_path=replica, max_age=max_age))
+    stop = threading.Event()
+    report_ms: List[List[float]] = [[] for _ in range(readers)]
+
+    def read(i: int) -> None:
+        k = i
+        while not stop.is_set():
+            started = time.perf_counter()
+            _report(db_path, ledger_readers[i], username((k * 7919) % users))
+            report_ms[i].append((time.perf_counter() - started) * 1000)
+            k += readers
+
+    threads = [threading.Thread(target=read, args=(i,), daemon=True) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    trade_ms: List[float] = []
+    errors = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    k = 0
+    while time.perf_counter() < deadline:
+        account = traders[(k // 2) % len(traders)]
+        t = time.perf_counter()
+        try:
+            if k % 2 == 0:
+                account.buy("AAPL", 1)
+            else:
+                account.sell("AAPL", 1)
+        except sqlite3.OperationalError:
+            errors += 1
+        trade_ms.append((time.perf_counter() - t) * 1000)
+        k += 1
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+    refreshes = 0
+    for reader in ledger_readers:
+        if reader is not None:
+            refreshes += reader.refreshes
+            reader.close()
+    trade_ms.sort()
+    reports = sorted(ms for per_reader in report_ms for ms in per_reader)
+    return MixedResult(
+        mode=mode, seconds=elapsed, trades=len(trade_ms) - errors, trade_errors=errors,
+        trade_p50_ms=percentile(trade_ms, 0.5), trade_p99_ms=percentile(trade_ms, 0.99),
+        trade_max_ms=trade_ms[-1], reports=len(reports),
+        report_p50_ms=percentile(reports, 0.5) if reports else 0.0, refreshes=refreshes,
+    )
+
+
+def run(workdir: str, rows: int = DEFAULT_ROWS, users: int = DEFAULT_USERS, seconds: float = DEFAULT_SECONDS,
+        readers: int = DEFAULT_READERS, modes: Sequence[str] = MODES,
+        max_age: float = DEFAULT_MAX_AGE) -> List[MixedResult]:
+    """Seed one database in ``workdir``, then run each mode on a copy of it."""
+    template = os.path.join(workdir, "seed.db")
+    seed(template, rows, users)
+    results = []
+    for mode in modes:
+        db_path = os.path.join(workdir, f"{mode}.db")
+        shutil.copyfile(template, db_path)
+        results.append(run_mode(mode, db_path, users, seconds, readers, max_age))
+    return results
+
+
+def format_report(results: List[MixedResult], readers: int) -> str:
+    lines = [
+        f"Trades with {readers} concurrent report readers:",
+        f"  {'mode':<8} {'trades/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>9} {'locked':>7} "
+        f"{'reports':>8} {'report ms':>10}",
+    ]
+    for r in results:
+        line = (f"  {r.mode:<8} {r.trades_per_second:9,.0f} {r.trade_p50_ms:8.2f} {r.trade_p99_ms:8.2f} "
+                f"{r.trade_max_ms:9.1f} {r.trade_errors:7} {r.reports:8} {r.report_p50_ms:10.1f}")
+        if r.refreshes:
+            line += f"  ({r.refreshes} replica refreshes)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="bench_reporting")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="ledger rows to seed")
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS)
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS, help="run time per mode")
+    parser.add_argument("--readers", type=int, default=DEFAULT_READERS, help="report threads")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE, help="replica refresh interval")
+    args = parser.parse_args(sys.argv[1:])
+
+    with tempfile.TemporaryDirectory(prefix="bench-reporting-") as workdir:
+        results = run(workdir, args.rows, args.users, args.seconds, args.readers, args.modes, args.max_age)
+    print(format_report(results, args.readers))
+
+
+if __name__ == "__main__":
+    main()
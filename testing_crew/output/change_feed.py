@@ -0,0 +1,321 @@
+"""Change-data-capture feed of the account ledger in ``accounts.py``.
+
+Every mutation of an account writes exactly one ``transactions`` row, in
+the same transaction as the rest of its changes. That covers opening the
+account (a ``deposit``), deposits, withdrawals, buys and sells. Row ids are
+AUTOINCREMENT keys and SQLite has one writer at a time, so ids grow in
+commit order and are never reused. The ledger is therefore already an
+ordered log, and its ids are the feed's sequence numbers.
+
+A :class:`ChangeFeed` follows that log. :meth:`ChangeFeed.poll` reads the
+committed rows past the last sequence number it has seen. It appends them
+to the feed's on-disk log, one JSON line each, which can be followed with
+``tail -f`` or :func:`follow`. It then hands them in order to every
+subscriber. ``Account`` polls the feeds of its database as soon as a
+mutation commits. A caller that runs mutations inside its own transaction
+calls ``accounts.publish(db_path)`` after committing; ``orderbook.Ledger``
+does this.
+
+A consumer that keeps a materialised view stores the sequence number of
+the last change it applied, and resumes from it. It can resume from the
+database with :meth:`ChangeFeed.changes_since` or
+``subscribe(from_seq=...)``, or from the log with :func:`read_log`.
+:class:`AccountView` is such a view, holding balances and holdings::
+
+    feed = ChangeFeed("accounts.db", log_path="changes.jsonl")
+    view = AccountView()
+    feed.subscribe(view.apply, from_seq=0)
+    Account("alice").buy("AAPL", 10)
+    view.holdings["alice"]  # {"AAPL": 10}
+
+On an in-memory database the feed reads through the shared connection,
+which would also show the rows of a transaction still open on it. Those
+ids are handed out again if the transaction rolls back, so the feed never
+reads past them: :meth:`ChangeFeed.poll` publishes nothing while such a
+transaction is open, and leaves it to the committing caller's ``publish``.
+:meth:`ChangeFeed.head` and :meth:`ChangeFeed.changes_since` raise
+``RuntimeError`` instead, and so does opening a feed without ``start_seq``
+or a log.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+import accounts
+from accounts import Account
+
+logger = logging.getLogger("accounts.changes")
+
+DEFAULT_BATCH = 1000
+
+
+@dataclass
+class Change:
+    seq: int
+    username: str
+    type: str
+    symbol: Optional[str]
+    quantity: Optional[float]
+    price: Optional[float]
+    amount: Optional[float]
+    balance_after: float
+    timestamp: float
+
+
+@dataclass
+class Subscription:
+    callback: Callable[[Change], None]
+    # Sequence number of the last change delivered
+    seq: int
+    # Set when the callback raised; the subscription is dropped then
+    error: Optional[BaseException] = None
+
+    def deliver(self, changes: List[Change]) -> None:
+        for change in changes:
+            if change.seq <= self.seq:
+                continue
+            self.callback(change)
+            self.seq = change.seq
+
+
+def _parse(line: bytes) -> Change:
+    return Change(**json.loads(line))
+
+
+def _last_logged(path: str) -> int:
+    """The last sequence number in the log at ``path``, after dropping a torn last line."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            # An append that was cut short
+            f.truncate(end)
+    lines = data[:end].splitlines()
+    for line in reversed(lines):
+        if line.strip():
+            return _parse(line).seq
+    return 0
+
+
+def read_log(path: str, from_seq: int = 0) -> Iterator[Change]:
+    """The changes in the log at ``path`` after ``from_seq``."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            change = _parse(line)
+            if change.seq > from_seq:
+                yield change
+
+
+def follow(
+    path: str,
+    from_seq: int = 0,
+    interval: float = 0.2,
+    stop: Optional[threading.Event] = None,
+) -> Iterator[Change]:
+    """Like ``tail -f``: the changes after ``from_seq``, then each one as it is logged."""
+    stop = stop or threading.Event()
+    position = 0
+    while not stop.is_set():
+        if not os.path.exists(path):
+            stop.wait(interval)
+            continue
+        with open(path, "rb") as f:
+            f.seek(position)
+            while not stop.is_set():
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    # Nothing new, or a line still being written
+                    f.seek(position)
+                    stop.wait(interval)
+                    continue
+                position = f.tell()
+                change = _parse(line)
+                if change.seq > from_seq:
+                    yield change
+
+
+class ChangeFeed:
+    """Committed ledger changes, in order, for subscribers and an on-disk log.
+
+    With a log, the feed starts after the last change in it, so every
+    committed change is logged once. A new log starts from the first
+    change. Without a log the feed starts at the current end of the ledger.
+    ``start_seq`` overrides both.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "accounts.db",
+        log_path: Optional[str] = None,
+        start_seq: Optional[int] = None,
+        batch: int = DEFAULT_BATCH,
+    ):
+        self.db_path = db_path
+        self.log_path = log_path
+        self.batch = batch
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # The feed may be opened before any account
+        schema = Account.__new__(Account)
+        schema.db_path, schema.conn = db_path, None
+        schema._init_db()
+        if start_seq is None:
+            start_seq = _last_logged(log_path) if log_path else self.head()
+        self.seq = start_seq
+        accounts.add_feed(db_path, self)
+
+    def _connection(self) -> sqlite3.Connection:
+        if accounts.is_memory_db(self.db_path):
+            return accounts.shared_connection(self.db_path)
+        if self._conn is None:
+            # Reads outside a transaction, so each one sees the latest commit
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self._conn
+
+    @contextmanager
+    def _reading(self) -> Iterator[Optional[sqlite3.Connection]]:
+        """The connection to read committed changes on, or None while it has a transaction open."""
+        with self._lock:
+            conn = self._connection()
+            # Other threads' mutations on a shared connection finish first
+            with accounts.connection_lock(conn):
+                yield None if conn.in_transaction else conn
+
+    @staticmethod
+    def _uncommitted() -> RuntimeError:
+        return RuntimeError("A transaction is open on the shared connection; read the feed once it commits.")
+
+    def head(self) -> int:
+        """The sequence number of the latest committed change."""
+        with self._reading() as conn:
+            if conn is None:
+                raise self._uncommitted()
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+
+    def changes_since(self, seq: int, limit: Optional[int] = None) -> List[Change]:
+        """Committed changes after ``seq``, oldest first."""
+        with self._reading() as conn:
+            if conn is None:
+                raise self._uncommitted()
+            return self._changes(conn, seq, limit)
+
+    @staticmethod
+    def _changes(conn: sqlite3.Connection, seq: int, limit: Optional[int]) -> List[Change]:
+        rows = conn.execute(
+            "SELECT t.id, t.username, t.type, s.symbol, t.quantity, t.price, t.amount, t.balance_after, t.timestamp "
+            "FROM transactions t LEFT JOIN symbols s ON s.id = t.symbol_id WHERE t.id > ? ORDER BY t.id LIMIT ?",
+            (seq, -1 if limit is None else limit),
+        ).fetchall()
+        return [Change(*row) for row in rows]
+
+    # === Subscribers ===
+    def subscribe(self, callback: Callable[[Change], None], from_seq: Optional[int] = None) -> Subscription:
+        """Call ``callback`` with every change after ``from_seq`` (default: from now on)."""
+        with self._lock:
+            subscription = Subscription(callback, self.seq if from_seq is None else from_seq)
+            # Catch up from the ledger to where the feed is, then follow it live
+            while subscription.seq < self.seq:
+                changes = [c for c in self.changes_since(subscription.seq, self.batch) if c.seq <= self.seq]
+                if not changes:
+                    break
+                subscription.deliver(changes)
+            self._subscribers.append(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    # === Publishing ===
+    def poll(self) -> int:
+        """Log and deliver the changes committed since the last poll; return how many."""
+        with self._reading() as conn:
+            if conn is None:
+                # The caller that commits it publishes afterwards
+                return 0
+            published = 0
+            while True:
+                changes = self._changes(conn, self.seq, self.batch)
+                if not changes:
+                    break
+                if self.log_path:
+                    self._append(changes)
+                self.seq = changes[-1].seq
+                for subscription in list(self._subscribers):
+                    try:
+                        subscription.deliver(changes)
+                    except Exception as e:
+                        # The mutation is committed already; the subscriber resumes from its seq
+                        logger.exception("Change subscriber failed at seq %d; dropping it", subscription.seq)
+                        subscription.error = e
+                        self._subscribers.remove(subscription)
+                published += len(changes)
+                if len(changes) < self.batch:
+                    break
+            return published
+
+    def _append(self, changes: List[Change]) -> None:
+        lines = "".join(json.dumps(asdict(change)) + "\n" for change in changes)
+        with open(self.log_path, "a") as f:
+            f.write(lines)
+
+    def close(self) -> None:
+        accounts.remove_feed(self.db_path, self)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self) -> "ChangeFeed":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+@dataclass
+class AccountView:
+    """Balances and holdings per account, maintained from the change feed."""
+
+    seq: int = 0
+    balances: Dict[str, float] = field(default_factory=dict)
+    holdings: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def apply(self, change: Change) -> None:
+        if change.seq <= self.seq:
+            # Already applied: replays after a resume are harmless
+            return
+        self.balances[change.username] = change.balance_after
+        if change.type in ("buy", "sell"):
+            held = self.holdings.setdefault(change.username, {})
+            delta = int(change.quantity) if change.type == "buy" else -int(change.quantity)
+            quantity = held.get(change.symbol, 0) + delta
+            if quantity:
+                held[change.symbol] = quantity
+            else:
+                held.pop(change.symbol, None)
+        self.seq = change.seq
+
+    def catch_up(self, feed: ChangeFeed) -> int:
+        """Apply what the ledger has past :attr:`seq`; return how many changes."""
+        applied = 0
+        while True:
+            changes = feed.changes_since(self.seq, feed.batch)
+            if not changes:
+                return applied
+            for change in changes:
+                self.apply(change)
+            applied += len(changes)
@@ -0,0 +1,51 @@
+"""Fast, isolated databases for the account engine tests.
+
+The session shares one in-memory SQLite database, with its schema created
+once. Every pytest-xdist worker is its own process and so gets its own
+database. ``temp_db`` wraps each test in a savepoint on that database's
+connection and rolls it back afterwards, so every test starts from an empty
+database without touching the filesystem. Set ``ACCOUNTS_TEST_DB=file`` to
+give each test its own database file instead.
+"""
+import os
+
+import pytest
+
+import accounts
+from accounts import Account
+
+
+def _memory_uri() -> str:
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    return f"file:accounts-test-{worker}?mode=memory&cache=shared"
+
+
+@pytest.fixture(scope="session")
+def memory_db():
+    uri = _memory_uri()
+    schema = Account.__new__(Account)
+    schema.db_path, schema.conn = uri, None
+    schema._init_db()
+    yield uri
+    accounts.close_shared(uri)
+
+
+@pytest.fixture
+def db_savepoint(memory_db):
+    """The shared connection, inside a savepoint that is rolled back after the test."""
+    conn = accounts.shared_connection(memory_db)
+    conn.execute("SAVEPOINT test_case")
+    try:
+        yield conn
+    finally:
+        conn.execute("ROLLBACK TO test_case")
+        conn.execute("RELEASE test_case")
+
+
+@pytest.fixture
+def temp_db(request, tmp_path):
+    """A database path that is empty at the start of each test."""
+    if os.environ.get("ACCOUNTS_TEST_DB") == "file":
+        return str(tmp_path / "accounts.db")
+    request.getfixturevalue("db_savepoint")
+    return request.getfixturevalue("memory_db")
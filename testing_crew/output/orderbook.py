@@ -0,0 +1,351 @@
+"""Resting limit orders and an in-process matching engine for ``accounts.py``.
+
+``Account.buy`` and ``Account.sell`` execute at once at the current share
+price. The :class:`MatchingEngine` instead holds limit orders until the
+price crosses them. A buy fills once the price is at or below its limit,
+and a sell once the price is at or above it. Each fill is at the price that
+crossed the order.
+
+Every symbol has an :class:`OrderBook` with two :class:`IndexedHeap` queues
+in price-time priority: bids by highest limit, asks by lowest limit, then
+oldest first. The heaps know where each order sits, so cancelling or
+replacing an order is O(log n). A price tick pops only the orders it
+crosses. A replace that raises the quantity or moves the limit loses the
+order's time priority; a smaller quantity keeps it.
+
+Fills queue up and are posted to the ledger by a :class:`Ledger` in batches.
+Each batch is one transaction on one connection, instead of a connection
+and a transaction per fill. A fill the account cannot cover (funds or shares) is
+rejected and reported, and the rest of the batch still posts.
+"""
+import itertools
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import accounts
+from accounts import Account
+
+SIDES = ("buy", "sell")
+DEFAULT_BATCH_SIZE = 1000
+
+
+class IndexedHeap:
+    """A binary min-heap of ``(key, item_id)`` that can remove or re-key any item."""
+
+    def __init__(self):
+        self._entries: List[list] = []
+        self._pos: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._pos
+
+    def push(self, key: tuple, item_id: int) -> None:
+        if item_id in self._pos:
+            raise KeyError(f"{item_id} is already queued.")
+        self._entries.append([key, item_id])
+        self._pos[item_id] = len(self._entries) - 1
+        self._up(len(self._entries) - 1)
+
+    def peek(self) -> Tuple[tuple, int]:
+        key, item_id = self._entries[0]
+        return key, item_id
+
+    def pop(self) -> Tuple[tuple, int]:
+        key, item_id = self._entries[0]
+        self._remove_at(0)
+        return key, item_id
+
+    def remove(self, item_id: int) -> tuple:
+        i = self._pos[item_id]
+        key = self._entries[i][0]
+        self._remove_at(i)
+        return key
+
+    def update(self, item_id: int, key: tuple) -> None:
+        i = self._pos[item_id]
+        old = self._entries[i][0]
+        self._entries[i][0] = key
+        if key < old:
+            self._up(i)
+        else:
+            self._down(i)
+
+    def _remove_at(self, i: int) -> None:
+        entries = self._entries
+        del self._pos[entries[i][1]]
+        last = entries.pop()
+        if i < len(entries):
+            entries[i] = last
+            self._pos[last[1]] = i
+            self._up(i)
+            self._down(self._pos[last[1]])
+
+    def _swap(self, i: int, j: int) -> None:
+        entries = self._entries
+        entries[i], entries[j] = entries[j], entries[i]
+        self._pos[entries[i][1]] = i
+        self._pos[entries[j][1]] = j
+
+    def _up(self, i: int) -> None:
+        entries = self._entries
+        while i:
+            parent = (i - 1) >> 1
+            if entries[i][0] >= entries[parent][0]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _down(self, i: int) -> None:
+        entries = self._entries
+        n = len(entries)
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and entries[child + 1][0] < entries[child][0]:
+                child += 1
+            if entries[child][0] >= entries[i][0]:
+                break
+            self._swap(i, child)
+            i = child
+
+
+@dataclass
+class Order:
+    id: int
+    username: str
+    symbol: str
+    side: str
+    quantity: int
+    limit: float
+    # Time priority: lower is older
+    seq: int
+    status: str = "open"
+
+    @property
+    def key(self) -> tuple:
+        return (-self.limit, self.seq) if self.side == "buy" else (self.limit, self.seq)
+
+
+@dataclass
+class Fill:
+    order_id: int
+    username: str
+    symbol: str
+    side: str
+    quantity: int
+    price: float
+    timestamp: float
+
+
+@dataclass
+class PostStats:
+    posted: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    # (fill, reason) for fills the account could not cover
+    rejected: List[Tuple[Fill, str]] = field(default_factory=list)
+
+
+class OrderBook:
+    """Resting orders of one symbol in price-time priority."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = IndexedHeap()
+        self.asks = IndexedHeap()
+
+    def __len__(self) -> int:
+        return len(self.bids) + len(self.asks)
+
+    def side(self, order: Order) -> IndexedHeap:
+        return self.bids if order.side == "buy" else self.asks
+
+    def add(self, order: Order) -> None:
+        self.side(order).push(order.key, order.id)
+
+    def remove(self, order: Order) -> None:
+        self.side(order).remove(order.id)
+
+    def rekey(self, order: Order) -> None:
+        self.side(order).update(order.id, order.key)
+
+    def crossed(self, price: float) -> Iterator[int]:
+        """Pop the ids of the orders ``price`` crosses, best first on each side."""
+        bids, asks = self.bids, self.asks
+        while bids and -bids.peek()[0][0] >= price:
+            yield bids.pop()[1]
+        while asks and asks.peek()[0][0] <= price:
+            yield asks.pop()[1]
+
+
+class Ledger:
+    """Posts fills to the account ledger, one transaction per batch."""
+
+    def __init__(self, db_path: str = "accounts.db", conn: Optional[sqlite3.Connection] = None):
+        self.db_path = db_path
+        self.stats = PostStats()
+        self._own = conn is None and not accounts.is_memory_db(db_path)
+        if conn is None:
+            conn = accounts.shared_connection(db_path) if accounts.is_memory_db(db_path) else sqlite3.connect(db_path)
+        self.conn = conn
+        self._accounts: Dict[str, Account] = {}
+
+    def _account(self, username: str) -> Account:
+        account = self._accounts.get(username)
+        if account is None:
+            account = self._accounts[username] = Account(username, self.db_path, conn=self.conn)
+        return account
+
+    def post(self, fills: List[Fill]) -> PostStats:
+        # On a shared in-memory connection, other threads wait for the batch
+        with accounts.connection_lock(self.conn):
+            return self._post(fills)
+
+    def _post(self, fills: List[Fill]) -> PostStats:
+        started = time.perf_counter()
+        began = self.conn.in_transaction
+        if not began:
+            # Write lock up front, as Account mutations take it: a deferred
+            # BEGIN fails its first write at once if another writer is active
+            self.conn.execute("BEGIN IMMEDIATE")
+        # Counted once the batch commits, so a retried batch is not counted twice
+        posted, rejected = 0, []
+        try:
+            for fill in fills:
+                try:
+                    account = self._account(fill.username)
+                    trade = account.buy if fill.side == "buy" else account.sell
+                    trade(fill.symbol, fill.quantity, price=fill.price)
+                except ValueError as e:
+                    rejected.append((fill, str(e)))
+                else:
+                    posted += 1
+        except BaseException:
+            if not began:
+                self.conn.rollback()
+                # Cached risk state may include fills that were just undone
+                risk = accounts._risk_caches.get(self.db_path)
+                if risk is not None:
+                    risk.invalidate()
+            raise
+        if not began:
+            self.conn.commit()
+            accounts.publish(self.db_path)
+        self.stats.posted += posted
+        self.stats.rejected.extend(rejected)
+        self.stats.batches += 1
+        self.stats.seconds += time.perf_counter() - started
+        return self.stats
+
+    def close(self) -> None:
+        if self._own:
+            self.conn.close()
+
+
+class MatchingEngine:
+    """Limit orders across symbols, filled as prices cross them."""
+
+    def __init__(self, ledger: Optional[Ledger] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.ledger = ledger
+        self.batch_size = batch_size
+        self.books: Dict[str, OrderBook] = {}
+        self.orders: Dict[int, Order] = {}
+        self.prices: Dict[str, float] = {}
+        self.pending: List[Fill] = []
+        self.fills = 0
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+
+    def book(self, symbol: str) -> OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol)
+        return book
+
+    def submit(self, username: str, symbol: str, side: str, quantity: int, limit: float) -> Order:
+        """Place a limit order; it fills at once if the last price already crosses it."""
+        if side not in SIDES:
+            raise ValueError(f"Side must be one of {', '.join(SIDES)}.")
+        if quantity <= 0 or limit <= 0:
+            raise ValueError("Quantity and limit must be positive.")
+        order = Order(next(self._ids), username, symbol, side, quantity, limit, next(self._seq))
+        self.orders[order.id] = order
+        price = self.prices.get(symbol)
+        if price is not None and (price <= limit if side == "buy" else price >= limit):
+            self._fill(order, price)
+        else:
+            self.book(symbol).add(order)
+        return order
+
+    def _open(self, order_id: int) -> Order:
+        order = self.orders.get(order_id)
+        if order is None or order.status != "open":
+            raise KeyError(f"No open order {order_id}.")
+        return order
+
+    def cancel(self, order_id: int) -> Order:
+        order = self._open(order_id)
+        self.book(order.symbol).remove(order)
+        order.status = "cancelled"
+        del self.orders[order_id]
+        return order
+
+    def replace(self, order_id: int, quantity: Optional[int] = None, limit: Optional[float] = None) -> Order:
+        """Change an open order's quantity and/or limit in place."""
+        order = self._open(order_id)
+        quantity = order.quantity if quantity is None else quantity
+        limit = order.limit if limit is None else limit
+        if quantity <= 0 or limit <= 0:
+            raise ValueError("Quantity and limit must be positive.")
+        if quantity > order.quantity or limit != order.limit:
+            # Price-time priority: only a smaller order keeps its place
+            order.seq = next(self._seq)
+        order.quantity, order.limit = quantity, limit
+        self.book(order.symbol).rekey(order)
+        price = self.prices.get(order.symbol)
+        if price is not None and (price <= limit if order.side == "buy" else price >= limit):
+            self.book(order.symbol).remove(order)
+            self._fill(order, price)
+        return order
+
+    def on_price(self, symbol: str, price: float) -> int:
+        """A new price for ``symbol``: fill every order it crosses; return how many."""
+        self.prices[symbol] = price
+        book = self.books.get(symbol)
+        if not book:
+            return 0
+        filled = 0
+        # Filled as popped: if a batch fails to post, the orders not reached yet stay in the book
+        for order_id in book.crossed(price):
+            self._fill(self.orders[order_id], price)
+            filled += 1
+        return filled
+
+    def _fill(self, order: Order, price: float) -> None:
+        order.status = "filled"
+        del self.orders[order.id]
+        self.fills += 1
+        self.pending.append(Fill(order.id, order.username, order.symbol, order.side, order.quantity, price,
+                                 time.time()))
+        if self.ledger is not None and len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> List[Fill]:
+        """Hand over the queued fills, posting them to the ledger if there is one.
+
+        If the post fails the fills stay queued for the next flush.
+        """
+        fills = self.pending
+        if fills and self.ledger is not None:
+            self.ledger.post(fills)
+        self.pending = []
+        return fills
+
+    def resting(self) -> int:
+        return sum(len(book) for book in self.books.values())
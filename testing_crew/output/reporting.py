@@ -0,0 +1,174 @@
+"""Read-only snapshot connections for reports on the account engine.
+
+Reports such as ``get_portfolio_value``, ``get_holdings_at`` and
+``list_transactions`` read the same database file that trades write. In
+SQLite's default rollback-journal mode a reader holds a shared lock for its
+whole scan, and a trade's commit waits until the scan ends. After
+:func:`enable_wal` the database uses write-ahead logging. Readers then work
+from a snapshot, so a long scan does not block a commit and a commit does
+not block the scan.
+
+A :class:`LedgerReader` holds one read-only (``mode=ro``) connection.
+:meth:`LedgerReader.account` returns ``Account`` objects opened with
+``read_only=True`` on that connection, and those refuse every mutation.
+Use ``with reader.snapshot():`` to run several reads against one snapshot,
+so that a report stays consistent while trades commit::
+
+    enable_wal("accounts.db")
+    reader = LedgerReader("accounts.db")
+    with reader.snapshot():
+        alice = reader.account("alice")
+        report = alice.get_portfolio_value(), alice.list_transactions(500)
+
+With ``replica_path`` set, the reader does not read the live database at
+all. It reads a copy made with ``VACUUM INTO``, and remakes the copy once
+it is older than ``max_age`` seconds. Each copy is written next to the
+replica and then renamed over it, so a reader never sees a partial file.
+Accounts from :meth:`LedgerReader.account` look up the reader's connection
+for every statement, so after a refresh they read the new copy and the old
+connection is closed. A snapshot open across a refresh keeps its copy until
+it ends.
+
+``bench_reporting.py`` measures trades while reports run in each of these
+modes.
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from accounts import Account, connect_read_only, is_memory_db
+
+DEFAULT_MAX_AGE = 5.0
+
+
+def enable_wal(db_path: str) -> str:
+    """Switch ``db_path`` to write-ahead logging (it stays on); return the journal mode."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def volume_by_symbol(conn: sqlite3.Connection) -> Dict[str, dict]:
+    """Trades and traded value per symbol over the whole ledger: a full scan."""
+    rows = conn.execute(
+        "SELECT s.symbol, COUNT(*), SUM(t.quantity), SUM(ABS(t.amount)) FROM transactions t "
+        "JOIN symbols s ON s.id = t.symbol_id GROUP BY s.symbol"
+    ).fetchall()
+    return {symbol: {"trades": trades, "shares": shares, "value": value} for symbol, trades, shares, value in rows}
+
+
+class LedgerReader:
+    """Read-only accounts over the live database (in WAL mode) or a replica of it."""
+
+    def __init__(self, db_path: str = "accounts.db", replica_path: Optional[str] = None,
+                 max_age: float = DEFAULT_MAX_AGE):
+        self.db_path = db_path
+        self.replica_path = replica_path
+        self.max_age = max_age
+        self.refreshes = 0
+        self.refreshed_at = 0.0
+        self._conn: Optional[sqlite3.Connection] = None
+        # The connection of the snapshot in progress, and the connections a
+        # refresh replaced while a snapshot was reading from them
+        self._snapshot: Optional[sqlite3.Connection] = None
+        self._retired: List[sqlite3.Connection] = []
+        if replica_path:
+            self.refresh()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._snapshot is not None:
+            return self._snapshot
+        if self.replica_path and time.monotonic() - self.refreshed_at > self.max_age:
+            self.refresh()
+        if self._conn is None:
+            self._conn = connect_read_only(self.replica_path or self.db_path)
+        return self._conn
+
+    def refresh(self) -> float:
+        """Copy the live database to the replica; return how long it took."""
+        if not self.replica_path:
+            raise ValueError("This reader has no replica to refresh.")
+        started = time.perf_counter()
+        partial = f"{self.replica_path}.partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        source = connect_read_only(self.db_path)
+        try:
+            source.execute("VACUUM INTO ?", (partial,))
+        finally:
+            if not is_memory_db(self.db_path):
+                source.close()
+        os.replace(partial, self.replica_path)
+        if self._conn is not None:
+            self._retired.append(self._conn)
+            self._conn = None
+        self._close_retired()
+        self.refreshes += 1
+        self.refreshed_at = time.monotonic()
+        return time.perf_counter() - started
+
+    def _close_retired(self, force: bool = False) -> None:
+        """Close the superseded connections that no snapshot is reading from."""
+        for conn in list(self._retired):
+            if force or conn is not self._snapshot:
+                conn.close()
+                self._retired.remove(conn)
+
+    def account(self, username: str) -> Account:
+        return _ReaderAccount(username, self)
+
+    @contextmanager
+    def snapshot(self) -> Iterator["LedgerReader"]:
+        """Every read in the block sees the database as of its first read."""
+        if self._snapshot is not None:
+            yield self
+            return
+        conn = self.conn
+        if self._source_is_memory:
+            # The shared in-memory connection is the writers' too: a
+            # transaction on it would hold back their commits
+            yield self
+            return
+        conn.execute("BEGIN")
+        self._snapshot = conn
+        try:
+            yield self
+        finally:
+            self._snapshot = None
+            conn.rollback()
+            self._close_retired()
+
+    def volume_by_symbol(self) -> Dict[str, dict]:
+        return volume_by_symbol(self.conn)
+
+    @property
+    def _source_is_memory(self) -> bool:
+        return is_memory_db(self.replica_path or self.db_path)
+
+    def close(self) -> None:
+        if self._conn is not None and not self._source_is_memory:
+            self._conn.close()
+        self._conn = None
+        self._close_retired(force=True)
+
+
+class _ReaderAccount(Account):
+    """A read-only account that runs each statement on its reader's current connection."""
+
+    def __init__(self, username: str, reader: LedgerReader):
+        self._reader = reader
+        super().__init__(username, reader.db_path, read_only=True)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self._reader.conn
+
+    @conn.setter
+    def conn(self, value: Optional[sqlite3.Connection]) -> None:
+        # Account.__init__ sets it; the reader's connection is always used
+        pass
@@ -0,0 +1,219 @@
+"""Pre-trade risk cache for the account engine in ``accounts.py``.
+
+Without a cache, ``Account.buy`` reads the balance row and ``Account.sell``
+reads the holdings row before an order can be turned down. A
+:class:`RiskCache` installed for a database keeps a copy of each account
+in memory: its balance, the share count of every position, and the day's
+realized P/L. Each order is checked against that copy and the account's
+:class:`RiskLimits` before any SQL runs. An order that fails a check is
+rejected with a ``ValueError``, in O(1) and without a round trip:
+
+- not enough cash for a buy, or not enough shares for a sell;
+- an order worth more than ``max_notional``;
+- a buy that takes a position over ``max_position`` shares;
+- a buy once the day's realized loss has reached ``max_daily_loss``. Sells
+  are still accepted.
+
+An order that passes still goes through the engine's own checks.
+
+The cache is write-through. After each mutation the account passes its new
+state to the cache. Every mutation also bumps ``users.version``, and the
+engine reads the version together with the user row it reads anyway before
+writing. If the database version differs from the cached one, something
+else changed the account: another process, a rolled-back transaction or a
+direct SQL update. The entry is then reloaded and the order checked again.
+An entry not confirmed against the database for ``max_age`` seconds is
+reloaded before it rejects an order. :meth:`RiskCache.follow` also drops
+entries as soon as a ``change_feed.ChangeFeed`` publishes changes made
+elsewhere::
+
+    with RiskCache("accounts.db", RiskLimits(max_position=1000, max_daily_loss=5000)) as risk:
+        Account("alice").buy("AAPL", 10)
+"""
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import accounts
+from accounts import Account, trading_day
+
+DEFAULT_MAX_AGE = 1.0
+
+
+@dataclass(frozen=True)
+class RiskLimits:
+    # None: no limit
+    max_position: Optional[int] = None
+    max_notional: Optional[float] = None
+    max_daily_loss: Optional[float] = None
+
+
+@dataclass
+class Exposure:
+    """What the cache knows about one account, as of ``version``."""
+
+    version: int
+    balance: float
+    positions: Dict[str, int] = field(default_factory=dict)
+    trading_day: int = 0
+    day_realized: float = 0.0
+    # time.monotonic() of the last load or version match
+    confirmed_at: float = 0.0
+
+    def daily_loss(self, day: int) -> float:
+        return max(0.0, -self.day_realized) if self.trading_day == day else 0.0
+
+
+@dataclass
+class RiskStats:
+    checks: int = 0
+    rejected: int = 0
+    loads: int = 0
+    # Orders that found their entry behind the database
+    stale: int = 0
+
+
+class RiskCache:
+    """In-memory pre-trade checks for the accounts of one database."""
+
+    def __init__(self, db_path: str = "accounts.db", limits: Optional[RiskLimits] = None,
+                 max_age: float = DEFAULT_MAX_AGE):
+        self.db_path = db_path
+        self.limits = limits or RiskLimits()
+        self.max_age = max_age
+        self.account_limits: Dict[str, RiskLimits] = {}
+        self.entries: Dict[str, Exposure] = {}
+        self.stats = RiskStats()
+        self._lock = threading.Lock()
+
+    # === Installing ===
+    def install(self) -> "RiskCache":
+        accounts.set_risk_cache(self.db_path, self)
+        return self
+
+    def uninstall(self) -> None:
+        if accounts._risk_caches.get(self.db_path) is self:
+            accounts.set_risk_cache(self.db_path, None)
+
+    def __enter__(self) -> "RiskCache":
+        return self.install()
+
+    def __exit__(self, *exc_info) -> None:
+        self.uninstall()
+
+    def set_limits(self, username: str, limits: RiskLimits) -> None:
+        self.account_limits[username] = limits
+
+    def limits_for(self, username: str) -> RiskLimits:
+        return self.account_limits.get(username, self.limits)
+
+    # === Entries ===
+    def load(self, account: Account) -> Exposure:
+        user = account._execute(
+            "SELECT balance, version, trading_day, day_realized FROM users WHERE username = ?",
+            (account.username,), fetchone=True
+        )
+        if user is None:
+            raise ValueError(f"Account '{account.username}' does not exist.")
+        holdings = account._execute(
+            "SELECT s.symbol, h.quantity FROM holdings h JOIN symbols s ON s.id = h.symbol_id WHERE h.username = ?",
+            (account.username,), fetchall=True
+        )
+        entry = Exposure(
+            version=user['version'], balance=user['balance'],
+            positions={sys.intern(row['symbol']): row['quantity'] for row in holdings},
+            trading_day=user['trading_day'], day_realized=user['day_realized'], confirmed_at=time.monotonic(),
+        )
+        with self._lock:
+            self.entries[account.username] = entry
+            self.stats.loads += 1
+        return entry
+
+    def invalidate(self, username: Optional[str] = None) -> None:
+        """Forget one account, or all of them; they are reloaded on their next order."""
+        with self._lock:
+            if username is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(username, None)
+
+    # === Hooks called by accounts.py ===
+    def check(self, account: Account, side: str, symbol: str, quantity: int, price: float,
+              reload: bool = False) -> None:
+        """Raise ``ValueError`` if the order breaks a check; ``symbol`` is normalized."""
+        self.stats.checks += 1
+        entry = None if reload else self.entries.get(account.username)
+        if entry is None:
+            entry = self.load(account)
+        limits = self.limits_for(account.username)
+        reason = self._violation(entry, limits, side, symbol, quantity, price)
+        if reason and not reload and time.monotonic() - entry.confirmed_at > self.max_age:
+            # Confirm an old entry against the database before turning the order down
+            entry = self.load(account)
+            reason = self._violation(entry, limits, side, symbol, quantity, price)
+        if reason:
+            self.stats.rejected += 1
+            raise ValueError(reason)
+
+    @staticmethod
+    def _violation(entry: Exposure, limits: RiskLimits, side: str, symbol: str, quantity: int,
+                   price: float) -> Optional[str]:
+        value = price * quantity
+        if limits.max_notional is not None and value > limits.max_notional:
+            return f"Order value {value:,.2f} is over the limit of {limits.max_notional:,.2f}."
+        held = entry.positions.get(symbol, 0)
+        if side == "sell":
+            return "Insufficient shares to sell." if held < quantity else None
+        if value > entry.balance:
+            return "Insufficient funds to buy."
+        if limits.max_position is not None and held + quantity > limits.max_position:
+            return f"Position in {symbol} would be over the limit of {limits.max_position} shares."
+        if limits.max_daily_loss is not None and \
+                entry.daily_loss(trading_day(time.time())) >= limits.max_daily_loss:
+            return "Daily loss limit reached; only sells are accepted today."
+        return None
+
+    def is_current(self, username: str, version: int) -> bool:
+        """Whether the cached entry is at ``version``, the one in the database."""
+        entry = self.entries.get(username)
+        if entry is None:
+            return False
+        if entry.version != version:
+            self.stats.stale += 1
+            return False
+        entry.confirmed_at = time.monotonic()
+        return True
+
+    def applied(self, username: str, version: int, balance: float, symbol: Optional[str] = None,
+                quantity: Optional[int] = None, day: Optional[int] = None,
+                day_realized: Optional[float] = None) -> None:
+        """A mutation of ``username`` took it to ``version``; keep the entry in step."""
+        with self._lock:
+            entry = self.entries.get(username)
+            if entry is None:
+                return
+            if entry.version != version - 1:
+                # Something else wrote in between
+                del self.entries[username]
+                return
+            entry.version, entry.balance = version, balance
+            if symbol is not None:
+                if quantity:
+                    entry.positions[symbol] = quantity
+                else:
+                    entry.positions.pop(symbol, None)
+            if day is not None:
+                entry.trading_day, entry.day_realized = day, day_realized
+
+    # === Change feed ===
+    def follow(self, feed):
+        """Drop entries that a change published on ``feed`` shows are stale."""
+        return feed.subscribe(self._on_change)
+
+    def _on_change(self, change) -> None:
+        entry = self.entries.get(change.username)
+        # Changes written through this cache already match it
+        if entry is not None and entry.balance != change.balance_after:
+            self.invalidate(change.username)
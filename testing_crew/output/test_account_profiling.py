@@ -0,0 +1,57 @@
+import logging
+
+import pytest
+
+import accounts
+from account_profiling import AccountProfiler
+from accounts import Account
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    return str(tmp_path / "accounts.db")
+
+
+def test_profiler_counts_statements_phases_and_rows(temp_db):
+    with AccountProfiler(slow_query_seconds=None) as profiler:
+        acct = Account.create_account("alice", 10000.0, db_path=temp_db)
+        acct.buy("AAPL", 2)
+        acct.get_holdings_at(10**10)
+    assert accounts._profiler is None
+
+    snapshot = profiler.snapshot()
+    insert = "INSERT INTO holdings (username, symbol_id, quantity, fifo_cost, average_cost) VALUES (?, ?, ?, ?, ?)"
+    assert snapshot["statements"][insert]["calls"] == 1 and snapshot["statements"][insert]["rows"] == 1
+    history = accounts._LEDGER + " WHERE t.username = ? AND t.timestamp <= ? ORDER BY t.id ASC"
+    assert snapshot["statements"][history]["rows"] == 2
+    phases = snapshot["phases"]
+    assert phases["price_lookup"]["calls"] == 1
+    assert phases["connect"]["calls"] == sum(s["calls"] for s in snapshot["statements"].values())
+    # One commit each for create_account and buy, whatever their statement
+    # count, plus the two reads outside them
+    assert phases["commit"]["calls"] == 4
+    assert phases["init_db"]["calls"] == 2
+    # Not installed: nothing is recorded
+    acct.deposit(1.0)
+    assert profiler.snapshot()["phases"]["connect"]["calls"] == phases["connect"]["calls"]
+
+
+def test_slow_queries_are_logged_with_their_plan(temp_db, caplog):
+    acct = Account.create_account("alice", 100.0, db_path=temp_db)
+    with caplog.at_level(logging.WARNING, logger="accounts.profiling"), AccountProfiler(slow_query_seconds=0.0) as profiler:
+        acct.list_transactions()
+    slow = profiler.slow_queries[-1]
+    assert slow.statement.startswith(accounts._LEDGER) and slow.rows == 1
+    # The ledger is read under its alias
+    assert any(step.startswith(("SCAN t", "SEARCH t")) for step in slow.plan)
+    assert "Slow query" in caplog.text
+
+
+def test_prometheus_text_dump(temp_db):
+    with AccountProfiler(slow_query_seconds=None) as profiler:
+        Account.create_account("alice", 100.0, db_path=temp_db).deposit(5.0)
+    text = profiler.prometheus_text()
+    assert "# TYPE account_sql_statements_total counter" in text
+    assert 'account_sql_statements_total{statement="SELECT username FROM users WHERE username = ?"} 2' in text
+    assert 'account_phase_calls_total{phase="init_db"} 2' in text
+    assert text.endswith("account_slow_queries_total 0\n")
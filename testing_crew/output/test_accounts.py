@@ -1,18 +1,9 @@
 import pytest
-import os
-import tempfile
 import time
 
 from accounts import Account, get_share_price
 
-@pytest.fixture
-def temp_db():
-    """Create and destroy a temporary sqlite DB file for each test."""
-    fd, path = tempfile.mkstemp(suffix=".db")
-    os.close(fd)
-    yield path
-    if os.path.exists(path):
-        os.remove(path)
+# temp_db (conftest.py): the shared in-memory database, rolled back after each test
 
 def test_get_share_price_valid():
     assert get_share_price('AAPL') == 175.0
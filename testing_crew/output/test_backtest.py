@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+from backtest import StrategyStats, backtest, buy_and_hold, momentum, random_walk
+
+RISING = {"AAPL": [100.0 + step for step in range(11)]}
+
+
+def test_buy_and_hold_on_an_explicit_path():
+    totals = backtest([buy_and_hold], paths=[RISING], workers=1, initial_cash=1000.0, curve_points=3)
+    stats = totals["buy_and_hold"]
+    # 10 shares at 100, worth 110 at the end
+    assert stats.returns == [pytest.approx(0.1)]
+    assert stats.mean_curve == [1000.0, 1050.0, 1100.0]
+    assert (stats.trades, stats.rejected, stats.max_drawdowns) == (1, 0, [0.0])
+
+
+def test_sharding_over_processes_matches_a_single_worker():
+    args = dict(paths=12, steps=40, chunk_size=5)
+    one = backtest([buy_and_hold, momentum], workers=1, **args)
+    many = backtest([buy_and_hold, momentum], workers=3, **args)
+    for name in one:
+        assert many[name].simulations == 12
+        assert sorted(many[name].returns) == pytest.approx(sorted(one[name].returns))
+        assert many[name].mean_curve == pytest.approx(one[name].mean_curve)
+    assert random_walk(4, 40) == random_walk(4, 40)
+
+
+def test_sqlite_shards_keep_ledgers_only_when_asked(tmp_path):
+    progress = []
+    backtest([buy_and_hold], paths=4, steps=5, workers=2, engine="sqlite", shard_dir=str(tmp_path / "dropped"),
+             chunk_size=1, on_progress=lambda done, total, _: progress.append((done, total)))
+    assert progress[-1] == (4, 4)
+    kept = tmp_path / "kept"
+    backtest([buy_and_hold], paths=4, steps=5, workers=2, engine="sqlite", shard_dir=str(kept), keep_ledgers=True)
+    users = {shard.name: sqlite3.connect(shard).execute("SELECT COUNT(*) FROM users").fetchone()[0]
+             for shard in kept.iterdir()}
+    assert sum(users.values()) == 4
+    for shard in (tmp_path / "dropped").iterdir():
+        assert sqlite3.connect(shard).execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0
+
+
+def test_stats_merge():
+    a, b = StrategyStats(), StrategyStats()
+    a.add([100.0, 90.0, 120.0], 2, trades=1, rejected=0, seconds=0.1)
+    b.add([100.0, 100.0, 80.0], 2, trades=2, rejected=1, seconds=0.1)
+    a.merge(b)
+    summary = a.summary()
+    assert summary["simulations"] == 2 and summary["trades"] == 3 and summary["rejected"] == 1
+    assert summary["mean_return"] == pytest.approx(0.0)
+    assert summary["mean_max_drawdown"] == pytest.approx(0.15)
+    assert a.mean_curve == [100.0, 100.0]
@@ -0,0 +1,46 @@
+import time
+
+from accounts import Account
+from bench_accounts import OPERATIONS, OpResult, format_report, record, regressions, run_grid, save_baseline, seed
+
+
+def result(p50_us, op="deposit"):
+    return OpResult(op=op, rows=100, users=1, iterations=10, ops_per_second=1e6 / p50_us,
+                    p50_us=p50_us, p95_us=p50_us, p99_us=p50_us, max_us=p50_us)
+
+
+def test_seeded_ledger_matches_balances_and_holdings(tmp_path):
+    db_path = str(tmp_path / "accounts.db")
+    middle = seed(db_path, rows=60, users=4, start=1000.0)
+    assert middle == 1030.0
+    for i in range(4):
+        acct = Account(f"user{i:06d}", db_path)
+        txs = acct.list_transactions(limit=1000)
+        assert len(txs) == 15
+        assert acct.get_holdings() == acct.get_holdings_at(time.time())
+        balance = acct._execute("SELECT balance FROM users WHERE username = ?", (acct.username,), fetchone=True)
+        assert balance["balance"] == txs[0]["balance_after"]
+
+
+def test_grid_times_every_operation_and_skips_cells_without_enough_rows():
+    results = run_grid((100,), (1, 10, 1000), budget=0.01)
+    assert {(r.rows, r.users) for r in results} == {(100, 1), (100, 10)}
+    assert [r.op for r in results[:len(OPERATIONS)]] == list(OPERATIONS)
+    for r in results:
+        assert r.iterations >= 5 and r.ops_per_second > 0
+        assert 0 < r.p50_us <= r.p95_us <= r.p99_us <= r.max_us
+
+
+def test_regressions_against_baseline_or_history(tmp_path):
+    history, baseline = str(tmp_path / "accounts.jsonl"), str(tmp_path / "baseline.jsonl")
+    assert record([result(100)], history, baseline)["regressions"] == []
+    run = record([result(200)], history, baseline)
+    assert run["regressions"] == ["deposit@100/1: p50 100us -> 200us (+100%)"]
+    assert "REGRESSION deposit@100/1" in format_report(run)
+
+    save_baseline(run, baseline)
+    # The stored baseline wins over the previous run
+    assert record([result(210)], history, baseline)["regressions"] == []
+    assert record([result(300)], history, baseline, threshold=0.6)["regressions"] == []
+    # Noise below the minimum is not a regression
+    assert regressions([result(30)], {"results": [{"op": "deposit", "rows": 100, "users": 1, "p50_us": 15}]}) == []
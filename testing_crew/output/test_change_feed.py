@@ -0,0 +1,175 @@
+import sqlite3
+import threading
+
+import pytest
+
+import accounts
+from accounts import Account
+from change_feed import AccountView, ChangeFeed, follow, read_log
+from orderbook import Fill, Ledger
+
+
+def balance(db_path, username):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT balance FROM users WHERE username = ?", (username,)).fetchone()[0]
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    # Publishing follows commits, which the savepoint of temp_db never makes
+    return str(tmp_path / "accounts.db")
+
+
+@pytest.fixture
+def feed(db_file, tmp_path):
+    with ChangeFeed(db_file, log_path=str(tmp_path / "changes.jsonl")) as feed:
+        yield feed
+
+
+def test_committed_mutations_are_published_in_order(db_file, feed):
+    seen = []
+    feed.subscribe(seen.append)
+    view = AccountView()
+    feed.subscribe(view.apply)
+    alice = Account.create_account("alice", 10000.0, db_path=db_file)
+    alice.buy("AAPL", 10)
+    alice.sell("AAPL", 4)
+    alice.withdraw(100.0)
+    Account.create_account("bob", 500.0, db_path=db_file).deposit(50.0)
+
+    assert [(c.username, c.type) for c in seen] == [
+        ("alice", "deposit"), ("alice", "buy"), ("alice", "sell"), ("alice", "withdraw"),
+        ("bob", "deposit"), ("bob", "deposit"),
+    ]
+    assert [c.seq for c in seen] == sorted({c.seq for c in seen})
+    assert [c.seq for c in read_log(feed.log_path)] == [c.seq for c in seen]
+    # The view matches a full re-query
+    assert view.seq == feed.seq == feed.head()
+    assert view.holdings == {"alice": alice.get_holdings()}
+    assert view.balances == {"alice": balance(db_file, "alice"), "bob": 550.0}
+
+
+def test_changes_are_published_only_once_committed(db_file, feed):
+    Account.create_account("alice", 10000.0, db_path=db_file)
+    seen = []
+    feed.subscribe(seen.append)
+    conn = sqlite3.connect(db_file)
+    alice = Account("alice", db_file, conn=conn)
+    conn.execute("BEGIN")
+    alice.buy("AAPL", 1)
+    assert seen == []
+    conn.rollback()
+    accounts.publish(db_file)
+    assert seen == []
+
+    conn.execute("BEGIN")
+    alice.buy("AAPL", 2)
+    conn.commit()
+    accounts.publish(db_file)
+    assert [(c.type, c.quantity) for c in seen] == [("buy", 2)]
+    # A ledger batch is published when it commits
+    ledger = Ledger(db_file)
+    ledger.post([Fill(1, "alice", "AAPL", "sell", 2, 180.0, 0.0)])
+    ledger.close()
+    assert [(c.type, c.price) for c in seen[1:]] == [("sell", 180.0)]
+    conn.close()
+
+
+def test_consumers_resume_from_a_sequence_number(db_file, feed, tmp_path):
+    alice = Account.create_account("alice", 10000.0, db_path=db_file)
+    alice.buy("AAPL", 10)
+    view = AccountView()
+    view.catch_up(feed)
+    checkpoint = view.seq
+    alice.sell("AAPL", 3)
+    alice.buy("TSLA", 1)
+
+    # From the database, and from the log
+    resumed = AccountView(seq=checkpoint, balances=dict(view.balances),
+                          holdings={k: dict(v) for k, v in view.holdings.items()})
+    feed.subscribe(resumed.apply, from_seq=checkpoint)
+    assert resumed.holdings == {"alice": {"AAPL": 7, "TSLA": 1}}
+    assert [c.type for c in read_log(feed.log_path, checkpoint)] == ["sell", "buy"]
+
+    # A restarted feed continues its log after a torn append, without repeats
+    feed.close()
+    with open(feed.log_path, "a") as f:
+        f.write('{"seq": 9')
+    alice.deposit(1.0)
+    with ChangeFeed(db_file, log_path=feed.log_path) as restarted:
+        restarted.poll()
+    seqs = [c.seq for c in read_log(feed.log_path)]
+    assert seqs == sorted(set(seqs)) and len(seqs) == 5
+
+    stop = threading.Event()
+    tailed = []
+    for change in follow(feed.log_path, from_seq=checkpoint, interval=0.01, stop=stop):
+        tailed.append(change.type)
+        if len(tailed) == 3:
+            stop.set()
+    assert tailed == ["sell", "buy", "deposit"]
+
+
+def test_failing_subscriber_is_dropped_without_failing_the_mutation(db_file, feed):
+    alice = Account.create_account("alice", 10000.0, db_path=db_file)
+
+    def broken(change):
+        raise RuntimeError("view is down")
+
+    bad = feed.subscribe(broken)
+    good = []
+    feed.subscribe(good.append)
+    alice.deposit(5.0)
+    alice.deposit(6.0)
+    assert isinstance(bad.error, RuntimeError)
+    assert bad.seq < good[0].seq
+    assert [c.amount for c in good] == [5.0, 6.0]
+    assert balance(db_file, "alice") == 10011.0
+
+
+def test_a_mutation_failing_partway_commits_and_publishes_nothing(db_file, feed, monkeypatch):
+    alice = Account.create_account("alice", 10000.0, db_path=db_file)
+    seen = []
+    feed.subscribe(seen.append)
+    execute = Account._execute
+
+    def failing(self, query, *args, **kwargs):
+        # After the symbol, holding, lot and balance writes of the buy
+        if query.startswith("INSERT INTO transactions"):
+            raise sqlite3.OperationalError("disk I/O error")
+        return execute(self, query, *args, **kwargs)
+
+    monkeypatch.setattr(Account, "_execute", failing)
+    with pytest.raises(sqlite3.OperationalError):
+        alice.buy("AAPL", 10)
+    monkeypatch.undo()
+
+    with sqlite3.connect(db_file) as conn:
+        for table in ("holdings", "lots", "symbols"):
+            assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == 0
+        assert conn.execute("SELECT balance, version FROM users").fetchone() == (10000.0, 0)
+    assert seen == [] and alice._symbol_ids == {}
+    alice.buy("AAPL", 10)
+    assert [(c.type, c.symbol, c.quantity) for c in seen] == [("buy", "AAPL", 10)]
+
+
+def test_memory_feed_never_reads_past_an_open_transaction():
+    uri = "file:test-change-feed?mode=memory&cache=shared"
+    alice = Account.create_account("alice", 100.0, db_path=uri)
+    conn = accounts.shared_connection(uri)
+    with ChangeFeed(uri) as feed:
+        view = AccountView()
+        feed.subscribe(view.apply)
+        conn.execute("BEGIN")
+        alice.deposit(1.0)
+        # The uncommitted row's id is handed out again after the rollback
+        assert feed.poll() == 0 and view.seq == 0
+        with pytest.raises(RuntimeError, match="transaction is open"):
+            feed.head()
+        with pytest.raises(RuntimeError):
+            ChangeFeed(uri)
+        conn.rollback()
+        alice.deposit(2.0)
+        assert view.seq == feed.seq == feed.head()
+        assert view.balances == {"alice": 102.0}
+    accounts.close_shared(uri)
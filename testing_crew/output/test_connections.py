@@ -0,0 +1,77 @@
+import sqlite3
+import threading
+
+import pytest
+
+import accounts
+from accounts import Account
+
+
+def test_injected_connection_leaves_callers_transaction_open():
+    conn = sqlite3.connect(":memory:")
+    Account.create_account("alice", 100.0, conn=conn)
+    # Outside a transaction each mutation is committed as usual
+    assert not conn.in_transaction
+    conn.execute("BEGIN")
+    Account("alice", conn=conn).deposit(50.0)
+    assert conn.in_transaction
+    conn.rollback()
+    assert Account("alice", conn=conn).get_portfolio_value() == 100.0
+
+
+def test_memory_database_is_shared_until_closed():
+    uri = "file:test-connections?mode=memory&cache=shared"
+    Account.create_account("alice", 100.0, db_path=uri)
+    assert Account("alice", db_path=uri).get_holdings() == {}
+    accounts.close_shared(uri)
+    with pytest.raises(ValueError):
+        Account("alice", db_path=uri)
+    accounts.close_shared(uri)
+
+
+def test_threads_wait_for_each_others_mutations_on_a_memory_database(monkeypatch):
+    uri = "file:test-connection-threads?mode=memory&cache=shared"
+    alice = Account.create_account("alice", 100.0, db_path=uri)
+    bob = Account.create_account("bob", 100.0, db_path=uri)
+    inside, release, errors = threading.Event(), threading.Event(), []
+    execute = Account._execute
+
+    def failing(self, query, *args, **kwargs):
+        # Alice's withdraw stops partway, then fails
+        if self.username == "alice" and query.startswith("INSERT INTO transactions"):
+            inside.set()
+            release.wait(5)
+            raise sqlite3.OperationalError("disk I/O error")
+        return execute(self, query, *args, **kwargs)
+
+    def withdraw():
+        try:
+            alice.withdraw(10.0)
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    monkeypatch.setattr(Account, "_execute", failing)
+    withdrawing = threading.Thread(target=withdraw)
+    withdrawing.start()
+    assert inside.wait(5)
+    depositing = threading.Thread(target=bob.deposit, args=(50.0,))
+    depositing.start()
+    # Bob's deposit waits for alice's transaction instead of joining it
+    depositing.join(0.2)
+    assert depositing.is_alive()
+    release.set()
+    withdrawing.join(5)
+    depositing.join(5)
+    monkeypatch.undo()
+
+    assert len(errors) == 1
+    conn = accounts.shared_connection(uri)
+    assert dict(conn.execute("SELECT username, balance FROM users")) == {"alice": 100.0, "bob": 150.0}
+    accounts.close_shared(uri)
+
+
+@pytest.mark.parametrize("run", [1, 2])
+def test_savepoint_rolls_back_each_test(db_savepoint, memory_db, run):
+    # Would fail on the second run if the first run's account survived
+    Account.create_account("carol", 10.0, db_path=memory_db)
+    assert db_savepoint.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 1
@@ -0,0 +1,131 @@
+import sqlite3
+
+import pytest
+
+import accounts
+import backfill_lots
+from accounts import Account
+from backfill_lots import backfill
+
+PRICES = {"AAPL": 100.0}
+
+
+@pytest.fixture
+def prices(monkeypatch):
+    monkeypatch.setattr(accounts, "get_share_price", lambda symbol: PRICES[symbol])
+    PRICES["AAPL"] = 100.0
+    return PRICES
+
+
+def trade(acct, prices):
+    acct.buy("AAPL", 10)
+    prices["AAPL"] = 200.0
+    acct.buy("AAPL", 10)
+    prices["AAPL"] = 300.0
+    acct.sell("AAPL", 15)
+
+
+def test_fifo_and_average_cost_basis(temp_db, prices):
+    acct = Account.create_account("alice", 10000.0, db_path=temp_db)
+    trade(acct, prices)
+    fifo = acct.get_profit_loss_by_symbol("fifo")["AAPL"]
+    # Sold the 10 at 100 and 5 of the 10 at 200
+    assert fifo == {"quantity": 5, "cost_basis": 1000.0, "market_value": 1500.0,
+                    "unrealized": 500.0, "realized": 2500.0}
+    average = acct.get_profit_loss_by_symbol("average")["AAPL"]
+    assert average["cost_basis"] == pytest.approx(750.0)
+    assert average["realized"] == pytest.approx(2250.0)
+    for method in ("fifo", "average"):
+        total = acct.get_realized_profit_loss(method) + acct.get_unrealized_profit_loss(method)
+        assert total == pytest.approx(acct.get_profit_loss())
+    # Selling out leaves only realized P/L
+    acct.sell("AAPL", 5)
+    assert acct.get_profit_loss_by_symbol()["AAPL"]["quantity"] == 0
+    assert acct.get_realized_profit_loss() == pytest.approx(acct.get_profit_loss())
+    with pytest.raises(ValueError):
+        acct.get_profit_loss_by_symbol("lifo")
+
+
+def test_sells_read_open_lots_through_the_partial_index(temp_db, prices):
+    acct = Account.create_account("alice", 10000.0, db_path=temp_db)
+    for _ in range(3):
+        acct.buy("AAPL", 2)
+    acct.sell("AAPL", 3)
+    lots = acct._execute("SELECT remaining FROM lots WHERE username = ? ORDER BY id", ("alice",), fetchall=True)
+    assert [lot["remaining"] for lot in lots] == [0, 1, 2]
+    plan = acct._execute(
+        "EXPLAIN QUERY PLAN SELECT id, remaining, price FROM lots WHERE username = ? AND symbol_id = ? "
+        "AND remaining > 0 ORDER BY id LIMIT 16", ("alice", acct._symbol_id("AAPL")), fetchall=True
+    )
+    assert "lots_open" in plan[0]["detail"]
+
+
+def test_backfill_migrates_and_rebuilds_a_legacy_database(tmp_path, prices):
+    db_path = str(tmp_path / "legacy.db")
+    expected = {}
+    acct = Account.create_account("alice", 10000.0, db_path=db_path)
+    trade(acct, prices)
+    for method in ("fifo", "average"):
+        expected[method] = acct.get_profit_loss_by_symbol(method)
+    # What a database from before lot tracking looks like after migration
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("DELETE FROM lots")
+        conn.execute("DELETE FROM realized")
+        conn.execute("UPDATE holdings SET fifo_cost = 0, average_cost = 0")
+        conn.execute("UPDATE users SET cost_tracked = 0")
+    conn.close()
+    with pytest.raises(RuntimeError, match="backfill_lots"):
+        acct.get_profit_loss_by_symbol()
+
+    stats = backfill(db_path)
+    assert (stats.users, stats.transactions, stats.lots) == (1, 4, 2)
+    for method in ("fifo", "average"):
+        assert acct.get_profit_loss_by_symbol(method)["AAPL"] == pytest.approx(expected[method]["AAPL"])
+    # Tracked accounts are left alone unless everything is rebuilt
+    assert backfill(db_path).users == 0
+    assert backfill(db_path, rebuild_all=True).lots == 2
+    acct.sell("AAPL", 5)
+    assert acct.get_realized_profit_loss() == pytest.approx(acct.get_profit_loss())
+
+
+def test_trades_between_backfill_batches_are_kept(tmp_path, prices, monkeypatch):
+    db_path = str(tmp_path / "legacy.db")
+    alice = Account.create_account("alice", 10000.0, db_path=db_path)
+    bob = Account.create_account("bob", 10000.0, db_path=db_path)
+    alice.buy("AAPL", 1)
+    bob.buy("AAPL", 1)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("DELETE FROM lots")
+        conn.execute("UPDATE holdings SET fifo_cost = 0, average_cost = 0")
+        conn.execute("UPDATE users SET cost_tracked = 0")
+    conn.close()
+    rebuild = backfill_lots._backfill_batch
+
+    def trade_after_alice(conn, usernames, *args):
+        rebuild(conn, usernames, *args)
+        if usernames == ["alice"]:
+            prices["AAPL"] = 200.0
+            bob.buy("AAPL", 1)
+
+    monkeypatch.setattr(backfill_lots, "_backfill_batch", trade_after_alice)
+    stats = backfill(db_path, batch=1)
+
+    assert (stats.users, stats.transactions, stats.lots) == (2, 5, 3)
+    assert bob.get_profit_loss_by_symbol()["AAPL"]["cost_basis"] == pytest.approx(300.0)
+
+
+def test_older_schema_gains_cost_columns(tmp_path):
+    db_path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE users (username TEXT PRIMARY KEY, balance REAL NOT NULL, total_deposit REAL NOT NULL)")
+    conn.execute("CREATE TABLE holdings (username TEXT, symbol TEXT, quantity INTEGER, PRIMARY KEY (username, symbol))")
+    conn.execute("INSERT INTO users VALUES ('bob', 100.0, 100.0)")
+    conn.commit()
+    conn.close()
+    bob = Account("bob", db_path=db_path)
+    with pytest.raises(RuntimeError):
+        bob.get_profit_loss_by_symbol()
+    assert backfill(db_path).users == 1
+    assert bob.get_profit_loss_by_symbol() == {}
@@ -0,0 +1,140 @@
+import random
+import sqlite3
+
+import pytest
+
+from accounts import Account
+from bench_orderbook import run
+from orderbook import Fill, IndexedHeap, Ledger, MatchingEngine
+
+
+def test_indexed_heap_matches_a_sorted_list_under_removes_and_updates():
+    rng = random.Random(7)
+    heap, reference = IndexedHeap(), {}
+    for step in range(2000):
+        action = rng.random()
+        if action < 0.5 or not reference:
+            key = (rng.randint(0, 50), step)
+            heap.push(key, step)
+            reference[step] = key
+        elif action < 0.7:
+            item = rng.choice(list(reference))
+            assert heap.remove(item) == reference.pop(item)
+        elif action < 0.85:
+            item = rng.choice(list(reference))
+            reference[item] = (rng.randint(0, 50), step)
+            heap.update(item, reference[item])
+        else:
+            key, item = heap.pop()
+            assert key == min(reference.values())
+            assert reference.pop(item) == key
+        assert len(heap) == len(reference)
+    assert [heap.pop()[0] for _ in range(len(heap))] == sorted(reference.values())
+
+
+def test_fills_follow_price_time_priority():
+    engine = MatchingEngine()
+    engine.on_price("AAPL", 100.0)
+    first = engine.submit("a", "AAPL", "buy", 1, 99.0)
+    better = engine.submit("b", "AAPL", "buy", 1, 99.5)
+    second = engine.submit("c", "AAPL", "buy", 1, 99.0)
+    far = engine.submit("d", "AAPL", "buy", 1, 90.0)
+    ask = engine.submit("e", "AAPL", "sell", 2, 101.0)
+    assert engine.on_price("AAPL", 99.0) == 3
+    assert [fill.order_id for fill in engine.flush()] == [better.id, first.id, second.id]
+    assert all(fill.price == 99.0 for fill in engine.pending) and far.status == "open"
+    engine.on_price("AAPL", 102.0)
+    assert [(fill.order_id, fill.quantity) for fill in engine.flush()] == [(ask.id, 2)]
+    # A limit the last price already crosses fills at once
+    assert engine.submit("f", "AAPL", "sell", 1, 100.0).status == "filled"
+    assert engine.resting() == 1
+
+
+def test_cancel_and_replace_keep_or_lose_time_priority():
+    engine = MatchingEngine()
+    engine.on_price("TSLA", 750.0)
+    a = engine.submit("a", "TSLA", "sell", 5, 760.0)
+    b = engine.submit("b", "TSLA", "sell", 5, 760.0)
+    c = engine.submit("c", "TSLA", "sell", 5, 760.0)
+    engine.replace(a.id, quantity=3)
+    engine.replace(b.id, quantity=6)
+    engine.cancel(c.id)
+    with pytest.raises(KeyError):
+        engine.cancel(c.id)
+    engine.on_price("TSLA", 760.0)
+    assert [(fill.order_id, fill.quantity) for fill in engine.flush()] == [(a.id, 3), (b.id, 6)]
+    # Moving the limit through the price fills the order
+    d = engine.submit("d", "TSLA", "buy", 1, 700.0)
+    engine.replace(d.id, limit=765.0)
+    assert d.status == "filled" and engine.flush()[0].price == 760.0
+
+
+def test_fills_post_to_the_ledger_in_batches(temp_db):
+    alice = Account.create_account("alice", 10000.0, db_path=temp_db)
+    engine = MatchingEngine(Ledger(temp_db), batch_size=2)
+    engine.on_price("AAPL", 175.0)
+    engine.submit("alice", "AAPL", "buy", 10, 170.0)
+    engine.submit("alice", "AAPL", "sell", 50, 180.0)
+    engine.submit("bob", "AAPL", "buy", 1, 170.0)
+    engine.on_price("AAPL", 168.0)
+    stats = engine.ledger.stats
+    assert (stats.posted, stats.batches) == (1, 1)
+    assert [fill.username for fill, _ in stats.rejected] == ["bob"]
+    assert alice.get_holdings() == {"AAPL": 10}
+    assert alice.list_transactions(limit=1)[0]["price"] == 168.0
+    engine.on_price("AAPL", 181.0)
+    engine.flush()
+    assert "Insufficient shares" in stats.rejected[-1][1] and stats.batches == 2
+
+
+def test_fills_stay_queued_when_a_batch_fails_to_post(temp_db, monkeypatch):
+    alice = Account.create_account("alice", 10000.0, db_path=temp_db)
+    engine = MatchingEngine(Ledger(temp_db), batch_size=2)
+    orders = [engine.submit("alice", "AAPL", "buy", 1, limit) for limit in (172.0, 171.0, 170.0)]
+    post = Ledger.post
+
+    def failing(self, fills):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(Ledger, "post", failing)
+    with pytest.raises(sqlite3.OperationalError):
+        engine.on_price("AAPL", 168.0)
+    # The batch is still queued, and the order after it still rests
+    assert [fill.order_id for fill in engine.pending] == [orders[0].id, orders[1].id]
+    assert orders[2].status == "open" and engine.resting() == 1
+
+    monkeypatch.setattr(Ledger, "post", post)
+    engine.flush()
+    assert engine.pending == [] and alice.get_holdings() == {"AAPL": 2}
+    assert engine.on_price("AAPL", 168.0) == 1
+    engine.flush()
+    assert alice.get_holdings() == {"AAPL": 3} and engine.ledger.stats.posted == 3
+
+
+def test_a_batch_that_rolls_back_is_counted_once_when_retried(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "accounts.db")
+    Account.create_account("alice", 10000.0, db_path=db_path)
+    ledger = Ledger(db_path)
+    fills = [Fill(1, "alice", "AAPL", "buy", 1, 170.0, 0.0), Fill(2, "bob", "AAPL", "buy", 1, 170.0, 0.0),
+             Fill(3, "alice", "AAPL", "sell", 1, 180.0, 0.0)]
+    sell = Account.sell
+
+    def failing(self, *args, **kwargs):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(Account, "sell", failing)
+    with pytest.raises(sqlite3.OperationalError):
+        ledger.post(fills)
+    assert (ledger.stats.posted, ledger.stats.rejected, ledger.stats.batches) == (0, [], 0)
+
+    monkeypatch.setattr(Account, "sell", sell)
+    stats = ledger.post(fills)
+    assert (stats.posted, len(stats.rejected), stats.batches) == (2, 1, 1)
+    assert Account("alice", db_path).get_holdings() == {}
+    ledger.close()
+
+
+def test_benchmark_replays_every_event():
+    result = run(events=5000, seed=3)
+    assert sum(count for count, _ in result.by_type.values()) == 5000
+    assert result.fills > 0 and result.events_per_second > 0
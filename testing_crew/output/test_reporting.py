@@ -0,0 +1,78 @@
+import sqlite3
+
+import pytest
+
+from accounts import Account
+from bench_reporting import MODES, run
+from reporting import LedgerReader, enable_wal
+
+
+@pytest.fixture
+def wal_db(tmp_path):
+    db_path = str(tmp_path / "accounts.db")
+    alice = Account.create_account("alice", 10000.0, db_path=db_path)
+    alice.buy("AAPL", 10)
+    assert enable_wal(db_path) == "wal"
+    return db_path
+
+
+def test_snapshot_reads_are_consistent_and_never_write(wal_db):
+    alice = Account("alice", wal_db)
+    reader = LedgerReader(wal_db)
+    report = reader.account("alice")
+    assert report.get_holdings() == alice.get_holdings()
+    assert report.list_transactions() == alice.list_transactions()
+    with pytest.raises(RuntimeError, match="read-only"):
+        report.buy("AAPL", 1)
+    with pytest.raises(RuntimeError, match="read-only"):
+        report.deposit(1.0)
+
+    with reader.snapshot():
+        before = report.get_portfolio_value()
+        # A trade commits while the snapshot is open, without waiting for it
+        alice.buy("AAPL", 5, price=100.0)
+        assert report.get_portfolio_value() == before
+        assert report.get_holdings() == {"AAPL": 10}
+        assert reader.volume_by_symbol()["AAPL"]["shares"] == 10
+    assert report.get_holdings() == {"AAPL": 15}
+    # The connection itself refuses writes
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        reader.conn.execute("DELETE FROM users")
+    reader.close()
+
+
+def test_replica_is_refreshed_when_stale(wal_db, tmp_path):
+    alice = Account("alice", wal_db)
+    reader = LedgerReader(wal_db, replica_path=str(tmp_path / "replica.db"), max_age=3600)
+    assert reader.refreshes == 1
+    report = reader.account("alice")
+    old = reader.conn
+    alice.sell("AAPL", 4)
+    # Reads come from the copy until it is refreshed
+    assert report.get_holdings() == {"AAPL": 10}
+    reader.refresh()
+    # The account reads the new copy, and the old connection is closed
+    assert report.get_holdings() == {"AAPL": 6}
+    with pytest.raises(sqlite3.ProgrammingError):
+        old.execute("SELECT 1")
+
+    # A snapshot keeps its copy across a refresh
+    with reader.snapshot():
+        alice.sell("AAPL", 1)
+        reader.refresh()
+        assert report.get_holdings() == {"AAPL": 6}
+    assert report.get_holdings() == {"AAPL": 5}
+    assert reader.refreshes == 3 and reader._retired == []
+    reader.max_age = 0
+    assert reader.account("alice").get_holdings() == {"AAPL": 5}
+    assert reader.refreshes > 3
+    reader.close()
+
+
+def test_mixed_benchmark_runs_every_mode(tmp_path):
+    results = run(str(tmp_path), rows=500, users=10, seconds=0.2, readers=1, max_age=0.05)
+    assert [r.mode for r in results] == list(MODES)
+    for result in results:
+        assert result.trades > 0 and result.trade_errors == 0
+        assert result.reports > 0
+    assert results[-1].refreshes >= 1
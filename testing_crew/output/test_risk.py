@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+from account_profiling import AccountProfiler
+from accounts import Account
+from change_feed import ChangeFeed
+from risk import RiskCache, RiskLimits
+
+
+def test_orders_are_rejected_in_memory(temp_db):
+    alice = Account.create_account("alice", 10000.0, db_path=temp_db)
+    with RiskCache(temp_db, RiskLimits(max_position=10, max_notional=5000.0), max_age=3600) as risk:
+        alice.buy("AAPL", 5)
+        balance = alice.list_transactions(limit=1)[0]["balance_after"]
+        with AccountProfiler(slow_query_seconds=None) as profiler:
+            for symbol, quantity, side, reason in [
+                ("AAPL", 6, alice.buy, "over the limit of 10 shares"),
+                ("GOOGL", 2, alice.buy, "over the limit of 5,000.00"),
+                ("tsla", 1, alice.sell, "Insufficient shares"),
+            ]:
+                with pytest.raises(ValueError, match=reason):
+                    side(symbol, quantity)
+            risk.set_limits("alice", RiskLimits())
+            with pytest.raises(ValueError, match="Insufficient funds"):
+                alice.buy("GOOGL", 4)
+        # No round trips at all
+        assert profiler.snapshot()["statements"] == {}
+        assert (risk.stats.rejected, risk.stats.loads) == (4, 1)
+        assert alice.list_transactions(limit=1)[0]["balance_after"] == balance
+
+
+def test_daily_loss_limit_survives_a_restart(temp_db):
+    alice = Account.create_account("alice", 10000.0, db_path=temp_db)
+    limits = RiskLimits(max_daily_loss=100.0)
+    with RiskCache(temp_db, limits):
+        alice.buy("AAPL", 10, price=175.0)
+        alice.sell("AAPL", 4, price=150.0)
+        with pytest.raises(ValueError, match="Daily loss"):
+            alice.buy("AAPL", 1)
+        # Sells still reduce risk
+        alice.sell("AAPL", 1, price=175.0)
+    with RiskCache(temp_db, limits):
+        with pytest.raises(ValueError, match="Daily loss"):
+            alice.buy("AAPL", 1)
+    row = alice._execute("SELECT day_realized FROM users WHERE username = ?", ("alice",), fetchone=True)
+    assert row["day_realized"] == pytest.approx(-100.0)
+
+
+def test_cache_stays_coherent_through_versions(tmp_path):
+    db_path = str(tmp_path / "accounts.db")
+    alice = Account.create_account("alice", 1000.0, db_path=db_path)
+    risk = RiskCache(db_path, max_age=3600).install()
+    alice.buy("AAPL", 2)
+    alice.deposit(500.0)
+    alice.sell("AAPL", 1)
+    entry = risk.entries["alice"]
+    assert (entry.balance, entry.positions, risk.stats.loads, risk.stats.stale) == (1325.0, {"AAPL": 1}, 1, 0)
+
+    # A rolled-back trade leaves the cache ahead of the database until the
+    # version check on the next order catches it
+    conn = sqlite3.connect(db_path)
+    conn.execute("BEGIN")
+    Account("alice", db_path, conn=conn).buy("AAPL", 1)
+    conn.rollback()
+    conn.close()
+    assert risk.entries["alice"].positions == {"AAPL": 2}
+    with pytest.raises(ValueError, match="Insufficient shares"):
+        alice.sell("AAPL", 2)
+    assert risk.stats.stale == 1 and risk.entries["alice"].positions == {"AAPL": 1}
+
+    # A deposit made without the cache: the feed drops the stale entry
+    with ChangeFeed(db_path) as feed:
+        risk.follow(feed)
+        risk.uninstall()
+        alice.deposit(10000.0)
+        risk.install()
+        # Published, and so dropped, as soon as it committed
+        assert "alice" not in risk.entries
+    alice.buy("TSLA", 10)
+    assert risk.entries["alice"].positions == {"AAPL": 1, "TSLA": 10}
+    risk.uninstall()
@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+from accounts import Account
+
+# The schema before symbols had ids
+LEGACY_SCHEMA = """
+CREATE TABLE users (username TEXT PRIMARY KEY, balance REAL NOT NULL, total_deposit REAL NOT NULL,
+                    cost_tracked INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE holdings (username TEXT, symbol TEXT, quantity INTEGER, fifo_cost REAL NOT NULL DEFAULT 0,
+                       average_cost REAL NOT NULL DEFAULT 0, PRIMARY KEY (username, symbol));
+CREATE TABLE lots (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, symbol TEXT NOT NULL,
+                   quantity INTEGER NOT NULL, remaining INTEGER NOT NULL, price REAL NOT NULL,
+                   opened_at REAL NOT NULL);
+CREATE INDEX lots_open ON lots (username, symbol, id) WHERE remaining > 0;
+CREATE TABLE realized (username TEXT, symbol TEXT, quantity INTEGER NOT NULL DEFAULT 0,
+                       fifo REAL NOT NULL DEFAULT 0, average REAL NOT NULL DEFAULT 0,
+                       PRIMARY KEY (username, symbol));
+CREATE TABLE transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, timestamp REAL NOT NULL,
+                           type TEXT NOT NULL, symbol TEXT, quantity REAL, price REAL, amount REAL,
+                           balance_after REAL NOT NULL);
+INSERT INTO users VALUES ('alice', 9475.0, 10000.0, 1);
+INSERT INTO transactions VALUES (1, 'alice', 1.0, 'deposit', NULL, 10000.0, NULL, 10000.0, 10000.0);
+INSERT INTO transactions VALUES (2, 'alice', 2.0, 'buy', 'aapl', 2, 175.0, -350.0, 9650.0);
+INSERT INTO transactions VALUES (3, 'alice', 3.0, 'buy', 'AAPL', 1, 175.0, -175.0, 9475.0);
+INSERT INTO holdings VALUES ('alice', 'aapl', 2, 350.0, 350.0);
+INSERT INTO holdings VALUES ('alice', 'AAPL', 1, 175.0, 175.0);
+INSERT INTO lots VALUES (1, 'alice', 'aapl', 2, 2, 175.0, 2.0);
+INSERT INTO lots VALUES (2, 'alice', 'AAPL', 1, 1, 175.0, 3.0);
+"""
+
+
+def test_symbol_case_does_not_split_positions(temp_db):
+    acct = Account.create_account("alice", 10000.0, db_path=temp_db)
+    acct.buy("aapl", 2)
+    acct.buy(" AAPL", 1)
+    acct.sell("Aapl", 1)
+    assert acct.get_holdings() == {"AAPL": 2}
+    assert [tx["symbol"] for tx in acct.list_transactions()] == ["AAPL", "AAPL", "AAPL", None]
+    # The ledger and positions hold the id, not the name
+    symbols = acct._execute("SELECT id, symbol FROM symbols", fetchall=True)
+    assert [row["symbol"] for row in symbols] == ["AAPL"]
+    row = acct._execute("SELECT symbol_id FROM transactions WHERE type = 'buy' LIMIT 1", fetchone=True)
+    assert row["symbol_id"] == symbols[0]["id"]
+    # A sell of a symbol never bought is refused without adding it
+    with pytest.raises(ValueError, match="Insufficient shares"):
+        acct.sell("tsla", 1)
+    assert len(acct._execute("SELECT id FROM symbols", fetchall=True)) == 1
+
+
+def test_legacy_text_symbols_are_migrated_and_merged(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+
+    acct = Account("alice", db_path=db_path)
+    assert acct.get_holdings() == {"AAPL": 3}
+    pl = acct.get_profit_loss_by_symbol()["AAPL"]
+    assert (pl["quantity"], pl["cost_basis"]) == (3, 525.0)
+    assert [tx["id"] for tx in acct.list_transactions()] == [3, 2, 1]
+    assert acct.get_holdings_at(2.5) == {"AAPL": 2}
+    # New rows continue the ledger's sequence and sell the merged lots oldest first
+    acct.sell("AAPL", 3)
+    assert acct.list_transactions(limit=1)[0]["id"] == 4
+    lots = acct._execute("SELECT id, remaining FROM lots ORDER BY id", fetchall=True)
+    assert [tuple(lot) for lot in lots] == [(1, 0), (2, 0)]
+    with sqlite3.connect(db_path) as conn:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(transactions)")}
+    assert "symbol_id" in columns and "symbol" not in columns
+
+
+def test_rolled_back_symbol_ids_are_not_cached(tmp_path):
+    db_path = str(tmp_path / "accounts.db")
+    Account.create_account("alice", 10000.0, db_path=db_path)
+    conn = sqlite3.connect(db_path)
+    acct = Account("alice", db_path, conn=conn)
+    conn.execute("BEGIN")
+    acct.buy("TSLA", 1)
+    conn.rollback()
+    acct.buy("GOOGL", 1)
+    acct.buy("TSLA", 1)
+    assert acct.get_holdings() == {"GOOGL": 1, "TSLA": 1}
+    conn.close()
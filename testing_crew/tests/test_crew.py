@@ -0,0 +1,40 @@
+import os
+
+import yaml
+
+from crew_kit.prompt import PromptAssembler, load_prompt_config
+from crew_kit.ratelimit import RateLimiter, load_limits
+
+from testing_crew import crew as crew_module
+
+
+def test_bundled_config_builds_the_engineering_crew():
+    # Attribute access keeps pytest from collecting a Test*-named crew class
+    crew = crew_module.TestingCrew().crew()
+    assert [t.name for t in crew.tasks] == ["design_task", "code_task", "frontend_task", "test_task"]
+    assert [[u.name for u in t.context] for t in crew.tasks[1:]] == [["design_task"], ["code_task"], ["code_task"]]
+    tools = {a.role.split()[0]: [t.name for t in a.tools] for a in crew.agents}
+    engineer = ["Code Interpreter", "Search Code", "Read Code", "Run Tests"]
+    assert tools == {"Engineering": ["Knowledge Search"], "Python": engineer, "A": ["Search Code", "Read Code"],
+                     "An": engineer}
+    # The engineers run code in the sandbox pool instead of Docker
+    assert not any(agent.allow_code_execution for agent in crew.agents)
+    engineers = [a for a in crew.agents if a.max_execution_time]
+    assert len(engineers) == 2
+    assert all(a.max_execution_time == 500 and a.max_retry_limit == 3 for a in engineers)
+    assert crew.agents[0].tools[0].index is crew_module.TestingCrew.knowledge_index
+    assert crew.agents[2].tools[0].index is crew_module.TestingCrew.code_index
+    assert crew_module.TestingCrew.code_index.root == crew_module.TestingCrew.sandbox_pool.mount
+
+
+def test_shipped_config_sends_requirements_through_tasks_only():
+    PromptAssembler.from_config(load_prompt_config(os.path.join(crew_module.CONFIG_DIR, "prompts.yaml")))
+    with open(os.path.join(crew_module.CONFIG_DIR, "agents.yaml")) as f:
+        agents = yaml.safe_load(f)
+    assert not any("{requirements}" in str(agent) for agent in agents.values())
+
+
+def test_shipped_config_has_a_lane_per_agent():
+    limiter = RateLimiter.from_config(load_limits(os.path.join(crew_module.CONFIG_DIR, "limits.yaml")))
+    assert set(limiter.lanes) == {"engineering_lead", "backend_engineer", "frontend_engineer", "test_engineer"}
+    assert limiter.capacity == {"requests": 500, "tokens": 30000}